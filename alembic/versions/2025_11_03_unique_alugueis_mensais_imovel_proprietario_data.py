@@ -0,0 +1,42 @@
+"""unique alugueis_mensais (id_imovel, id_proprietario, data_referencia)
+
+Revision ID: uq_alugueis_mensais_chave
+Revises: bfe0965c6ad1, add_indexes_permissions_alugueis
+Create Date: 2025-11-03 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'uq_alugueis_mensais_chave'
+down_revision: Union[str, Sequence[str], None] = ('bfe0965c6ad1', 'add_indexes_permissions_alugueis')
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Remover duplicatas antes de criar a restrição, mantendo o registro mais recente
+    op.execute(
+        """
+        DELETE FROM alugueis_mensais
+        WHERE id NOT IN (
+            SELECT MAX(id) FROM alugueis_mensais
+            GROUP BY id_imovel, id_proprietario, data_referencia
+        )
+        """
+    )
+    # Chave natural usada pelo upsert em massa da importação (ON CONFLICT)
+    op.create_index(
+        'uq_alugueis_mensais_imovel_proprietario_data',
+        'alugueis_mensais',
+        ['id_imovel', 'id_proprietario', 'data_referencia'],
+        unique=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('uq_alugueis_mensais_imovel_proprietario_data', table_name='alugueis_mensais')
@@ -0,0 +1,47 @@
+"""importacao_checkpoints: commits em lotes e retomada de importações
+
+Revision ID: importacao_checkpoints
+Revises: uq_alugueis_mensais_chave
+Create Date: 2025-11-05 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'importacao_checkpoints'
+down_revision: Union[str, None] = 'uq_alugueis_mensais_chave'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('importacao_checkpoints',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('tipo', sa.String(length=30), nullable=False),
+        sa.Column('hash_arquivo', sa.String(length=64), nullable=False),
+        sa.Column('nome_arquivo', sa.String(length=255), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('planilha_indice', sa.Integer(), nullable=False),
+        sa.Column('planilha', sa.String(length=255), nullable=True),
+        sa.Column('linha', sa.Integer(), nullable=False),
+        sa.Column('registros_gravados', sa.Integer(), nullable=False),
+        sa.Column('lotes_gravados', sa.Integer(), nullable=False),
+        sa.Column('erros', sa.Text(), nullable=True),
+        sa.Column('mensagem', sa.Text(), nullable=True),
+        sa.Column('id_usuario', sa.Integer(), nullable=True),
+        sa.Column('criado_em', sa.TIMESTAMP(), server_default=sa.text('now()'), nullable=True),
+        sa.Column('atualizado_em', sa.TIMESTAMP(), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_importacao_checkpoints_id'), 'importacao_checkpoints', ['id'], unique=False)
+    op.create_index('ix_importacao_checkpoints_tipo_hash', 'importacao_checkpoints', ['tipo', 'hash_arquivo'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_importacao_checkpoints_tipo_hash', table_name='importacao_checkpoints')
+    op.drop_index(op.f('ix_importacao_checkpoints_id'), table_name='importacao_checkpoints')
+    op.drop_table('importacao_checkpoints')
@@ -0,0 +1,41 @@
+"""importacao_hashes: deduplicação de uploads repetidos
+
+Revision ID: importacao_hashes
+Revises: importacao_checkpoints
+Create Date: 2025-11-06 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'importacao_hashes'
+down_revision: Union[str, None] = 'importacao_checkpoints'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('importacao_hashes',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('tipo', sa.String(length=30), nullable=False),
+        sa.Column('escopo', sa.String(length=20), nullable=False),
+        sa.Column('chave', sa.String(length=255), nullable=False),
+        sa.Column('hash', sa.String(length=64), nullable=False),
+        sa.Column('detalhes', sa.Text(), nullable=True),
+        sa.Column('registros', sa.Integer(), nullable=False),
+        sa.Column('criado_em', sa.TIMESTAMP(), server_default=sa.text('now()'), nullable=True),
+        sa.Column('atualizado_em', sa.TIMESTAMP(), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_importacao_hashes_id'), 'importacao_hashes', ['id'], unique=False)
+    op.create_index('uq_importacao_hashes_tipo_escopo_chave', 'importacao_hashes', ['tipo', 'escopo', 'chave'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('uq_importacao_hashes_tipo_escopo_chave', table_name='importacao_hashes')
+    op.drop_index(op.f('ix_importacao_hashes_id'), table_name='importacao_hashes')
+    op.drop_table('importacao_hashes')
@@ -0,0 +1,45 @@
+"""nomes_trgm: índices de trigramas (pg_trgm) para busca aproximada de nomes
+
+Revision ID: nomes_trgm
+Revises: importacao_hashes
+Create Date: 2025-11-07 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'nomes_trgm'
+down_revision: Union[str, None] = 'importacao_hashes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (índice, tabela, coluna): atendem ILIKE '%termo%' e os operadores de similaridade
+INDICES = (
+    ('ix_usuarios_nome_trgm', 'usuarios', 'nome'),
+    ('ix_imoveis_nome_trgm', 'imoveis', 'nome'),
+    ('ix_imoveis_endereco_trgm', 'imoveis', 'endereco'),
+)
+
+
+def upgrade() -> None:
+    # Apenas PostgreSQL; no SQLite a busca usa o índice de trigramas em memória
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for nome, tabela, coluna in INDICES:
+        op.create_index(
+            nome, tabela, [coluna],
+            postgresql_using='gin',
+            postgresql_ops={coluna: 'gin_trgm_ops'}
+        )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for nome, tabela, _coluna in reversed(INDICES):
+        op.drop_index(nome, table_name=tabela)
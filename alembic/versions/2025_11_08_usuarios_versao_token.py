@@ -0,0 +1,26 @@
+"""usuarios_versao_token: versão dos tokens de acesso de cada usuário
+
+Revision ID: usuarios_versao_token
+Revises: nomes_trgm
+Create Date: 2025-11-08 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'usuarios_versao_token'
+down_revision: Union[str, None] = 'nomes_trgm'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('usuarios', sa.Column('versao_token', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('usuarios', 'versao_token')
@@ -0,0 +1,66 @@
+"""receitas_mensais_resumo: totais de alugueis_mensais por mês, imóvel e proprietário
+
+Revision ID: receitas_mensais_resumo
+Revises: usuarios_versao_token
+Create Date: 2025-11-09 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'receitas_mensais_resumo'
+down_revision: Union[str, None] = 'usuarios_versao_token'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Primeiro dia do mês de data_referencia, por dialeto
+INICIO_MES = {
+    'postgresql': "date_trunc('month', data_referencia)::date",
+    'sqlite': "date(data_referencia, 'start of month')",
+}
+
+
+def upgrade() -> None:
+    op.create_table(
+        'receitas_mensais_resumo',
+        sa.Column('mes', sa.Date(), nullable=False),
+        sa.Column('id_imovel', sa.Integer(), nullable=False),
+        sa.Column('id_proprietario', sa.Integer(), nullable=False),
+        sa.Column('quantidade', sa.Integer(), nullable=False),
+        sa.Column('valor_total', sa.Numeric(14, 2), nullable=False),
+        sa.Column('valor_proprietario', sa.Numeric(14, 2), nullable=False),
+        sa.Column('taxa_administracao', sa.Numeric(14, 2), nullable=False),
+        sa.Column('valor_total_imovel', sa.Numeric(12, 2), nullable=False),
+        sa.Column('atualizado_em', sa.TIMESTAMP(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True),
+        sa.ForeignKeyConstraint(['id_imovel'], ['imoveis.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['id_proprietario'], ['usuarios.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('mes', 'id_imovel', 'id_proprietario')
+    )
+    op.create_index('ix_receitas_mensais_resumo_proprietario_mes', 'receitas_mensais_resumo', ['id_proprietario', 'mes'])
+    op.create_index('ix_receitas_mensais_resumo_imovel_mes', 'receitas_mensais_resumo', ['id_imovel', 'mes'])
+
+    # Carga inicial; em outros bancos use scripts/reconstruir_resumo_receitas.py
+    inicio_mes = INICIO_MES.get(op.get_bind().dialect.name)
+    if inicio_mes is None:
+        return
+    op.execute(f"""
+        INSERT INTO receitas_mensais_resumo (
+            mes, id_imovel, id_proprietario, quantidade, valor_total,
+            valor_proprietario, taxa_administracao, valor_total_imovel
+        )
+        SELECT {inicio_mes}, id_imovel, id_proprietario, count(*), sum(valor_total),
+               sum(valor_proprietario), coalesce(sum(taxa_administracao), 0), max(valor_total)
+        FROM alugueis_mensais
+        GROUP BY {inicio_mes}, id_imovel, id_proprietario
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_receitas_mensais_resumo_imovel_mes', table_name='receitas_mensais_resumo')
+    op.drop_index('ix_receitas_mensais_resumo_proprietario_mes', table_name='receitas_mensais_resumo')
+    op.drop_table('receitas_mensais_resumo')
@@ -0,0 +1,42 @@
+"""indices_alugueis_mensais: índices compostos para as consultas de alugueis_mensais
+
+Revision ID: indices_alugueis_mensais
+Revises: receitas_mensais_resumo
+Create Date: 2025-11-10 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'indices_alugueis_mensais'
+down_revision: Union[str, None] = 'receitas_mensais_resumo'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Período agrupado por imóvel/proprietário: dashboard, resumo de receitas e relatórios
+    op.create_index(
+        'ix_alugueis_mensais_data_imovel_proprietario', 'alugueis_mensais',
+        ['data_referencia', 'id_imovel', 'id_proprietario'],
+        postgresql_include=['valor_total', 'valor_proprietario', 'taxa_administracao']
+    )
+    # Registros de um proprietário por período (filtros e permissões por proprietário)
+    op.create_index('ix_alugueis_mensais_proprietario_data', 'alugueis_mensais', ['id_proprietario', 'data_referencia'])
+    # Aluguéis recentes do dashboard (ORDER BY criado_em DESC LIMIT n)
+    op.create_index('ix_alugueis_mensais_criado_em', 'alugueis_mensais', ['criado_em'])
+
+    # Índices de uma coluna cobertos pelos compostos acima (mesmo prefixo)
+    op.drop_index('ix_alugueis_mensais_data_referencia', table_name='alugueis_mensais')
+    op.drop_index('ix_alugueis_mensais_id_proprietario', table_name='alugueis_mensais')
+
+
+def downgrade() -> None:
+    op.create_index('ix_alugueis_mensais_id_proprietario', 'alugueis_mensais', ['id_proprietario'])
+    op.create_index('ix_alugueis_mensais_data_referencia', 'alugueis_mensais', ['data_referencia'])
+    op.drop_index('ix_alugueis_mensais_criado_em', table_name='alugueis_mensais')
+    op.drop_index('ix_alugueis_mensais_proprietario_data', table_name='alugueis_mensais')
+    op.drop_index('ix_alugueis_mensais_data_imovel_proprietario', table_name='alugueis_mensais')
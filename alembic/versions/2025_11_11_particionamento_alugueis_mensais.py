@@ -0,0 +1,50 @@
+"""particionamento_alugueis_mensais: alugueis_mensais particionada por ano (opcional, PostgreSQL)
+
+Revision ID: particionamento_alugueis_mensais
+Revises: indices_alugueis_mensais
+Create Date: 2025-11-11 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+import os
+
+from alembic import op
+
+from app.core.particionamento import Indice, desfazer_particionamento, particionar, tabela_particionada
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'particionamento_alugueis_mensais'
+down_revision: Union[str, None] = 'indices_alugueis_mensais'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Índices de alugueis_mensais nesta revisão (uq_alugueis_mensais_chave
+# e indices_alugueis_mensais), recriados junto com a tabela
+INDICES = (
+    Indice('uq_alugueis_mensais_imovel_proprietario_data', ('id_imovel', 'id_proprietario', 'data_referencia'), unico=True),
+    Indice(
+        'ix_alugueis_mensais_data_imovel_proprietario', ('data_referencia', 'id_imovel', 'id_proprietario'),
+        incluir=('valor_total', 'valor_proprietario', 'taxa_administracao')
+    ),
+    Indice('ix_alugueis_mensais_proprietario_data', ('id_proprietario', 'data_referencia')),
+    Indice('ix_alugueis_mensais_criado_em', ('criado_em',)),
+)
+
+
+def upgrade() -> None:
+    # Apenas PostgreSQL e com PARTICIONAR_ALUGUEIS_MENSAIS ativo; a tabela é recriada e os
+    # registros copiados na mesma transação. Depois, scripts/particionar_alugueis_mensais.py
+    # converte (ou desfaz) sem depender desta migração.
+    conn = op.get_bind()
+    ativo = os.getenv("PARTICIONAR_ALUGUEIS_MENSAIS", "false").lower() in ("1", "true", "sim")
+    if conn.dialect.name != 'postgresql' or not ativo:
+        return
+    if not tabela_particionada(conn):
+        particionar(conn, INDICES)
+
+
+def downgrade() -> None:
+    conn = op.get_bind()
+    if tabela_particionada(conn):
+        desfazer_particionamento(conn, INDICES)
@@ -1,36 +1,79 @@
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import List, Optional
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status, Request
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy import or_
+from app.core.cache import CacheTTL
 from app.core.config import settings
-from app.core.database import get_db
+from app.core.database import get_async_db, get_db
+from app.core.permissions import ConjuntoProprietarios, permissoes_usuario
 from app.models.usuario import Usuario
+from app.services.hash_senhas import cache_credenciais, pwd_context, servico_hash_senhas, verificar_senha
 
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
-def verify_password(plain_password, hashed_password):
-    """Verifica a senha com tratamento de hashes desconhecidos.
 
-    Retorna False em vez de lançar se o hash não for identificado pelo passlib,
-    evitando erros 500 quando existirem valores antigos ou inválidos no banco.
+@dataclass(frozen=True)
+class UsuarioAutenticado:
     """
-    if not hashed_password:
-        return False
-    try:
-        return pwd_context.verify(plain_password, hashed_password)
-    except Exception as e:
-        # Qualquer erro na verificação (incluindo UnknownHashError) — falhar de forma segura
-        print(f"Aviso: Erro na verificação de senha: {e}")
-        return False
+    Dados do usuário autenticado, sem vínculo com a sessão do banco.
+
+    Montado a partir do Usuario na primeira requisição de um token e reaproveitado pelo
+    cache enquanto (id, versao_token) não mudar; proprietarios_permitidos é
+    TODOS_PROPRIETARIOS para administradores.
+    """
+    id: int
+    username: str
+    nome: str
+    tipo: str
+    email: str
+    telefone: Optional[str]
+    ativo: bool
+    versao_token: int
+    proprietarios_permitidos: ConjuntoProprietarios
+
+    @property
+    def papel(self):
+        return self.tipo
+
+
+cache_usuarios_autenticados = CacheTTL(settings.cache_usuarios_tamanho, settings.cache_usuarios_ttl)
+
+
+def carregar_usuario_autenticado(user: Usuario, db: Session) -> UsuarioAutenticado:
+    return UsuarioAutenticado(
+        id=user.id,
+        username=user.username,
+        nome=user.nome,
+        tipo=user.tipo,
+        email=user.email,
+        telefone=user.telefone,
+        ativo=bool(user.ativo) if user.ativo is not None else True,
+        versao_token=user.versao_token or 1,
+        proprietarios_permitidos=permissoes_usuario(user, db).visualizar
+    )
+
+
+def invalidar_usuario_autenticado(id_usuario: int):
+    """Descarta os dados em cache do usuário (chamado quando o usuário ou suas permissões mudam)"""
+    cache_usuarios_autenticados.remover_se(lambda chave, _valor: chave[0] == id_usuario)
+
+
+def verify_password(plain_password, hashed_password):
+    """Verifica a senha no processo atual (ver verificar_senha em app.services.hash_senhas)"""
+    return verificar_senha(plain_password, hashed_password)
 
 def get_password_hash(password):
     return pwd_context.hash(password)
 
+def get_password_hashes(passwords: List[str]) -> List[str]:
+    """Gera vários hashes no pool de processos, na ordem recebida (cada um com seu próprio salt)"""
+    return servico_hash_senhas.gerar_hashes_sync(passwords)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -41,26 +84,34 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
     return encoded_jwt
 
-def authenticate_user(db: Session, username: str, password: str):
+def dados_token(user) -> dict:
+    """Claims do token: username, id e versão do token (que permite revogá-lo)"""
+    return {"sub": user.username, "uid": user.id, "ver": user.versao_token or 1}
+
+async def authenticate_user(db: Session, username: str, password: str):
     # Permitir que o usuário informe username, email ou nome de exibição
     user = db.query(Usuario).filter(
         or_(Usuario.username == username, Usuario.email == username, Usuario.nome == username)
     ).first()
     if not user:
         return False
-    if not verify_password(password, user.hashed_password):
+    # Logins repetidos com a mesma senha dispensam o PBKDF2 enquanto durar o cache
+    if cache_credenciais.verificada(user.id, user.hashed_password, password):
+        return user
+    # A verificação roda no pool de processos, sem bloquear o event loop
+    if not await servico_hash_senhas.verificar(password, user.hashed_password):
         return False
+    cache_credenciais.registrar(user.id, user.hashed_password, password)
     return user
 
-from typing import Optional
-
-
-def get_current_user(db: Session = Depends(get_db), request: Request = None, token: Optional[str] = None):
-    credentials_exception = HTTPException(
+def _credenciais_invalidas() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+def _token_da_requisicao(request: Optional[Request], token: Optional[str] = None) -> str:
     # Tentar obter token do header Authorization manualmente
     if request is not None and not token:
         auth_header = request.headers.get('Authorization')
@@ -71,25 +122,69 @@ def get_current_user(db: Session = Depends(get_db), request: Request = None, tok
     if not token and request is not None:
         token = request.cookies.get('access_token')
 
+    if not token:
+        raise _credenciais_invalidas()
+    return token
+
+def usuario_do_token(db: Session, token: str) -> UsuarioAutenticado:
+    """
+    Usuário autenticado do token
+
+    Tokens com uid/ver são resolvidos pelo cache sem nenhuma consulta; no primeiro uso (ou
+    após uma invalidação) o usuário e suas permissões são carregados e o token é recusado
+    se a versão gravada no usuário já for outra.
+    """
+    credentials_exception = _credenciais_invalidas()
     try:
-        if not token:
-            raise credentials_exception
         payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
         username: str = payload.get("sub")
         if username is None:
             raise credentials_exception
     except JWTError:
         raise credentials_exception
-    user = db.query(Usuario).filter(Usuario.username == username).first()
-    if user is None:
-        raise credentials_exception
-    return user
+
+    id_usuario, versao = payload.get("uid"), payload.get("ver")
+    if id_usuario is not None and versao is not None:
+        usuario_autenticado = cache_usuarios_autenticados.obter((id_usuario, versao))
+        if usuario_autenticado is not None:
+            return usuario_autenticado
+        user = db.query(Usuario).filter(Usuario.id == id_usuario).first()
+        if user is None or (user.versao_token or 1) != versao:
+            raise credentials_exception
+    else:
+        # Tokens emitidos antes de uid/ver: busca pelo username
+        user = db.query(Usuario).filter(Usuario.username == username).first()
+        if user is None:
+            raise credentials_exception
+        usuario_autenticado = cache_usuarios_autenticados.obter((user.id, user.versao_token or 1))
+        if usuario_autenticado is not None:
+            return usuario_autenticado
+
+    usuario_autenticado = carregar_usuario_autenticado(user, db)
+    cache_usuarios_autenticados.definir((user.id, usuario_autenticado.versao_token), usuario_autenticado)
+    return usuario_autenticado
+
+def get_current_user(db: Session = Depends(get_db), request: Request = None, token: Optional[str] = None):
+    """Usuário do token (header Authorization ou cookie access_token); ver usuario_do_token"""
+    return usuario_do_token(db, _token_da_requisicao(request, token))
+
+async def get_current_user_async(request: Request, db: AsyncSession = Depends(get_async_db)):
+    """
+    Como get_current_user, para as rotas assíncronas (sessão de get_async_db, compartilhada
+    com a rota); com o usuário em cache, não usa o banco nem o threadpool
+    """
+    return await db.run_sync(usuario_do_token, _token_da_requisicao(request))
 
 def get_current_active_user(current_user: Usuario = Depends(get_current_user)):
     if not current_user.ativo:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
 
+async def get_current_active_user_async(current_user: Usuario = Depends(get_current_user_async)):
+    if not current_user.ativo:
+        raise HTTPException(status_code=400, detail="Inactive user")
+    return current_user
+
 def refresh_access_token(token: str):
     """Verifica se o token precisa ser renovado e retorna um novo se necessário"""
     try:
@@ -101,10 +196,11 @@ def refresh_access_token(token: str):
         if exp - now < 30 * 60:
             username = payload.get("sub")
             if username:
-                # Criar novo token
+                # Criar novo token (mantendo id e versão do token original)
                 access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
                 new_token = create_access_token(
-                    data={"sub": username}, expires_delta=access_token_expires
+                    data={k: payload[k] for k in ("sub", "uid", "ver") if k in payload},
+                    expires_delta=access_token_expires
                 )
                 return new_token
     except JWTError:
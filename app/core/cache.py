@@ -0,0 +1,85 @@
+"""
+Cache em memória com validade (TTL) e tamanho limitado (LRU)
+Usado pelos caches de autenticação; cada processo do servidor mantém o seu
+"""
+from typing import Any, Callable, Dict, Hashable, Optional
+from collections import OrderedDict
+import threading
+import time
+
+
+class CacheTTL:
+    """
+    Dicionário LRU thread-safe cujas entradas expiram após `ttl` segundos.
+
+    Ao atingir `tamanho`, a entrada usada há mais tempo é descartada. ttl ou tamanho
+    iguais a 0 desativam o cache (toda consulta é um miss).
+    """
+
+    def __init__(self, tamanho: int, ttl: float, relogio: Callable[[], float] = time.monotonic):
+        self.tamanho = tamanho
+        self.ttl = ttl
+        self._relogio = relogio
+        self._entradas: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+        self.descartes = 0
+
+    @property
+    def ativo(self) -> bool:
+        return self.tamanho > 0 and self.ttl > 0
+
+    def obter(self, chave: Hashable, padrao: Any = None) -> Any:
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is None:
+                self.falhas += 1
+                return padrao
+            valor, expira_em = entrada
+            if expira_em <= self._relogio():
+                del self._entradas[chave]
+                self.falhas += 1
+                return padrao
+            self._entradas.move_to_end(chave)
+            self.acertos += 1
+            return valor
+
+    def definir(self, chave: Hashable, valor: Any):
+        if not self.ativo:
+            return
+        with self._lock:
+            self._entradas[chave] = (valor, self._relogio() + self.ttl)
+            self._entradas.move_to_end(chave)
+            while len(self._entradas) > self.tamanho:
+                self._entradas.popitem(last=False)
+                self.descartes += 1
+
+    def remover(self, chave: Hashable):
+        with self._lock:
+            self._entradas.pop(chave, None)
+
+    def remover_se(self, condicao: Callable[[Hashable, Any], bool]) -> int:
+        """Remove as entradas para as quais condicao(chave, valor) é verdadeira"""
+        with self._lock:
+            chaves = [c for c, (v, _expira) in self._entradas.items() if condicao(c, v)]
+            for chave in chaves:
+                del self._entradas[chave]
+            return len(chaves)
+
+    def limpar(self):
+        with self._lock:
+            self._entradas.clear()
+
+    def metricas(self) -> Dict[str, Optional[float]]:
+        with self._lock:
+            consultas = self.acertos + self.falhas
+            return {
+                'entradas': len(self._entradas),
+                'tamanho': self.tamanho,
+                'ttl_segundos': self.ttl,
+                'acertos': self.acertos,
+                'falhas': self.falhas,
+                'descartes': self.descartes,
+                'taxa_acerto': round(self.acertos / consultas, 4) if consultas else None,
+            }
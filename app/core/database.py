@@ -1,11 +1,217 @@
-from sqlalchemy import create_engine
+"""
+Engine e sessões do banco
+
+O pool de conexões é configurado por Settings (DB_POOL_SIZE, DB_MAX_OVERFLOW,
+DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_POOL_PRE_PING, DB_STATEMENT_TIMEOUT). Com
+DB_POOLER_EXTERNO (pgbouncer) a aplicação não mantém conexões abertas (NullPool). No
+SQLite a conexão pode passar entre threads (as dependências e as rotas síncronas rodam no
+threadpool) e o banco usa WAL, que permite leituras durante uma escrita.
+
+Ao lado da engine síncrona (get_db) há uma engine assíncrona no mesmo banco, com asyncpg ou
+aiosqlite e as mesmas configurações de pool (get_async_db), usada pelas rotas de leitura de
+maior tráfego. Essas rotas rodam no event loop, sem ocupar uma thread do threadpool por
+requisição; as consultas dos serviços continuam escritas para Session e são executadas com
+AsyncSession.run_sync.
+"""
+from collections import deque
+from typing import Any, Dict
+import threading
+import time
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as TimeoutPool
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
 from app.core.config import settings
+from app.core.metricas import estatisticas_latencia
+
+
+class MetricasPool:
+    """Checkouts, tempo de espera por uma conexão e esgotamentos do pool (ver /api/admin/metricas)"""
+
+    def __init__(self, tamanho: int = 1000):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.conexoes_criadas = 0
+        self.conexoes_invalidadas = 0
+        self.pico_em_uso = 0
+        self.espera = deque(maxlen=tamanho)
+
+    def registrar_checkout(self, segundos: float, em_uso: int):
+        with self._lock:
+            self.checkouts += 1
+            self.espera.append(segundos)
+            self.pico_em_uso = max(self.pico_em_uso, em_uso)
+
+    def registrar_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def registrar_conexao(self):
+        with self._lock:
+            self.conexoes_criadas += 1
+
+    def registrar_invalidacao(self):
+        with self._lock:
+            self.conexoes_invalidadas += 1
+
+    def resumo(self, pool) -> Dict[str, Any]:
+        estado = {'pool': type(pool).__name__}
+        if isinstance(pool, QueuePool):
+            estado.update({
+                'tamanho': pool.size(),
+                'em_uso': pool.checkedout(),
+                'ociosas': pool.checkedin(),
+                'overflow': max(0, pool.overflow()),
+            })
+        with self._lock:
+            estado.update({
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'conexoes_criadas': self.conexoes_criadas,
+                'conexoes_invalidadas': self.conexoes_invalidadas,
+                'pico_em_uso': self.pico_em_uso,
+                'espera': estatisticas_latencia(self.espera),
+            })
+        return estado
+
+
+metricas_pool = MetricasPool()
+metricas_pool_assincrono = MetricasPool()
+
+
+class _PoolMedido:
+    """Mede o checkout (fila do pool, pre-ping e abertura de conexão) em `metricas`"""
+    metricas = metricas_pool
+
+    def connect(self):
+        inicio = time.perf_counter()
+        try:
+            conexao = super().connect()
+        except TimeoutPool:
+            self.metricas.registrar_timeout()
+            raise
+        self.metricas.registrar_checkout(
+            time.perf_counter() - inicio, self.checkedout() if isinstance(self, QueuePool) else 0
+        )
+        return conexao
+
+
+class QueuePoolMedido(_PoolMedido, QueuePool):
+    pass
+
+
+class NullPoolMedido(_PoolMedido, NullPool):
+    pass
+
+
+class AsyncQueuePoolMedido(_PoolMedido, AsyncAdaptedQueuePool):
+    metricas = metricas_pool_assincrono
 
-engine = create_engine(settings.database_url)
+
+class AsyncNullPoolMedido(_PoolMedido, NullPool):
+    metricas = metricas_pool_assincrono
+
+
+# Driver assíncrono de cada banco (ver criar_engine_assincrona)
+DRIVERS_ASSINCRONOS = {'postgresql': 'asyncpg', 'sqlite': 'aiosqlite'}
+
+
+def _pragmas_sqlite(conexao_dbapi, _registro):
+    cursor = conexao_dbapi.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")  # Seguro com WAL; só o último commit pode se perder em queda de energia
+    cursor.close()
+
+
+def _opcoes_engine(url, assincrona: bool = False) -> Dict[str, Any]:
+    backend = url.get_backend_name()
+    sqlite = backend == 'sqlite'
+    em_memoria = sqlite and url.database in (None, '', ':memory:')
+    fila = AsyncQueuePoolMedido if assincrona else QueuePoolMedido
+    opcoes: Dict[str, Any] = {}
+
+    if sqlite:
+        opcoes['connect_args'] = {'check_same_thread': False, 'timeout': settings.db_sqlite_busy_timeout}
+        if not em_memoria:
+            # Conexões locais: sem reciclagem nem pre-ping
+            opcoes.update(
+                poolclass=fila,
+                pool_size=settings.db_pool_size,
+                max_overflow=settings.db_max_overflow,
+                pool_timeout=settings.db_pool_timeout,
+            )
+    elif settings.db_pooler_externo:
+        # O pgbouncer (modo transação) mantém o pool; SETs de sessão não são repassados com
+        # segurança, então o statement_timeout deve ser configurado no usuário do banco
+        opcoes.update(poolclass=AsyncNullPoolMedido if assincrona else NullPoolMedido, pool_pre_ping=False)
+        if assincrona and backend == 'postgresql':
+            # Prepared statements do asyncpg não sobrevivem à troca de conexão do pgbouncer
+            opcoes['connect_args'] = {'statement_cache_size': 0}
+    else:
+        opcoes.update(
+            poolclass=fila,
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+            pool_recycle=settings.db_pool_recycle,
+            pool_pre_ping=settings.db_pool_pre_ping,
+        )
+        if settings.db_statement_timeout and backend == 'postgresql':
+            if assincrona:
+                opcoes['connect_args'] = {'server_settings': {'statement_timeout': str(settings.db_statement_timeout)}}
+            else:
+                opcoes['connect_args'] = {'options': f"-c statement_timeout={settings.db_statement_timeout}"}
+    return opcoes
+
+
+def _registrar_eventos(engine, metricas: MetricasPool):
+    url = engine.url
+    if url.get_backend_name() == 'sqlite' and url.database not in (None, '', ':memory:'):
+        event.listen(engine, 'connect', _pragmas_sqlite)
+    event.listen(engine, 'connect', lambda *_: metricas.registrar_conexao())
+    event.listen(engine, 'invalidate', lambda *_: metricas.registrar_invalidacao())
+
+
+def criar_engine(database_url: str = settings.database_url):
+    engine = create_engine(database_url, **_opcoes_engine(make_url(database_url)))
+    _registrar_eventos(engine, metricas_pool)
+    return engine
+
+
+def url_assincrona(database_url: str):
+    """A mesma URL com o driver assíncrono do banco (postgresql+asyncpg, sqlite+aiosqlite)"""
+    url = make_url(database_url)
+    driver = DRIVERS_ASSINCRONOS.get(url.get_backend_name())
+    if driver is None:
+        raise ValueError(f"Banco sem driver assíncrono suportado: {url.get_backend_name()}")
+    if url.get_backend_name() == 'postgresql' and settings.db_pooler_externo:
+        url = url.update_query_dict({'prepared_statement_cache_size': '0'})
+    return url.set(drivername=f"{url.get_backend_name()}+{driver}")
+
+
+def criar_engine_assincrona(database_url: str = settings.database_url):
+    url = url_assincrona(database_url)
+    try:
+        engine = create_async_engine(url, **_opcoes_engine(url, assincrona=True))
+    except ImportError as e:
+        raise RuntimeError(
+            f"Driver assíncrono {url.get_driver_name()} não instalado; instale as dependências de requirements.txt"
+        ) from e
+    _registrar_eventos(engine.sync_engine, metricas_pool_assincrono)
+    return engine
+
+
+engine = criar_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+engine_assincrona = criar_engine_assincrona()
+AsyncSessionLocal = async_sessionmaker(engine_assincrona, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 def get_db():
@@ -13,4 +219,8 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,21 @@
+"""
+Estatísticas das métricas internas expostas em /api/admin/metricas
+"""
+from typing import Dict, Iterable, Optional
+
+
+def estatisticas_latencia(valores: Iterable[float]) -> Dict[str, Optional[float]]:
+    """Média, p50, p95 e máximo (em milissegundos) de medições em segundos"""
+    ordenados = sorted(valores)
+    if not ordenados:
+        return {'media_ms': None, 'p50_ms': None, 'p95_ms': None, 'max_ms': None}
+
+    def percentil(p):
+        return round(ordenados[min(len(ordenados) - 1, int(p * len(ordenados)))] * 1000, 3)
+
+    return {
+        'media_ms': round(sum(ordenados) / len(ordenados) * 1000, 3),
+        'p50_ms': percentil(0.50),
+        'p95_ms': percentil(0.95),
+        'max_ms': round(ordenados[-1] * 1000, 3),
+    }
@@ -0,0 +1,163 @@
+"""
+Particionamento opcional de alugueis_mensais por ano de data_referencia (PostgreSQL)
+
+Com PARTICIONAR_ALUGUEIS_MENSAIS ativo, a migração particionamento_alugueis_mensais converte a
+tabela em particionada por intervalo de data_referencia: uma partição por ano
+(alugueis_mensais_AAAA) e a partição padrão (alugueis_mensais_padrao) para datas sem partição.
+As consultas por período (ver app.core.periodo) leem só as partições dos anos envolvidos.
+
+Na inicialização a aplicação cria as partições do ano atual e do seguinte; a partição de um
+ano que já tenha registros na partição padrão é criada com esses registros.
+"""
+import re
+from datetime import date
+from typing import Iterable, List, NamedTuple, Sequence, Set, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+TABELA = "alugueis_mensais"
+PARTICAO_PADRAO = f"{TABELA}_padrao"
+
+
+class Indice(NamedTuple):
+    """Índice recriado junto com a tabela"""
+    nome: str
+    colunas: Tuple[str, ...]
+    unico: bool = False
+    incluir: Tuple[str, ...] = ()  # INCLUDE: colunas guardadas no índice, fora da chave
+
+
+# Índices atuais de alugueis_mensais (os de AluguelMensal, exceto o de id, coberto pela chave
+# primária), usados pelo script. A migração declara os da sua revisão: mudanças no modelo não
+# alteram o que ela recria. tests/test_particionamento.py confere esta lista com o modelo.
+INDICES: Tuple[Indice, ...] = (
+    Indice('uq_alugueis_mensais_imovel_proprietario_data', ('id_imovel', 'id_proprietario', 'data_referencia'), unico=True),
+    Indice(
+        'ix_alugueis_mensais_data_imovel_proprietario', ('data_referencia', 'id_imovel', 'id_proprietario'),
+        incluir=('valor_total', 'valor_proprietario', 'taxa_administracao')
+    ),
+    Indice('ix_alugueis_mensais_proprietario_data', ('id_proprietario', 'data_referencia')),
+    Indice('ix_alugueis_mensais_criado_em', ('criado_em',)),
+)
+
+
+def nome_particao(ano: int) -> str:
+    return f"{TABELA}_{ano}"
+
+
+def tabela_particionada(conn: Connection) -> bool:
+    if conn.dialect.name != 'postgresql':
+        return False
+    return conn.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+        "WHERE c.relname = :tabela AND pg_table_is_visible(c.oid))"
+    ), {'tabela': TABELA}).scalar()
+
+
+def anos_particionados(conn: Connection) -> Set[int]:
+    nomes = conn.execute(text(
+        "SELECT filha.relname FROM pg_inherits h "
+        "JOIN pg_class pai ON pai.oid = h.inhparent "
+        "JOIN pg_class filha ON filha.oid = h.inhrelid "
+        "WHERE pai.relname = :tabela AND pg_table_is_visible(pai.oid)"
+    ), {'tabela': TABELA}).scalars()
+    padrao = re.compile(rf"{TABELA}_(\d{{4}})")
+    return {int(m.group(1)) for m in map(padrao.fullmatch, nomes) if m}
+
+
+def _limites(ano: int) -> str:
+    return f"FROM ('{date(ano, 1, 1)}') TO ('{date(ano + 1, 1, 1)}')"
+
+
+def criar_particao(conn: Connection, ano: int) -> None:
+    """
+    Cria e anexa a partição do ano. Os registros do ano que estiverem na partição padrão são
+    movidos para a nova partição antes do ATTACH, que exige a padrão sem linhas do intervalo.
+    """
+    nome = nome_particao(ano)
+    conn.execute(text(f"CREATE TABLE {nome} (LIKE {TABELA} INCLUDING DEFAULTS)"))
+    conn.execute(text(
+        f"WITH movidos AS ("
+        f"DELETE FROM {PARTICAO_PADRAO} WHERE data_referencia >= :inicio AND data_referencia < :fim RETURNING *"
+        f") INSERT INTO {nome} SELECT * FROM movidos"
+    ), {'inicio': date(ano, 1, 1), 'fim': date(ano + 1, 1, 1)})
+    # Índices, chave primária e chaves estrangeiras da tabela são criados na partição pelo ATTACH
+    conn.execute(text(f"ALTER TABLE {TABELA} ATTACH PARTITION {nome} FOR VALUES {_limites(ano)}"))
+
+
+def garantir_particoes(conn: Connection, anos: Iterable[int]) -> List[int]:
+    """Cria as partições que faltam entre `anos`; sem efeito se a tabela não for particionada"""
+    if not tabela_particionada(conn):
+        return []
+    faltando = sorted(set(anos) - anos_particionados(conn))
+    for ano in faltando:
+        criar_particao(conn, ano)
+    return faltando
+
+
+def _criar_indice(conn: Connection, indice: Indice) -> None:
+    unico = "UNIQUE " if indice.unico else ""
+    incluir = f" INCLUDE ({', '.join(indice.incluir)})" if indice.incluir else ""
+    conn.execute(text(f"CREATE {unico}INDEX {indice.nome} ON {TABELA} ({', '.join(indice.colunas)}){incluir}"))
+
+
+def _recriar_tabela(conn: Connection, particionar: bool, indices: Sequence[Indice]) -> None:
+    """
+    Recria alugueis_mensais (particionada ou comum) com as mesmas colunas e registros e com
+    os `indices`. Na particionada a chave primária inclui data_referencia, exigência do
+    PostgreSQL; os ids continuam vindo da mesma sequência.
+    """
+    antiga = f"{TABELA}_antiga"
+    sequencia = conn.execute(text("SELECT pg_get_serial_sequence(:tabela, 'id')"), {'tabela': TABELA}).scalar()
+
+    # Nomes de índices são únicos no schema: libera os nomes para a nova tabela
+    conn.execute(text(f"ALTER TABLE {TABELA} RENAME TO {antiga}"))
+    conn.execute(text(f"ALTER TABLE {antiga} RENAME CONSTRAINT {TABELA}_pkey TO {antiga}_pkey"))
+    indices = conn.execute(text(
+        "SELECT i.relname FROM pg_index x "
+        "JOIN pg_class i ON i.oid = x.indexrelid JOIN pg_class t ON t.oid = x.indrelid "
+        "WHERE t.relname = :tabela AND pg_table_is_visible(t.oid) AND NOT x.indisprimary"
+    ), {'tabela': antiga}).scalars().all()
+    for indice in indices:
+        conn.execute(text(f"DROP INDEX {indice}"))
+    if sequencia:
+        conn.execute(text(f"ALTER SEQUENCE {sequencia} OWNED BY NONE"))
+
+    chave = "id, data_referencia" if particionar else "id"
+    conn.execute(text(
+        f"CREATE TABLE {TABELA} ("
+        f"LIKE {antiga} INCLUDING DEFAULTS, "
+        f"PRIMARY KEY ({chave}), "
+        f"FOREIGN KEY (id_imovel) REFERENCES imoveis (id) ON DELETE CASCADE, "
+        f"FOREIGN KEY (id_proprietario) REFERENCES usuarios (id) ON DELETE CASCADE"
+        f")" + (" PARTITION BY RANGE (data_referencia)" if particionar else "")
+    ))
+    if particionar:
+        anos = set(conn.execute(text(
+            f"SELECT DISTINCT CAST(extract(year FROM data_referencia) AS integer) FROM {antiga}"
+        )).scalars())
+        hoje = date.today()
+        for ano in sorted(anos | {hoje.year, hoje.year + 1}):
+            conn.execute(text(f"CREATE TABLE {nome_particao(ano)} PARTITION OF {TABELA} FOR VALUES {_limites(ano)}"))
+        conn.execute(text(f"CREATE TABLE {PARTICAO_PADRAO} PARTITION OF {TABELA} DEFAULT"))
+
+    # Na particionada os índices são propagados para as partições
+    for indice in indices:
+        _criar_indice(conn, indice)
+
+    conn.execute(text(f"INSERT INTO {TABELA} SELECT * FROM {antiga}"))
+    conn.execute(text(f"DROP TABLE {antiga}"))
+    if sequencia:
+        conn.execute(text(f"ALTER SEQUENCE {sequencia} OWNED BY {TABELA}.id"))
+    conn.execute(text(f"ANALYZE {TABELA}"))
+
+
+def particionar(conn: Connection, indices: Sequence[Indice] = INDICES) -> None:
+    """Converte alugueis_mensais em tabela particionada por ano (uma transação)"""
+    _recriar_tabela(conn, particionar=True, indices=indices)
+
+
+def desfazer_particionamento(conn: Connection, indices: Sequence[Indice] = INDICES) -> None:
+    """Volta alugueis_mensais a uma tabela comum com todos os registros das partições"""
+    _recriar_tabela(conn, particionar=False, indices=indices)
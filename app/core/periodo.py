@@ -0,0 +1,70 @@
+"""
+Filtros de período sobre colunas de data
+
+(ano, mês), (ano) e (data_inicio, data_fim) viram intervalos semiabertos [inicio, fim),
+comparados direto com a coluna. Ao contrário de extract('year', coluna) == ano, a condição
+aproveita os índices da coluna (ex.: ix_alugueis_mensais_data_referencia).
+"""
+from sqlalchemy import and_, true
+from typing import Optional, Tuple
+from datetime import date, timedelta
+
+
+def inicio_mes(dia: date) -> date:
+    return dia.replace(day=1)
+
+
+def somar_meses(dia: date, meses: int) -> date:
+    """Primeiro dia do mês `meses` meses depois (ou antes, se negativo) do mês de `dia`"""
+    indice = dia.year * 12 + dia.month - 1 + meses
+    return date(indice // 12, indice % 12 + 1, 1)
+
+
+def mes_seguinte(dia: date) -> date:
+    return somar_meses(dia, 1)
+
+
+def intervalo_periodo(
+    ano: Optional[int] = None,
+    mes: Optional[int] = None,
+    data_inicio: Optional[date] = None,
+    data_fim: Optional[date] = None
+) -> Tuple[Optional[date], Optional[date]]:
+    """
+    Intervalo [inicio, fim) do período; None no limite não informado
+
+    ano/mês e datas podem ser combinados (vale a interseção). data_fim é inclusiva, como
+    nos parâmetros dos relatórios. Mês sem ano ou fora de 1-12 gera ValueError.
+    """
+    if mes is not None and ano is None:
+        raise ValueError("Informe o ano junto com o mês")
+    if mes is not None and not 1 <= mes <= 12:
+        raise ValueError("Mês deve estar entre 1 e 12")
+
+    inicio = fim = None
+    if ano is not None:
+        inicio = date(ano, mes or 1, 1)
+        fim = somar_meses(inicio, 1 if mes else 12)
+    if data_inicio is not None:
+        inicio = max(inicio, data_inicio) if inicio else data_inicio
+    if data_fim is not None:
+        fim_data = data_fim + timedelta(days=1)
+        fim = min(fim, fim_data) if fim else fim_data
+    return inicio, fim
+
+
+def filtro_periodo(
+    coluna,
+    ano: Optional[int] = None,
+    mes: Optional[int] = None,
+    data_inicio: Optional[date] = None,
+    data_fim: Optional[date] = None
+):
+    """Condição `coluna` dentro do período (true() se nenhum limite for informado)"""
+    inicio, fim = intervalo_periodo(ano, mes, data_inicio, data_fim)
+    condicoes = []
+    if inicio is not None:
+        condicoes.append(coluna >= inicio)
+    if fim is not None:
+        condicoes.append(coluna < fim)
+    return and_(*condicoes) if condicoes else true()
@@ -1,11 +1,47 @@
 """
 Módulo de controle de acesso e permissões
+
+Os proprietários que cada usuário pode ver/editar são carregados uma vez e mantidos em
+cache (invalidado pelas rotas de permissoes_financeiras); administradores recebem a
+sentinela TODOS_PROPRIETARIOS em vez da lista de todos os ids. Filtros de consulta usam
+EXISTS contra permissoes_financeiras, sem listas literais no IN.
 """
 from fastapi import HTTPException, status
+from sqlalchemy import exists, true
 from sqlalchemy.orm import Session
+from app.core.cache import CacheTTL
+from app.core.config import settings
 from app.models.usuario import Usuario
 from app.models.permissao_financeira import PermissaoFinanceira
-from typing import List, Optional
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Union
+
+
+class _TodosProprietarios:
+    """Sentinela para o acesso irrestrito dos administradores: contém qualquer proprietário"""
+
+    def __contains__(self, id_proprietario) -> bool:
+        return True
+
+    def __bool__(self) -> bool:
+        return True
+
+    def __repr__(self) -> str:
+        return 'TODOS_PROPRIETARIOS'
+
+
+TODOS_PROPRIETARIOS = _TodosProprietarios()
+
+ConjuntoProprietarios = Union[FrozenSet[int], _TodosProprietarios]
+
+
+class PermissoesUsuario(NamedTuple):
+    visualizar: ConjuntoProprietarios
+    editar: ConjuntoProprietarios
+
+
+PERMISSOES_ADMIN = PermissoesUsuario(TODOS_PROPRIETARIOS, TODOS_PROPRIETARIOS)
+
+cache_permissoes = CacheTTL(settings.cache_permissoes_tamanho, settings.cache_permissoes_ttl)
 
 
 def require_admin(current_user: Usuario) -> Usuario:
@@ -26,11 +62,74 @@ def is_admin(user: Usuario) -> bool:
     return user.tipo == 'administrador'
 
 
+def carregar_permissoes(id_usuario: int, db: Session) -> PermissoesUsuario:
+    """Lê as permissões do usuário em uma consulta (sem cache)"""
+    visualizar, editar = set(), set()
+    for id_proprietario, pode_visualizar, pode_editar in db.query(
+        PermissaoFinanceira.id_proprietario,
+        PermissaoFinanceira.visualizar,
+        PermissaoFinanceira.editar
+    ).filter(PermissaoFinanceira.id_usuario == id_usuario):
+        if pode_visualizar:
+            visualizar.add(id_proprietario)
+        if pode_editar:
+            editar.add(id_proprietario)
+    return PermissoesUsuario(frozenset(visualizar), frozenset(editar))
+
+
+def permissoes_usuario(user: Usuario, db: Session) -> PermissoesUsuario:
+    """Proprietários que o usuário pode visualizar e editar (cache por usuário)"""
+    if is_admin(user):
+        return PERMISSOES_ADMIN
+    permissoes = cache_permissoes.obter(user.id)
+    if permissoes is None:
+        permissoes = carregar_permissoes(user.id, db)
+        cache_permissoes.definir(user.id, permissoes)
+    return permissoes
+
+
+def proprietarios_permitidos(user: Usuario, db: Session) -> ConjuntoProprietarios:
+    """
+    Conjunto de proprietários visíveis para o usuário (TODOS_PROPRIETARIOS para admin).
+    Usa o conjunto já carregado no usuário autenticado, quando disponível.
+    """
+    permitidos = getattr(user, 'proprietarios_permitidos', None)
+    if permitidos is not None:
+        return permitidos
+    return permissoes_usuario(user, db).visualizar
+
+
+def invalidar_permissoes(id_usuario: int):
+    """Descarta as permissões em cache do usuário (e o usuário autenticado que as carrega)"""
+    cache_permissoes.remover(id_usuario)
+    from app.core.auth import invalidar_usuario_autenticado
+    invalidar_usuario_autenticado(id_usuario)
+
+
+def filtro_proprietarios(user: Usuario, coluna, acao: str = 'visualizar'):
+    """
+    Condição SQL que restringe `coluna` (id de proprietário) aos que o usuário pode
+    visualizar (ou editar, com acao='editar'): EXISTS correlacionado em
+    permissoes_financeiras, resolvido pelo índice (id_usuario, id_proprietario).
+    Para administradores, uma condição sempre verdadeira.
+    """
+    if is_admin(user):
+        return true()
+    return exists().where(
+        PermissaoFinanceira.id_usuario == user.id,
+        PermissaoFinanceira.id_proprietario == coluna,
+        getattr(PermissaoFinanceira, acao) == True
+    )
+
+
 def get_permitted_proprietarios(user: Usuario, db: Session) -> List[int]:
     """
     Retorna lista de IDs de proprietários que o usuário pode acessar.
     - Admin: todos os proprietários
     - Usuário comum: apenas proprietários definidos em permissoes_financeiras
+
+    Para filtrar consultas prefira filtro_proprietarios, e para testar pertinência,
+    proprietarios_permitidos: nenhum dos dois enumera os proprietários dos administradores.
     """
     if is_admin(user):
         # Admin pode ver todos os proprietários
@@ -41,13 +140,7 @@ def get_permitted_proprietarios(user: Usuario, db: Session) -> List[int]:
         ).all()
         return [p[0] for p in proprietarios]
 
-    # Usuário comum: apenas proprietários com permissão
-    permissoes = db.query(PermissaoFinanceira).filter(
-        PermissaoFinanceira.id_usuario == user.id,
-        PermissaoFinanceira.visualizar == True
-    ).all()
-
-    return [p.id_proprietario for p in permissoes]
+    return sorted(proprietarios_permitidos(user, db))
 
 
 def filter_by_permissions(query, user: Usuario, db: Session, proprietario_field: str = None):
@@ -67,35 +160,23 @@ def filter_by_permissions(query, user: Usuario, db: Session, proprietario_field:
         # Admin vê tudo (exceto dados inativos se especificado)
         return query
 
-    # Usuário comum: filtrar por permissões
-    permitted_proprietarios = get_permitted_proprietarios(user, db)
+    # Usuário comum: sem nenhuma permissão, nem consulta o banco
+    if not proprietarios_permitidos(user, db):
+        return query.filter(False)
 
-    if proprietario_field and permitted_proprietarios:
+    entidade = query.column_descriptions[0]['entity']
+    if proprietario_field:
         # Filtrar por campo de proprietário específico
-        return query.filter(getattr(query.column_descriptions[0]['entity'], proprietario_field).in_(permitted_proprietarios))
-    elif permitted_proprietarios:
-        # Para queries que não têm campo específico, assumir que é uma query de proprietários
-        return query.filter(query.column_descriptions[0]['entity'].id.in_(permitted_proprietarios))
-
-    # Se não há permissões, retornar query vazia
-    return query.filter(False)
+        return query.filter(filtro_proprietarios(user, getattr(entidade, proprietario_field)))
+    # Para queries que não têm campo específico, assumir que é uma query de proprietários
+    return query.filter(filtro_proprietarios(user, entidade.id))
 
 
 def can_edit_financial_data(user: Usuario, proprietario_id: int, db: Session) -> bool:
     """
     Verifica se o usuário pode editar dados financeiros de um proprietário específico.
     """
-    if is_admin(user):
-        return True
-
-    # Verificar permissão específica
-    permissao = db.query(PermissaoFinanceira).filter(
-        PermissaoFinanceira.id_usuario == user.id,
-        PermissaoFinanceira.id_proprietario == proprietario_id,
-        PermissaoFinanceira.editar == True
-    ).first()
-
-    return permissao is not None
+    return proprietario_id in permissoes_usuario(user, db).editar
 
 
 def can_view_financial_data(user: Usuario, proprietario_id: int, db: Session) -> bool:
@@ -103,16 +184,34 @@ def can_view_financial_data(user: Usuario, proprietario_id: int, db: Session) ->
     Verifica se o usuário pode visualizar dados financeiros de um proprietário específico.
     Usa a flag `visualizar` na tabela de permissões. Admins podem ver tudo.
     """
-    if is_admin(user):
-        return True
+    return proprietario_id in proprietarios_permitidos(user, db)
 
-    permissao = db.query(PermissaoFinanceira).filter(
-        PermissaoFinanceira.id_usuario == user.id,
-        PermissaoFinanceira.id_proprietario == proprietario_id,
-        PermissaoFinanceira.visualizar == True
-    ).first()
 
-    return permissao is not None
+def permissoes_lote(user: Usuario, ids_proprietarios: Iterable[int], db: Session, acao: str = 'editar') -> Dict[int, bool]:
+    """
+    Responde de uma vez, para vários proprietários, se o usuário pode 'editar' ou
+    'visualizar' seus dados financeiros (no máximo uma consulta, depois vem do cache)
+    """
+    permissoes = permissoes_usuario(user, db)
+    permitidos = permissoes.editar if acao == 'editar' else permissoes.visualizar
+    return {id_proprietario: id_proprietario in permitidos for id_proprietario in set(ids_proprietarios)}
+
+
+def exigir_permissao_lote(user: Usuario, registros, db: Session, acao: str = 'editar'):
+    """
+    Verifica a permissão sobre vários registros (com id e id_proprietario) e levanta 403
+    listando os ids negados; nenhum registro do lote deve ser alterado nesse caso.
+    """
+    permitido = permissoes_lote(user, (r.id_proprietario for r in registros), db, acao)
+    negados = sorted(r.id for r in registros if not permitido[r.id_proprietario])
+    if negados:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail={
+                "mensagem": f"Você não tem permissão para {acao} {len(negados)} registro(s) do lote",
+                "ids": negados
+            }
+        )
 
 
 def filter_inactive_records(query, user: Usuario, active_field: str = 'ativo'):
@@ -2,14 +2,20 @@ from fastapi import FastAPI, Request, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import FileResponse, RedirectResponse
+from fastapi.responses import FileResponse, JSONResponse, RedirectResponse
+from datetime import date
+from sqlalchemy.exc import TimeoutError as TimeoutPool
 from sqlalchemy.orm import Session
 from app.core.auth import get_current_active_user
 from app.core.config import settings
 from app.core.config import APP_ENV
-from app.core.database import engine, Base, get_db
+from app.core.database import engine, engine_assincrona, Base, get_db
+from app.core.particionamento import garantir_particoes
 from app.models.usuario import Usuario
-from app.routes import auth, usuarios, imoveis, participacoes, alugueis, alias, transferencias, permissoes_financeiras, dashboard, import_routes, relatorios, backup
+from app.services.import_jobs import gerenciador_importacoes
+from app.services.import_paralelo import encerrar_pool_processos
+from app.services.hash_senhas import servico_hash_senhas
+from app.routes import auth, usuarios, imoveis, participacoes, alugueis, alias, transferencias, permissoes_financeiras, dashboard, import_routes, relatorios, backup, metricas
 
 app = FastAPI(
     title="Sistema de Aluguéis",
@@ -31,6 +37,15 @@ async def csrf_protect(request: Request, call_next):
             return JSONResponse({'detail': 'CSRF token missing or invalid'}, status_code=403)
     return await call_next(request)
 
+# Pool de conexões esgotado (DB_POOL_TIMEOUT): sobrecarga temporária, não erro interno
+@app.exception_handler(TimeoutPool)
+async def pool_esgotado(request: Request, exc: TimeoutPool):
+    return JSONResponse(
+        {'detail': 'Servidor ocupado, tente novamente em instantes'},
+        status_code=503,
+        headers={'Retry-After': '1'}
+    )
+
 # Configurar CORS
 app.add_middleware(
     CORSMiddleware,
@@ -61,10 +76,41 @@ app.include_router(alias.router, prefix="/api/alias", tags=["Aliás"])
 app.include_router(transferencias.router, prefix="/api/transferencias", tags=["Transferências"])
 app.include_router(permissoes_financeiras.router, prefix="/api/permissoes_financeiras", tags=["Permissões Financeiras"])
 app.include_router(backup.router, prefix="/api/admin/backup", tags=["Backup"])
+app.include_router(metricas.router, prefix="/api/admin/metricas", tags=["Métricas"])
 app.include_router(dashboard.router, prefix="/api/dashboard", tags=["Dashboard"])
 app.include_router(import_routes.router, prefix="/api/importacao", tags=["Importação"])
 app.include_router(relatorios.router, prefix="/api/relatorios", tags=["Relatórios"])
 
+
+@app.on_event("startup")
+def criar_particoes_alugueis():
+    """Partições de alugueis_mensais do ano atual e do seguinte, se a tabela for particionada"""
+    if engine.dialect.name != 'postgresql':
+        return
+    ano = date.today().year
+    try:
+        with engine.begin() as conn:
+            criadas = garantir_particoes(conn, [ano, ano + 1])
+        if criadas:
+            print(f"Partições de alugueis_mensais criadas: {', '.join(map(str, criadas))}")
+    except Exception as e:
+        print(f"WARNING: não foi possível criar as partições de alugueis_mensais: {e}")
+
+
+@app.on_event("shutdown")
+def encerrar_importacoes():
+    """Aguarda as importações em andamento e cancela as que ainda não gravaram"""
+    gerenciador_importacoes.encerrar()
+    encerrar_pool_processos()
+    servico_hash_senhas.encerrar()
+
+
+@app.on_event("shutdown")
+async def fechar_engine_assincrona():
+    """Fecha as conexões do pool assíncrono ainda no event loop que as abriu"""
+    await engine_assincrona.dispose()
+
+
 @app.get("/")
 async def root(request: Request):
     return templates.TemplateResponse("dashboard.html", {"request": request})
@@ -7,6 +7,8 @@ from .alias_proprietario import AliasProprietario
 from .transferencia import Transferencia
 from .permissao_financeira import PermissaoFinanceira
 from .backup import Backup
+from .importacao import ImportacaoCheckpoint, ImportacaoHash
+from .receita_mensal_resumo import ReceitaMensalResumo
 
 __all__ = [
     "Usuario",
@@ -18,5 +20,8 @@ __all__ = [
     "AliasProprietario",
     "Transferencia",
     "PermissaoFinanceira",
-    "Backup"
+    "Backup",
+    "ImportacaoCheckpoint",
+    "ImportacaoHash",
+    "ReceitaMensalResumo"
 ]
\ No newline at end of file
@@ -1,9 +1,12 @@
-from sqlalchemy import Column, Integer, Numeric, Date, ForeignKey, TIMESTAMP, func, String
+from sqlalchemy import Column, Integer, Numeric, Date, ForeignKey, TIMESTAMP, func, String, Index
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 
 class Aluguel(Base):
     __tablename__ = "alugueis"
+    __table_args__ = (
+        Index('idx_alugueis_data', 'data_cadastro'),  # Filtros por período (ver app.core.periodo)
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     id_imovel = Column(Integer, ForeignKey("imoveis.id", ondelete="CASCADE"), nullable=False)
@@ -17,6 +20,19 @@ class Aluguel(Base):
 class AluguelMensal(Base):
     """Modelo para armazenar aluguéis mensais detalhados por proprietário"""
     __tablename__ = "alugueis_mensais"
+    __table_args__ = (
+        # Chave natural: um registro por imóvel/proprietário/mês (usada no upsert da importação)
+        Index('uq_alugueis_mensais_imovel_proprietario_data', 'id_imovel', 'id_proprietario', 'data_referencia', unique=True),
+        # Período agrupado por imóvel/proprietário (dashboard, resumo de receitas, relatórios); no
+        # PostgreSQL os valores ficam no índice (INCLUDE) e a agregação não precisa ler a tabela
+        Index(
+            'ix_alugueis_mensais_data_imovel_proprietario', 'data_referencia', 'id_imovel', 'id_proprietario',
+            postgresql_include=['valor_total', 'valor_proprietario', 'taxa_administracao']
+        ),
+        # Registros de um proprietário por período (filtros e permissões por proprietário)
+        Index('ix_alugueis_mensais_proprietario_data', 'id_proprietario', 'data_referencia'),
+        Index('ix_alugueis_mensais_criado_em', 'criado_em'),  # Aluguéis recentes do dashboard
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     id_imovel = Column(Integer, ForeignKey("imoveis.id", ondelete="CASCADE"), nullable=False)
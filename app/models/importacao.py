@@ -0,0 +1,48 @@
+from sqlalchemy import Column, Integer, String, TIMESTAMP, func, Text, Index
+from app.core.database import Base
+
+
+class ImportacaoCheckpoint(Base):
+    """Ponto de retomada de uma importação: arquivo (hash) e última posição gravada"""
+    __tablename__ = "importacao_checkpoints"
+    __table_args__ = (
+        Index('ix_importacao_checkpoints_tipo_hash', 'tipo', 'hash_arquivo'),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    tipo = Column(String(30), nullable=False)  # proprietarios, imoveis, participacoes, alugueis
+    hash_arquivo = Column(String(64), nullable=False)  # sha256 do arquivo enviado
+    nome_arquivo = Column(String(255), nullable=True)
+    status = Column(String(20), nullable=False, default='em_andamento')  # em_andamento, falhou, concluida
+    planilha_indice = Column(Integer, nullable=False, default=0)  # Planilhas anteriores já gravadas
+    planilha = Column(String(255), nullable=True)
+    linha = Column(Integer, nullable=False, default=0)  # Linhas da planilha atual já gravadas
+    registros_gravados = Column(Integer, nullable=False, default=0)
+    lotes_gravados = Column(Integer, nullable=False, default=0)
+    erros = Column(Text, nullable=True)  # JSON com os erros de linha acumulados
+    mensagem = Column(Text, nullable=True)
+    id_usuario = Column(Integer, nullable=True)
+    criado_em = Column(TIMESTAMP, server_default=func.now())
+    atualizado_em = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
+
+
+class ImportacaoHash(Base):
+    """
+    Impressão digital do conteúdo importado: a versão atual de cada planilha (escopo
+    'planilha', chave = nome da planilha) e os arquivos importados por completo (escopo
+    'arquivo', chave = hash do arquivo, detalhes = hashes das planilhas do arquivo)
+    """
+    __tablename__ = "importacao_hashes"
+    __table_args__ = (
+        Index('uq_importacao_hashes_tipo_escopo_chave', 'tipo', 'escopo', 'chave', unique=True),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    tipo = Column(String(30), nullable=False)
+    escopo = Column(String(20), nullable=False)  # 'arquivo' ou 'planilha'
+    chave = Column(String(255), nullable=False)
+    hash = Column(String(64), nullable=False)
+    detalhes = Column(Text, nullable=True)  # JSON
+    registros = Column(Integer, nullable=False, default=0)
+    criado_em = Column(TIMESTAMP, server_default=func.now())
+    atualizado_em = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, Numeric, Date, ForeignKey, TIMESTAMP, func, Index
+from app.core.database import Base
+
+
+class ReceitaMensalResumo(Base):
+    """
+    Totais de alugueis_mensais por mês, imóvel e proprietário, mantidos pelas gravações
+    (ver app.services.resumo_receitas) para os relatórios não reagregarem os registros
+    """
+    __tablename__ = "receitas_mensais_resumo"
+    __table_args__ = (
+        Index('ix_receitas_mensais_resumo_proprietario_mes', 'id_proprietario', 'mes'),
+        Index('ix_receitas_mensais_resumo_imovel_mes', 'id_imovel', 'mes'),
+    )
+
+    mes = Column(Date, primary_key=True)  # Primeiro dia do mês de referência
+    id_imovel = Column(Integer, ForeignKey("imoveis.id", ondelete="CASCADE"), primary_key=True)
+    id_proprietario = Column(Integer, ForeignKey("usuarios.id", ondelete="CASCADE"), primary_key=True)
+    quantidade = Column(Integer, nullable=False, default=0)  # Registros de alugueis_mensais somados
+    valor_total = Column(Numeric(14, 2), nullable=False, default=0)
+    valor_proprietario = Column(Numeric(14, 2), nullable=False, default=0)
+    taxa_administracao = Column(Numeric(14, 2), nullable=False, default=0)
+    valor_total_imovel = Column(Numeric(12, 2), nullable=False, default=0)  # Valor do imóvel no mês (sem repetir por proprietário)
+    atualizado_em = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
@@ -16,6 +16,8 @@ class Usuario(Base):
     endereco = Column(Text)  # Novo campo
     hashed_password = Column(String(512), nullable=False)
     ativo = Column(Boolean, default=True)
+    # Incrementada para revogar os tokens já emitidos (mudança de tipo ou desativação)
+    versao_token = Column(Integer, nullable=False, default=1, server_default='1')
     criado_em = Column(TIMESTAMP, server_default=func.now())
     atualizado_em = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
 
@@ -1,13 +1,17 @@
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.core.auth import get_current_active_user, get_current_admin_user
-from app.core.permissions import filter_by_permissions, can_edit_financial_data, filter_inactive_records
-from app.schemas import Aluguel, AluguelCreate, AluguelUpdate, AluguelMensal, AluguelMensalCreate, AluguelMensalUpdate
+from app.core.database import get_async_db, get_db
+from app.core.auth import get_current_active_user, get_current_active_user_async, get_current_admin_user
+from app.core.permissions import filter_by_permissions, can_edit_financial_data, filter_inactive_records, exigir_permissao_lote
+from app.core.periodo import filtro_periodo
+from app.schemas import Aluguel, AluguelCreate, AluguelUpdate, AluguelMensal, AluguelMensalCreate, AluguelMensalUpdate, AluguelMensalLoteUpdate, AluguelMensalStatusLote, LoteIds
 from app.models.aluguel import Aluguel as AluguelModel, AluguelMensal as AluguelMensalModel
 from app.models.usuario import Usuario
 from app.services.aluguel_service import AluguelService
+from app.services.resumo_receitas import ResumoReceitasService
+from app.services.status_aluguel_service import StatusAluguelService
 
 router = APIRouter()
 
@@ -184,8 +188,8 @@ def obter_relatorio_por_proprietario(
     
     resultado = AluguelService.obter_relatorio_por_proprietario(db, ano, mes)
     # Filtrar resultados pelo conjunto de proprietários permitidos para o usuário
-    from app.core.permissions import get_permitted_proprietarios
-    permitted = get_permitted_proprietarios(current_user, db)
+    from app.core.permissions import proprietarios_permitidos
+    permitted = proprietarios_permitidos(current_user, db)
     if not current_user or current_user.tipo != 'administrador':
         # Apenas retornar dados para proprietários permitidos
         resultado = [r for r in resultado if r.get('id_proprietario') in permitted]
@@ -207,8 +211,8 @@ def obter_relatorio_por_imovel(
     
     resultado = AluguelService.obter_relatorio_por_imovel(db, ano, mes)
     # Filtrar por permissões: se o usuário não tem acesso ao proprietário do imóvel, remover
-    from app.core.permissions import get_permitted_proprietarios
-    permitted = get_permitted_proprietarios(current_user, db)
+    from app.core.permissions import proprietarios_permitidos
+    permitted = proprietarios_permitidos(current_user, db)
     if not current_user or current_user.tipo != 'administrador':
         # Supõe que cada item em resultado tem campo 'id_proprietario'
         resultado = [r for r in resultado if r.get('id_proprietario') in permitted]
@@ -219,7 +223,7 @@ def obter_relatorio_por_imovel(
 # Endpoints para Aluguéis Mensais (dados importados)
 
 @router.get("/mensais/")
-def read_alugueis_mensais(
+async def read_alugueis_mensais(
     skip: int = 0,
     limit: int = 1000,
     imovel_id: Optional[int] = None,
@@ -228,8 +232,25 @@ def read_alugueis_mensais(
     mes: Optional[int] = None,
     data_inicio_de: Optional[str] = None,
     data_inicio_ate: Optional[str] = None,
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Usuario = Depends(get_current_active_user_async)
+):
+    return await db.run_sync(
+        _listar_alugueis_mensais, current_user, skip, limit, imovel_id, proprietario_id,
+        ano, mes, data_inicio_de, data_inicio_ate
+    )
+
+def _listar_alugueis_mensais(
+    db: Session,
+    current_user: Usuario,
+    skip: int,
+    limit: int,
+    imovel_id: Optional[int],
+    proprietario_id: Optional[int],
+    ano: Optional[int],
+    mes: Optional[int],
+    data_inicio_de: Optional[str],
+    data_inicio_ate: Optional[str]
 ):
     query = db.query(AluguelMensalModel)
     
@@ -238,14 +259,7 @@ def read_alugueis_mensais(
     if proprietario_id:
         query = query.filter(AluguelMensalModel.id_proprietario == proprietario_id)
     if ano and mes:
-        from datetime import date
-        data_inicio = date(ano, mes, 1)
-        if mes == 12:
-            data_fim = date(ano + 1, 1, 1)
-        else:
-            data_fim = date(ano, mes + 1, 1)
-        query = query.filter(AluguelMensalModel.data_referencia >= data_inicio, 
-                           AluguelMensalModel.data_referencia < data_fim)
+        query = query.filter(filtro_periodo(AluguelMensalModel.data_referencia, ano, mes))
     
     # Filtros por data de início
     if data_inicio_de:
@@ -271,6 +285,93 @@ def read_alugueis_mensais(
     alugueis_mensais = query.offset(skip).limit(limit).all()
     return alugueis_mensais
 
+def _alugueis_mensais_lote(db: Session, ids: List[int]):
+    """Id e chave (imóvel, proprietário, data) dos registros do lote; 404 listando os ids inexistentes"""
+    registros = db.query(
+        AluguelMensalModel.id,
+        AluguelMensalModel.id_imovel,
+        AluguelMensalModel.id_proprietario,
+        AluguelMensalModel.data_referencia
+    ).filter(
+        AluguelMensalModel.id.in_(set(ids))
+    ).all()
+    faltando = sorted(set(ids) - {r.id for r in registros})
+    if faltando:
+        raise HTTPException(
+            status_code=404,
+            detail={"mensagem": f"{len(faltando)} aluguel(is) mensal(is) não encontrado(s)", "ids": faltando}
+        )
+    return registros
+
+@router.put("/mensais/lote")
+def update_alugueis_mensais_lote(
+    lote: AluguelMensalLoteUpdate,
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_current_active_user)
+):
+    """
+    Aplica os mesmos dados (ex.: status "Pago") a vários aluguéis mensais em uma transação.
+    Se algum registro não existir ou não puder ser editado, nada é alterado.
+    """
+    registros = _alugueis_mensais_lote(db, lote.ids)
+    exigir_permissao_lote(current_user, registros, db, 'editar')
+
+    update_data = lote.dados.dict(exclude_unset=True)
+    if not update_data:
+        raise HTTPException(status_code=400, detail="Nenhum campo informado para atualizar")
+
+    atualizados = db.query(AluguelMensalModel).filter(
+        AluguelMensalModel.id.in_([r.id for r in registros])
+    ).update(update_data, synchronize_session=False)
+    if update_data.keys() & ResumoReceitasService.CAMPOS_VALORES:
+        ResumoReceitasService.recalcular_chaves(db, [(r.id_imovel, r.id_proprietario, r.data_referencia) for r in registros])
+    db.commit()
+
+    return {
+        "message": f"{atualizados} aluguel(is) mensal(is) atualizado(s)",
+        "atualizados": atualizados,
+        "ids": sorted(r.id for r in registros)
+    }
+
+@router.delete("/mensais/lote")
+def delete_alugueis_mensais_lote(
+    lote: LoteIds,
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_current_active_user)
+):
+    """Exclui vários aluguéis mensais em uma transação (tudo ou nada, como na edição em lote)"""
+    registros = _alugueis_mensais_lote(db, lote.ids)
+    exigir_permissao_lote(current_user, registros, db, 'editar')
+
+    excluidos = db.query(AluguelMensalModel).filter(
+        AluguelMensalModel.id.in_([r.id for r in registros])
+    ).delete(synchronize_session=False)
+    ResumoReceitasService.recalcular_chaves(db, [(r.id_imovel, r.id_proprietario, r.data_referencia) for r in registros])
+    db.commit()
+
+    return {
+        "message": f"{excluidos} aluguel(is) mensal(is) excluído(s)",
+        "excluidos": excluidos,
+        "ids": sorted(r.id for r in registros)
+    }
+
+@router.put("/mensais/status")
+def update_status_alugueis_mensais(
+    dados: AluguelMensalStatusLote,
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_current_active_user)
+):
+    """
+    Altera o status de pagamento (ex.: "Pago") de vários aluguéis mensais com um único UPDATE.
+
+    Seleciona por ids ou por filtro (ano/mês, imóvel, proprietário). Registros sem permissão
+    de edição ou que já estão no status (ou fora de status_atual) não são alterados; cada id
+    recebe seu resultado: atualizado, inalterado, sem_permissao ou nao_encontrado.
+    """
+    resultado = StatusAluguelService.alterar_status(db, current_user, **dados.dict())
+    db.commit()
+    return resultado
+
 @router.get("/mensais/{aluguel_mensal_id}", response_model=AluguelMensal)
 def read_aluguel_mensal(
     aluguel_mensal_id: int,
@@ -301,7 +402,9 @@ def delete_aluguel_mensal(
     if not can_edit_financial_data(current_user, db_aluguel.id_proprietario, db):
         raise HTTPException(status_code=403, detail="Você não tem permissão para excluir este aluguel mensal")
 
+    chave = (db_aluguel.id_imovel, db_aluguel.id_proprietario, db_aluguel.data_referencia)
     db.delete(db_aluguel)
+    ResumoReceitasService.recalcular_chaves(db, [chave])
     db.commit()
 
     return {"message": "Aluguel mensal deletado com sucesso"}
@@ -325,6 +428,10 @@ def update_aluguel_mensal(
     for field, value in update_data.items():
         setattr(db_aluguel, field, value)
 
+    if update_data.keys() & ResumoReceitasService.CAMPOS_VALORES:
+        ResumoReceitasService.recalcular_chaves(
+            db, [(db_aluguel.id_imovel, db_aluguel.id_proprietario, db_aluguel.data_referencia)]
+        )
     db.commit()
     db.refresh(db_aluguel)
     return db_aluguel
@@ -7,6 +7,7 @@ from app.core.database import get_db
 from app.core.auth import (
     authenticate_user,
     create_access_token,
+    dados_token,
     get_current_active_user,
     refresh_access_token,
 )
@@ -26,7 +27,7 @@ async def login_for_access_token(
     Em ambientes de produção o cookie será Secure e SameSite=Lax. Em desenvolvimento
     usa-se SameSite=Lax e Secure=False para permitir testes locais sem HTTPS.
     """
-    user = authenticate_user(db, form_data.username, form_data.password)
+    user = await authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -35,7 +36,7 @@ async def login_for_access_token(
         )
     access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
     access_token = create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
+        data=dados_token(user), expires_delta=access_token_expires
     )
 
     # Preparar cookie
@@ -65,7 +66,7 @@ async def login_json(
 
     Esta rota é compatível com requisições JSON do frontend.
     """
-    user = authenticate_user(db, user_credentials.username, user_credentials.password)
+    user = await authenticate_user(db, user_credentials.username, user_credentials.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -74,7 +75,7 @@ async def login_json(
         )
     access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
     access_token = create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
+        data=dados_token(user), expires_delta=access_token_expires
     )
 
     return {"access_token": access_token, "token_type": "bearer"}
@@ -103,7 +104,7 @@ async def refresh_access_token_endpoint(
     """Renova o token de acesso e redefine o cookie HttpOnly"""
     access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
     access_token = create_access_token(
-        data={"sub": current_user.username}, expires_delta=access_token_expires
+        data=dados_token(current_user), expires_delta=access_token_expires
     )
 
     secure_cookie = APP_ENV == 'production'
@@ -1,8 +1,11 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.core.auth import get_current_active_user
+from app.core.database import get_async_db, get_db
+from app.core.auth import get_current_active_user, get_current_active_user_async
 from app.models.usuario import Usuario
+from app.services.dashboard_service import DashboardService
+from app.services.graficos_service import GraficosService
 
 router = APIRouter()
 
@@ -12,260 +15,27 @@ def get_dashboard(db: Session = Depends(get_db), current_user: Usuario = Depends
     return {"message": "Dashboard - Em desenvolvimento", "user": current_user.nome}
 
 @router.get("/stats")
-def get_dashboard_stats(db: Session = Depends(get_db), current_user: Usuario = Depends(get_current_active_user)):
-    # Estatísticas básicas do dashboard
-    from sqlalchemy import func, extract
-    from app.models.imovel import Imovel
-    from app.models.aluguel import AluguelMensal
-    from app.models.usuario import Usuario
-    from datetime import datetime, timedelta
-    
-    # Contar imóveis (este número não depende de permissões financeiras)
-    total_imoveis = db.query(Imovel).count()
-
-    # Permissões: limitar métricas financeiras aos proprietários permitidos
-    permitted = None
-    if current_user.tipo != 'administrador':
-        from app.core.permissions import get_permitted_proprietarios
-        permitted = get_permitted_proprietarios(current_user, db)
-    
-    # Receita do mês atual (soma única dos valores totais por imóvel)
-    hoje = datetime.now()
-
-    # Subquery para obter valor_total único por imóvel no mês
-    subquery_mensal = db.query(
-        AluguelMensal.id_imovel,
-        func.max(AluguelMensal.valor_total).label('valor_total_unico')
-    ).filter(
-        extract('year', AluguelMensal.data_referencia) == hoje.year,
-        extract('month', AluguelMensal.data_referencia) == hoje.month
-    ).group_by(AluguelMensal.id_imovel).subquery()
-
-    receita_mensal_q = db.query(func.sum(subquery_mensal.c.valor_total_unico))
-
-    if permitted is not None:
-        if not permitted:
-            receita_mensal = 0.0
-        else:
-            # Filtrar imóveis pelos proprietários permitidos
-            receita_mensal_q = receita_mensal_q.join(
-                AluguelMensal,
-                AluguelMensal.id_imovel == subquery_mensal.c.id_imovel
-            ).filter(AluguelMensal.id_proprietario.in_(permitted))
-            receita_mensal = receita_mensal_q.scalar() or 0.0
-    else:
-        receita_mensal = receita_mensal_q.scalar() or 0.0
-    
-    # Aluguéis ativos (todos os registros do mês atual)
-    alugueis_ativos_q = db.query(func.count(func.distinct(AluguelMensal.id))).filter(
-        extract('year', AluguelMensal.data_referencia) == hoje.year,
-        extract('month', AluguelMensal.data_referencia) == hoje.month
-    )
-    if permitted is not None:
-        if not permitted:
-            alugueis_ativos = 0
-        else:
-            alugueis_ativos = alugueis_ativos_q.filter(AluguelMensal.id_proprietario.in_(permitted)).scalar() or 0
-    else:
-        alugueis_ativos = alugueis_ativos_q.scalar() or 0
-    
-    # Proprietários ativos (que têm aluguéis no mês atual)
-    proprietarios_ativos_q = db.query(func.count(func.distinct(AluguelMensal.id_proprietario))).filter(
-        extract('year', AluguelMensal.data_referencia) == hoje.year,
-        extract('month', AluguelMensal.data_referencia) == hoje.month
-    )
-    if permitted is not None:
-        if not permitted:
-            proprietarios_ativos = 0
-        else:
-            proprietarios_ativos = proprietarios_ativos_q.filter(AluguelMensal.id_proprietario.in_(permitted)).scalar() or 0
-    else:
-        proprietarios_ativos = proprietarios_ativos_q.scalar() or 0
-    
-    # Taxa de ocupação (imóveis com aluguel / total imóveis)
-    imoveis_ocupados_q = db.query(func.count(func.distinct(AluguelMensal.id_imovel))).filter(
-        extract('year', AluguelMensal.data_referencia) == hoje.year,
-        extract('month', AluguelMensal.data_referencia) == hoje.month
-    )
-    if permitted is not None:
-        if not permitted:
-            imoveis_ocupados = 0
-        else:
-            imoveis_ocupados = imoveis_ocupados_q.filter(AluguelMensal.id_proprietario.in_(permitted)).scalar() or 0
-    else:
-        imoveis_ocupados = imoveis_ocupados_q.scalar() or 0
-    
-    taxa_ocupacao = (imoveis_ocupados / total_imoveis * 100) if total_imoveis > 0 else 0
-    
-    # Receita do ano atual (soma única dos valores totais por imóvel)
-    subquery_anual = db.query(
-        AluguelMensal.id_imovel,
-        func.max(AluguelMensal.valor_total).label('valor_total_unico')
-    ).filter(
-        extract('year', AluguelMensal.data_referencia) == hoje.year
-    ).group_by(AluguelMensal.id_imovel).subquery()
-
-    receita_anual_q = db.query(func.sum(subquery_anual.c.valor_total_unico))
-
-    if permitted is not None:
-        if not permitted:
-            receita_anual = 0.0
-        else:
-            # Filtrar imóveis pelos proprietários permitidos
-            receita_anual_q = receita_anual_q.join(
-                AluguelMensal,
-                AluguelMensal.id_imovel == subquery_anual.c.id_imovel
-            ).filter(AluguelMensal.id_proprietario.in_(permitted))
-            receita_anual = receita_anual_q.scalar() or 0.0
-    else:
-        receita_anual = receita_anual_q.scalar() or 0.0
-    
-    # Receita do mês anterior (soma única dos valores totais por imóvel)
-    mes_anterior = hoje.replace(day=1) - timedelta(days=1)
-    subquery_mes_anterior = db.query(
-        AluguelMensal.id_imovel,
-        func.max(AluguelMensal.valor_total).label('valor_total_unico')
-    ).filter(
-        extract('year', AluguelMensal.data_referencia) == mes_anterior.year,
-        extract('month', AluguelMensal.data_referencia) == mes_anterior.month
-    ).group_by(AluguelMensal.id_imovel).subquery()
-
-    receita_mes_anterior_q = db.query(func.sum(subquery_mes_anterior.c.valor_total_unico))
-
-    if permitted is not None:
-        if not permitted:
-            receita_mes_anterior = 0.0
-        else:
-            # Filtrar imóveis pelos proprietários permitidos
-            receita_mes_anterior_q = receita_mes_anterior_q.join(
-                AluguelMensal,
-                AluguelMensal.id_imovel == subquery_mes_anterior.c.id_imovel
-            ).filter(AluguelMensal.id_proprietario.in_(permitted))
-            receita_mes_anterior = receita_mes_anterior_q.scalar() or 0.0
-    else:
-        receita_mes_anterior = receita_mes_anterior_q.scalar() or 0.0
-    
-    # Variação da receita
-    if receita_mes_anterior > 0:
-        variacao = ((receita_mensal - receita_mes_anterior) / receita_mes_anterior) * 100
-    else:
-        variacao = 0 if receita_mensal == 0 else 100
-    
-    # Imóveis disponíveis (total - ocupados)
-    imoveis_disponiveis = total_imoveis - imoveis_ocupados
-    
-    return {
-        "total_imoveis": total_imoveis,
-        "receita_mensal": float(receita_mensal),
-        "receita_anual": float(receita_anual),
-        "variacao_mensal": round(variacao, 1),
-        "imoveis_disponiveis": imoveis_disponiveis,
-        "alugueis_ativos": alugueis_ativos,
-        "proprietarios_ativos": proprietarios_ativos,
-        "taxa_ocupacao": round(taxa_ocupacao, 1)
-    }
+async def get_dashboard_stats(db: AsyncSession = Depends(get_async_db), current_user: Usuario = Depends(get_current_active_user_async)):
+    # Estatísticas básicas do dashboard (uma consulta; ver DashboardService)
+    return await db.run_sync(DashboardService.obter_estatisticas, current_user)
 
 @router.get("/charts")
-def get_dashboard_charts(db: Session = Depends(get_db), current_user: Usuario = Depends(get_current_active_user)):
-    # Verificar permissões de acesso aos proprietários
-    permitted = None
-    if current_user.tipo != 'administrador':
-        from app.core.permissions import get_permitted_proprietarios
-        permitted = get_permitted_proprietarios(current_user, db)
-    
-    # Dados para gráficos do dashboard
-    from app.models.imovel import Imovel
-    from app.models.aluguel import AluguelMensal
-    from sqlalchemy import func, extract
-    from datetime import datetime, timedelta
-    
-    # Gráfico de receita por mês (últimos 6 meses)
-    receita_por_mes = []
-    hoje = datetime.now()
-    
-    for i in range(5, -1, -1):
-        mes_referencia = hoje.replace(day=1) - timedelta(days=i*30)
-        ano = mes_referencia.year
-        mes = mes_referencia.month
-        
-        # Calcular receita total do mês (valores únicos por imóvel)
-        subquery_mes = db.query(
-            AluguelMensal.id_imovel,
-            func.max(AluguelMensal.valor_total).label('valor_total_unico')
-        ).filter(
-            extract('year', AluguelMensal.data_referencia) == ano,
-            extract('month', AluguelMensal.data_referencia) == mes
-            # Removido filtro de valores positivos para incluir todos os valores na receita total
-        ).group_by(AluguelMensal.id_imovel).subquery()
-        
-        receita_mes = db.query(func.sum(subquery_mes.c.valor_total_unico)).scalar() or 0
-        
-        receita_por_mes.append({
-            "mes": f"{mes:02d}/{ano}",
-            "receita": float(receita_mes)
-        })
-    
-    # Gráfico de status dos imóveis
-    imoveis_com_aluguel = db.query(func.count(func.distinct(AluguelMensal.id_imovel))).scalar() or 0
-    total_imoveis = db.query(Imovel).count()
-    imoveis_disponiveis = total_imoveis - imoveis_com_aluguel
-    
-    status_imoveis = [
-        {"status": "Alugado", "quantidade": imoveis_com_aluguel},
-        {"status": "Disponível", "quantidade": imoveis_disponiveis},
-        {"status": "Manutenção", "quantidade": 0}
-    ]
-    
-    # Gráfico de distribuição por tipo de imóvel
-    tipos_imoveis = db.query(
-        Imovel.tipo,
-        func.count(Imovel.id).label('quantidade')
-    ).group_by(Imovel.tipo).all()
-    
-    distribuicao_tipos = [
-        {"tipo": tipo or "Não informado", "quantidade": quantidade}
-        for tipo, quantidade in tipos_imoveis
-    ]
-    
-    # Gráfico de receita por proprietário (top 5)
-    receita_proprietarios_q = db.query(
-        AluguelMensal.id_proprietario,
-        func.sum(AluguelMensal.valor_proprietario).label('total_receita')
-    ).group_by(AluguelMensal.id_proprietario).order_by(
-        func.sum(AluguelMensal.valor_proprietario).desc()
-    ).limit(5)
-
-    if permitted is not None:
-        if permitted:
-            receita_proprietarios_q = receita_proprietarios_q.filter(AluguelMensal.id_proprietario.in_(permitted))
-        else:
-            receita_proprietarios_q = receita_proprietarios_q.filter(False)
-
-    receita_proprietarios = receita_proprietarios_q.all()
-    
-    receita_por_proprietario = []
-    for proprietario_id, total in receita_proprietarios:
-        proprietario = db.query(Usuario).filter(Usuario.id == proprietario_id).first()
-        nome = proprietario.nome if proprietario else f"ID {proprietario_id}"
-        receita_por_proprietario.append({
-            "proprietario": nome,
-            "receita": float(total)
-        })
-    
-    return {
-        "receita_por_mes": receita_por_mes,
-        "status_imoveis": status_imoveis,
-        "distribuicao_tipos": distribuicao_tipos,
-        "receita_por_proprietario": receita_por_proprietario
-    }
+async def get_dashboard_charts(
+    meses: int = Query(6, ge=1, le=120, description="Tamanho da janela da série de receita (ex.: 6, 12, 24, 60)"),
+    agrupamento: str = Query('mensal', pattern='^(mensal|trimestral)$', description="mensal ou trimestral"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Usuario = Depends(get_current_active_user_async)
+):
+    # Dados para gráficos do dashboard (ver GraficosService); todas as séries respeitam as permissões
+    return await db.run_sync(GraficosService.obter_graficos, current_user, meses, agrupamento)
 
 @router.get("/recent-rentals")
 def get_recent_rentals(limit: int = 10, db: Session = Depends(get_db), current_user: Usuario = Depends(get_current_active_user)):
     # Verificar permissões de acesso aos proprietários
     permitted = None
     if current_user.tipo != 'administrador':
-        from app.core.permissions import get_permitted_proprietarios
-        permitted = get_permitted_proprietarios(current_user, db)
+        from app.core.permissions import filtro_proprietarios, proprietarios_permitidos
+        permitted = proprietarios_permitidos(current_user, db)
     
     from app.models.aluguel import AluguelMensal
     from app.models.imovel import Imovel
@@ -276,15 +46,15 @@ def get_recent_rentals(limit: int = 10, db: Session = Depends(get_db), current_u
         Imovel, AluguelMensal.id_imovel == Imovel.id
     ).join(
         Usuario, AluguelMensal.id_proprietario == Usuario.id
-    ).order_by(AluguelMensal.criado_em.desc()).limit(limit)
+    ).order_by(AluguelMensal.criado_em.desc())
     
     if permitted is not None:
         if permitted:
-            query = query.filter(AluguelMensal.id_proprietario.in_(permitted))
+            query = query.filter(filtro_proprietarios(current_user, AluguelMensal.id_proprietario))
         else:
             query = query.filter(False)
     
-    alugueis = query.all()
+    alugueis = query.limit(limit).all()
     
     result = []
     for aluguel in alugueis:
@@ -1,8 +1,9 @@
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.core.auth import get_current_active_user, get_current_admin_user
+from app.core.database import get_async_db, get_db
+from app.core.auth import get_current_active_user, get_current_active_user_async, get_current_admin_user
 from app.core.permissions import filter_inactive_records
 from app.schemas import Imovel, ImovelCreate, ImovelUpdate
 from app.models.imovel import Imovel as ImovelModel
@@ -12,13 +13,16 @@ from decimal import Decimal
 router = APIRouter()
 
 @router.get("/")
-def read_imoveis(
+async def read_imoveis(
     skip: int = 0,
     limit: int = 100,
     q: str = None,
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Usuario = Depends(get_current_active_user_async)
 ):
+    return await db.run_sync(_listar_imoveis, current_user, skip, limit, q)
+
+def _listar_imoveis(db: Session, current_user: Usuario, skip: int, limit: int, q: str = None):
     # Aplicar filtros de permissão
     query = db.query(ImovelModel)
     query = filter_inactive_records(query, current_user)
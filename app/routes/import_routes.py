@@ -4,19 +4,28 @@ Sistema inteligente que detecta automaticamente o tipo de dados
 """
 from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
 from fastapi.encoders import jsonable_encoder
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 from app.core.database import get_db
 from app.services.import_service import ImportacaoAvancadaService
+from app.services.xlsx_reader import LeitorPlanilhas
+from app.services.import_jobs import gerenciador_importacoes, TIPOS_IMPORTACAO
+from app.services.import_checkpoint import CheckpointEmUso, CheckpointImportacao, hash_arquivo
+from app.services.import_simulacao import SimuladorImportacao
+from app.services.busca_similaridade import BuscaSimilaridade
+from app.models.importacao import ImportacaoCheckpoint
 from app.core.auth import get_current_active_user
 import math
 import numpy as np
 from app.schemas import Usuario
 import pandas as pd
-from io import BytesIO
 
 router = APIRouter(tags=["import"])
 
+# Linhas lidas para detecção do tipo e pré-visualização; o restante do arquivo não é carregado
+LINHAS_AMOSTRA_DETECCAO = 200
+
 
 def require_admin(current_user: Usuario = Depends(get_current_active_user)):
     """Verifica se o usuário é administrador"""
@@ -28,6 +37,27 @@ def require_admin(current_user: Usuario = Depends(get_current_active_user)):
     return current_user
 
 
+def abrir_planilha(file: UploadFile) -> LeitorPlanilhas:
+    """
+    Abre o upload em streaming direto do arquivo temporário do UploadFile,
+    sem copiar o conteúdo inteiro para a memória
+    """
+    file.file.seek(0)
+    return LeitorPlanilhas(file.file)
+
+
+def ler_amostra(file: UploadFile, limite: Optional[int] = LINHAS_AMOSTRA_DETECCAO):
+    """Lê a primeira planilha (ou uma amostra dela) e os nomes das planilhas do upload"""
+    with abrir_planilha(file) as leitor:
+        return leitor.dataframe(0, limite=limite), leitor.nomes_planilhas
+
+
+def contar_linhas_upload(file: UploadFile) -> int:
+    """Conta as linhas de dados da primeira planilha sem materializá-la"""
+    with abrir_planilha(file) as leitor:
+        return leitor.contar_linhas(0)
+
+
 @router.post("/proprietarios")
 async def import_proprietarios(
     file: UploadFile = File(...),
@@ -48,9 +78,11 @@ async def import_proprietarios(
             detail="Arquivo deve ser Excel (.xlsx ou .xls)"
         )
     
-    content = await file.read()
+    file.file.seek(0)
     service = ImportacaoAvancadaService()
-    result = service.importar_proprietarios(content, db)
+    result = await run_in_threadpool(
+        service.importar_proprietarios, file.file, db, nome_arquivo=file.filename
+    )
     
     return result
 
@@ -78,9 +110,11 @@ async def import_imoveis(
             detail="Arquivo deve ser Excel (.xlsx ou .xls)"
         )
     
-    content = await file.read()
+    file.file.seek(0)
     service = ImportacaoAvancadaService()
-    result = service.importar_imoveis(content, db)
+    result = await run_in_threadpool(
+        service.importar_imoveis, file.file, db, nome_arquivo=file.filename
+    )
     
     return result
 
@@ -105,9 +139,11 @@ async def import_participacoes(
             detail="Arquivo deve ser Excel (.xlsx ou .xls)"
         )
     
-    content = await file.read()
+    file.file.seek(0)
     service = ImportacaoAvancadaService()
-    result = service.importar_participacoes(content, db)
+    result = await run_in_threadpool(
+        service.importar_participacoes, file.file, db, nome_arquivo=file.filename
+    )
     
     return result
 
@@ -115,6 +151,8 @@ async def import_participacoes(
 @router.post("/alugueis")
 async def import_alugueis(
     file: UploadFile = File(...),
+    paralelo: bool = False,
+    forcar: bool = False,
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(require_admin)
 ) -> Dict[str, Any]:
@@ -126,6 +164,12 @@ async def import_alugueis(
     - Primeira célula (A1): Data no formato DD/MM/YYYY
     - Colunas: Nome/Endereço imóvel, Valor Total, [valores por proprietário], Taxa Administração
     - Valores podem ser negativos (com hífen)
+
+    **paralelo=true:** planilhas lidas e validadas em paralelo (pool de processos),
+    indicado para pastas de trabalho com muitos meses
+
+    **Reenvios:** planilhas idênticas à versão já importada são ignoradas e listadas em
+    planilhas_ignoradas; **forcar=true** reprocessa todas
     """
     if not file.filename.endswith(('.xlsx', '.xls')):
         raise HTTPException(
@@ -133,9 +177,12 @@ async def import_alugueis(
             detail="Arquivo deve ser Excel (.xlsx ou .xls)"
         )
     
-    content = await file.read()
+    file.file.seek(0)
     service = ImportacaoAvancadaService()
-    result = service.importar_alugueis(content, db)
+    result = await run_in_threadpool(
+        service.importar_alugueis, file.file, db, nome_arquivo=file.filename,
+        paralelo=paralelo, forcar=forcar
+    )
     
     return result
 
@@ -159,8 +206,7 @@ async def analisar_arquivo_tipo(
         raise HTTPException(status_code=400, detail="Arquivo deve ser Excel (.xlsx ou .xls)")
     
     try:
-        content = await file.read()
-        df = pd.read_excel(BytesIO(content), sheet_name=0)
+        df, _ = await run_in_threadpool(ler_amostra, file, None)
 
         # Sanitizar DataFrame para evitar valores no serializables por JSON
         try:
@@ -254,6 +300,73 @@ async def analisar_arquivo_tipo(
         )
 
 
+@router.post("/simular/{tipo}")
+async def simular_importacao(
+    tipo: str,
+    file: UploadFile = File(...),
+    limite_detalhes: int = 100,
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(require_admin)
+) -> Dict[str, Any]:
+    """
+    Simula a importação do arquivo inteiro sem gravar nada (dry-run)
+
+    **Tipos:** proprietarios, imoveis, participacoes, alugueis ou auto (detecção automática)
+
+    **Retorna:**
+    - resumo: quantidade de registros a inserir, a atualizar, inalterados e erros
+    - detalhes: os primeiros limite_detalhes itens de cada categoria (atualizações com
+      os valores atual e novo de cada campo alterado)
+    - erros: todos os erros que a importação reportaria
+    """
+    if tipo not in SimuladorImportacao.TIPOS and tipo != 'auto':
+        raise HTTPException(status_code=400, detail="Tipo inválido")
+
+    if not file.filename.endswith(('.xlsx', '.xls')):
+        raise HTTPException(status_code=400, detail="Arquivo deve ser Excel (.xlsx ou .xls)")
+
+    if tipo == 'auto':
+        try:
+            df, nomes_planilhas = await run_in_threadpool(ler_amostra, file)
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f'Erro ao processar arquivo: {str(e)}')
+        tipo = detectar_tipo_arquivo(file.filename, df, nomes_planilhas)
+        if tipo == 'desconhecido':
+            raise HTTPException(
+                status_code=400,
+                detail="Não foi possível detectar o tipo de dados. Use análise manual ou verifique o arquivo."
+            )
+
+    file.file.seek(0)
+    simulador = SimuladorImportacao(db, limite_detalhes=max(limite_detalhes, 0))
+    result = await run_in_threadpool(simulador.simular, tipo, file.file)
+    result['arquivo'] = file.filename
+    return jsonable_encoder(result)
+
+
+@router.get("/similares")
+async def buscar_similares(
+    tipo: str,
+    termo: str,
+    limite: int = 5,
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(require_admin)
+) -> Dict[str, Any]:
+    """
+    Sugere imóveis ou proprietários com nome parecido ao termo, ordenados por similaridade
+
+    **Tipos:** imoveis (nome ou endereço) ou proprietarios
+    """
+    if tipo not in BuscaSimilaridade.COLUNAS:
+        raise HTTPException(status_code=400, detail="Tipo inválido")
+    candidatos = await run_in_threadpool(BuscaSimilaridade(db).buscar, tipo, termo, max(min(limite, 50), 1))
+    return {
+        'tipo': tipo,
+        'termo': termo,
+        'candidatos': [c._asdict() for c in candidatos]
+    }
+
+
 @router.post("/analisar")
 async def analisar_arquivo(
     file: UploadFile = File(...),
@@ -275,8 +388,7 @@ async def analisar_arquivo(
         )
     
     try:
-        content = await file.read()
-        df = pd.read_excel(BytesIO(content), sheet_name=0)
+        df, _ = await run_in_threadpool(ler_amostra, file, None)
         
         # Limpar dados para evitar problemas de serialização JSON
         df = df.replace([float('inf'), float('-inf')], None)  # Remover infinitos
@@ -355,14 +467,15 @@ async def analisar_arquivo(
         )
 
 
-def detectar_tipo_arquivo(filename: str, df: pd.DataFrame) -> str:
+def detectar_tipo_arquivo(filename: str, df: pd.DataFrame, nomes_planilhas: Optional[List[str]] = None) -> str:
     """
     Detecta automaticamente o tipo de dados baseado no nome do arquivo e conteúdo
     
     **Critérios de detecção:**
     - Nome do arquivo: proprietarios, imoveis, participacoes, alugueis
     - Colunas específicas para cada tipo
-    - Conteúdo dos dados
+    - Conteúdo dos dados (basta uma amostra das primeiras linhas)
+    - Número de planilhas da pasta de trabalho
     """
     filename_lower = filename.lower()
     
@@ -401,13 +514,12 @@ def detectar_tipo_arquivo(filename: str, df: pd.DataFrame) -> str:
             if abs(media_valor - 1.0) < 0.1:  # Valores próximos de 1.0
                 return 'participacoes'
     
-    # Aluguéis: múltiplas planilhas ou formato especial
-    try:
-        xl = pd.ExcelFile(BytesIO(df.to_excel().encode()))
-        if len(xl.sheet_names) > 1:
-            return 'alugueis'
-    except:
-        pass
+    # Aluguéis: múltiplas planilhas (uma por mês)
+    if nomes_planilhas and len(nomes_planilhas) > 1:
+        return 'alugueis'
+    
+    if df.empty:
+        return 'desconhecido'
     
     # Fallback: tentar detectar por conteúdo
     sample_text = ' '.join([str(val) for val in df.iloc[0].values if pd.notna(val)]).lower()
@@ -442,11 +554,13 @@ async def upload_arquivo_unificado(
         )
     
     try:
-        content = await file.read()
-        df = pd.read_excel(BytesIO(content), sheet_name=0)
+        # Detecção e preview usam uma amostra lida em streaming; o total de linhas é
+        # contado sem materializar a planilha
+        df, nomes_planilhas = await run_in_threadpool(ler_amostra, file)
+        total_linhas = await run_in_threadpool(contar_linhas_upload, file)
         
         # Detectar tipo
-        tipo_detectado = detectar_tipo_arquivo(file.filename, df)
+        tipo_detectado = detectar_tipo_arquivo(file.filename, df, nomes_planilhas)
         
         if tipo_detectado == 'desconhecido':
             # Sanitizar preview para evitar valores não serializáveis
@@ -542,7 +656,7 @@ async def upload_arquivo_unificado(
             safe_preview.append(safe_row)
 
         analise = {
-            'total_linhas': len(df),
+            'total_linhas': total_linhas,
             'total_colunas': len(df.columns),
             'colunas_encontradas': [str(c) for c in df.columns],
             'tipo_detectado': tipo_detectado,
@@ -595,6 +709,8 @@ async def upload_arquivo_unificado(
 async def importar_arquivo_unificado(
     file: UploadFile = File(...),
     confirmar_importacao: bool = False,
+    paralelo: bool = False,
+    forcar: bool = False,
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(require_admin)
 ) -> Dict[str, Any]:
@@ -604,6 +720,8 @@ async def importar_arquivo_unificado(
     **Parâmetros:**
     - file: Arquivo Excel
     - confirmar_importacao: true para executar a importação, false para apenas analisar
+    - paralelo: true para processar as planilhas de aluguéis em paralelo
+    - forcar: true para reprocessar planilhas de aluguéis já importadas sem alterações
     
     **Processo:**
     1. Detecta automaticamente o tipo de dados
@@ -618,11 +736,10 @@ async def importar_arquivo_unificado(
         )
     
     try:
-        content = await file.read()
-        df = pd.read_excel(BytesIO(content), sheet_name=0)
+        df, nomes_planilhas = await run_in_threadpool(ler_amostra, file)
         
         # Detectar tipo
-        tipo_detectado = detectar_tipo_arquivo(file.filename, df)
+        tipo_detectado = detectar_tipo_arquivo(file.filename, df, nomes_planilhas)
         
         if tipo_detectado == 'desconhecido':
             raise HTTPException(
@@ -631,16 +748,26 @@ async def importar_arquivo_unificado(
             )
         
         service = ImportacaoAvancadaService()
+        file.file.seek(0)
         
         # Executar importação baseada no tipo
         if tipo_detectado == 'proprietarios':
-            result = service.importar_proprietarios(content, db)
+            result = await run_in_threadpool(
+                service.importar_proprietarios, file.file, db, nome_arquivo=file.filename
+            )
         elif tipo_detectado == 'imoveis':
-            result = service.importar_imoveis(content, db)
+            result = await run_in_threadpool(
+                service.importar_imoveis, file.file, db, nome_arquivo=file.filename
+            )
         elif tipo_detectado == 'participacoes':
-            result = service.importar_participacoes(content, db)
+            result = await run_in_threadpool(
+                service.importar_participacoes, file.file, db, nome_arquivo=file.filename
+            )
         elif tipo_detectado == 'alugueis':
-            result = service.importar_alugueis(content, db)
+            result = await run_in_threadpool(
+                service.importar_alugueis, file.file, db, nome_arquivo=file.filename,
+                paralelo=paralelo, forcar=forcar
+            )
         else:
             raise HTTPException(status_code=400, detail=f"Tipo não suportado: {tipo_detectado}")
         
@@ -656,3 +783,196 @@ async def importar_arquivo_unificado(
             status_code=500,
             detail=f'Erro interno durante importação: {str(e)}'
         )
+
+
+@router.post("/jobs/{tipo}")
+async def criar_job_importacao(
+    tipo: str,
+    file: UploadFile = File(...),
+    paralelo: bool = False,
+    tamanho_lote: Optional[int] = None,
+    forcar: bool = False,
+    current_user: Usuario = Depends(require_admin)
+) -> Dict[str, Any]:
+    """
+    Agenda a importação em segundo plano e retorna imediatamente o id do job
+
+    **Tipos:** proprietarios, imoveis, participacoes, alugueis ou auto (detecção automática)
+
+    **paralelo=true:** para aluguéis, processa as planilhas em paralelo
+
+    **forcar=true:** para aluguéis, reprocessa também as planilhas sem alterações
+
+    **tamanho_lote:** linhas por commit (padrão IMPORT_CHUNK_SIZE; 0 = commit único)
+
+    O andamento é consultado em GET /jobs/{job_id}
+    """
+    if tipo not in TIPOS_IMPORTACAO and tipo != 'auto':
+        raise HTTPException(status_code=400, detail="Tipo inválido")
+
+    if not file.filename.endswith(('.xlsx', '.xls')):
+        raise HTTPException(status_code=400, detail="Arquivo deve ser Excel (.xlsx ou .xls)")
+
+    if tipo == 'auto':
+        try:
+            df, nomes_planilhas = await run_in_threadpool(ler_amostra, file)
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f'Erro ao processar arquivo: {str(e)}')
+        tipo = detectar_tipo_arquivo(file.filename, df, nomes_planilhas)
+        if tipo == 'desconhecido':
+            raise HTTPException(
+                status_code=400,
+                detail="Não foi possível detectar o tipo de dados. Use análise manual ou verifique o arquivo."
+            )
+
+    opcoes = {'paralelo': paralelo, 'forcar': forcar} if tipo == 'alugueis' else {}
+    if tamanho_lote is not None:
+        opcoes['tamanho_lote'] = tamanho_lote
+    job = await run_in_threadpool(
+        gerenciador_importacoes.submeter, tipo, file.file, file.filename, current_user.id, opcoes
+    )
+    return jsonable_encoder({
+        'success': True,
+        'message': 'Importação agendada',
+        'job': job.to_dict(incluir_resultado=False)
+    })
+
+
+@router.get("/jobs")
+async def listar_jobs_importacao(
+    current_user: Usuario = Depends(require_admin)
+) -> Dict[str, Any]:
+    """Lista os jobs de importação recentes, do mais novo para o mais antigo"""
+    jobs = gerenciador_importacoes.listar()
+    return jsonable_encoder({'jobs': [j.to_dict(incluir_resultado=False) for j in jobs]})
+
+
+@router.get("/jobs/{job_id}")
+async def obter_job_importacao(
+    job_id: str,
+    current_user: Usuario = Depends(require_admin)
+) -> Dict[str, Any]:
+    """Progresso (planilha atual, linhas processadas, erros até o momento) e resultado final do job"""
+    job = gerenciador_importacoes.obter(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job de importação não encontrado")
+    return jsonable_encoder(job.to_dict())
+
+
+@router.post("/jobs/{job_id}/cancelar")
+async def cancelar_job_importacao(
+    job_id: str,
+    current_user: Usuario = Depends(require_admin)
+) -> Dict[str, Any]:
+    """
+    Cancela um job que ainda não chegou ao commit final; o lote em andamento é desfeito
+    e os lotes já gravados podem ser retomados pelo checkpoint
+    """
+    job = gerenciador_importacoes.obter(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job de importação não encontrado")
+    if not gerenciador_importacoes.cancelar(job_id):
+        raise HTTPException(
+            status_code=409,
+            detail=f"Job não pode mais ser cancelado (status: {job.status}, etapa: {job.progresso.etapa})"
+        )
+    return {'success': True, 'message': 'Cancelamento solicitado', 'job_id': job_id}
+
+
+def checkpoint_to_dict(checkpoint: ImportacaoCheckpoint) -> Dict[str, Any]:
+    return {
+        'id': checkpoint.id,
+        'tipo': checkpoint.tipo,
+        'arquivo': checkpoint.nome_arquivo,
+        'hash_arquivo': checkpoint.hash_arquivo,
+        'status': checkpoint.status,
+        'planilha_indice': checkpoint.planilha_indice,
+        'planilha': checkpoint.planilha,
+        'linha': checkpoint.linha,
+        'registros_gravados': checkpoint.registros_gravados,
+        'lotes_gravados': checkpoint.lotes_gravados,
+        'mensagem': checkpoint.mensagem,
+        'criado_em': checkpoint.criado_em,
+        'atualizado_em': checkpoint.atualizado_em
+    }
+
+
+@router.get("/checkpoints")
+async def listar_checkpoints(
+    status: Optional[str] = None,
+    limit: int = 50,
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(require_admin)
+) -> Dict[str, Any]:
+    """Lista os checkpoints de importação mais recentes (filtro opcional por status)"""
+    query = db.query(ImportacaoCheckpoint)
+    if status:
+        query = query.filter(ImportacaoCheckpoint.status == status)
+    checkpoints = query.order_by(ImportacaoCheckpoint.id.desc()).limit(limit).all()
+    return jsonable_encoder({'checkpoints': [checkpoint_to_dict(c) for c in checkpoints]})
+
+
+@router.get("/checkpoints/{checkpoint_id}")
+async def obter_checkpoint(
+    checkpoint_id: int,
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(require_admin)
+) -> Dict[str, Any]:
+    """Posição gravada (planilha/linha), registros e lotes já confirmados de uma importação"""
+    checkpoint = db.query(ImportacaoCheckpoint).filter(ImportacaoCheckpoint.id == checkpoint_id).first()
+    if not checkpoint:
+        raise HTTPException(status_code=404, detail="Checkpoint não encontrado")
+    return jsonable_encoder(checkpoint_to_dict(checkpoint))
+
+
+@router.post("/checkpoints/{checkpoint_id}/retomar")
+async def retomar_importacao(
+    checkpoint_id: int,
+    file: UploadFile = File(...),
+    paralelo: bool = False,
+    tamanho_lote: Optional[int] = None,
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(require_admin)
+) -> Dict[str, Any]:
+    """
+    Retoma uma importação interrompida a partir do último lote gravado
+
+    O mesmo arquivo deve ser enviado novamente (verificado pelo hash). A importação roda
+    em segundo plano como um job; as linhas já gravadas não são reprocessadas.
+    """
+    checkpoint = db.query(ImportacaoCheckpoint).filter(ImportacaoCheckpoint.id == checkpoint_id).first()
+    if not checkpoint:
+        raise HTTPException(status_code=404, detail="Checkpoint não encontrado")
+    if checkpoint.status not in CheckpointImportacao.STATUS_RETOMAVEIS:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Checkpoint não pode ser retomado (status: {checkpoint.status})"
+        )
+    # 'em_andamento' só é retomável se nenhuma importação viva é dona do checkpoint
+    if gerenciador_importacoes.checkpoint_ocupado(checkpoint.id):
+        raise HTTPException(status_code=409, detail="Esta importação já está em execução")
+
+    hash_enviado = await run_in_threadpool(hash_arquivo, file.file)
+    if hash_enviado != checkpoint.hash_arquivo:
+        raise HTTPException(
+            status_code=409,
+            detail="O arquivo enviado não corresponde ao arquivo da importação interrompida"
+        )
+
+    opcoes = {'id_checkpoint': checkpoint.id}
+    if checkpoint.tipo == 'alugueis':
+        opcoes['paralelo'] = paralelo
+    if tamanho_lote is not None:
+        opcoes['tamanho_lote'] = tamanho_lote
+    try:
+        job = await run_in_threadpool(
+            gerenciador_importacoes.submeter, checkpoint.tipo, file.file, file.filename, current_user.id, opcoes
+        )
+    except CheckpointEmUso:
+        raise HTTPException(status_code=409, detail="Esta importação já está em execução")
+    return jsonable_encoder({
+        'success': True,
+        'message': f'Importação retomada a partir da planilha {checkpoint.planilha_indice + 1}, linha {checkpoint.linha + 1}',
+        'checkpoint': checkpoint_to_dict(checkpoint),
+        'job': job.to_dict(incluir_resultado=False)
+    })
@@ -0,0 +1,33 @@
+from typing import Any, Dict
+from fastapi import APIRouter, Depends
+from app.core.auth import cache_usuarios_autenticados, get_current_admin_user
+from app.core.database import engine, engine_assincrona, metricas_pool, metricas_pool_assincrono
+from app.core.permissions import cache_permissoes
+from app.models.usuario import Usuario
+from app.services.hash_senhas import cache_credenciais, servico_hash_senhas
+
+router = APIRouter()
+
+
+@router.get("/")
+def read_metricas(current_user: Usuario = Depends(get_current_admin_user)) -> Dict[str, Any]:
+    """
+    Métricas internas dos serviços (apenas administradores).
+
+    hash_senhas: processos, tarefas pendentes e em fila, e latência (média, p50, p95,
+    máximo) das últimas operações de hash e de verificação de senha.
+    cache_credenciais: entradas, acertos e falhas do cache de logins verificados.
+    cache_usuarios_autenticados e cache_permissoes: idem para os caches de usuários por
+    (id, versão do token) e de permissões financeiras por usuário.
+    banco: estado do pool de conexões (em uso, ociosas, overflow), checkouts, esgotamentos
+    (timeouts) e tempo de espera por uma conexão.
+    banco_assincrono: idem para o pool da engine assíncrona (rotas com get_async_db).
+    """
+    return {
+        'hash_senhas': servico_hash_senhas.metricas(),
+        'cache_credenciais': cache_credenciais.metricas(),
+        'cache_usuarios_autenticados': cache_usuarios_autenticados.metricas(),
+        'cache_permissoes': cache_permissoes.metricas(),
+        'banco': metricas_pool.resumo(engine.pool),
+        'banco_assincrono': metricas_pool_assincrono.resumo(engine_assincrona.pool),
+    }
@@ -3,8 +3,8 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from app.core.database import get_db
 from app.core.auth import get_current_active_user, get_current_admin_user
-from app.core.permissions import filter_by_permissions, can_edit_financial_data
-from app.schemas import Participacao, ParticipacaoCreate, ParticipacaoUpdate
+from app.core.permissions import filter_by_permissions, can_edit_financial_data, exigir_permissao_lote
+from app.schemas import Participacao, ParticipacaoCreate, ParticipacaoUpdate, ParticipacaoLoteUpdate, LoteIds
 from app.models.participacao import Participacao as ParticipacaoModel
 from app.models.usuario import Usuario
 from app.services.participacao_service import ParticipacaoService
@@ -109,6 +109,79 @@ def create_participacao(
     db.refresh(db_participacao)
     return db_participacao
 
+def _participacoes_lote(db: Session, ids: List[int]) -> List[ParticipacaoModel]:
+    """Participações do lote; 404 listando os ids inexistentes"""
+    participacoes = db.query(ParticipacaoModel).filter(ParticipacaoModel.id.in_(set(ids))).all()
+    faltando = sorted(set(ids) - {p.id for p in participacoes})
+    if faltando:
+        raise HTTPException(
+            status_code=404,
+            detail={"mensagem": f"{len(faltando)} participação(ões) não encontrada(s)", "ids": faltando}
+        )
+    return participacoes
+
+@router.put("/lote")
+def update_participacoes_lote(
+    lote: ParticipacaoLoteUpdate,
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_current_active_user)
+):
+    """
+    Atualiza várias participações em uma transação.
+
+    A soma de cada imóvel/data é validada com o estado final do lote (ex.: redistribuir
+    percentuais entre proprietários), e não a cada registro. Se algum registro não existir,
+    não puder ser editado ou deixar a soma inválida, nada é alterado.
+    """
+    itens = {item.id: item.dict(exclude_unset=True, exclude={'id'}) for item in lote.itens}
+    participacoes = _participacoes_lote(db, list(itens))
+    exigir_permissao_lote(current_user, participacoes, db, 'editar')
+
+    # Mudar percentual ou data afeta o grupo (imóvel, data) de origem e o de destino
+    alteradas = []
+    grupos_originais = set()
+    for db_participacao in participacoes:
+        update_data = itens[db_participacao.id]
+        if update_data.get('participacao') is not None or update_data.get('data_cadastro') is not None:
+            grupos_originais.add((db_participacao.id_imovel, db_participacao.data_cadastro))
+            alteradas.append(db_participacao)
+        for field, value in update_data.items():
+            setattr(db_participacao, field, value)
+
+    try:
+        ParticipacaoService.validar_lote(db, alteradas, grupos_originais)
+    except HTTPException:
+        db.rollback()
+        raise
+
+    db.commit()
+    return {
+        "message": f"{len(participacoes)} participação(ões) atualizada(s)",
+        "atualizados": len(participacoes),
+        "ids": sorted(itens)
+    }
+
+@router.delete("/lote")
+def delete_participacoes_lote(
+    lote: LoteIds,
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_current_active_user)
+):
+    """Exclui várias participações em uma transação (tudo ou nada)"""
+    participacoes = _participacoes_lote(db, lote.ids)
+    exigir_permissao_lote(current_user, participacoes, db, 'editar')
+
+    ids = sorted(p.id for p in participacoes)
+    excluidos = db.query(ParticipacaoModel).filter(
+        ParticipacaoModel.id.in_(ids)
+    ).delete(synchronize_session=False)
+    db.commit()
+    return {
+        "message": f"{excluidos} participação(ões) excluída(s)",
+        "excluidos": excluidos,
+        "ids": ids
+    }
+
 @router.get("/{participacao_id}", response_model=Participacao)
 def read_participacao(
     participacao_id: int,
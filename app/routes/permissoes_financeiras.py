@@ -3,7 +3,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from app.core.database import get_db
 from app.core.auth import get_current_active_user
-from app.core.permissions import require_admin
+from app.core.permissions import invalidar_permissoes, require_admin
 from app.schemas import PermissaoFinanceira, PermissaoFinanceiraCreate, PermissaoFinanceiraUpdate, PermissaoFinanceiraBulkCreate, PermissaoFinanceiraOut, PermissaoTarget
 from app.models.permissao_financeira import PermissaoFinanceira as PermissaoFinanceiraModel
 from app.models.usuario import Usuario
@@ -87,6 +87,7 @@ def create_permissao_financeira(permissao: PermissaoFinanceiraCreate, db: Sessio
     db_permissao = PermissaoFinanceiraModel(**permissao.dict())
     db.add(db_permissao)
     db.commit()
+    invalidar_permissoes(db_permissao.id_usuario)
     db.refresh(db_permissao)
 
     # Enriquecer
@@ -118,6 +119,7 @@ def update_permissao_financeira(perm_id: int, permissao: PermissaoFinanceiraUpda
         setattr(db_perm, field, value)
 
     db.commit()
+    invalidar_permissoes(db_perm.id_usuario)
     db.refresh(db_perm)
 
     # Enriquecer
@@ -166,6 +168,7 @@ def bulk_create_permissoes(payload: PermissaoFinanceiraBulkCreate, db: Session =
             db.add(db_perm)
 
         db.commit()
+        invalidar_permissoes(payload.id_usuario)
         db.refresh(db_perm)
 
         usuario = db.query(Usuario).filter(Usuario.id == db_perm.id_usuario).first()
@@ -187,8 +190,10 @@ def delete_permissao_financeira(perm_id: int, db: Session = Depends(get_db), cur
     if not db_perm:
         raise HTTPException(status_code=404, detail="Permissão não encontrada")
 
+    id_usuario = db_perm.id_usuario
     db.delete(db_perm)
     db.commit()
+    invalidar_permissoes(id_usuario)
     return {"message": "Permissão deletada com sucesso"}
 
 
@@ -257,4 +262,5 @@ def create_bulk_permissoes_financeiras(bulk_data: PermissaoFinanceiraBulkCreate,
         ))
 
     db.commit()  # Commit manual para garantir persistência
+    invalidar_permissoes(bulk_data.id_usuario)
     return enriched
\ No newline at end of file
@@ -1,69 +1,78 @@
 from fastapi import APIRouter, Depends, Query, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import func, extract, and_, or_, exists
+from sqlalchemy import func, and_, or_, exists, select
 from typing import Optional, List
 from datetime import datetime, date
-from app.core.database import get_db
-from app.core.auth import get_current_active_user
+from app.core.database import get_async_db, get_db
+from app.core.auth import get_current_active_user, get_current_active_user_async
 from app.models.usuario import Usuario
 from app.models.imovel import Imovel
 from app.models.aluguel import AluguelMensal
 from app.models.participacao import Participacao
 from app.models.alias import Alias
 from app.models.alias_proprietario import AliasProprietario
-from app.core.permissions import get_permitted_proprietarios
+from app.core.permissions import filtro_proprietarios, proprietarios_permitidos
+from app.core.periodo import filtro_periodo
+from app.services.resumo_receitas import ResumoReceitasService
 
 router = APIRouter()
 
 @router.get("/receitas-periodo")
-def get_receitas_por_periodo(
+async def get_receitas_por_periodo(
     data_inicio: date = Query(..., description="Data inicial do período"),
     data_fim: date = Query(..., description="Data final do período"),
     id_proprietario: Optional[int] = Query(None, description="ID do proprietário (opcional)"),
     id_imovel: Optional[int] = Query(None, description="ID do imóvel (opcional)"),
     id_alias: Optional[int] = Query(None, description="ID do alias (opcional)"),
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Usuario = Depends(get_current_active_user_async)
 ):
     """
     Relatório de receitas por período com filtros avançados
     """
-    # Base query
+    return await db.run_sync(
+        _receitas_por_periodo, current_user, data_inicio, data_fim, id_proprietario, id_imovel, id_alias
+    )
+
+def _receitas_por_periodo(
+    db: Session,
+    current_user: Usuario,
+    data_inicio: date,
+    data_fim: date,
+    id_proprietario: Optional[int] = None,
+    id_imovel: Optional[int] = None,
+    id_alias: Optional[int] = None
+):
+    # Base query: totais mensais prontos (receitas_mensais_resumo)
+    receitas = ResumoReceitasService.fonte(data_inicio, data_fim)
     query = db.query(
-        AluguelMensal.data_referencia,
-        func.sum(AluguelMensal.valor_total).label('total_receitas'),
-        func.count(func.distinct(AluguelMensal.id_imovel)).label('imoveis_ativos'),
-        func.count(func.distinct(AluguelMensal.id_proprietario)).label('proprietarios_ativos')
-    ).filter(
-        AluguelMensal.data_referencia.between(data_inicio, data_fim)
+        receitas.c.mes,
+        func.sum(receitas.c.valor_total).label('total_receitas'),
+        func.count(func.distinct(receitas.c.id_imovel)).label('imoveis_ativos'),
+        func.count(func.distinct(receitas.c.id_proprietario)).label('proprietarios_ativos')
     )
 
     # Aplicar filtros
     if id_proprietario:
-        query = query.filter(AluguelMensal.id_proprietario == id_proprietario)
+        query = query.filter(receitas.c.id_proprietario == id_proprietario)
 
     if id_imovel:
-        query = query.filter(AluguelMensal.id_imovel == id_imovel)
+        query = query.filter(receitas.c.id_imovel == id_imovel)
 
     if id_alias:
         # Buscar proprietários do alias
         proprietarios_alias = db.query(AliasProprietario.id_proprietario).filter(
             AliasProprietario.id_alias == id_alias
         ).subquery()
-        query = query.filter(AluguelMensal.id_proprietario.in_(proprietarios_alias))
+        query = query.filter(receitas.c.id_proprietario.in_(proprietarios_alias))
 
     # Agrupar por mês/ano
-    query = query.group_by(
-        extract('year', AluguelMensal.data_referencia),
-        extract('month', AluguelMensal.data_referencia)
-    ).order_by(
-        extract('year', AluguelMensal.data_referencia),
-        extract('month', AluguelMensal.data_referencia)
-    )
+    query = query.group_by(receitas.c.mes).order_by(receitas.c.mes)
 
     # Aplicar filtro de permissões: usuários comuns só veem proprietários permitidos (nível DB)
     if current_user.tipo != 'administrador':
-        permitted = get_permitted_proprietarios(current_user, db)
+        permitted = proprietarios_permitidos(current_user, db)
         if not permitted:
             return {
                 "filtros": {
@@ -92,7 +101,7 @@ def get_receitas_por_periodo(
                     "total_geral": 0
                 }
         else:
-            query = query.filter(AluguelMensal.id_proprietario.in_(permitted))
+            query = query.filter(filtro_proprietarios(current_user, receitas.c.id_proprietario))
 
     resultados = query.all()
 
@@ -100,7 +109,7 @@ def get_receitas_por_periodo(
     dados = []
     for row in resultados:
         dados.append({
-            "periodo": row.data_referencia.strftime("%Y-%m"),
+            "periodo": row.mes.strftime("%Y-%m"),
             "total_receitas": float(row.total_receitas or 0),
             "imoveis_ativos": row.imoveis_ativos,
             "proprietarios_ativos": row.proprietarios_ativos
@@ -119,28 +128,37 @@ def get_receitas_por_periodo(
     }
 
 @router.get("/receitas-proprietario")
-def get_receitas_por_proprietario(
+async def get_receitas_por_proprietario(
     data_inicio: date = Query(..., description="Data inicial do período"),
     data_fim: date = Query(..., description="Data final do período"),
     id_alias: Optional[int] = Query(None, description="ID do alias (opcional)"),
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Usuario = Depends(get_current_active_user_async)
 ):
     """
     Relatório de receitas por proprietário
     """
-    # Base query com join para nome do proprietário
+    return await db.run_sync(_receitas_por_proprietario, current_user, data_inicio, data_fim, id_alias)
+
+def _receitas_por_proprietario(
+    db: Session,
+    current_user: Usuario,
+    data_inicio: date,
+    data_fim: date,
+    id_alias: Optional[int] = None
+):
+    # Base query com join para nome do proprietário (totais de receitas_mensais_resumo)
+    receitas = ResumoReceitasService.fonte(data_inicio, data_fim)
     query = db.query(
         Usuario.id,
         Usuario.nome,
         Usuario.sobrenome,
-        func.sum(AluguelMensal.valor_proprietario).label('total_receitas'),
-        func.count(func.distinct(AluguelMensal.id_imovel)).label('imoveis'),
-        func.avg(AluguelMensal.taxa_administracao).label('taxa_media')
+        func.sum(receitas.c.valor_proprietario).label('total_receitas'),
+        func.count(func.distinct(receitas.c.id_imovel)).label('imoveis'),
+        func.sum(receitas.c.taxa_administracao).label('taxa_total'),
+        func.sum(receitas.c.quantidade).label('registros')
     ).join(
-        AluguelMensal, Usuario.id == AluguelMensal.id_proprietario
-    ).filter(
-        AluguelMensal.data_referencia.between(data_inicio, data_fim)
+        receitas, Usuario.id == receitas.c.id_proprietario
     )
 
     # Filtro por alias
@@ -152,12 +170,12 @@ def get_receitas_por_proprietario(
 
     # Agrupar por proprietário
     query = query.group_by(Usuario.id, Usuario.nome, Usuario.sobrenome).order_by(
-        func.sum(AluguelMensal.valor_proprietario).desc()
+        func.sum(receitas.c.valor_proprietario).desc()
     )
 
     # Aplicar filtro de permissões a nível de DB para proprietários
     if current_user.tipo != 'administrador':
-        permitted = get_permitted_proprietarios(current_user, db)
+        permitted = proprietarios_permitidos(current_user, db)
         if not permitted:
             return {
                 "filtros": {
@@ -169,7 +187,7 @@ def get_receitas_por_proprietario(
                 "total_geral": 0
             }
 
-        query = query.filter(Usuario.id.in_(permitted))
+        query = query.filter(filtro_proprietarios(current_user, Usuario.id))
 
     resultados = query.all()
 
@@ -180,7 +198,7 @@ def get_receitas_por_proprietario(
             "nome": f"{row.nome} {row.sobrenome or ''}".strip(),
             "total_receitas": float(row.total_receitas or 0),
             "imoveis": row.imoveis,
-            "taxa_media": float(row.taxa_media or 0)
+            "taxa_media": float(row.taxa_total or 0) / row.registros if row.registros else 0.0
         })
 
     return {
@@ -194,48 +212,52 @@ def get_receitas_por_proprietario(
     }
 
 @router.get("/performance-imoveis")
-def get_performance_imoveis(
+async def get_performance_imoveis(
     data_inicio: date = Query(..., description="Data inicial do período"),
     data_fim: date = Query(..., description="Data final do período"),
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Usuario = Depends(get_current_active_user_async)
 ):
     """
     Relatório de performance dos imóveis
     """
+    return await db.run_sync(_performance_imoveis, current_user, data_inicio, data_fim)
+
+def _performance_imoveis(
+    db: Session,
+    current_user: Usuario,
+    data_inicio: date,
+    data_fim: date
+):
+    receitas = ResumoReceitasService.fonte(data_inicio, data_fim)
     query = db.query(
         Imovel.id,
         Imovel.nome,
         Imovel.endereco,
         Imovel.tipo,
-        func.sum(AluguelMensal.valor_total).label('receita_total'),
-        func.count(AluguelMensal.id).label('meses_alugado'),
-        func.avg(AluguelMensal.valor_total).label('receita_media_mensal')
+        func.sum(receitas.c.valor_total).label('receita_total'),
+        func.sum(receitas.c.quantidade).label('meses_alugado')
     ).join(
-        AluguelMensal, Imovel.id == AluguelMensal.id_imovel
-    ).filter(
-        AluguelMensal.data_referencia.between(data_inicio, data_fim)
+        receitas, Imovel.id == receitas.c.id_imovel
     ).group_by(
         Imovel.id, Imovel.nome, Imovel.endereco, Imovel.tipo
     ).order_by(
-        func.sum(AluguelMensal.valor_total).desc()
+        func.sum(receitas.c.valor_total).desc()
     )
 
     # Aplicar filtro de permissões a nível de DB para evitar N+1
     if current_user.tipo != 'administrador':
-        permitted = get_permitted_proprietarios(current_user, db)
+        permitted = proprietarios_permitidos(current_user, db)
         if not permitted:
             # Sem permissões, retornar vazio
             return {"filtros": {"data_inicio": data_inicio.isoformat(), "data_fim": data_fim.isoformat()}, "dados": []}
 
-        # Subquery EXISTS: verificar que exista um aluguel mensal para o imóvel e um proprietario permitido
-        subq = db.query(AluguelMensal.id).filter(
-            AluguelMensal.id_imovel == Imovel.id,
-            AluguelMensal.id_proprietario.in_(permitted),
-            AluguelMensal.data_referencia.between(data_inicio, data_fim)
-        ).exists()
-
-        query = query.filter(subq)
+        # Imóveis com receita de algum proprietário permitido no período (os totais
+        # continuam considerando todos os proprietários do imóvel)
+        imoveis_permitidos = select(receitas.c.id_imovel).where(
+            filtro_proprietarios(current_user, receitas.c.id_proprietario)
+        )
+        query = query.filter(Imovel.id.in_(imoveis_permitidos))
 
     resultados = query.all()
 
@@ -248,7 +270,7 @@ def get_performance_imoveis(
             "tipo": row.tipo,
             "receita_total": float(row.receita_total or 0),
             "meses_alugado": row.meses_alugado,
-            "receita_media_mensal": float(row.receita_media_mensal or 0)
+            "receita_media_mensal": float(row.receita_total or 0) / row.meses_alugado if row.meses_alugado else 0.0
         })
 
     return {
@@ -260,15 +282,23 @@ def get_performance_imoveis(
     }
 
 @router.get("/alugueis-ativos")
-def get_alugueis_ativos(
-    mes: Optional[int] = Query(None, description="Mês (1-12)"),
+async def get_alugueis_ativos(
+    mes: Optional[int] = Query(None, ge=1, le=12, description="Mês (1-12)"),
     ano: Optional[int] = Query(None, description="Ano"),
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Usuario = Depends(get_current_active_user_async)
 ):
     """
     Relatório de aluguéis ativos
     """
+    return await db.run_sync(_alugueis_ativos, current_user, mes, ano)
+
+def _alugueis_ativos(
+    db: Session,
+    current_user: Usuario,
+    mes: Optional[int] = None,
+    ano: Optional[int] = None
+):
     hoje = datetime.now()
     if not ano:
         ano = hoje.year
@@ -285,13 +315,12 @@ def get_alugueis_ativos(
     ).join(
         Usuario, AluguelMensal.id_proprietario == Usuario.id
     ).filter(
-        extract('year', AluguelMensal.data_referencia) == ano,
-        extract('month', AluguelMensal.data_referencia) == mes
+        filtro_periodo(AluguelMensal.data_referencia, ano, mes)
     ).order_by(AluguelMensal.valor_total.desc())
 
     # Aplicar filtro de permissões (DB-level) para aluguéis ativos
     if current_user.tipo != 'administrador':
-        permitted = get_permitted_proprietarios(current_user, db)
+        permitted = proprietarios_permitidos(current_user, db)
         if not permitted:
             return {
                 "filtros": {
@@ -303,7 +332,7 @@ def get_alugueis_ativos(
                 "receita_total": 0
             }
 
-        query = query.filter(AluguelMensal.id_proprietario.in_(permitted))
+        query = query.filter(filtro_proprietarios(current_user, AluguelMensal.id_proprietario))
 
     resultados = query.all()
 
@@ -344,7 +373,7 @@ def export_receitas_periodo_excel(
     Exportar relatório de receitas por período para Excel
     """
     # Reutilizar a lógica do endpoint normal
-    data = get_receitas_por_periodo(data_inicio, data_fim, id_proprietario, id_imovel, id_alias, db, current_user)
+    data = _receitas_por_periodo(db, current_user, data_inicio, data_fim, id_proprietario, id_imovel, id_alias)
     
     # Criar DataFrame pandas
     import pandas as pd
@@ -353,7 +382,7 @@ def export_receitas_periodo_excel(
     
     # Garantir que os dados exportados respeitam permissões
     if current_user.tipo != 'administrador':
-        permitted = get_permitted_proprietarios(current_user, db)
+        permitted = proprietarios_permitidos(current_user, db)
         data["dados"] = [d for d in data["dados"] if d.get('id_proprietario') in permitted]
 
     df = pd.DataFrame(data["dados"])
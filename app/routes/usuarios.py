@@ -2,11 +2,11 @@ from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from app.core.database import get_db
-from app.core.auth import get_current_active_user, get_current_admin_user
+from app.core.auth import get_current_active_user, get_current_admin_user, invalidar_usuario_autenticado
 from app.core.permissions import filter_inactive_records
 from app.schemas import Usuario, UsuarioCreate, UsuarioUpdate
 from app.models.usuario import Usuario as UsuarioModel
-from app.core.auth import get_password_hash
+from app.services.hash_senhas import cache_credenciais, servico_hash_senhas
 
 router = APIRouter()
 
@@ -121,7 +121,7 @@ def create_usuario(
     
     # Usar senha padrão para proprietários (deve ser alterada depois)
     default_password = "123456"
-    hashed_password = get_password_hash(default_password)
+    hashed_password = servico_hash_senhas.gerar_hash_sync(default_password)
     
     db_usuario = UsuarioModel(
         username=username,
@@ -188,10 +188,20 @@ def update_usuario(
         raise HTTPException(status_code=404, detail="User not found")
     
     update_data = usuario_update.dict(exclude_unset=True)
+    # Mudar o tipo ou desativar revoga os tokens já emitidos para o usuário
+    revogar_tokens = any(
+        campo in update_data and update_data[campo] != getattr(db_usuario, campo)
+        for campo in ('tipo', 'ativo')
+    )
     for field, value in update_data.items():
         setattr(db_usuario, field, value)
+    if revogar_tokens:
+        db_usuario.versao_token = (db_usuario.versao_token or 1) + 1
     
     db.commit()
+    invalidar_usuario_autenticado(usuario_id)
+    if 'ativo' in update_data:
+        cache_credenciais.invalidar_usuario(usuario_id)
     db.refresh(db_usuario)
     
     # Conversão manual para evitar problemas de tipos
@@ -221,6 +231,8 @@ def delete_usuario(
     
     db.delete(db_usuario)
     db.commit()
+    invalidar_usuario_autenticado(usuario_id)
+    cache_credenciais.invalidar_usuario(usuario_id)
     return {"message": "User deleted successfully"}
 
 @router.get("/export")
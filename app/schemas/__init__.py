@@ -82,6 +82,16 @@ class ParticipacaoUpdate(BaseModel):
     participacao: Optional[Decimal] = Field(None, ge=0, le=100)
     data_cadastro: Optional[date] = None
 
+# Schemas para edição em lote
+class LoteIds(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=5000)
+
+class ParticipacaoLoteItem(ParticipacaoUpdate):
+    id: int
+
+class ParticipacaoLoteUpdate(BaseModel):
+    itens: List[ParticipacaoLoteItem] = Field(..., min_length=1, max_length=5000)
+
 class Participacao(ParticipacaoBase):
     id: int
 
@@ -128,9 +138,25 @@ class AluguelMensalUpdate(BaseModel):
     valor_total: Optional[Decimal] = Field(None, ge=0, le=999999999.99)
     valor_proprietario: Optional[Decimal] = Field(None, ge=0, le=999999999.99)
     taxa_administracao: Optional[Decimal] = Field(None, ge=0, le=999999999.99)
+    status: Optional[str] = Field(None, max_length=30)
+
+class AluguelMensalLoteUpdate(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=5000)
+    dados: AluguelMensalUpdate
+
+class AluguelMensalStatusLote(BaseModel):
+    """Transição de status por ids ou por filtro (mês, imóvel, proprietário)"""
+    status: str = Field(..., min_length=1, max_length=30)
+    status_atual: Optional[str] = Field(None, max_length=30)  # Só altera registros com este status
+    ids: Optional[List[int]] = Field(None, min_length=1, max_length=5000)
+    ano: Optional[int] = Field(None, ge=1900, le=2100)
+    mes: Optional[int] = Field(None, ge=1, le=12)
+    id_imovel: Optional[int] = None
+    id_proprietario: Optional[int] = None
 
 class AluguelMensal(AluguelMensalBase):
     id: int
+    status: Optional[str] = None
     criado_em: Optional[datetime] = None
     atualizado_em: Optional[datetime] = None
 
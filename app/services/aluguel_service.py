@@ -3,11 +3,12 @@ Serviço de cálculos financeiros
 Centraliza a lógica de cálculos de taxas, valores e totais
 """
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
+from sqlalchemy import func
 from typing import List, Dict, Optional
 from decimal import Decimal
 from datetime import date
 
+from app.core.periodo import filtro_periodo
 from app.models.aluguel import Aluguel
 from app.models.participacao import Participacao
 from app.models.imovel import Imovel
@@ -77,7 +78,7 @@ class AluguelService:
             func.sum(Aluguel.taxa_administracao_total).label('total_taxa'),
             func.sum(Aluguel.darf).label('total_darf')
         ).filter(
-            func.extract('year', Aluguel.data_cadastro) == ano
+            filtro_periodo(Aluguel.data_cadastro, ano)
         )
         
         if id_proprietario:
@@ -126,10 +127,7 @@ class AluguelService:
             func.sum(Aluguel.taxa_administracao_total).label('total_taxa'),
             func.sum(Aluguel.darf).label('total_darf')
         ).filter(
-            and_(
-                func.extract('year', Aluguel.data_cadastro) == ano,
-                func.extract('month', Aluguel.data_cadastro) == mes
-            )
+            filtro_periodo(Aluguel.data_cadastro, ano, mes)
         )
         
         if id_proprietario:
@@ -180,12 +178,9 @@ class AluguelService:
         ).join(
             Aluguel, Aluguel.id_proprietario == Usuario.id
         ).filter(
-            func.extract('year', Aluguel.data_cadastro) == ano
+            filtro_periodo(Aluguel.data_cadastro, ano, mes or None)
         )
         
-        if mes:
-            query = query.filter(func.extract('month', Aluguel.data_cadastro) == mes)
-        
         query = query.group_by(Usuario.id, Usuario.nome)
         
         resultados = query.all()
@@ -236,12 +231,9 @@ class AluguelService:
         ).join(
             Aluguel, Aluguel.id_imovel == Imovel.id
         ).filter(
-            func.extract('year', Aluguel.data_cadastro) == ano
+            filtro_periodo(Aluguel.data_cadastro, ano, mes or None)
         )
         
-        if mes:
-            query = query.filter(func.extract('month', Aluguel.data_cadastro) == mes)
-        
         query = query.group_by(Imovel.id, Imovel.nome, Imovel.endereco)
         
         resultados = query.all()
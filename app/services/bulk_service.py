@@ -0,0 +1,179 @@
+"""
+Serviço de escrita em massa
+Operações set-based para gravar muitos registros com poucas idas ao banco
+"""
+from typing import List, Dict, Any, Iterable
+import io
+
+from sqlalchemy.orm import Session
+from sqlalchemy import Table, func, insert as sa_insert, tuple_
+
+from app.models.aluguel import AluguelMensal
+from app.services.resumo_receitas import ResumoReceitasService
+
+
+class BulkService:
+    """Serviço para inserções e atualizações em lote"""
+
+    TAMANHO_LOTE = 500  # Linhas por comando (limite de parâmetros do SQLite)
+
+    CHAVE_ALUGUEL_MENSAL = ('id_imovel', 'id_proprietario', 'data_referencia')
+    CAMPOS_ATUALIZAVEIS_ALUGUEL_MENSAL = ('valor_total', 'valor_proprietario', 'taxa_administracao')
+
+    @staticmethod
+    def _valor_copy(valor) -> str:
+        """Campo no formato CSV do COPY: vazio sem aspas é NULL, textos sempre entre aspas"""
+        if valor is None:
+            return ''
+        if isinstance(valor, bool):
+            return 't' if valor else 'f'
+        if isinstance(valor, (int, float)):
+            return str(valor)
+        return '"' + str(valor).replace('"', '""') + '"'
+
+    @staticmethod
+    def _copy_disponivel(db: Session):
+        """Cursor psycopg2 capaz de COPY na transação da sessão, ou None"""
+        if db.get_bind().dialect.name != 'postgresql':
+            return None
+        conexao = db.connection().connection.driver_connection
+        cursor = conexao.cursor()
+        if not hasattr(cursor, 'copy_expert'):
+            cursor.close()
+            return None
+        return cursor
+
+    @staticmethod
+    def inserir(db: Session, tabela: Table, registros: List[Dict[str, Any]]) -> int:
+        """
+        Insere muitos registros novos de uma vez
+
+        No PostgreSQL com psycopg2 usa COPY FROM STDIN (na mesma transação da sessão); nos
+        demais casos, INSERT com executemany em lotes. Colunas omitidas recebem o default
+        do servidor. Todos os registros devem ter as mesmas chaves.
+
+        Returns:
+            Número de registros inseridos
+        """
+        if not registros:
+            return 0
+        colunas = list(registros[0])
+
+        cursor = BulkService._copy_disponivel(db)
+        if cursor is not None:
+            buffer = io.StringIO()
+            for registro in registros:
+                buffer.write(','.join(BulkService._valor_copy(registro[c]) for c in colunas))
+                buffer.write('\n')
+            buffer.seek(0)
+            try:
+                cursor.copy_expert(
+                    f"COPY {tabela.name} ({', '.join(colunas)}) FROM STDIN WITH (FORMAT csv)",
+                    buffer
+                )
+            finally:
+                cursor.close()
+            return len(registros)
+
+        for inicio in range(0, len(registros), BulkService.TAMANHO_LOTE):
+            db.execute(sa_insert(tabela), registros[inicio:inicio + BulkService.TAMANHO_LOTE])
+        return len(registros)
+
+    @staticmethod
+    def buscar_existentes(db: Session, coluna, valores: Iterable[Any], retorno=None) -> Dict[Any, Any]:
+        """
+        Consulta quais valores já existem na coluna com poucas consultas IN (em lotes)
+
+        Returns:
+            Dict valor -> valor da coluna `retorno` (ou o próprio valor, sem `retorno`)
+        """
+        valores = [v for v in dict.fromkeys(valores) if v is not None]
+        retorno = coluna if retorno is None else retorno
+        existentes = {}
+        for inicio in range(0, len(valores), BulkService.TAMANHO_LOTE):
+            lote = valores[inicio:inicio + BulkService.TAMANHO_LOTE]
+            for valor, extra in db.query(coluna, retorno).filter(coluna.in_(lote)).all():
+                existentes.setdefault(valor, extra)
+        return existentes
+
+    @staticmethod
+    def _insert_com_conflito(dialeto: str):
+        """Retorna o construtor de INSERT com suporte a ON CONFLICT para o dialeto, se houver"""
+        if dialeto == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+            return insert
+        if dialeto == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+            return insert
+        return None
+
+    @staticmethod
+    def upsert_alugueis_mensais(db: Session, registros: List[Dict[str, Any]]) -> int:
+        """
+        Insere ou atualiza aluguéis mensais pela chave (id_imovel, id_proprietario, data_referencia)
+
+        Usa INSERT ... ON CONFLICT DO UPDATE no PostgreSQL e no SQLite. O status de pagamento
+        de registros existentes é preservado; apenas os valores são atualizados.
+
+        Args:
+            db: Sessão do banco
+            registros: Dicts com id_imovel, id_proprietario, data_referencia, valor_total,
+                valor_proprietario e taxa_administracao
+
+        O resumo mensal de receitas das chaves gravadas é recalculado na mesma transação.
+
+        Returns:
+            Número de registros enviados ao banco (após remover chaves repetidas)
+        """
+        # A mesma chave não pode aparecer duas vezes no mesmo comando; a última ocorrência vence
+        por_chave = {}
+        for registro in registros:
+            chave = tuple(registro[c] for c in BulkService.CHAVE_ALUGUEL_MENSAL)
+            por_chave[chave] = registro
+        linhas = list(por_chave.values())
+        if not linhas:
+            return 0
+
+        insert = BulkService._insert_com_conflito(db.get_bind().dialect.name)
+        if insert is None:
+            BulkService._upsert_alugueis_mensais_orm(db, linhas)
+            ResumoReceitasService.recalcular_chaves(db, por_chave)
+            return len(linhas)
+
+        tabela = AluguelMensal.__table__
+        for inicio in range(0, len(linhas), BulkService.TAMANHO_LOTE):
+            lote = [
+                {**linha, 'status': linha.get('status', 'Não Pago')}
+                for linha in linhas[inicio:inicio + BulkService.TAMANHO_LOTE]
+            ]
+            stmt = insert(tabela).values(lote)
+            set_ = {c: stmt.excluded[c] for c in BulkService.CAMPOS_ATUALIZAVEIS_ALUGUEL_MENSAL}
+            set_['atualizado_em'] = func.now()
+            stmt = stmt.on_conflict_do_update(
+                index_elements=list(BulkService.CHAVE_ALUGUEL_MENSAL),
+                set_=set_
+            )
+            db.execute(stmt)
+
+        ResumoReceitasService.recalcular_chaves(db, por_chave)
+        return len(linhas)
+
+    @staticmethod
+    def _upsert_alugueis_mensais_orm(db: Session, linhas: List[Dict[str, Any]]) -> None:
+        """Alternativa para dialetos sem ON CONFLICT: uma consulta por lote e escrita via ORM"""
+        colunas_chave = [getattr(AluguelMensal, c) for c in BulkService.CHAVE_ALUGUEL_MENSAL]
+        for inicio in range(0, len(linhas), BulkService.TAMANHO_LOTE):
+            lote = linhas[inicio:inicio + BulkService.TAMANHO_LOTE]
+            chaves = [tuple(l[c] for c in BulkService.CHAVE_ALUGUEL_MENSAL) for l in lote]
+            existentes = {
+                (r.id_imovel, r.id_proprietario, r.data_referencia): r
+                for r in db.query(AluguelMensal).filter(tuple_(*colunas_chave).in_(chaves)).all()
+            }
+            for chave, linha in zip(chaves, lote):
+                existente = existentes.get(chave)
+                if existente:
+                    for campo in BulkService.CAMPOS_ATUALIZAVEIS_ALUGUEL_MENSAL:
+                        setattr(existente, campo, linha[campo])
+                    existente.atualizado_em = func.now()
+                else:
+                    db.add(AluguelMensal(**linha))
@@ -0,0 +1,188 @@
+"""
+Busca aproximada de nomes por trigramas
+Usa a mesma medida de similaridade do pg_trgm: no PostgreSQL as consultas usam os índices
+GIN gin_trgm_ops; no SQLite (ou sem a extensão) um índice de trigramas em memória faz o
+mesmo papel, de modo que nenhuma busca precisa percorrer a tabela inteira linha a linha
+"""
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+import re
+import unicodedata
+
+from sqlalchemy import func, text
+from sqlalchemy.orm import Session
+
+from app.models.usuario import Usuario
+from app.models.imovel import Imovel
+
+
+SIMILARIDADE_MINIMA = 0.3  # Mesmo padrão de pg_trgm.similarity_threshold
+# Tipos de usuário que podem ser proprietários, na ordem em que são consultados
+TIPOS_PROPRIETARIO = ('usuario', 'proprietario')
+
+
+def normalizar_nome(valor) -> str:
+    """Normaliza um nome para comparação: sem acentos, minúsculo e espaços simples"""
+    if valor is None:
+        return ""
+    texto = unicodedata.normalize('NFKD', str(valor))
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return re.sub(r'\s+', ' ', texto).strip().lower()
+
+
+class Candidato(NamedTuple):
+    id: int
+    nome: str
+    score: float
+
+
+def trigramas(texto: str) -> Set[str]:
+    """
+    Trigramas no formato do pg_trgm: cada palavra (sem acentos, minúscula) recebe dois
+    espaços à esquerda e um à direita antes de ser fatiada
+    """
+    resultado = set()
+    for palavra in re.split(r'[^0-9a-z]+', normalizar_nome(texto)):
+        if not palavra:
+            continue
+        palavra = f'  {palavra} '
+        resultado.update(palavra[i:i + 3] for i in range(len(palavra) - 2))
+    return resultado
+
+
+def similaridade(a: str, b: str) -> float:
+    """Equivalente a similarity(a, b) do pg_trgm: trigramas em comum / trigramas no total"""
+    ta, tb = trigramas(a), trigramas(b)
+    if not ta or not tb:
+        return 0.0
+    return len(ta & tb) / len(ta | tb)
+
+
+class IndiceTrigramas:
+    """
+    Índice invertido de trigramas para uma lista de (id, texto)
+
+    Mantém dois índices: trigramas por palavra (ranking por similaridade, como o pg_trgm)
+    e trechos de três caracteres do texto normalizado, que todo texto contendo o termo
+    precisa ter (busca por substring, equivalente a ILIKE '%termo%').
+    """
+
+    def __init__(self, entradas: Iterable[Tuple[int, str]]):
+        self._entradas: List[Tuple[int, str, str, Set[str]]] = sorted(
+            ((id_, texto or '', normalizar_nome(texto), trigramas(texto or '')) for id_, texto in entradas),
+            key=lambda e: e[0]
+        )
+        self._por_trigrama: Dict[str, Set[int]] = {}
+        self._por_trecho: Dict[str, Set[int]] = {}
+        for posicao, (_id, _texto, norm, tris) in enumerate(self._entradas):
+            for tri in tris:
+                self._por_trigrama.setdefault(tri, set()).add(posicao)
+            for i in range(len(norm) - 2):
+                self._por_trecho.setdefault(norm[i:i + 3], set()).add(posicao)
+
+    def __len__(self) -> int:
+        return len(self._entradas)
+
+    def _candidato(self, posicao: int, tris: Set[str]) -> Candidato:
+        id_, texto, _norm, tris_entrada = self._entradas[posicao]
+        uniao = len(tris | tris_entrada)
+        return Candidato(id_, texto, len(tris & tris_entrada) / uniao if uniao else 0.0)
+
+    def contendo(self, termo: str) -> List[Candidato]:
+        """Entradas cujo texto normalizado contém o termo, da mais para a menos similar"""
+        norm = normalizar_nome(termo)
+        if not norm:
+            return []
+        if len(norm) < 3:
+            posicoes = range(len(self._entradas))
+        else:
+            trechos = sorted(
+                (self._por_trecho.get(norm[i:i + 3], set()) for i in range(len(norm) - 2)),
+                key=len
+            )
+            posicoes = set.intersection(*trechos) if trechos[0] else set()
+        tris = trigramas(termo)
+        encontrados = [
+            self._candidato(posicao, tris)
+            for posicao in posicoes
+            if norm in self._entradas[posicao][2]
+        ]
+        return sorted(encontrados, key=lambda c: (-c.score, c.id))
+
+    def similares(self, termo: str, limite: int = 5, minimo: float = SIMILARIDADE_MINIMA) -> List[Candidato]:
+        """Entradas com similaridade >= minimo, ordenadas por score (empates pelo menor id)"""
+        tris = trigramas(termo)
+        if not tris:
+            return []
+        posicoes = set()
+        for tri in tris:
+            posicoes.update(self._por_trigrama.get(tri, ()))
+        candidatos = [self._candidato(posicao, tris) for posicao in posicoes]
+        candidatos = [c for c in candidatos if c.score >= minimo]
+        return sorted(candidatos, key=lambda c: (-c.score, c.id))[:limite]
+
+
+class BuscaSimilaridade:
+    """
+    Sugestões de imóveis e proprietários pelo nome, com score
+
+    No PostgreSQL com pg_trgm usa o operador % (índices GIN da migração nomes_trgm); nos
+    demais bancos carrega os nomes uma vez e consulta um IndiceTrigramas.
+    """
+
+    COLUNAS = {
+        'imoveis': (Imovel, ('nome', 'endereco')),
+        'proprietarios': (Usuario, ('nome',)),
+    }
+
+    _pg_trgm_disponivel: Optional[bool] = None
+
+    def __init__(self, db: Session):
+        self.db = db
+        self._indices: Dict[Tuple[str, str], IndiceTrigramas] = {}
+
+    def _usa_pg_trgm(self) -> bool:
+        if self.db.get_bind().dialect.name != 'postgresql':
+            return False
+        if BuscaSimilaridade._pg_trgm_disponivel is None:
+            BuscaSimilaridade._pg_trgm_disponivel = self.db.execute(
+                text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+            ).first() is not None
+        return BuscaSimilaridade._pg_trgm_disponivel
+
+    def _filtro_tipo(self, modelo, query):
+        if modelo is Usuario:
+            return query.filter(Usuario.tipo.in_(TIPOS_PROPRIETARIO))
+        return query
+
+    def _buscar_coluna(self, tipo: str, campo: str, termo: str, limite: int, minimo: float) -> List[Candidato]:
+        modelo, _campos = self.COLUNAS[tipo]
+        coluna = getattr(modelo, campo)
+
+        if self._usa_pg_trgm():
+            score = func.similarity(coluna, termo)
+            query = self.db.query(modelo.id, coluna, score).filter(coluna.op('%')(termo))
+            linhas = self._filtro_tipo(modelo, query).order_by(score.desc(), modelo.id).limit(limite).all()
+            return [Candidato(id_, nome, float(s)) for id_, nome, s in linhas if s >= minimo]
+
+        chave = (tipo, campo)
+        if chave not in self._indices:
+            query = self.db.query(modelo.id, coluna)
+            self._indices[chave] = IndiceTrigramas(self._filtro_tipo(modelo, query).all())
+        return self._indices[chave].similares(termo, limite, minimo)
+
+    def buscar(self, tipo: str, termo: str, limite: int = 5, minimo: float = SIMILARIDADE_MINIMA) -> List[Candidato]:
+        """
+        Candidatos mais parecidos com o termo (imóveis por nome ou endereço)
+
+        Args:
+            tipo: 'imoveis' ou 'proprietarios'
+        """
+        if tipo not in self.COLUNAS:
+            raise ValueError(f"Tipo de busca inválido: {tipo}")
+        melhores: Dict[int, Candidato] = {}
+        for campo in self.COLUNAS[tipo][1]:
+            for candidato in self._buscar_coluna(tipo, campo, termo, limite, minimo):
+                atual = melhores.get(candidato.id)
+                if atual is None or candidato.score > atual.score:
+                    melhores[candidato.id] = candidato
+        return sorted(melhores.values(), key=lambda c: (-c.score, c.id))[:limite]
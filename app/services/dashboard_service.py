@@ -0,0 +1,122 @@
+"""
+Serviço de estatísticas do dashboard
+Calcula os indicadores em uma única consulta, com agregações condicionais sobre um
+intervalo de datas que usa o índice de data_referencia
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, func, select, true
+from typing import Dict, Optional
+from datetime import date
+from decimal import Decimal
+
+from app.core.periodo import intervalo_periodo, mes_seguinte, somar_meses
+from app.core.permissions import filtro_proprietarios
+from app.models.aluguel import AluguelMensal
+from app.models.imovel import Imovel
+from app.models.usuario import Usuario
+
+
+class DashboardService:
+    """Serviço para os indicadores do dashboard"""
+
+    @staticmethod
+    def consulta_estatisticas(user: Usuario, hoje: date):
+        """
+        SELECT único dos indicadores de `hoje`
+
+        A tabela é lida uma vez, no intervalo que cobre o ano atual e o mês anterior, e
+        agrupada por imóvel/proprietário com FILTER para cada período; os totais por imóvel
+        (receita = maior valor_total do imóvel no período) e as contagens saem desse
+        agrupamento. Só entram registros de proprietários visíveis para o usuário.
+        """
+        inicio_mes = hoje.replace(day=1)
+        fim_mes = mes_seguinte(hoje)
+        inicio_mes_anterior = somar_meses(hoje, -1)
+        inicio_ano, fim_ano = intervalo_periodo(hoje.year)
+
+        data = AluguelMensal.data_referencia
+        no_mes = and_(data >= inicio_mes, data < fim_mes)
+        no_mes_anterior = and_(data >= inicio_mes_anterior, data < inicio_mes)
+        no_ano = data >= inicio_ano
+
+        grupos = select(
+            AluguelMensal.id_imovel,
+            AluguelMensal.id_proprietario,
+            func.count().filter(no_mes).label('alugueis_mes'),
+            func.max(AluguelMensal.valor_total).filter(no_mes).label('valor_mes'),
+            func.max(AluguelMensal.valor_total).filter(no_mes_anterior).label('valor_mes_anterior'),
+            func.max(AluguelMensal.valor_total).filter(no_ano).label('valor_ano'),
+        ).where(
+            # Em janeiro o mês anterior fica no ano passado
+            data >= min(inicio_ano, inicio_mes_anterior),
+            data < fim_ano,
+            filtro_proprietarios(user, AluguelMensal.id_proprietario)
+        ).group_by(AluguelMensal.id_imovel, AluguelMensal.id_proprietario).cte('grupos')
+
+        por_imovel = select(
+            func.max(grupos.c.valor_mes).label('valor_mes'),
+            func.max(grupos.c.valor_mes_anterior).label('valor_mes_anterior'),
+            func.max(grupos.c.valor_ano).label('valor_ano'),
+        ).group_by(grupos.c.id_imovel).cte('por_imovel')
+
+        contagens = select(
+            func.sum(grupos.c.alugueis_mes).label('alugueis_ativos'),
+            func.count(grupos.c.id_proprietario.distinct()).filter(grupos.c.alugueis_mes > 0).label('proprietarios_ativos'),
+            func.count(grupos.c.id_imovel.distinct()).filter(grupos.c.alugueis_mes > 0).label('imoveis_ocupados'),
+        ).subquery('contagens')
+
+        receitas = select(
+            func.sum(por_imovel.c.valor_mes).label('receita_mensal'),
+            func.sum(por_imovel.c.valor_mes_anterior).label('receita_mes_anterior'),
+            func.sum(por_imovel.c.valor_ano).label('receita_anual'),
+        ).subquery('receitas')
+
+        total_imoveis = select(func.count()).select_from(Imovel).scalar_subquery()
+
+        return select(
+            total_imoveis.label('total_imoveis'),
+            contagens.c.alugueis_ativos,
+            contagens.c.proprietarios_ativos,
+            contagens.c.imoveis_ocupados,
+            receitas.c.receita_mensal,
+            receitas.c.receita_mes_anterior,
+            receitas.c.receita_anual,
+        ).select_from(contagens.join(receitas, true()))
+
+    @staticmethod
+    def obter_estatisticas(db: Session, user: Usuario, hoje: Optional[date] = None) -> Dict:
+        """
+        Indicadores do dashboard (receitas do mês, do mês anterior e do ano, aluguéis,
+        proprietários e imóveis ativos no mês), limitados às permissões do usuário
+
+        Args:
+            hoje: Data de referência (padrão: data atual)
+        """
+        linha = db.execute(DashboardService.consulta_estatisticas(user, hoje or date.today())).one()
+
+        total_imoveis = linha.total_imoveis
+        receita_mensal = linha.receita_mensal or Decimal(0)
+        receita_anual = linha.receita_anual or Decimal(0)
+        receita_mes_anterior = linha.receita_mes_anterior or Decimal(0)
+        alugueis_ativos = linha.alugueis_ativos or 0
+        proprietarios_ativos = linha.proprietarios_ativos or 0
+        imoveis_ocupados = linha.imoveis_ocupados or 0
+
+        taxa_ocupacao = (imoveis_ocupados / total_imoveis * 100) if total_imoveis > 0 else 0
+
+        # Variação da receita
+        if receita_mes_anterior > 0:
+            variacao = ((receita_mensal - receita_mes_anterior) / receita_mes_anterior) * 100
+        else:
+            variacao = 0 if receita_mensal == 0 else 100
+
+        return {
+            "total_imoveis": total_imoveis,
+            "receita_mensal": float(receita_mensal),
+            "receita_anual": float(receita_anual),
+            "variacao_mensal": round(variacao, 1),
+            "imoveis_disponiveis": total_imoveis - imoveis_ocupados,
+            "alugueis_ativos": alugueis_ativos,
+            "proprietarios_ativos": proprietarios_ativos,
+            "taxa_ocupacao": round(taxa_ocupacao, 1)
+        }
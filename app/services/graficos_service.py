@@ -0,0 +1,153 @@
+"""
+Serviço de dados dos gráficos do dashboard
+Séries temporais em janelas de N meses (mensais ou trimestrais), cada uma calculada com
+uma consulta agrupada sobre um calendário de períodos, a partir de receitas_mensais_resumo
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import Date, and_, func, literal, select, union_all
+from typing import Dict, List, NamedTuple, Optional
+from datetime import date
+
+from app.core.periodo import somar_meses
+from app.core.permissions import filtro_proprietarios
+from app.models.imovel import Imovel
+from app.models.receita_mensal_resumo import ReceitaMensalResumo
+from app.models.usuario import Usuario
+
+
+class Periodo(NamedTuple):
+    inicio: date
+    fim: date  # Exclusivo
+    rotulo: str
+
+
+class GraficosService:
+    """Serviço para os dados dos gráficos do dashboard"""
+
+    AGRUPAMENTOS = ('mensal', 'trimestral')
+
+    @staticmethod
+    def calendario(meses: int, agrupamento: str = 'mensal', hoje: Optional[date] = None) -> List[Periodo]:
+        """
+        Períodos da janela que termina no mês atual
+
+        Mensal: os últimos `meses` meses. Trimestral: os últimos ceil(meses / 3) trimestres
+        do calendário, incluindo o atual.
+        """
+        if agrupamento not in GraficosService.AGRUPAMENTOS:
+            raise ValueError(f"Agrupamento inválido: {agrupamento}")
+        atual = (hoje or date.today()).replace(day=1)
+
+        if agrupamento == 'mensal':
+            inicios = [somar_meses(atual, -i) for i in range(meses - 1, -1, -1)]
+            return [Periodo(m, somar_meses(m, 1), f"{m.month:02d}/{m.year}") for m in inicios]
+
+        trimestre_atual = somar_meses(atual, -((atual.month - 1) % 3))
+        trimestres = -(-meses // 3)
+        inicios = [somar_meses(trimestre_atual, -3 * i) for i in range(trimestres - 1, -1, -1)]
+        return [Periodo(t, somar_meses(t, 3), f"T{(t.month - 1) // 3 + 1}/{t.year}") for t in inicios]
+
+    @staticmethod
+    def receita_por_periodo(db: Session, user: Usuario, periodos: List[Periodo]) -> List[Dict]:
+        """
+        Receita de cada período (soma, mês a mês, do valor de cada imóvel), em uma consulta:
+        o calendário é unido (LEFT JOIN) aos valores por mês/imóvel e agrupado por período,
+        de modo que períodos sem receita aparecem com zero. Só entram imóveis com
+        proprietários visíveis para o usuário.
+        """
+        calendario = union_all(*(
+            select(literal(p.inicio, Date).label('inicio'), literal(p.fim, Date).label('fim'))
+            for p in periodos
+        )).subquery('calendario')
+
+        valores = select(
+            ReceitaMensalResumo.mes,
+            func.max(ReceitaMensalResumo.valor_total_imovel).label('valor')
+        ).where(
+            ReceitaMensalResumo.mes >= periodos[0].inicio,
+            ReceitaMensalResumo.mes < periodos[-1].fim,
+            filtro_proprietarios(user, ReceitaMensalResumo.id_proprietario)
+        ).group_by(ReceitaMensalResumo.mes, ReceitaMensalResumo.id_imovel).subquery('valores')
+
+        linhas = db.execute(
+            select(calendario.c.inicio, func.sum(valores.c.valor).label('receita')).select_from(
+                calendario.outerjoin(valores, and_(
+                    valores.c.mes >= calendario.c.inicio,
+                    valores.c.mes < calendario.c.fim
+                ))
+            ).group_by(calendario.c.inicio)
+        ).all()
+
+        receitas = {inicio: receita for inicio, receita in linhas}
+        return [
+            {"mes": p.rotulo, "inicio": p.inicio.isoformat(), "receita": float(receitas.get(p.inicio) or 0)}
+            for p in periodos
+        ]
+
+    @staticmethod
+    def receita_por_proprietario(db: Session, user: Usuario, limite: int = 5) -> List[Dict]:
+        """Proprietários com maior receita acumulada, já com o nome (uma consulta)"""
+        total = func.sum(ReceitaMensalResumo.valor_proprietario)
+        linhas = db.query(
+            ReceitaMensalResumo.id_proprietario,
+            Usuario.nome,
+            total.label('total_receita')
+        ).outerjoin(
+            Usuario, Usuario.id == ReceitaMensalResumo.id_proprietario
+        ).filter(
+            filtro_proprietarios(user, ReceitaMensalResumo.id_proprietario)
+        ).group_by(
+            ReceitaMensalResumo.id_proprietario, Usuario.nome
+        ).order_by(total.desc()).limit(limite).all()
+
+        return [
+            {"proprietario": nome if nome is not None else f"ID {id_proprietario}", "receita": float(total_receita)}
+            for id_proprietario, nome, total_receita in linhas
+        ]
+
+    @staticmethod
+    def status_imoveis(db: Session, user: Usuario) -> List[Dict]:
+        """Imóveis com algum aluguel (de proprietários visíveis) e os demais"""
+        total_imoveis = select(func.count()).select_from(Imovel).scalar_subquery()
+        imoveis_com_aluguel = select(
+            func.count(ReceitaMensalResumo.id_imovel.distinct())
+        ).where(
+            filtro_proprietarios(user, ReceitaMensalResumo.id_proprietario)
+        ).scalar_subquery()
+        total, alugados = db.execute(select(total_imoveis, imoveis_com_aluguel)).one()
+
+        return [
+            {"status": "Alugado", "quantidade": alugados},
+            {"status": "Disponível", "quantidade": total - alugados},
+            {"status": "Manutenção", "quantidade": 0}
+        ]
+
+    @staticmethod
+    def distribuicao_tipos(db: Session) -> List[Dict]:
+        tipos_imoveis = db.query(
+            Imovel.tipo,
+            func.count(Imovel.id).label('quantidade')
+        ).group_by(Imovel.tipo).all()
+
+        return [
+            {"tipo": tipo or "Não informado", "quantidade": quantidade}
+            for tipo, quantidade in tipos_imoveis
+        ]
+
+    @staticmethod
+    def obter_graficos(
+        db: Session,
+        user: Usuario,
+        meses: int = 6,
+        agrupamento: str = 'mensal',
+        hoje: Optional[date] = None
+    ) -> Dict:
+        """Dados de todos os gráficos do dashboard; receita_por_mes cobre a janela pedida"""
+        return {
+            "receita_por_mes": GraficosService.receita_por_periodo(
+                db, user, GraficosService.calendario(meses, agrupamento, hoje)
+            ),
+            "status_imoveis": GraficosService.status_imoveis(db, user),
+            "distribuicao_tipos": GraficosService.distribuicao_tipos(db),
+            "receita_por_proprietario": GraficosService.receita_por_proprietario(db, user)
+        }
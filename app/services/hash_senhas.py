@@ -0,0 +1,255 @@
+"""
+Hash e verificação de senhas em um pool de processos
+O pbkdf2_sha256 custa dezenas de milissegundos de CPU por senha; o cálculo é feito em
+processos separados, de modo que nem o event loop nem as threads do servidor ficam presos a
+ele, e o serviço expõe métricas de fila e latência
+"""
+from typing import Any, Dict, List, Optional, Tuple
+from collections import deque
+from concurrent.futures import Future, InvalidStateError, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import asyncio
+import hashlib
+import hmac
+import multiprocessing
+import os
+import secrets
+import threading
+import time
+
+from passlib.context import CryptContext
+
+from app.core.cache import CacheTTL
+from app.core.config import settings
+from app.core.metricas import estatisticas_latencia
+
+
+pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+
+
+def verificar_senha(plain_password, hashed_password) -> bool:
+    """Verifica a senha com tratamento de hashes desconhecidos.
+
+    Retorna False em vez de lançar se o hash não for identificado pelo passlib,
+    evitando erros 500 quando existirem valores antigos ou inválidos no banco.
+    """
+    if not hashed_password:
+        return False
+    try:
+        return pwd_context.verify(plain_password, hashed_password)
+    except Exception as e:
+        # Qualquer erro na verificação (incluindo UnknownHashError) — falhar de forma segura
+        print(f"Aviso: Erro na verificação de senha: {e}")
+        return False
+
+
+def _gerar_hash(senha: str) -> Tuple[str, float]:
+    """Executado no processo de trabalho; retorna o hash e o tempo de cálculo"""
+    inicio = time.perf_counter()
+    return pwd_context.hash(senha), time.perf_counter() - inicio
+
+
+def _verificar(senha: str, hashed_password: Optional[str]) -> Tuple[bool, float]:
+    """Executado no processo de trabalho; retorna o resultado e o tempo de cálculo"""
+    inicio = time.perf_counter()
+    return verificar_senha(senha, hashed_password), time.perf_counter() - inicio
+
+
+class _Latencias:
+    """Últimas medições (em segundos) de uma operação, para média e percentis"""
+
+    def __init__(self, tamanho: int):
+        self.total = 0
+        self.falhas = 0
+        self.espera = deque(maxlen=tamanho)   # Da submissão até o resultado
+        self.calculo = deque(maxlen=tamanho)  # Só o cálculo, medido no processo de trabalho
+
+    def resumo(self) -> Dict[str, Any]:
+        return {
+            'total': self.total,
+            'falhas': self.falhas,
+            'latencia': estatisticas_latencia(self.espera),
+            'calculo': estatisticas_latencia(self.calculo),
+        }
+
+
+class ServicoHashSenhas:
+    """
+    Pool de processos para hash e verificação de senhas.
+
+    O pool é criado sob demanda (contexto 'spawn', pois as chamadas vêm de threads de
+    trabalho e do event loop) e recriado se um processo morrer. As corrotinas gerar_hash,
+    gerar_hashes e verificar servem às rotas async; as variantes *_sync bloqueiam apenas a
+    thread chamadora, que fica à espera sem segurar o GIL.
+    """
+
+    AMOSTRAS_LATENCIA = 1000
+
+    def __init__(self, processos: Optional[int] = None):
+        self._processos = processos
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pendentes = 0
+        self._pico_pendentes = 0
+        self._metricas = {
+            'hash': _Latencias(self.AMOSTRAS_LATENCIA),
+            'verificacao': _Latencias(self.AMOSTRAS_LATENCIA),
+        }
+
+    @property
+    def processos(self) -> int:
+        return self._processos or settings.hash_processos or os.cpu_count() or 1
+
+    def _obter_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.processos,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._pool
+
+    def _descartar_pool(self, pool: ProcessPoolExecutor):
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def _submeter(self, operacao: str, funcao, *args) -> Future:
+        """Envia a tarefa ao pool e devolve um futuro com apenas o resultado (sem o tempo)"""
+        pool = self._obter_pool()
+        try:
+            futuro = pool.submit(funcao, *args)
+        except BrokenProcessPool:
+            # Um processo de trabalho morreu: o pool é recriado e a tarefa reenviada uma vez
+            self._descartar_pool(pool)
+            pool = self._obter_pool()
+            futuro = pool.submit(funcao, *args)
+
+        with self._lock:
+            self._pendentes += 1
+            self._pico_pendentes = max(self._pico_pendentes, self._pendentes)
+        inicio = time.perf_counter()
+        resultado: Future = Future()
+
+        def concluir(f: Future):
+            erro = None if f.cancelled() else f.exception()
+            metricas = self._metricas[operacao]
+            with self._lock:
+                self._pendentes -= 1
+                metricas.total += 1
+                if f.cancelled() or erro is not None:
+                    metricas.falhas += 1
+                else:
+                    metricas.espera.append(time.perf_counter() - inicio)
+                    metricas.calculo.append(f.result()[1])
+            if isinstance(erro, BrokenProcessPool):
+                self._descartar_pool(pool)
+            try:
+                if f.cancelled():
+                    resultado.cancel()
+                elif erro is not None:
+                    resultado.set_exception(erro)
+                else:
+                    resultado.set_result(f.result()[0])
+            except InvalidStateError:
+                pass  # Quem aguardava desistiu (ex.: requisição cancelada)
+
+        futuro.add_done_callback(concluir)
+        return resultado
+
+    # API assíncrona (rotas async)
+
+    async def gerar_hash(self, senha: str) -> str:
+        return await asyncio.wrap_future(self._submeter('hash', _gerar_hash, senha))
+
+    async def gerar_hashes(self, senhas: List[str]) -> List[str]:
+        """Hashes na ordem recebida, cada um com seu próprio salt"""
+        futuros = [asyncio.wrap_future(self._submeter('hash', _gerar_hash, s)) for s in senhas]
+        return list(await asyncio.gather(*futuros))
+
+    async def verificar(self, senha: str, hashed_password: Optional[str]) -> bool:
+        if not hashed_password:
+            return False
+        return await asyncio.wrap_future(self._submeter('verificacao', _verificar, senha, hashed_password))
+
+    # API síncrona (rotas sync e importações, executadas em threads de trabalho)
+
+    def gerar_hash_sync(self, senha: str) -> str:
+        return self._submeter('hash', _gerar_hash, senha).result()
+
+    def gerar_hashes_sync(self, senhas: List[str]) -> List[str]:
+        """Hashes na ordem recebida, cada um com seu próprio salt"""
+        futuros = [self._submeter('hash', _gerar_hash, s) for s in senhas]
+        return [f.result() for f in futuros]
+
+    def verificar_sync(self, senha: str, hashed_password: Optional[str]) -> bool:
+        if not hashed_password:
+            return False
+        return self._submeter('verificacao', _verificar, senha, hashed_password).result()
+
+    def metricas(self) -> Dict[str, Any]:
+        """
+        Fila e latência do serviço
+
+        pendentes conta as tarefas enviadas e ainda não concluídas; em_fila, as que aguardam
+        um processo livre. A latência vai da submissão ao resultado (inclui a fila); o
+        cálculo é o tempo gasto no processo de trabalho.
+        """
+        with self._lock:
+            return {
+                'processos': self.processos,
+                'pool_ativo': self._pool is not None,
+                'pendentes': self._pendentes,
+                'em_fila': max(0, self._pendentes - self.processos),
+                'pico_pendentes': self._pico_pendentes,
+                'hash': self._metricas['hash'].resumo(),
+                'verificacao': self._metricas['verificacao'].resumo(),
+            }
+
+    def encerrar(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+
+servico_hash_senhas = ServicoHashSenhas()
+
+
+class CacheCredenciais:
+    """
+    Credenciais verificadas recentemente, para logins repetidos não refazerem o PBKDF2.
+
+    A chave é um HMAC (com segredo aleatório, gerado a cada processo) de id do usuário,
+    hash de senha gravado e senha informada: trocar a senha muda o hash gravado e invalida
+    as entradas antigas. Só verificações bem-sucedidas entram no cache, de modo que senhas
+    desconhecidas continuam custando um PBKDF2 completo a cada tentativa.
+    """
+
+    def __init__(self, tamanho: int, ttl: float):
+        self._segredo = secrets.token_bytes(32)
+        self._cache = CacheTTL(tamanho, ttl)
+
+    def _chave(self, id_usuario: int, hashed_password: str, senha: str) -> bytes:
+        mensagem = b'\0'.join((str(id_usuario).encode(), hashed_password.encode(), senha.encode('utf-8')))
+        return hmac.new(self._segredo, mensagem, hashlib.sha256).digest()
+
+    def verificada(self, id_usuario: int, hashed_password: Optional[str], senha: str) -> bool:
+        if not hashed_password or not self._cache.ativo:
+            return False
+        return self._cache.obter(self._chave(id_usuario, hashed_password, senha)) == id_usuario
+
+    def registrar(self, id_usuario: int, hashed_password: str, senha: str):
+        if self._cache.ativo:
+            self._cache.definir(self._chave(id_usuario, hashed_password, senha), id_usuario)
+
+    def invalidar_usuario(self, id_usuario: int):
+        """Descarta as credenciais do usuário (troca de senha, ativação/desativação, exclusão)"""
+        self._cache.remover_se(lambda _chave, valor: valor == id_usuario)
+
+    def metricas(self) -> Dict[str, Any]:
+        return self._cache.metricas()
+
+
+cache_credenciais = CacheCredenciais(settings.cache_login_tamanho, settings.cache_login_ttl)
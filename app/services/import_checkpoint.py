@@ -0,0 +1,236 @@
+"""
+Commits em lotes e checkpoints de importação
+A importação grava a cada tamanho_lote linhas; o checkpoint (hash do arquivo + última
+planilha/linha gravada) é atualizado na mesma transação dos dados, de modo que uma
+importação interrompida pode ser retomada exatamente do último lote confirmado
+"""
+from typing import Any, BinaryIO, Callable, Dict, List, Optional, Set, Union
+import hashlib
+import json
+import threading
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.importacao import ImportacaoCheckpoint
+from app.services.import_progress import ProgressoImportacao
+
+
+class CheckpointEmUso(ValueError):
+    """O checkpoint já pertence a uma importação em execução"""
+
+
+# Checkpoints com uma importação em execução neste processo
+_checkpoints_em_uso: Set[int] = set()
+_lock_em_uso = threading.Lock()
+
+
+def checkpoint_em_uso(id_checkpoint: int) -> bool:
+    with _lock_em_uso:
+        return id_checkpoint in _checkpoints_em_uso
+
+
+def _reservar(id_checkpoint: int):
+    with _lock_em_uso:
+        if id_checkpoint in _checkpoints_em_uso:
+            raise CheckpointEmUso(f"Checkpoint {id_checkpoint} já está sendo importado")
+        _checkpoints_em_uso.add(id_checkpoint)
+
+
+def hash_arquivo(origem: Union[bytes, BinaryIO], tamanho_bloco: int = 1024 * 1024) -> str:
+    """sha256 do arquivo enviado, lido em blocos (a posição do arquivo é restaurada)"""
+    if isinstance(origem, (bytes, bytearray)):
+        return hashlib.sha256(origem).hexdigest()
+    posicao = origem.tell()
+    origem.seek(0)
+    h = hashlib.sha256()
+    for bloco in iter(lambda: origem.read(tamanho_bloco), b''):
+        h.update(bloco)
+    origem.seek(posicao)
+    return h.hexdigest()
+
+
+class CheckpointImportacao:
+    """
+    Controla os lotes de uma importação e persiste a posição de retomada.
+
+    A posição é (planilha_indice, linha): todas as planilhas anteriores a planilha_indice e
+    as primeiras `linha` linhas dela já estão gravadas.
+
+    Enquanto a importação roda o checkpoint fica reservado neste processo, até liberar().
+    Um checkpoint 'em_andamento' só pode ser retomado quando nenhuma importação viva o
+    reservou (processo interrompido no meio da importação).
+    """
+
+    STATUS_RETOMAVEIS = ('em_andamento', 'falhou')
+
+    def __init__(
+        self,
+        db: Session,
+        tipo: str,
+        hash_arquivo: str,
+        nome_arquivo: Optional[str] = None,
+        tamanho_lote: Optional[int] = None,
+        id_checkpoint: Optional[int] = None,
+        progresso: Optional[ProgressoImportacao] = None,
+        ao_gravar: Optional[Callable[[], None]] = None
+    ):
+        self.db = db
+        self.tamanho_lote = settings.import_chunk_size if tamanho_lote is None else tamanho_lote
+        self.progresso = progresso or ProgressoImportacao()
+        self.ao_gravar = ao_gravar
+        self._erros: List[str] = []
+        self._pendentes = 0
+        self._reservado: Optional[int] = None
+
+        if id_checkpoint is not None:
+            _reservar(id_checkpoint)
+            self._reservado = id_checkpoint
+            try:
+                registro = self._retomar(db, tipo, hash_arquivo, id_checkpoint)
+            except Exception:
+                self.liberar()
+                raise
+            registro.status = 'em_andamento'
+            registro.mensagem = None
+            self.retomado = True
+        else:
+            registro = ImportacaoCheckpoint(
+                tipo=tipo,
+                hash_arquivo=hash_arquivo,
+                nome_arquivo=nome_arquivo,
+                status='em_andamento',
+                planilha_indice=0,
+                linha=0,
+                registros_gravados=0,
+                lotes_gravados=0
+            )
+            db.add(registro)
+            self.retomado = False
+        db.flush()
+        if self._reservado is None:
+            _reservar(registro.id)
+            self._reservado = registro.id
+
+        self.registro = registro
+        self.planilha_indice = registro.planilha_indice
+        self.linha = registro.linha
+        self.registros_anteriores = registro.registros_gravados
+        self.erros_anteriores: List[str] = json.loads(registro.erros) if registro.erros else []
+
+    def _retomar(self, db: Session, tipo: str, hash_arquivo: str, id_checkpoint: int) -> ImportacaoCheckpoint:
+        registro = db.query(ImportacaoCheckpoint).filter(ImportacaoCheckpoint.id == id_checkpoint).first()
+        if registro is None or registro.tipo != tipo:
+            raise ValueError(f"Checkpoint {id_checkpoint} não encontrado para importação de {tipo}")
+        if registro.hash_arquivo != hash_arquivo:
+            raise ValueError("O arquivo enviado não corresponde ao arquivo do checkpoint")
+        if registro.status not in self.STATUS_RETOMAVEIS:
+            raise ValueError(f"Checkpoint {id_checkpoint} não pode ser retomado (status: {registro.status})")
+        if registro.status == 'falhou':
+            # UPDATE condicional: entre processos, só uma retomada tira o checkpoint de 'falhou'
+            reivindicados = db.query(ImportacaoCheckpoint).filter(
+                ImportacaoCheckpoint.id == id_checkpoint,
+                ImportacaoCheckpoint.status == 'falhou'
+            ).update({ImportacaoCheckpoint.status: 'em_andamento'}, synchronize_session=False)
+            if not reivindicados:
+                raise CheckpointEmUso(f"Checkpoint {id_checkpoint} já está sendo importado")
+        return registro
+
+    def liberar(self):
+        """Libera a reserva do checkpoint; chamado pelas importações ao terminar, com ou sem erro"""
+        if self._reservado is not None:
+            with _lock_em_uso:
+                _checkpoints_em_uso.discard(self._reservado)
+            self._reservado = None
+
+    def acompanhar_erros(self, erros: List[str]):
+        """Lista de erros da execução atual (mesma referência), salva junto com cada lote"""
+        self._erros = erros
+
+    def planilha_concluida(self, planilha_indice: int) -> bool:
+        return planilha_indice < self.planilha_indice
+
+    def linha_inicial(self, planilha_indice: int) -> int:
+        """Primeira linha ainda não gravada da planilha"""
+        return self.linha if planilha_indice == self.planilha_indice else 0
+
+    def proxima_linha(self, planilha_indice: int, planilha: str, linha: int, registros: int):
+        """
+        Chamado antes de processar cada linha: se o lote atual está completo, grava-o com a
+        posição desta linha (ainda não processada)
+
+        Args:
+            registros: Registros importados até aqui na execução atual
+        """
+        if self.tamanho_lote and self._pendentes >= self.tamanho_lote:
+            self._gravar_lote(planilha_indice, planilha, linha, registros)
+        self._pendentes += 1
+
+    def _gravar_lote(self, planilha_indice: int, planilha: Optional[str], linha: int, registros: int):
+        self.progresso.verificar_cancelamento()
+        if self.ao_gravar:
+            self.ao_gravar()
+        self._atualizar(planilha_indice, planilha, linha, registros)
+        self.registro.lotes_gravados = (self.registro.lotes_gravados or 0) + 1
+        self.db.commit()
+        self._pendentes = 0
+
+    def _atualizar(self, planilha_indice: int, planilha: Optional[str], linha: int, registros: int):
+        self.registro.planilha_indice = planilha_indice
+        self.registro.planilha = planilha
+        self.registro.linha = linha
+        self.registro.registros_gravados = self.registros_anteriores + registros
+        self.registro.erros = json.dumps(self.erros_completos(), ensure_ascii=False)
+
+    def erros_completos(self) -> List[str]:
+        """Erros das execuções anteriores seguidos dos novos (sem repetir mensagens)"""
+        anteriores = set(self.erros_anteriores)
+        return self.erros_anteriores + [e for e in self._erros if e not in anteriores]
+
+    def total_registros(self, registros: int) -> int:
+        return self.registros_anteriores + registros
+
+    def concluir(self, planilha_indice: int, registros: int):
+        """Grava o último lote e marca a importação como concluída"""
+        self.progresso.confirmar()
+        if self.ao_gravar:
+            self.ao_gravar()
+        self._atualizar(planilha_indice, None, 0, registros)
+        self.registro.status = 'concluida'
+        self.registro.lotes_gravados = (self.registro.lotes_gravados or 0) + 1
+        self.db.commit()
+
+    def falhar(self, mensagem: str):
+        """
+        Descarta o lote em andamento e registra a falha; os lotes já gravados são mantidos
+        e a importação pode ser retomada a partir deles
+        """
+        self.db.rollback()
+        try:
+            if not inspect(self.registro).persistent:
+                # Nenhum lote chegou a ser gravado: o checkpoint é criado agora, apontando para o início
+                self.registro.planilha_indice = 0
+                self.registro.planilha = None
+                self.registro.linha = 0
+                self.registro.registros_gravados = 0
+                self.registro.lotes_gravados = 0
+                self.registro.erros = None
+                self.db.add(self.registro)
+            self.registro.status = 'falhou'
+            self.registro.mensagem = mensagem
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+
+    def resumo(self) -> Dict[str, Any]:
+        return {
+            'id': self.registro.id,
+            'status': self.registro.status,
+            'planilha_indice': self.registro.planilha_indice,
+            'planilha': self.registro.planilha,
+            'linha': self.registro.linha,
+            'registros_gravados': self.registro.registros_gravados,
+            'lotes_gravados': self.registro.lotes_gravados,
+            'retomado': self.retomado
+        }
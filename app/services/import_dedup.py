@@ -0,0 +1,147 @@
+"""
+Deduplicação de uploads repetidos
+Cada planilha importada tem o hash do seu conteúdo registrado; em um novo upload, planilhas
+com o mesmo conteúdo da versão já gravada não são interpretadas nem gravadas de novo, e um
+arquivo idêntico a um já importado por completo é descartado sem sequer ser lido
+"""
+from typing import Dict, Iterable, List, Optional
+import hashlib
+import json
+
+import pandas as pd
+from sqlalchemy.orm import Session
+
+from app.models.importacao import ImportacaoHash
+
+
+# Casas decimais consideradas nos números: quem salva a planilha de novo pode reescrever
+# 1155.2866666666666 como 1155.286666666667, ou 10102.0 como 10102, sem mudar nenhum valor
+CASAS_DECIMAIS_HASH = 6
+
+
+def _celula_canonica(valor):
+    # Células vazias chegam como None ou NaN/NaT, conforme o leitor; ambas contam como vazias
+    if valor is None or (not isinstance(valor, str) and pd.isna(valor)):
+        return None
+    if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+        return round(float(valor), CASAS_DECIMAIS_HASH) + 0.0  # + 0.0 normaliza -0.0
+    return valor
+
+
+def hash_planilha(df: pd.DataFrame) -> str:
+    """
+    sha256 do conteúdo de uma planilha, célula a célula
+
+    Calculado sobre os valores lidos, e não sobre os bytes do .xlsx, de modo que salvar o
+    mesmo conteúdo novamente (o que muda metadados e a compressão) não altera o hash.
+    """
+    h = hashlib.sha256()
+    for linha in df.itertuples(index=False, name=None):
+        h.update(repr(tuple(_celula_canonica(v) for v in linha)).encode('utf-8'))
+        h.update(b'\n')
+    return h.hexdigest()
+
+
+class DeduplicacaoImportacao:
+    """
+    Consulta e atualiza os hashes de uma importação.
+
+    Para cada planilha guarda-se apenas o hash da versão atualmente gravada: uma planilha só
+    é registrada quando todas as suas linhas foram importadas sem erros, e reprocessar uma
+    planilha com erros descarta o hash anterior. Os registros são adicionados à sessão e
+    confirmados no mesmo commit dos dados (lote do checkpoint).
+    """
+
+    ESCOPO_ARQUIVO = 'arquivo'
+    ESCOPO_PLANILHA = 'planilha'
+
+    def __init__(self, db: Session, tipo: str, hash_arquivo: str, forcar: bool = False):
+        self.db = db
+        self.tipo = tipo
+        self.hash_arquivo = hash_arquivo
+        self.forcar = forcar
+        self.ignoradas: List[str] = []
+        self._hashes: Dict[str, str] = {}
+        self._atuais: Dict[str, ImportacaoHash] = {
+            registro.chave: registro
+            for registro in db.query(ImportacaoHash).filter(
+                ImportacaoHash.tipo == tipo,
+                ImportacaoHash.escopo == self.ESCOPO_PLANILHA
+            )
+        }
+
+    def hashes_conhecidos(self) -> Dict[str, str]:
+        """Hash da versão gravada de cada planilha (vazio com forcar=True)"""
+        if self.forcar:
+            return {}
+        return {chave: registro.hash for chave, registro in self._atuais.items()}
+
+    def planilhas_arquivo_inalterado(self) -> Optional[List[str]]:
+        """
+        Se o arquivo já foi importado por completo e nenhuma das suas planilhas foi
+        substituída desde então, retorna os nomes das planilhas; senão, None
+        """
+        if self.forcar:
+            return None
+        registro = self.db.query(ImportacaoHash).filter(
+            ImportacaoHash.tipo == self.tipo,
+            ImportacaoHash.escopo == self.ESCOPO_ARQUIVO,
+            ImportacaoHash.chave == self.hash_arquivo
+        ).first()
+        if registro is None or not registro.detalhes:
+            return None
+        planilhas = json.loads(registro.detalhes)
+        for nome, hash_conteudo in planilhas.items():
+            atual = self._atuais.get(nome)
+            if atual is None or atual.hash != hash_conteudo:
+                return None
+        return list(planilhas)
+
+    def planilha_inalterada(self, nome: str, hash_conteudo: str):
+        """Registra que a planilha foi ignorada por não ter mudado"""
+        self.ignoradas.append(nome)
+        self._hashes[nome] = hash_conteudo
+
+    def registrar_planilha(self, nome: str, hash_conteudo: str, registros: int, completa: bool):
+        """
+        Atualiza o hash da planilha recém-gravada
+
+        Args:
+            completa: False se alguma linha ficou de fora (erros ou retomada no meio da
+                planilha); nesse caso o hash anterior é descartado e a planilha volta a ser
+                processada no próximo upload
+        """
+        atual = self._atuais.get(nome)
+        if not completa:
+            if atual is not None:
+                self.db.delete(atual)
+                del self._atuais[nome]
+            return
+
+        self._hashes[nome] = hash_conteudo
+        if atual is None:
+            atual = ImportacaoHash(tipo=self.tipo, escopo=self.ESCOPO_PLANILHA, chave=nome)
+            self.db.add(atual)
+            self._atuais[nome] = atual
+        atual.hash = hash_conteudo
+        atual.registros = registros
+        atual.detalhes = None
+
+    def registrar_arquivo(self, nomes_planilhas: Iterable[str], registros: int):
+        """Registra o arquivo se todas as suas planilhas estão gravadas ou inalteradas"""
+        nomes_planilhas = list(nomes_planilhas)
+        if not all(nome in self._hashes for nome in nomes_planilhas):
+            return
+        registro = self.db.query(ImportacaoHash).filter(
+            ImportacaoHash.tipo == self.tipo,
+            ImportacaoHash.escopo == self.ESCOPO_ARQUIVO,
+            ImportacaoHash.chave == self.hash_arquivo
+        ).first()
+        if registro is None:
+            registro = ImportacaoHash(tipo=self.tipo, escopo=self.ESCOPO_ARQUIVO, chave=self.hash_arquivo)
+            self.db.add(registro)
+        registro.hash = self.hash_arquivo
+        registro.registros = registros
+        registro.detalhes = json.dumps(
+            {nome: self._hashes[nome] for nome in nomes_planilhas}, ensure_ascii=False
+        )
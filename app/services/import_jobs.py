@@ -0,0 +1,206 @@
+"""
+Importações em segundo plano
+O upload é gravado em um arquivo temporário e a importação roda em um pool de threads,
+com sessão de banco própria, enquanto as rotas respondem com o id do job e o progresso
+"""
+from typing import Any, BinaryIO, Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.services.import_service import ImportacaoAvancadaService
+from app.services.import_progress import ProgressoImportacao, ImportacaoCancelada
+from app.services.import_checkpoint import CheckpointEmUso, checkpoint_em_uso
+
+
+TIPOS_IMPORTACAO = ('proprietarios', 'imoveis', 'participacoes', 'alugueis')
+
+
+class JobImportacao:
+    """Uma importação submetida: arquivo, situação, progresso e resultado final"""
+
+    def __init__(
+        self,
+        tipo: str,
+        nome_arquivo: str,
+        caminho: str,
+        id_usuario: Optional[int],
+        opcoes: Optional[Dict[str, Any]] = None
+    ):
+        self.id = uuid.uuid4().hex
+        self.tipo = tipo
+        self.opcoes = opcoes or {}
+        self.nome_arquivo = nome_arquivo
+        self.caminho = caminho
+        self.id_usuario = id_usuario
+        self.status = 'pendente'  # pendente, executando, concluido, erro, cancelado
+        self.criado_em = datetime.now()
+        self.iniciado_em: Optional[datetime] = None
+        self.finalizado_em: Optional[datetime] = None
+        self.progresso = ProgressoImportacao()
+        self.resultado: Optional[Dict[str, Any]] = None
+        self.mensagem: Optional[str] = None
+
+    @property
+    def finalizado(self) -> bool:
+        return self.status in ('concluido', 'erro', 'cancelado')
+
+    def to_dict(self, incluir_resultado: bool = True) -> Dict[str, Any]:
+        dados = {
+            'id': self.id,
+            'tipo': self.tipo,
+            'arquivo': self.nome_arquivo,
+            'opcoes': self.opcoes,
+            'status': self.status,
+            'mensagem': self.mensagem,
+            'criado_em': self.criado_em.isoformat(),
+            'iniciado_em': self.iniciado_em.isoformat() if self.iniciado_em else None,
+            'finalizado_em': self.finalizado_em.isoformat() if self.finalizado_em else None,
+            'progresso': self.progresso.resumo()
+        }
+        if incluir_resultado:
+            dados['resultado'] = self.resultado
+        return dados
+
+
+class GerenciadorImportacoes:
+    """Registro em memória dos jobs de importação e pool de execução"""
+
+    def __init__(self, max_workers: int, jobs_retidos: int):
+        self._max_workers = max_workers
+        self._jobs_retidos = jobs_retidos
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._jobs: Dict[str, JobImportacao] = {}
+        self._lock = threading.Lock()
+
+    def _pool(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix='importacao')
+        return self._executor
+
+    def submeter(
+        self,
+        tipo: str,
+        origem: BinaryIO,
+        nome_arquivo: str,
+        id_usuario: Optional[int] = None,
+        opcoes: Optional[Dict[str, Any]] = None
+    ) -> JobImportacao:
+        """
+        Copia o upload para um arquivo temporário (o UploadFile é fechado ao fim da requisição)
+        e agenda a importação. As opções são repassadas ao método importar_<tipo>.
+
+        Raises:
+            CheckpointEmUso: opcoes['id_checkpoint'] já pertence a uma importação em execução
+        """
+        if tipo not in TIPOS_IMPORTACAO:
+            raise ValueError(f"Tipo de importação inválido: {tipo}")
+
+        sufixo = os.path.splitext(nome_arquivo)[1] or '.xlsx'
+        with tempfile.NamedTemporaryFile(prefix='importacao_', suffix=sufixo, delete=False) as destino:
+            origem.seek(0)
+            shutil.copyfileobj(origem, destino)
+
+        job = JobImportacao(tipo, nome_arquivo, destino.name, id_usuario, opcoes)
+        with self._lock:
+            id_checkpoint = job.opcoes.get('id_checkpoint')
+            if id_checkpoint is not None and self._checkpoint_ocupado(id_checkpoint):
+                os.remove(job.caminho)
+                raise CheckpointEmUso(f"Checkpoint {id_checkpoint} já está sendo importado")
+            self._descartar_antigos()
+            self._jobs[job.id] = job
+        self._pool().submit(self._executar, job)
+        return job
+
+    def _executar(self, job: JobImportacao):
+        if job.progresso.cancelamento_solicitado:
+            self._finalizar(job, 'cancelado', 'Importação cancelada antes de iniciar')
+            return
+
+        job.status = 'executando'
+        job.iniciado_em = datetime.now()
+        db = SessionLocal()
+        try:
+            importar = getattr(ImportacaoAvancadaService(), f'importar_{job.tipo}')
+            with open(job.caminho, 'rb') as arquivo:
+                resultado = importar(
+                    arquivo, db, progresso=job.progresso, nome_arquivo=job.nome_arquivo, **job.opcoes
+                )
+            job.resultado = resultado
+            self._finalizar(
+                job,
+                'concluido' if resultado.get('success') else 'erro',
+                resultado.get('message')
+            )
+        except ImportacaoCancelada as e:
+            self._finalizar(job, 'cancelado', str(e))
+        except Exception as e:
+            db.rollback()
+            self._finalizar(job, 'erro', f'Erro interno durante importação: {str(e)}')
+        finally:
+            db.close()
+
+    def _finalizar(self, job: JobImportacao, status: str, mensagem: Optional[str]):
+        job.progresso.finalizar()
+        job.status = status
+        job.mensagem = mensagem
+        job.finalizado_em = datetime.now()
+        try:
+            os.remove(job.caminho)
+        except OSError:
+            pass
+
+    def _checkpoint_ocupado(self, id_checkpoint: int) -> bool:
+        """Checkpoint reservado por uma importação em execução ou por um job ainda na fila"""
+        return checkpoint_em_uso(id_checkpoint) or any(
+            not j.finalizado and j.opcoes.get('id_checkpoint') == id_checkpoint
+            for j in self._jobs.values()
+        )
+
+    def checkpoint_ocupado(self, id_checkpoint: int) -> bool:
+        with self._lock:
+            return self._checkpoint_ocupado(id_checkpoint)
+
+    def _descartar_antigos(self):
+        """Mantém no máximo jobs_retidos jobs finalizados, descartando os mais antigos"""
+        finalizados = sorted(
+            (j for j in self._jobs.values() if j.finalizado),
+            key=lambda j: j.finalizado_em
+        )
+        for job in finalizados[:max(len(finalizados) - self._jobs_retidos, 0)]:
+            del self._jobs[job.id]
+
+    def obter(self, job_id: str) -> Optional[JobImportacao]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def listar(self, id_usuario: Optional[int] = None) -> List[JobImportacao]:
+        with self._lock:
+            jobs = [j for j in self._jobs.values() if id_usuario is None or j.id_usuario == id_usuario]
+        return sorted(jobs, key=lambda j: j.criado_em, reverse=True)
+
+    def cancelar(self, job_id: str) -> bool:
+        """Solicita o cancelamento; só é aceito enquanto a importação não começou a gravar"""
+        job = self.obter(job_id)
+        if job is None or job.finalizado:
+            return False
+        return job.progresso.solicitar_cancelamento()
+
+    def encerrar(self):
+        """Encerra o pool, cancelando os jobs que ainda não começaram a gravar"""
+        with self._lock:
+            for job in self._jobs.values():
+                if not job.finalizado:
+                    job.progresso.solicitar_cancelamento()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+gerenciador_importacoes = GerenciadorImportacoes(settings.import_workers, settings.import_jobs_retidos)
@@ -0,0 +1,124 @@
+"""
+Processamento paralelo de planilhas de aluguéis
+Cada mês fica em uma planilha independente; grupos de planilhas são lidos e validados em
+processos separados e os resultados voltam na ordem original do arquivo
+"""
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Union
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+
+from app.core.config import settings
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def numero_processos() -> int:
+    return settings.import_processos or os.cpu_count() or 1
+
+
+def pool_processos() -> ProcessPoolExecutor:
+    """
+    Pool de processos compartilhado, criado sob demanda e reaproveitado entre importações.
+    Usa 'spawn' porque as importações são disparadas a partir de threads de trabalho.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=numero_processos(),
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return _pool
+
+
+def encerrar_pool_processos():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool = None
+
+
+@contextmanager
+def caminho_arquivo(origem: Union[bytes, str, BinaryIO]) -> Iterator[str]:
+    """
+    Garante um caminho em disco para a planilha, que os processos abrem por conta própria.
+    Arquivos já gravados (como os dos jobs de importação) são usados diretamente.
+    """
+    if isinstance(origem, (str, os.PathLike)):
+        yield os.fspath(origem)
+        return
+    nome = getattr(origem, 'name', None)
+    if isinstance(nome, str) and os.path.isfile(nome):
+        yield nome
+        return
+
+    with tempfile.NamedTemporaryFile(prefix='importacao_', suffix='.xlsx', delete=False) as destino:
+        if isinstance(origem, (bytes, bytearray)):
+            destino.write(origem)
+        else:
+            origem.seek(0)
+            shutil.copyfileobj(origem, destino)
+    try:
+        yield destino.name
+    finally:
+        os.remove(destino.name)
+
+
+def _analisar_grupo(
+    caminho: str,
+    nomes_planilhas: List[str],
+    hashes_conhecidos: Dict[str, str]
+) -> List[Dict[str, Any]]:
+    """Executado no processo de trabalho: abre o arquivo uma vez e analisa o grupo de planilhas"""
+    from app.services.import_service import ImportacaoAvancadaService
+    from app.services.xlsx_reader import LeitorPlanilhas
+
+    with LeitorPlanilhas(caminho) as leitor:
+        return [
+            ImportacaoAvancadaService.preparar_planilha_alugueis(
+                nome, leitor.dataframe(nome, header=None, inferir_tipos=False), hashes_conhecidos.get(nome)
+            )
+            for nome in nomes_planilhas
+        ]
+
+
+def analisar_planilhas_alugueis_em_paralelo(
+    origem: Union[bytes, str, BinaryIO],
+    nomes_planilhas: List[str],
+    hashes_conhecidos: Optional[Dict[str, str]] = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    Gera as análises das planilhas na ordem do arquivo, processando grupos contíguos de
+    planilhas em paralelo (um grupo por processo, para abrir o arquivo uma vez por grupo).
+    Planilhas cujo conteúdo tem o hash indicado em hashes_conhecidos não são interpretadas.
+    """
+    hashes_conhecidos = hashes_conhecidos or {}
+    grupos_total = min(numero_processos(), len(nomes_planilhas))
+    tamanho, resto = divmod(len(nomes_planilhas), grupos_total)
+    grupos, inicio = [], 0
+    for i in range(grupos_total):
+        fim = inicio + tamanho + (1 if i < resto else 0)
+        grupos.append(nomes_planilhas[inicio:fim])
+        inicio = fim
+
+    with caminho_arquivo(origem) as caminho:
+        pool = pool_processos()
+        futuros = [
+            pool.submit(_analisar_grupo, caminho, grupo, {n: hashes_conhecidos[n] for n in grupo if n in hashes_conhecidos})
+            for grupo in grupos
+        ]
+        try:
+            for futuro in futuros:
+                yield from futuro.result()
+        finally:
+            # Em caso de erro ou cancelamento, não processar os grupos que ainda não começaram
+            for futuro in futuros:
+                futuro.cancel()
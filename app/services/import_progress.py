@@ -0,0 +1,97 @@
+"""
+Progresso e cancelamento de importações
+Estado compartilhado entre a importação, executada em uma thread de trabalho, e as rotas
+que consultam o andamento
+"""
+from typing import Any, Dict, List, Optional
+import threading
+
+
+class ImportacaoCancelada(Exception):
+    """Levantada dentro da importação quando o cancelamento foi solicitado antes do commit"""
+
+
+class ProgressoImportacao:
+    """
+    Acompanha planilha atual, linhas processadas e erros de uma importação.
+
+    A importação chama avancar() a cada linha e confirmar() imediatamente antes do
+    commit final; a partir desse ponto o cancelamento não é mais aceito. Um cancelamento
+    entre lotes preserva os lotes já gravados, que podem ser retomados pelo checkpoint.
+    """
+
+    ULTIMOS_ERROS = 10
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cancelamento = threading.Event()
+        self._erros: List[str] = []
+        self.etapa = 'lendo'
+        self.planilha: Optional[str] = None
+        self.planilhas_processadas = 0
+        self.total_planilhas: Optional[int] = None
+        self.linhas_processadas = 0
+        self.linhas_planilha: Optional[int] = None
+
+    def acompanhar_erros(self, erros: List[str]):
+        """Passa a expor a lista de erros da importação (mesma referência, sem cópia)"""
+        self._erros = erros
+
+    def iniciar_planilha(self, nome: str, total_linhas: Optional[int] = None, total_planilhas: Optional[int] = None):
+        """Marca o início de uma planilha; a anterior conta como processada"""
+        self.verificar_cancelamento()
+        with self._lock:
+            if self.planilha is not None:
+                self.planilhas_processadas += 1
+            self.etapa = 'processando'
+            self.planilha = nome
+            self.linhas_planilha = total_linhas
+            if total_planilhas is not None:
+                self.total_planilhas = total_planilhas
+
+    def avancar(self, linhas: int = 1):
+        """Contabiliza linhas processadas e interrompe a importação se houver cancelamento"""
+        self.verificar_cancelamento()
+        self.linhas_processadas += linhas
+
+    def solicitar_cancelamento(self) -> bool:
+        """Pede o cancelamento; retorna False se a importação já está gravando ou terminou"""
+        with self._lock:
+            if self.etapa in ('gravando', 'finalizado'):
+                return False
+            self._cancelamento.set()
+            return True
+
+    @property
+    def cancelamento_solicitado(self) -> bool:
+        return self._cancelamento.is_set()
+
+    def verificar_cancelamento(self):
+        if self._cancelamento.is_set():
+            raise ImportacaoCancelada('Importação cancelada pelo usuário')
+
+    def confirmar(self):
+        """Chamado antes do commit: última chance de cancelar, depois a gravação é definitiva"""
+        with self._lock:
+            self.verificar_cancelamento()
+            if self.planilha is not None:
+                self.planilhas_processadas += 1
+                self.planilha = None
+            self.etapa = 'gravando'
+
+    def finalizar(self):
+        with self._lock:
+            self.etapa = 'finalizado'
+
+    def resumo(self) -> Dict[str, Any]:
+        erros = list(self._erros)
+        return {
+            'etapa': self.etapa,
+            'planilha': self.planilha,
+            'planilhas_processadas': self.planilhas_processadas,
+            'total_planilhas': self.total_planilhas,
+            'linhas_processadas': self.linhas_processadas,
+            'linhas_planilha': self.linhas_planilha,
+            'total_erros': len(erros),
+            'ultimos_erros': erros[-self.ULTIMOS_ERROS:]
+        }
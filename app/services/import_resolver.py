@@ -0,0 +1,157 @@
+"""
+Resolução de entidades em memória para importações
+Pré-carrega imóveis e proprietários uma única vez por importação e resolve os nomes
+das planilhas sem consultar o banco a cada linha
+"""
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from datetime import date
+
+from sqlalchemy.orm import Session
+from app.models.usuario import Usuario
+from app.models.imovel import Imovel
+from app.models.aluguel import AluguelMensal
+from app.services.busca_similaridade import Candidato, IndiceTrigramas, TIPOS_PROPRIETARIO, normalizar_nome
+
+
+class _IndiceNomes:
+    """Índice exato, normalizado e por trigramas (substring e similaridade) para uma lista de (id, texto)"""
+
+    def __init__(self, entradas: List[Tuple[int, str]]):
+        # Ordenar por id para que empates sejam resolvidos de forma determinística
+        entradas = sorted(((id_, texto or '') for id_, texto in entradas), key=lambda e: e[0])
+        self._exato: Dict[str, int] = {}
+        self._normalizado: Dict[str, int] = {}
+        for id_, texto in entradas:
+            self._exato.setdefault(texto.strip().lower(), id_)
+            self._normalizado.setdefault(normalizar_nome(texto), id_)
+        self._trigramas = IndiceTrigramas(entradas)
+
+    def buscar(self, termo: str) -> Optional[int]:
+        """
+        Busca exata, depois normalizada e por fim por substring (equivalente a ILIKE '%termo%').
+        Entre vários textos que contêm o termo vence o mais similar a ele, e não o primeiro.
+        """
+        chave = termo.strip().lower()
+        if chave in self._exato:
+            return self._exato[chave]
+        norm = normalizar_nome(termo)
+        if not norm:
+            return None
+        if norm in self._normalizado:
+            return self._normalizado[norm]
+        candidatos = self._trigramas.contendo(termo)
+        return candidatos[0].id if candidatos else None
+
+    def similares(self, termo: str, limite: int) -> List[Candidato]:
+        return self._trigramas.similares(termo, limite)
+
+
+class ResolvedorEntidades:
+    """
+    Resolve nomes de imóveis e proprietários vindos de planilhas usando dados
+    pré-carregados do banco. Os resultados são memorizados por nome, de modo que o
+    mesmo imóvel repetido em várias planilhas mensais custa uma única busca.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+        imoveis = db.query(Imovel.id, Imovel.nome, Imovel.endereco).all()
+        self._imoveis_por_nome = _IndiceNomes([(i.id, i.nome) for i in imoveis])
+        self._imoveis_por_endereco = _IndiceNomes([(i.id, i.endereco) for i in imoveis])
+
+        proprietarios = db.query(
+            Usuario.id, Usuario.nome, Usuario.sobrenome, Usuario.tipo
+        ).filter(Usuario.tipo.in_(TIPOS_PROPRIETARIO)).all()
+        # A busca original tentava primeiro tipo 'usuario' e depois 'proprietario'
+        self._proprietarios_por_tipo = {
+            tipo: _IndiceNomes([(p.id, p.nome) for p in proprietarios if p.tipo == tipo])
+            for tipo in TIPOS_PROPRIETARIO
+        }
+        self._proprietarios = sorted(
+            ((p.id, normalizar_nome(p.nome), normalizar_nome(p.sobrenome)) for p in proprietarios),
+            key=lambda p: p[0]
+        )
+
+        self._cache_imoveis: Dict[str, Optional[int]] = {}
+        self._cache_proprietarios: Dict[str, Optional[int]] = {}
+        self.imoveis_nao_encontrados: Set[str] = set()
+        self.proprietarios_nao_encontrados: Set[str] = set()
+
+    def resolver_imovel(self, nome: str) -> Optional[int]:
+        """Retorna o id do imóvel pelo nome ou, em seguida, pelo endereço"""
+        if nome in self._cache_imoveis:
+            return self._cache_imoveis[nome]
+        id_imovel = self._imoveis_por_nome.buscar(nome)
+        if id_imovel is None:
+            id_imovel = self._imoveis_por_endereco.buscar(nome)
+        if id_imovel is None:
+            self.imoveis_nao_encontrados.add(nome)
+        self._cache_imoveis[nome] = id_imovel
+        return id_imovel
+
+    def resolver_proprietario(self, nome: str) -> Optional[int]:
+        """Retorna o id do proprietário pelo nome ou pela combinação nome + sobrenome"""
+        if nome in self._cache_proprietarios:
+            return self._cache_proprietarios[nome]
+        id_proprietario = None
+        for tipo in TIPOS_PROPRIETARIO:
+            id_proprietario = self._proprietarios_por_tipo[tipo].buscar(nome)
+            if id_proprietario is not None:
+                break
+
+        if id_proprietario is None:
+            partes = normalizar_nome(nome).split()
+            if len(partes) >= 2:
+                for id_, nome_norm, sobrenome_norm in self._proprietarios:
+                    if partes[0] in nome_norm and partes[1] in sobrenome_norm:
+                        id_proprietario = id_
+                        break
+
+        if id_proprietario is None:
+            self.proprietarios_nao_encontrados.add(nome)
+        self._cache_proprietarios[nome] = id_proprietario
+        return id_proprietario
+
+    def imoveis_similares(self, nome: str, limite: int = 3) -> List[Candidato]:
+        """Imóveis com nome ou endereço parecido, por score, para sugerir quando a busca falha"""
+        melhores: Dict[int, Candidato] = {}
+        for indice in (self._imoveis_por_nome, self._imoveis_por_endereco):
+            for candidato in indice.similares(nome, limite):
+                if candidato.id not in melhores or candidato.score > melhores[candidato.id].score:
+                    melhores[candidato.id] = candidato
+        return sorted(melhores.values(), key=lambda c: (-c.score, c.id))[:limite]
+
+    def proprietarios_similares(self, nome: str, limite: int = 3) -> List[Candidato]:
+        """Proprietários com nome parecido, por score"""
+        candidatos = [
+            candidato
+            for indice in self._proprietarios_por_tipo.values()
+            for candidato in indice.similares(nome, limite)
+        ]
+        return sorted(candidatos, key=lambda c: (-c.score, c.id))[:limite]
+
+    def alugueis_existentes(self, datas_referencia: Iterable[date]) -> Dict[Tuple[int, int, date], Tuple]:
+        """
+        Carrega em uma única consulta os aluguéis mensais já gravados para as datas de
+        referência, indexados por (imóvel, proprietário, data)
+        """
+        datas_referencia = list(set(datas_referencia))
+        if not datas_referencia:
+            return {}
+        registros = self.db.query(
+            AluguelMensal.id_imovel,
+            AluguelMensal.id_proprietario,
+            AluguelMensal.data_referencia,
+            AluguelMensal.valor_total,
+            AluguelMensal.valor_proprietario,
+            AluguelMensal.taxa_administracao
+        ).filter(AluguelMensal.data_referencia.in_(datas_referencia)).all()
+        return {(r.id_imovel, r.id_proprietario, r.data_referencia): r for r in registros}
+
+    def relatorio_nao_encontrados(self) -> Dict[str, List[str]]:
+        """Resumo dos nomes que não puderam ser resolvidos"""
+        return {
+            'imoveis': sorted(self.imoveis_nao_encontrados),
+            'proprietarios': sorted(self.proprietarios_nao_encontrados)
+        }
@@ -2,29 +2,41 @@
 Serviço de importação de dados a partir de arquivos Excel - Versão Avançada
 Suporte para múltiplas planilhas, validações específicas e formatos brasileiros
 """
-from typing import List, Dict, Any, Tuple, Optional
+from typing import List, Dict, Any, Tuple, Optional, Union, BinaryIO, Iterator
+import math
 import re
 from datetime import datetime, date
 from decimal import Decimal, InvalidOperation
 try:
+    import numpy as np
     import pandas as pd
     import openpyxl
 except Exception:
+    np = None
     pd = None
     openpyxl = None
 
-from io import BytesIO
 from sqlalchemy.orm import Session
-from sqlalchemy import func
 from app.models.usuario import Usuario
 from app.models.imovel import Imovel
-from app.models.aluguel import AluguelMensal
 from app.models.participacao import Participacao
+from app.services.import_resolver import ResolvedorEntidades
+from app.services.busca_similaridade import Candidato
+from app.services.bulk_service import BulkService
+from app.core.auth import get_password_hashes
+from app.services.xlsx_reader import LeitorPlanilhas
+from app.services.import_progress import ProgressoImportacao, ImportacaoCancelada
+from app.services.import_paralelo import analisar_planilhas_alugueis_em_paralelo
+from app.services.import_checkpoint import CheckpointImportacao, hash_arquivo
+from app.services.import_dedup import DeduplicacaoImportacao, hash_planilha
 
 
 class ImportacaoAvancadaService:
     """Serviço avançado para importação de dados via Excel"""
 
+    SENHA_PADRAO_PROPRIETARIO = 'senha123'  # Deve ser alterada no primeiro acesso
+    CAMPOS_MONETARIOS_IMOVEIS = ('area_total', 'area_construida', 'valor_catastral', 'valor_mercado', 'iptu_anual', 'condominio')
+
     def __init__(self):
         self._ensure_dependencies()
 
@@ -105,6 +117,75 @@ class ImportacaoAvancadaService:
         except (InvalidOperation, ValueError):
             return None
 
+    @staticmethod
+    def parse_serie_monetaria(serie: 'pd.Series') -> Tuple['pd.Series', List[Any]]:
+        """
+        Versão vetorizada de parse_valor_monetario para uma coluna inteira
+
+        Aceita os mesmos formatos (brasileiro "49.891,92", americano "2,500.00", "R$ 1.234,00",
+        sinal "-") e também negativos entre parênteses "(1.234,00)". Células numéricas são
+        convertidas diretamente.
+
+        Returns:
+            Tupla (valores, invalidos): Series de Decimal/None com o mesmo índice da entrada
+            e a lista de índices cujo conteúdo não vazio não pôde ser convertido
+        """
+        resultado = pd.Series([None] * len(serie), index=serie.index, dtype=object)
+        if serie.empty:
+            return resultado, []
+
+        # Células numéricas (int/float/Decimal) - converter diretamente
+        numericas = serie.map(lambda v: isinstance(v, (int, float, Decimal, np.number)) and not isinstance(v, bool))
+        if numericas.any():
+            valores_num = serie[numericas]
+            finitos = valores_num.map(lambda v: math.isfinite(v))
+            resultado.loc[valores_num[finitos].index] = valores_num[finitos].map(lambda v: Decimal(str(v)))
+
+        textos = serie[~numericas & serie.notna()].astype(str)
+        if textos.empty:
+            return resultado, []
+
+        # Planilhas repetem muito os mesmos valores: processar apenas os textos distintos
+        codigos, unicos = pd.factorize(textos)
+        s = pd.Series(unicos, dtype=object).str.replace(r'[R$\s]', '', regex=True)
+
+        # Sinal: valor entre parênteses ou hífen inicial
+        parenteses = s.str.startswith('(') & s.str.endswith(')')
+        s[parenteses] = s[parenteses].str.slice(1, -1)
+        hifen = s.str.startswith('-')
+        s[hifen] = s[hifen].str.slice(1)
+        negativo = parenteses | hifen
+
+        # Mesma heurística de separadores do parser escalar
+        ultimo_ponto = s.str.rfind('.')
+        ultima_virgula = s.str.rfind(',')
+        tamanho = s.str.len()
+        tem_ponto = ultimo_ponto >= 0
+        tem_virgula = ultima_virgula >= 0
+
+        ambos = tem_virgula & tem_ponto
+        americano = ambos & (ultimo_ponto > ultima_virgula) & (tamanho - ultimo_ponto - 1 <= 2)
+        brasileiro = ambos & ~americano & (ultima_virgula > ultimo_ponto) & (tamanho - ultima_virgula - 1 <= 2)
+        so_virgula = tem_virgula & ~tem_ponto
+
+        # Remover milhares: vírgulas (americano/ambíguo) ou pontos (brasileiro); decimal vira ponto
+        milhar = pd.Series(np.where(brasileiro, '.', ','), index=s.index)
+        remover = ambos
+        s[remover] = [t.replace(m, '') for t, m in zip(s[remover], milhar[remover])]
+        trocar = brasileiro | so_virgula
+        s[trocar] = s[trocar].str.replace(',', '.', regex=False)
+
+        # Sinal duplo ("(-5)") é ambíguo: inválido em vez de virar positivo
+        validos = s.str.fullmatch(r'\d+(\.\d*)?|\.\d+').fillna(False).astype(bool) & ~(parenteses & hifen)
+        vazios = s.isin(['', 'nan', 'None', 'none', 'NaN']) & ~parenteses
+        s[negativo] = '-' + s[negativo]
+        decimais = pd.Series([None] * len(s), dtype=object)
+        decimais[validos] = s[validos].map(Decimal)
+
+        resultado.loc[textos.index] = decimais.take(codigos).values
+        invalidos = (~validos & ~vazios).take(codigos).values
+        return resultado, list(textos.index[invalidos])
+
     @staticmethod
     def parse_data(data_str: str) -> Optional[date]:
         """Converte string de data para date object"""
@@ -119,10 +200,55 @@ class ImportacaoAvancadaService:
                 continue
         return None
 
-    def importar_proprietarios(self, file_content: bytes, db: Session) -> Dict[str, Any]:
-        """Importa proprietários do Excel"""
+    @staticmethod
+    def formatar_similares(candidatos: List[Candidato]) -> List[str]:
+        """Sugestões para mensagens de erro: nome e score de similaridade"""
+        return [f"{c.nome} ({c.score:.2f})" for c in candidatos]
+
+    @staticmethod
+    def _registrar_falha(db: Session, checkpoint: Optional[CheckpointImportacao], mensagem: str):
+        """Desfaz o lote em andamento; os lotes já gravados ficam disponíveis para retomada"""
+        if checkpoint is not None:
+            checkpoint.falhar(mensagem)
+        else:
+            db.rollback()
+
+    def importar_proprietarios(
+        self,
+        file_content: Union[bytes, BinaryIO],
+        db: Session,
+        progresso: Optional[ProgressoImportacao] = None,
+        nome_arquivo: Optional[str] = None,
+        tamanho_lote: Optional[int] = None,
+        id_checkpoint: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Importa proprietários do Excel
+
+        A planilha é validada coluna a coluna, documentos e emails já cadastrados são
+        consultados com IN em lotes e os novos proprietários são gravados a cada lote com
+        inserção em massa (COPY no PostgreSQL), com os hashes de senha gerados em paralelo.
+        """
+        progresso = progresso or ProgressoImportacao()
+        checkpoint = None
         try:
-            df = pd.read_excel(BytesIO(file_content), sheet_name=0)
+            # Proprietários aguardando o próximo lote
+            pendentes = []
+
+            def gravar_pendentes():
+                hashes = get_password_hashes([self.SENHA_PADRAO_PROPRIETARIO] * len(pendentes))
+                for registro, hashed_password in zip(pendentes, hashes):
+                    registro['hashed_password'] = hashed_password
+                BulkService.inserir(db, Usuario.__table__, pendentes)
+                pendentes.clear()
+
+            checkpoint = CheckpointImportacao(
+                db, 'proprietarios', hash_arquivo(file_content), nome_arquivo,
+                tamanho_lote, id_checkpoint, progresso, ao_gravar=gravar_pendentes
+            )
+            with LeitorPlanilhas(file_content) as leitor:
+                df = leitor.dataframe(0)
+                nome_planilha = leitor.nomes_planilhas[0]
 
             # Validar colunas obrigatórias
             colunas_esperadas = ['Nome', 'Sobrenome', 'Documento', 'Tipo Documento', 'Endereço', 'Telefone', 'Email']
@@ -136,101 +262,103 @@ class ImportacaoAvancadaService:
             registros_importados = 0
             erros = []
             linhas_processadas = 0
-
-            for idx, row in df.iterrows():
+            progresso.acompanhar_erros(erros)
+            checkpoint.acompanhar_erros(erros)
+            progresso.iniciar_planilha(nome_planilha, len(df), 1)
+            # Ao retomar, as linhas já gravadas em lotes anteriores são puladas
+            linha_inicial = checkpoint.linha_inicial(0)
+
+            # Limpar e validar todas as linhas de uma vez
+            preparados = self.preparar_proprietarios(df)
+            validos = preparados[preparados['erro'].isna()]
+
+            # Documentos e emails já cadastrados (o email também é usado como username)
+            documentos = BulkService.buscar_existentes(db, Usuario.documento, validos['documento'], Usuario.nome)
+            emails = set(BulkService.buscar_existentes(db, Usuario.email, validos['email']))
+            emails.update(BulkService.buscar_existentes(db, Usuario.username, validos['email']))
+
+            for posicao, (idx, dados) in enumerate(zip(preparados.index, preparados.to_dict('records'))):
+                if posicao < linha_inicial:
+                    continue
+                checkpoint.proxima_linha(0, nome_planilha, posicao, registros_importados)
                 linhas_processadas += 1
-                
-                try:
-                    # Limpar e validar dados
-                    nome = str(row['Nome']).strip()
-                    sobrenome = str(row.get('Sobrenome', '')).strip()
-                    documento = self.limpar_cpf(str(row['Documento']))
-                    tipo_documento = str(row.get('Tipo Documento', 'CPF')).strip().upper()
-                    endereco = str(row.get('Endereço', '')).strip()
-                    telefone = str(row.get('Telefone', '')).strip()
-                    email = str(row['Email']).strip().lower()
-
-                    # Validações
-                    if not nome:
-                        erros.append(f"Linha {idx+2}: Nome é obrigatório (encontrado: '{row.get('Nome', '')}')")
-                        continue
-
-                    if not email or '@' not in email:
-                        erros.append(f"Linha {idx+2}: Email inválido (encontrado: '{row.get('Email', '')}')")
-                        continue
-
-                    if not self.validar_cpf(documento):
-                        erros.append(f"Linha {idx+2}: Documento inválido (encontrado: '{row.get('Documento', '')}' -> '{documento}')")
-                        continue
-
-                    # Verificar duplicata
-                    existente = db.query(Usuario).filter(Usuario.documento == documento).first()
-                    if existente:
-                        erros.append(f"Linha {idx+2}: Proprietário com documento {documento} já existe (nome: {existente.nome})")
-                        continue
-
-                    # Criar proprietário
-                    proprietario = Usuario(
-                        nome=nome,
-                        sobrenome=sobrenome,
-                        documento=documento,
-                        tipo_documento=tipo_documento,
-                        endereco=endereco,
-                        telefone=telefone,
-                        email=email,
-                        tipo='usuario',  # proprietário
-                        username=email,  # usar email como username
-                        hashed_password='senha123',  # senha padrão
-                        ativo=True
-                    )
-
-                    db.add(proprietario)
-                    registros_importados += 1
-
-                except Exception as e:
-                    erros.append(f"Linha {idx+2}: Erro ao processar - {str(e)} (dados: {dict(row)})")
-
-            db.commit()
+                progresso.avancar()
+
+                erro = dados.pop('erro')
+                if erro:
+                    erros.append(erro)
+                    continue
+
+                # Verificar duplicata (no banco ou em linha anterior da planilha)
+                documento = dados['documento']
+                if documento in documentos:
+                    erros.append(f"Linha {idx+2}: Proprietário com documento {documento} já existe (nome: {documentos[documento]})")
+                    continue
+                if dados['email'] in emails:
+                    erros.append(f"Linha {idx+2}: Email {dados['email']} já cadastrado")
+                    continue
+                documentos[documento] = dados['nome']
+                emails.add(dados['email'])
+
+                # Criar proprietário (gravado com o lote)
+                pendentes.append({
+                    **dados,
+                    'tipo': 'usuario',  # proprietário
+                    'username': dados['email'],  # usar email como username
+                    'ativo': True
+                })
+                registros_importados += 1
+
+            checkpoint.concluir(1, registros_importados)
+            registros_importados = checkpoint.total_registros(registros_importados)
 
             return {
                 'success': True,
                 'message': f'Importação concluída. {registros_importados} proprietários importados de {linhas_processadas} linhas processadas.',
                 'registros_importados': registros_importados,
                 'linhas_processadas': linhas_processadas,
-                'erros': erros
+                'erros': checkpoint.erros_completos(),
+                'checkpoint': checkpoint.resumo()
             }
 
+        except ImportacaoCancelada as e:
+            self._registrar_falha(db, checkpoint, str(e))
+            raise
+
         except Exception as e:
-            db.rollback()
+            self._registrar_falha(db, checkpoint, str(e))
             return {
                 'success': False,
-                'message': f'Erro na importação: {str(e)}'
+                'message': f'Erro na importação: {str(e)}',
+                'checkpoint': checkpoint.resumo() if checkpoint else None
             }
 
-    def importar_imoveis(self, file_content: bytes, db: Session) -> Dict[str, Any]:
+        finally:
+            if checkpoint is not None:
+                checkpoint.liberar()
+
+    def importar_imoveis(
+        self,
+        file_content: Union[bytes, BinaryIO],
+        db: Session,
+        progresso: Optional[ProgressoImportacao] = None,
+        nome_arquivo: Optional[str] = None,
+        tamanho_lote: Optional[int] = None,
+        id_checkpoint: Optional[int] = None
+    ) -> Dict[str, Any]:
         """Importa imóveis do Excel"""
+        progresso = progresso or ProgressoImportacao()
+        checkpoint = None
         try:
-            # Primeiro ler para identificar as colunas
-            df_preview = pd.read_excel(BytesIO(file_content), sheet_name=0, nrows=1)
-            colunas = df_preview.columns.tolist()
-            
-            # Criar converters para colunas monetárias - forçar leitura como string
-            converters = {}
-            colunas_monetarias = [
-                'área total', 'area total', 'total area',
-                'área construída', 'area construida', 'constructed area', 
-                'valor catastral', 'cadastral value',
-                'valor de mercado', 'valor mercado', 'market value',
-                'iptu', 'iptu anual', 'annual iptu',
-                'condomínio', 'condominio', 'hoa fee'
-            ]
-            
-            for i, col in enumerate(colunas):
-                col_padronizada = col.lower().strip()
-                if any(monetaria in col_padronizada for monetaria in colunas_monetarias):
-                    converters[col] = str  # Forçar leitura como string para preservar formato
-            
-            df = pd.read_excel(BytesIO(file_content), sheet_name=0, converters=converters)
+            # Ler como object: o parser monetário vetorizado trata células numéricas e textos
+            # em formato brasileiro sem depender de converters por coluna
+            checkpoint = CheckpointImportacao(
+                db, 'imoveis', hash_arquivo(file_content), nome_arquivo,
+                tamanho_lote, id_checkpoint, progresso
+            )
+            with LeitorPlanilhas(file_content) as leitor:
+                df = leitor.dataframe(0, inferir_tipos=False)
+                nome_planilha = leitor.nomes_planilhas[0]
 
             # Mapeamento flexível de colunas
             mapeamento = self.mapear_colunas_imoveis(df.columns.tolist())
@@ -243,51 +371,47 @@ class ImportacaoAvancadaService:
 
             registros_importados = 0
             erros = []
-
-            for idx, row in df.iterrows():
+            progresso.acompanhar_erros(erros)
+            checkpoint.acompanhar_erros(erros)
+            progresso.iniciar_planilha(nome_planilha, len(df), 1)
+            # Ao retomar, as linhas já gravadas em lotes anteriores são puladas
+            linha_inicial = checkpoint.linha_inicial(0)
+
+            # Converter as colunas monetárias mapeadas de uma vez
+            valores_monetarios = {}
+            valores_invalidos = []
+            for campo in self.CAMPOS_MONETARIOS_IMOVEIS:
+                coluna = mapeamento[campo]
+                if not coluna:
+                    continue
+                valores, invalidos = self.parse_serie_monetaria(df[coluna])
+                valores_monetarios[campo] = valores
+                for idx in invalidos:
+                    valores_invalidos.append(f"Linha {idx+2}: Valor inválido em '{coluna}' ('{df.at[idx, coluna]}') - campo ignorado")
+
+            for posicao, (idx, row) in enumerate(df.iterrows()):
+                if posicao < linha_inicial:
+                    continue
+                checkpoint.proxima_linha(0, nome_planilha, posicao, registros_importados)
+                progresso.avancar()
                 try:
                     # Limpar e validar dados usando mapeamento
-                    nome = str(row[mapeamento['nome']]).strip()
-                    endereco = str(row[mapeamento['endereco']]).strip()
-                    tipo = str(row.get(mapeamento['tipo'], 'Residencial')).strip() if mapeamento['tipo'] else 'Residencial'
-
-                    # Validar tipo
-                    tipos_validos = ['Comercial', 'Residencial']
-                    if tipo not in tipos_validos:
-                        erros.append(f"Linha {idx+2}: Tipo deve ser 'Comercial' ou 'Residencial'")
+                    dados, erro = self.dados_linha_imovel(idx, row, mapeamento, valores_monetarios)
+                    if erro:
+                        erros.append(erro)
                         continue
 
                     # Verificar duplicata por nome + endereço
                     existente = db.query(Imovel).filter(
-                        Imovel.nome == nome,
-                        Imovel.endereco == endereco
+                        Imovel.nome == dados['nome'],
+                        Imovel.endereco == dados['endereco']
                     ).first()
                     if existente:
-                        erros.append(f"Linha {idx+2}: Imóvel '{nome}' já existe neste endereço")
+                        erros.append(f"Linha {idx+2}: Imóvel '{dados['nome']}' já existe neste endereço")
                         continue
 
-                    # Parsear valores numéricos usando mapeamento
-                    area_total = self.parse_valor_monetario(str(row.get(mapeamento['area_total'], ''))) if mapeamento['area_total'] else None
-                    area_construida = self.parse_valor_monetario(str(row.get(mapeamento['area_construida'], ''))) if mapeamento['area_construida'] else None
-                    valor_catastral = self.parse_valor_monetario(str(row.get(mapeamento['valor_catastral'], ''))) if mapeamento['valor_catastral'] else None
-                    valor_mercado = self.parse_valor_monetario(str(row.get(mapeamento['valor_mercado'], ''))) if mapeamento['valor_mercado'] else None
-                    iptu_anual = self.parse_valor_monetario(str(row.get(mapeamento['iptu_anual'], ''))) if mapeamento['iptu_anual'] else None
-                    condominio = self.parse_valor_monetario(str(row.get(mapeamento['condominio'], ''))) if mapeamento['condominio'] else None
-
                     # Criar imóvel
-                    imovel = Imovel(
-                        nome=nome,
-                        endereco=endereco,
-                        tipo=tipo,
-                        area_total=area_total,
-                        area_construida=area_construida,
-                        valor_catastral=valor_catastral,
-                        valor_mercado=valor_mercado,
-                        iptu_anual=iptu_anual,
-                        condominio=condominio,
-                        alugado=False,
-                        ativo=True
-                    )
+                    imovel = Imovel(**dados, alugado=False, ativo=True)
 
                     db.add(imovel)
                     registros_importados += 1
@@ -295,26 +419,54 @@ class ImportacaoAvancadaService:
                 except Exception as e:
                     erros.append(f"Linha {idx+2}: Erro ao processar - {str(e)}")
 
-            db.commit()
+            checkpoint.concluir(1, registros_importados)
+            registros_importados = checkpoint.total_registros(registros_importados)
 
             return {
                 'success': True,
                 'message': f'Importação concluída. {registros_importados} imóveis importados.',
                 'registros_importados': registros_importados,
-                'erros': erros
+                'erros': checkpoint.erros_completos(),
+                'checkpoint': checkpoint.resumo(),
+                'valores_invalidos': valores_invalidos
             }
 
+        except ImportacaoCancelada as e:
+            self._registrar_falha(db, checkpoint, str(e))
+            raise
+
         except Exception as e:
-            db.rollback()
+            self._registrar_falha(db, checkpoint, str(e))
             return {
                 'success': False,
-                'message': f'Erro na importação: {str(e)}'
+                'message': f'Erro na importação: {str(e)}',
+                'checkpoint': checkpoint.resumo() if checkpoint else None
             }
 
-    def importar_participacoes(self, file_content: bytes, db: Session) -> Dict[str, Any]:
+        finally:
+            if checkpoint is not None:
+                checkpoint.liberar()
+
+    def importar_participacoes(
+        self,
+        file_content: Union[bytes, BinaryIO],
+        db: Session,
+        progresso: Optional[ProgressoImportacao] = None,
+        nome_arquivo: Optional[str] = None,
+        tamanho_lote: Optional[int] = None,
+        id_checkpoint: Optional[int] = None
+    ) -> Dict[str, Any]:
         """Importa participações do Excel (formato com valores decimais 0-1)"""
+        progresso = progresso or ProgressoImportacao()
+        checkpoint = None
         try:
-            df = pd.read_excel(BytesIO(file_content), sheet_name=0)
+            checkpoint = CheckpointImportacao(
+                db, 'participacoes', hash_arquivo(file_content), nome_arquivo,
+                tamanho_lote, id_checkpoint, progresso
+            )
+            with LeitorPlanilhas(file_content) as leitor:
+                df = leitor.dataframe(0)
+                nome_planilha = leitor.nomes_planilhas[0]
 
             # Validar colunas mínimas
             if len(df.columns) < 3:
@@ -340,8 +492,18 @@ class ImportacaoAvancadaService:
 
             registros_importados = 0
             erros = []
-
-            for idx, row in df.iterrows():
+            resolvedor = ResolvedorEntidades(db)
+            progresso.acompanhar_erros(erros)
+            checkpoint.acompanhar_erros(erros)
+            progresso.iniciar_planilha(nome_planilha, len(df), 1)
+            # Ao retomar, as linhas já gravadas em lotes anteriores são puladas
+            linha_inicial = checkpoint.linha_inicial(0)
+
+            for posicao, (idx, row) in enumerate(df.iterrows()):
+                if posicao < linha_inicial:
+                    continue
+                checkpoint.proxima_linha(0, nome_planilha, posicao, registros_importados)
+                progresso.avancar()
                 try:
                     nome_imovel = str(row[mapeamento['nome_imovel']]).strip()
                     valor_total = row[mapeamento['valor_total']]
@@ -351,20 +513,11 @@ class ImportacaoAvancadaService:
                         erros.append(f"Linha {idx+2}: VALOR deve ser próximo de 1.0 (100%) - encontrado: {valor_total}")
                         continue
 
-                    # Buscar imóvel por nome
-                    imovel = db.query(Imovel).filter(
-                        Imovel.nome.ilike(f"%{nome_imovel}%")
-                    ).first()
-
-                    if not imovel:
-                        # Tentar buscar por endereço também
-                        imovel = db.query(Imovel).filter(Imovel.endereco.ilike(f'%{nome_imovel}%')).first()
-                    if not imovel:
-                        # Listar imóveis similares para debug
-                        imoveis_similares = db.query(Imovel).filter(
-                            Imovel.nome.ilike(f"%{nome_imovel.split()[0]}%")
-                        ).limit(3).all()
-                        similares = [i.nome for i in imoveis_similares]
+                    # Buscar imóvel por nome e depois por endereço (índice de trigramas em memória)
+                    id_imovel = resolvedor.resolver_imovel(nome_imovel)
+                    if id_imovel is None:
+                        # Sugerir os imóveis mais parecidos, com o score de similaridade
+                        similares = self.formatar_similares(resolvedor.imoveis_similares(nome_imovel))
                         erros.append(f"Linha {idx+2}: Imóvel '{nome_imovel}' não encontrado. Imóveis similares: {similares}")
                         continue
 
@@ -394,21 +547,14 @@ class ImportacaoAvancadaService:
                             continue
 
                         # Buscar proprietário por nome
-                        proprietario = db.query(Usuario).filter(
-                            Usuario.nome.ilike(f"%{proprietario_nome}%")
-                        ).first()
-
-                        if not proprietario:
-                            # Listar proprietários similares para debug
-                            proprietarios_similares = db.query(Usuario).filter(
-                                Usuario.nome.ilike(f"%{proprietario_nome.split()[0]}%")
-                            ).limit(3).all()
-                            similares = [p.nome for p in proprietarios_similares]
+                        id_proprietario = resolvedor.resolver_proprietario(proprietario_nome)
+                        if id_proprietario is None:
+                            similares = self.formatar_similares(resolvedor.proprietarios_similares(proprietario_nome))
                             erros.append(f"Linha {idx+2}: Proprietário '{proprietario_nome}' não encontrado. Proprietários similares: {similares}")
                             continue
 
                         participacoes_imovel.append({
-                            'proprietario': proprietario,
+                            'id_proprietario': id_proprietario,
                             'participacao': participacao_decimal
                         })
                         soma_participacoes += participacao_decimal
@@ -422,8 +568,8 @@ class ImportacaoAvancadaService:
                     for part in participacoes_imovel:
                         # Verificar se já existe
                         existente = db.query(Participacao).filter(
-                            Participacao.id_imovel == imovel.id,
-                            Participacao.id_proprietario == part['proprietario'].id
+                            Participacao.id_imovel == id_imovel,
+                            Participacao.id_proprietario == part['id_proprietario']
                         ).first()
                         
                         if existente:
@@ -433,8 +579,8 @@ class ImportacaoAvancadaService:
                         else:
                             # Criar nova
                             nova_participacao = Participacao(
-                                id_imovel=imovel.id,
-                                id_proprietario=part['proprietario'].id,
+                                id_imovel=id_imovel,
+                                id_proprietario=part['id_proprietario'],
                                 participacao=part['participacao'],
                                 data_cadastro=date.today()
                             )
@@ -445,22 +591,97 @@ class ImportacaoAvancadaService:
                 except Exception as e:
                     erros.append(f"Linha {idx+2}: Erro ao processar - {str(e)}")
 
-            db.commit()
+            checkpoint.concluir(1, registros_importados)
+            registros_importados = checkpoint.total_registros(registros_importados)
 
             return {
                 'success': True,
                 'message': f'Importação concluída. {registros_importados} participações importadas.',
                 'registros_importados': registros_importados,
-                'erros': erros
+                'erros': checkpoint.erros_completos(),
+                'nao_encontrados': resolvedor.relatorio_nao_encontrados(),
+                'checkpoint': checkpoint.resumo()
             }
 
+        except ImportacaoCancelada as e:
+            self._registrar_falha(db, checkpoint, str(e))
+            raise
+
         except Exception as e:
-            db.rollback()
+            self._registrar_falha(db, checkpoint, str(e))
             return {
                 'success': False,
-                'message': f'Erro na importação: {str(e)}'
+                'message': f'Erro na importação: {str(e)}',
+                'checkpoint': checkpoint.resumo() if checkpoint else None
             }
 
+        finally:
+            if checkpoint is not None:
+                checkpoint.liberar()
+
+
+    @classmethod
+    def preparar_proprietarios(cls, df: 'pd.DataFrame') -> 'pd.DataFrame':
+        """
+        Limpa e valida a planilha de proprietários coluna a coluna
+
+        Retorna um DataFrame com os campos limpos (nome, sobrenome, documento, tipo_documento,
+        endereco, telefone, email) e a coluna 'erro', vazia nas linhas válidas.
+        """
+        def texto(coluna: str, padrao: str = '') -> 'pd.Series':
+            if coluna not in df.columns:
+                return pd.Series(padrao, index=df.index, dtype=object)
+            return df[coluna].astype(str).str.strip()
+
+        dados = pd.DataFrame({
+            'nome': texto('Nome'),
+            'sobrenome': texto('Sobrenome'),
+            'documento': df['Documento'].astype(str).str.replace(r'[^\d]', '', regex=True),
+            'tipo_documento': texto('Tipo Documento', 'CPF').str.upper(),
+            'endereco': texto('Endereço'),
+            'telefone': texto('Telefone'),
+            'email': texto('Email').str.lower()
+        }, index=df.index)
+
+        # Validações, na ordem em que são reportadas (CPF tem 11 dígitos, CNPJ tem 14)
+        sem_nome = dados['nome'] == ''
+        email_invalido = ~sem_nome & ~dados['email'].str.contains('@', regex=False)
+        documento_invalido = ~sem_nome & ~email_invalido & (dados['documento'].str.len() < 11)
+
+        dados['erro'] = None
+        for idx in dados.index[sem_nome]:
+            dados.at[idx, 'erro'] = f"Linha {idx+2}: Nome é obrigatório (encontrado: '{df.at[idx, 'Nome']}')"
+        for idx in dados.index[email_invalido]:
+            dados.at[idx, 'erro'] = f"Linha {idx+2}: Email inválido (encontrado: '{df.at[idx, 'Email']}')"
+        for idx in dados.index[documento_invalido]:
+            dados.at[idx, 'erro'] = (
+                f"Linha {idx+2}: Documento inválido (encontrado: '{df.at[idx, 'Documento']}' -> '{dados.at[idx, 'documento']}')"
+            )
+        return dados
+
+    @classmethod
+    def dados_linha_imovel(
+        cls,
+        idx,
+        row: 'pd.Series',
+        mapeamento: Dict[str, str],
+        valores_monetarios: Dict[str, 'pd.Series']
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """Limpa e valida uma linha da planilha de imóveis; retorna (dados, erro)"""
+        nome = str(row[mapeamento['nome']]).strip()
+        endereco = str(row[mapeamento['endereco']]).strip()
+        tipo = str(row.get(mapeamento['tipo'], 'Residencial')).strip() if mapeamento['tipo'] else 'Residencial'
+
+        # Validar tipo
+        tipos_validos = ['Comercial', 'Residencial']
+        if tipo not in tipos_validos:
+            return None, f"Linha {idx+2}: Tipo deve ser 'Comercial' ou 'Residencial'"
+
+        # Valores numéricos já convertidos por coluna (campos não mapeados ficam vazios)
+        dados = {'nome': nome, 'endereco': endereco, 'tipo': tipo}
+        for campo in cls.CAMPOS_MONETARIOS_IMOVEIS:
+            dados[campo] = valores_monetarios[campo][idx] if campo in valores_monetarios else None
+        return dados, None
 
     @staticmethod
     def mapear_colunas_imoveis(colunas: List[str]) -> Dict[str, str]:
@@ -532,213 +753,364 @@ class ImportacaoAvancadaService:
         
         return mapeamento
 
-    def importar_alugueis(self, file_content: bytes, db: Session) -> Dict[str, Any]:
-        """Importa aluguéis mensais de múltiplas planilhas Excel"""
+    def importar_alugueis(
+        self,
+        file_content: Union[bytes, BinaryIO],
+        db: Session,
+        progresso: Optional[ProgressoImportacao] = None,
+        nome_arquivo: Optional[str] = None,
+        tamanho_lote: Optional[int] = None,
+        id_checkpoint: Optional[int] = None,
+        paralelo: bool = False,
+        forcar: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Importa aluguéis mensais de múltiplas planilhas Excel
+
+        Com paralelo=True as planilhas (uma por mês, independentes entre si) são lidas e
+        validadas em um pool de processos. A resolução de nomes e a gravação continuam no
+        processo atual, na ordem das planilhas, com upserts em massa a cada lote.
+
+        Planilhas com o mesmo conteúdo da última versão importada são ignoradas (e listadas
+        em 'planilhas_ignoradas'); forcar=True reprocessa todas.
+        """
+        progresso = progresso or ProgressoImportacao()
+        checkpoint = None
+        leitor = None
         try:
-            xl = pd.ExcelFile(BytesIO(file_content))
+            hash_conteudo_arquivo = hash_arquivo(file_content)
+            deduplicacao = DeduplicacaoImportacao(db, 'alugueis', hash_conteudo_arquivo, forcar)
+            if id_checkpoint is None:
+                planilhas_inalteradas = deduplicacao.planilhas_arquivo_inalterado()
+                if planilhas_inalteradas is not None:
+                    return {
+                        'success': True,
+                        'message': 'Arquivo idêntico a uma importação anterior. Nenhuma planilha alterada.',
+                        'registros_importados': 0,
+                        'erros': [],
+                        'planilhas_ignoradas': planilhas_inalteradas,
+                        'arquivo_ja_importado': True
+                    }
+
+            # Registros aguardando o próximo lote, gravados em ordem com upsert em massa
+            pendentes = []
+
+            def gravar_pendentes():
+                BulkService.upsert_alugueis_mensais(db, pendentes)
+                pendentes.clear()
+
+            checkpoint = CheckpointImportacao(
+                db, 'alugueis', hash_conteudo_arquivo, nome_arquivo,
+                tamanho_lote, id_checkpoint, progresso, ao_gravar=gravar_pendentes
+            )
+            leitor = LeitorPlanilhas(file_content)
             registros_importados = 0
             erros = []
+            valores_invalidos = []
+            resolvedor = ResolvedorEntidades(db)
+            progresso.acompanhar_erros(erros)
+            checkpoint.acompanhar_erros(erros)
+            nomes_planilhas = leitor.nomes_planilhas
+            total_planilhas = len(nomes_planilhas)
+
+            # Ao retomar, planilhas já gravadas nem chegam a ser lidas
+            indices = [i for i in range(total_planilhas) if not checkpoint.planilha_concluida(i)]
+            hashes_conhecidos = deduplicacao.hashes_conhecidos()
+
+            if paralelo and len(indices) > 1:
+                leitor.fechar()
+                analises = zip(indices, analisar_planilhas_alugueis_em_paralelo(
+                    file_content, [nomes_planilhas[i] for i in indices], hashes_conhecidos
+                ))
+            else:
+                # Cada planilha é lida uma única vez, em streaming, como object: células numéricas
+                # e textos como "49.891,92" são tratados coluna a coluna pelo parser monetário
+                analises = (
+                    (i, self.preparar_planilha_alugueis(
+                        nomes_planilhas[i],
+                        leitor.dataframe(nomes_planilhas[i], header=None, inferir_tipos=False),
+                        hashes_conhecidos.get(nomes_planilhas[i])
+                    ))
+                    for i in indices
+                )
+
+            for indice, analise in analises:
+                progresso.iniciar_planilha(analise['planilha'], len(analise['linhas']), total_planilhas)
+                if analise['inalterada']:
+                    deduplicacao.planilha_inalterada(analise['planilha'], analise['hash'])
+                    continue
+
+                linha_inicial = checkpoint.linha_inicial(indice)
+                erros_antes = len(erros)
+                valores_invalidos.extend(analise['valores_invalidos'])
+                registros_planilha = 0
+                linhas = self._linhas_planilha_alugueis(analise, resolvedor, erros, linha_inicial)
+                for posicao, registros_linha in linhas:
+                    checkpoint.proxima_linha(indice, analise['planilha'], posicao, registros_importados)
+                    progresso.avancar()
+                    pendentes.extend(registros_linha)
+                    registros_importados += len(registros_linha)
+                    registros_planilha += len(registros_linha)
+
+                deduplicacao.registrar_planilha(
+                    analise['planilha'], analise['hash'], registros_planilha,
+                    completa=linha_inicial == 0 and len(erros) == erros_antes
+                )
+
+            deduplicacao.registrar_arquivo(nomes_planilhas, registros_importados)
+            checkpoint.concluir(total_planilhas, registros_importados)
+            registros_importados = checkpoint.total_registros(registros_importados)
+
+            mensagem = f'Importação concluída. {registros_importados} registros de aluguel importados.'
+            if deduplicacao.ignoradas:
+                mensagem += f' {len(deduplicacao.ignoradas)} planilha(s) sem alterações ignorada(s).'
 
-            for sheet_name in xl.sheet_names:
-                try:
-                    # Primeiro, ler apenas para determinar o número de colunas
-                    df_preview = pd.read_excel(xl, sheet_name=sheet_name, header=None, nrows=5)
-                    num_cols = len(df_preview.columns)
-
-                    # Usar converters para forçar leitura como string das colunas monetárias
-                    # Isso previne que pandas converta automaticamente valores como "49.891,92" para float
-                    converters = {}
-                    for i in range(num_cols):
-                        if i == 0:
-                            converters[i] = str  # Nome do imóvel
-                        else:
-                            converters[i] = str  # Valores monetários - preservar formato original
-
-                    df = pd.read_excel(xl, sheet_name=sheet_name, header=None, converters=converters)
-                    
-                    # Verificar se há dados suficientes
-                    if df.empty or len(df) < 2:
-                        erros.append(f"Planilha '{sheet_name}': Dados insuficientes")
-                        continue
-                    
-                    # Extrair data de referência da célula A1
-                    data_ref_str = str(df.iloc[0, 0]).strip()
-                    try:
-                        # Tentar diferentes formatos de data
-                        if 'T' in data_ref_str:
-                            # Formato ISO com timezone
-                            data_referencia = datetime.fromisoformat(data_ref_str.replace('Z', '+00:00')).date()
-                        elif len(data_ref_str.split('-')[0]) == 4:
-                            # Formato YYYY-MM-DD
-                            if ' ' in data_ref_str:
-                                # Com hora: YYYY-MM-DD HH:MM:SS
-                                data_referencia = datetime.strptime(data_ref_str.split(' ')[0], '%Y-%m-%d').date()
-                            else:
-                                # Apenas data: YYYY-MM-DD
-                                data_referencia = datetime.strptime(data_ref_str, '%Y-%m-%d').date()
-                        else:
-                            # Formato brasileiro DD/MM/YYYY
-                            data_referencia = datetime.strptime(data_ref_str, '%d/%m/%Y').date()
-                    except ValueError as e:
-                        erros.append(f"Planilha '{sheet_name}': Data inválida '{data_ref_str}' - {str(e)}")
-                        continue
-
-                    # Os cabeçalhos estão na linha 0, colunas 1 em diante
-                    headers = df.iloc[0, 1:]  # Pular a coluna da data
-                    
-                    # Pular a linha dos cabeçalhos para os dados
-                    df_data = df[1:]
-                    
-                    # Remover linhas vazias
-                    df_data = df_data.dropna(how='all')
-                    
-                    if df_data.empty:
-                        erros.append(f"Planilha '{sheet_name}': Dados insuficientes")
-                        continue
-                    
-                    # Verificar se a primeira linha de dados tem a estrutura esperada
-                    first_data_row = df_data.iloc[0] if len(df_data) > 0 else None
-                    if first_data_row is None:
-                        erros.append(f"Planilha '{sheet_name}': Dados insuficientes")
-                        continue
-                    
-                    # A estrutura esperada é:
-                    # Coluna 0: Nome do imóvel
-                    # Coluna 1: Valor Total
-                    # Colunas 2 até penúltima: Valores por proprietário (com nomes específicos)
-                    # Última coluna: Taxa de Administração
-                    
-                    # Definir índices das colunas (ajustados pois headers começa da coluna 1)
-                    imovel_col = 0  # Sempre a primeira coluna dos dados
-                    valor_total_col = 1  # Sempre a segunda coluna dos dados
-                    taxa_admin_col = len(df_data.columns) - 1  # Última coluna dos dados
-                    
-                    # Colunas dos proprietários são da 3ª até a penúltima dos dados
-                    # Mas mapeiam para os cabeçalhos (que começam do índice 0 dos headers)
-                    proprietario_cols = []
-                    for i in range(2, len(df_data.columns) - 1):
-                        header_idx = i - 1  # Headers começa do índice 0
-                        if header_idx < len(headers):
-                            nome_proprietario = str(headers.iloc[header_idx]).strip()
-                            if nome_proprietario and nome_proprietario.lower() not in ['nan', 'none', '']:
-                                proprietario_cols.append((i, nome_proprietario))
-                    
-                    # Mapear proprietários pelos nomes das colunas do Excel
-                    proprietarios_mapeados = []
-                    for col_idx, nome_excel in proprietario_cols:
-                        # Buscar proprietário por nome (case insensitive, partial match)
-                        proprietario = None
-                        for tipo in ['usuario', 'proprietario']:
-                            proprietario = db.query(Usuario).filter(
-                                Usuario.tipo == tipo,
-                                Usuario.nome.ilike(f'%{nome_excel}%')
-                            ).first()
-                            if proprietario:
-                                break
-                        
-                        if not proprietario:
-                            # Tentar buscar por nome completo (nome + sobrenome)
-                            partes_nome = nome_excel.split()
-                            if len(partes_nome) >= 2:
-                                proprietario = db.query(Usuario).filter(
-                                    Usuario.tipo.in_(['usuario', 'proprietario']),
-                                    Usuario.nome.ilike(f'%{partes_nome[0]}%'),
-                                    Usuario.sobrenome.ilike(f'%{partes_nome[1]}%')
-                                ).first()
-                        
-                        if proprietario:
-                            proprietarios_mapeados.append((col_idx, proprietario))
-                        else:
-                            erros.append(f"Planilha '{sheet_name}': Proprietário '{nome_excel}' não encontrado")
-                    
-                    if not proprietarios_mapeados:
-                        erros.append(f"Planilha '{sheet_name}': Nenhum proprietário mapeado")
-                        continue
-
-                    # Processar cada linha (imóvel)
-                    for idx, row in df_data.iterrows():
-                        try:
-                            imovel_nome = str(row.iloc[imovel_col]).strip()
-                            if not imovel_nome or imovel_nome.lower() in ['nan', 'none', '']:
-                                continue
-                            
-                            # Buscar imóvel por nome
-                            imovel = db.query(Imovel).filter(Imovel.nome.ilike(f'%{imovel_nome}%')).first()
-                            if not imovel:
-                                # Tentar buscar por endereço também
-                                imovel = db.query(Imovel).filter(Imovel.endereco.ilike(f'%{imovel_nome}%')).first()
-                            if not imovel:
-                                erros.append(f"Linha {idx+3} planilha '{sheet_name}': Imóvel '{imovel_nome}' não encontrado")
-                                continue
-                            
-                            # Valor total do aluguel
-                            valor_total_str = str(row.iloc[valor_total_col]).strip()
-                            valor_total = self.parse_valor_monetario(valor_total_str)
-                            if valor_total is None:
-                                erros.append(f"Linha {idx+3} planilha '{sheet_name}': Valor total inválido '{valor_total_str}'")
-                                continue
-                            
-                            # Taxa de administração (opcional)
-                            taxa_admin_str = str(row.iloc[taxa_admin_col]).strip()
-                            taxa_admin = self.parse_valor_monetario(taxa_admin_str) or Decimal('0')
-                            
-                            # Processar valores por proprietário mapeado
-                            for col_idx, proprietario in proprietarios_mapeados:
-                                valor_prop_str = str(row.iloc[col_idx]).strip()
-                                if valor_prop_str.lower() in ['nan', 'none', '']:
-                                    continue
-                                
-                                # Limpar valor
-                                valor_proprietario = self.parse_valor_monetario(valor_prop_str)
-                                if valor_proprietario is None:
-                                    continue
-                                
-                                # Verificar se já existe registro para este mês/proprietário/imóvel
-                                existing = db.query(AluguelMensal).filter(
-                                    AluguelMensal.id_imovel == imovel.id,
-                                    AluguelMensal.id_proprietario == proprietario.id,
-                                    AluguelMensal.data_referencia == data_referencia
-                                ).first()
-                                
-                                if existing:
-                                    # Atualizar
-                                    existing.valor_total = valor_total
-                                    existing.valor_proprietario = valor_proprietario
-                                    existing.taxa_administracao = taxa_admin
-                                    existing.atualizado_em = func.now()
-                                else:
-                                    # Criar novo
-                                    novo_aluguel = AluguelMensal(
-                                        id_imovel=imovel.id,
-                                        id_proprietario=proprietario.id,
-                                        data_referencia=data_referencia,
-                                        valor_total=valor_total,
-                                        valor_proprietario=valor_proprietario,
-                                        taxa_administracao=taxa_admin
-                                    )
-                                    db.add(novo_aluguel)
-                                
-                                registros_importados += 1
-                        
-                        except Exception as e:
-                            erros.append(f"Linha {idx+3} planilha '{sheet_name}': Erro ao processar - {str(e)}")
-                
-                except Exception as e:
-                    erros.append(f"Planilha '{sheet_name}': Erro geral - {str(e)}")
-            
-            db.commit()
-            
             return {
                 'success': True,
-                'message': f'Importação concluída. {registros_importados} registros de aluguel importados.',
+                'message': mensagem,
                 'registros_importados': registros_importados,
-                'erros': erros
+                'erros': checkpoint.erros_completos(),
+                'nao_encontrados': resolvedor.relatorio_nao_encontrados(),
+                'planilhas_ignoradas': deduplicacao.ignoradas,
+                'arquivo_ja_importado': False,
+                'checkpoint': checkpoint.resumo(),
+                'valores_invalidos': valores_invalidos
             }
-        
+
+        except ImportacaoCancelada as e:
+            self._registrar_falha(db, checkpoint, str(e))
+            raise
+
         except Exception as e:
-            db.rollback()
+            self._registrar_falha(db, checkpoint, str(e))
             return {
                 'success': False,
-                'message': f'Erro na importação: {str(e)}'
+                'message': f'Erro na importação: {str(e)}',
+                'checkpoint': checkpoint.resumo() if checkpoint else None
             }
 
+        finally:
+            if checkpoint is not None:
+                checkpoint.liberar()
+            if leitor is not None:
+                leitor.fechar()
+
+    @classmethod
+    def preparar_planilha_alugueis(
+        cls,
+        sheet_name: str,
+        df: 'pd.DataFrame',
+        hash_conhecido: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Calcula o hash do conteúdo da planilha e só a interpreta se ele difere do hash da
+        versão já importada; planilhas inalteradas voltam sem linhas, com inalterada=True
+        """
+        hash_conteudo = hash_planilha(df)
+        inalterada = hash_conteudo == hash_conhecido
+        if inalterada:
+            analise = {
+                'planilha': sheet_name,
+                'erro': None,
+                'data_referencia': None,
+                'proprietarios': [],
+                'linhas': [],
+                'valores_invalidos': []
+            }
+        else:
+            analise = cls.analisar_planilha_alugueis(sheet_name, df)
+        analise['hash'] = hash_conteudo
+        analise['inalterada'] = inalterada
+        return analise
+
+    @staticmethod
+    def analisar_planilha_alugueis(sheet_name: str, df: 'pd.DataFrame') -> Dict[str, Any]:
+        """
+        Interpreta uma planilha mensal de aluguéis sem acessar o banco
+
+        Não depende de estado nem de sessão, de modo que pode rodar em outro processo.
+        Retorna a data de referência, as colunas de proprietários e as linhas com os valores
+        já convertidos; a resolução de nomes fica a cargo de importar_alugueis. Taxas e valores
+        de proprietário inválidos são ignorados e listados em 'valores_invalidos'.
+        """
+        analise = {
+            'planilha': sheet_name,
+            'erro': None,
+            'data_referencia': None,
+            'proprietarios': [],
+            'linhas': [],
+            'valores_invalidos': []
+        }
+        try:
+            # Verificar se há dados suficientes
+            if df.empty or len(df) < 2:
+                analise['erro'] = f"Planilha '{sheet_name}': Dados insuficientes"
+                return analise
+
+            # Extrair data de referência da célula A1
+            data_ref_str = str(df.iloc[0, 0]).strip()
+            try:
+                # Tentar diferentes formatos de data
+                if 'T' in data_ref_str:
+                    # Formato ISO com timezone
+                    data_referencia = datetime.fromisoformat(data_ref_str.replace('Z', '+00:00')).date()
+                elif len(data_ref_str.split('-')[0]) == 4:
+                    # Formato YYYY-MM-DD
+                    if ' ' in data_ref_str:
+                        # Com hora: YYYY-MM-DD HH:MM:SS
+                        data_referencia = datetime.strptime(data_ref_str.split(' ')[0], '%Y-%m-%d').date()
+                    else:
+                        # Apenas data: YYYY-MM-DD
+                        data_referencia = datetime.strptime(data_ref_str, '%Y-%m-%d').date()
+                else:
+                    # Formato brasileiro DD/MM/YYYY
+                    data_referencia = datetime.strptime(data_ref_str, '%d/%m/%Y').date()
+            except ValueError as e:
+                analise['erro'] = f"Planilha '{sheet_name}': Data inválida '{data_ref_str}' - {str(e)}"
+                return analise
+            analise['data_referencia'] = data_referencia
+
+            # Os cabeçalhos estão na linha 0, colunas 1 em diante
+            headers = df.iloc[0, 1:]  # Pular a coluna da data
+
+            # Pular a linha dos cabeçalhos para os dados
+            df_data = df[1:]
+
+            # Remover linhas vazias
+            df_data = df_data.dropna(how='all')
+
+            if df_data.empty:
+                analise['erro'] = f"Planilha '{sheet_name}': Dados insuficientes"
+                return analise
+
+            # A estrutura esperada é:
+            # Coluna 0: Nome do imóvel
+            # Coluna 1: Valor Total
+            # Colunas 2 até penúltima: Valores por proprietário (com nomes específicos)
+            # Última coluna: Taxa de Administração
+
+            # Definir índices das colunas (ajustados pois headers começa da coluna 1)
+            imovel_col = 0  # Sempre a primeira coluna dos dados
+            valor_total_col = 1  # Sempre a segunda coluna dos dados
+            taxa_admin_col = len(df_data.columns) - 1  # Última coluna dos dados
+
+            # Colunas dos proprietários são da 3ª até a penúltima dos dados
+            # Mas mapeiam para os cabeçalhos (que começam do índice 0 dos headers)
+            proprietario_cols = []
+            for i in range(2, len(df_data.columns) - 1):
+                header_idx = i - 1  # Headers começa do índice 0
+                if header_idx < len(headers):
+                    nome_proprietario = str(headers.iloc[header_idx]).strip()
+                    if nome_proprietario and nome_proprietario.lower() not in ['nan', 'none', '']:
+                        proprietario_cols.append((i, nome_proprietario))
+            analise['proprietarios'] = proprietario_cols
+
+            # Converter as colunas monetárias inteiras de uma vez
+            # (o valor total inválido vira erro da linha ao resolver os registros)
+            valores_totais, _ = ImportacaoAvancadaService.parse_serie_monetaria(df_data.iloc[:, valor_total_col])
+            nome_taxa = str(headers.iloc[taxa_admin_col - 1]).strip() if taxa_admin_col - 1 < len(headers) else ''
+            colunas_opcionais = [(taxa_admin_col, nome_taxa or 'Taxa Administração')] + proprietario_cols
+            convertidas = {}
+            for col_idx, nome_coluna in colunas_opcionais:
+                coluna = df_data.iloc[:, col_idx]
+                valores, invalidos = ImportacaoAvancadaService.parse_serie_monetaria(coluna)
+                convertidas[col_idx] = valores
+                for idx in invalidos:
+                    analise['valores_invalidos'].append(
+                        f"Linha {idx+3} planilha '{sheet_name}': Valor inválido em '{nome_coluna}' "
+                        f"('{coluna[idx]}') - campo ignorado"
+                    )
+            taxas_admin = convertidas.pop(taxa_admin_col)
+            valores_proprietarios = convertidas
+
+            # Uma entrada por imóvel: (índice, nome, valor total, texto original se inválido, taxa, valores)
+            for idx, imovel_celula in df_data.iloc[:, imovel_col].items():
+                imovel_nome = str(imovel_celula).strip()
+                if not imovel_nome or imovel_nome.lower() in ['nan', 'none', '']:
+                    continue
+
+                valor_total = valores_totais[idx]
+                valor_total_str = None
+                if valor_total is None:
+                    valor_total_str = str(df_data.at[idx, df_data.columns[valor_total_col]]).strip()
+
+                analise['linhas'].append((
+                    idx,
+                    imovel_nome,
+                    valor_total,
+                    valor_total_str,
+                    taxas_admin[idx] or Decimal('0'),  # Taxa de administração (opcional)
+                    {col_idx: valores[idx] for col_idx, valores in valores_proprietarios.items()}
+                ))
+
+        except Exception as e:
+            analise['erro'] = f"Planilha '{sheet_name}': Erro geral - {str(e)}"
+            analise['linhas'] = []
+            analise['valores_invalidos'] = []
+
+        return analise
+
+    @staticmethod
+    def _linhas_planilha_alugueis(
+        analise: Dict[str, Any],
+        resolvedor: ResolvedorEntidades,
+        erros: List[str],
+        linha_inicial: int = 0
+    ) -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+        """
+        Resolve imóveis e proprietários de uma planilha analisada e gera, para cada linha válida
+        a partir de linha_inicial, sua posição na planilha e os registros a gravar
+        """
+        sheet_name = analise['planilha']
+        if analise['erro']:
+            erros.append(analise['erro'])
+            return
+
+        # Mapear proprietários pelos nomes das colunas do Excel (resolução em memória)
+        proprietarios_mapeados = []
+        for col_idx, nome_excel in analise['proprietarios']:
+            id_proprietario = resolvedor.resolver_proprietario(nome_excel)
+            if id_proprietario is not None:
+                proprietarios_mapeados.append((col_idx, id_proprietario))
+            else:
+                erros.append(f"Planilha '{sheet_name}': Proprietário '{nome_excel}' não encontrado")
+
+        if not proprietarios_mapeados:
+            erros.append(f"Planilha '{sheet_name}': Nenhum proprietário mapeado")
+            return
+
+        for posicao, linha in enumerate(analise['linhas']):
+            if posicao < linha_inicial:
+                continue
+            idx, imovel_nome, valor_total, valor_total_str, taxa_admin, valores = linha
+            registros = []
+            try:
+                # Buscar imóvel por nome ou endereço
+                id_imovel = resolvedor.resolver_imovel(imovel_nome)
+                if id_imovel is None:
+                    erros.append(f"Linha {idx+3} planilha '{sheet_name}': Imóvel '{imovel_nome}' não encontrado")
+                    continue
+
+                if valor_total is None:
+                    erros.append(f"Linha {idx+3} planilha '{sheet_name}': Valor total inválido '{valor_total_str}'")
+                    continue
+
+                # Processar valores por proprietário mapeado
+                for col_idx, id_proprietario in proprietarios_mapeados:
+                    valor_proprietario = valores[col_idx]
+                    if valor_proprietario is None:
+                        continue
+
+                    registros.append({
+                        'id_imovel': id_imovel,
+                        'id_proprietario': id_proprietario,
+                        'data_referencia': analise['data_referencia'],
+                        'valor_total': valor_total,
+                        'valor_proprietario': valor_proprietario,
+                        'taxa_administracao': taxa_admin
+                    })
+
+            except Exception as e:
+                erros.append(f"Linha {idx+3} planilha '{sheet_name}': Erro ao processar - {str(e)}")
+
+            yield posicao, registros
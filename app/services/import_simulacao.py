@@ -0,0 +1,399 @@
+"""
+Simulação (dry-run) de importações
+Calcula, sem gravar nada, o que cada importação faria: registros a inserir, a atualizar,
+inalterados e com erro. As tabelas envolvidas são carregadas uma única vez (snapshot em
+massa) e todas as comparações são feitas em memória.
+"""
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple, Union
+from decimal import Decimal, ROUND_HALF_UP
+
+import pandas as pd
+from sqlalchemy.orm import Session
+
+from app.models.usuario import Usuario
+from app.models.imovel import Imovel
+from app.models.aluguel import AluguelMensal
+from app.models.participacao import Participacao
+from app.services.import_resolver import ResolvedorEntidades
+from app.services.import_service import ImportacaoAvancadaService
+from app.services.xlsx_reader import LeitorPlanilhas
+
+
+def _quantizar(valor, casas: Optional[int]) -> Any:
+    """Arredonda para a escala da coluna Numeric, para exibir o valor como ficará gravado"""
+    if valor is None or casas is None:
+        return valor
+    return Decimal(str(valor)).quantize(Decimal(1).scaleb(-casas), rounding=ROUND_HALF_UP)
+
+
+def _mesmo_valor(atual, novo, casas: Optional[int]) -> bool:
+    """
+    Compara o valor gravado com o da planilha na escala da coluna. Diferenças de até meia
+    unidade da última casa contam como iguais: o arredondamento de valores como 347,525
+    depende do banco (SQLite grava float, PostgreSQL arredonda o numeric)
+    """
+    if atual is None or novo is None or casas is None:
+        return atual == novo
+    return abs(Decimal(str(atual)) - Decimal(str(novo))) <= Decimal(5).scaleb(-casas - 1)
+
+
+class DiffImportacao:
+    """Contagens por categoria e os primeiros itens de cada uma"""
+
+    CATEGORIAS = ('inserir', 'atualizar', 'inalterado')
+
+    def __init__(self, limite_detalhes: int):
+        self.limite_detalhes = limite_detalhes
+        self.contagens = {categoria: 0 for categoria in self.CATEGORIAS}
+        self.detalhes: Dict[str, List[Dict[str, Any]]] = {categoria: [] for categoria in self.CATEGORIAS}
+        self.erros: List[str] = []
+
+    def adicionar(self, categoria: str, item: Dict[str, Any]):
+        self.contagens[categoria] += 1
+        if len(self.detalhes[categoria]) < self.limite_detalhes:
+            self.detalhes[categoria].append(item)
+
+    def comparar(
+        self,
+        item: Dict[str, Any],
+        atuais: Optional[Dict[str, Any]],
+        novos: Dict[str, Any],
+        escalas: Dict[str, int]
+    ):
+        """
+        Classifica o item como inserção (sem registro atual), atualização ou inalterado
+
+        Args:
+            escalas: Casas decimais dos campos numéricos (os demais são comparados exatamente)
+        """
+        if atuais is None:
+            self.adicionar('inserir', {
+                **item, 'valores': {campo: _quantizar(valor, escalas.get(campo)) for campo, valor in novos.items()}
+            })
+            return
+        alteracoes = {
+            campo: {'atual': atuais.get(campo), 'novo': _quantizar(valor, escalas.get(campo))}
+            for campo, valor in novos.items()
+            if not _mesmo_valor(atuais.get(campo), valor, escalas.get(campo))
+        }
+        if alteracoes:
+            self.adicionar('atualizar', {**item, 'alteracoes': alteracoes})
+        else:
+            self.adicionar('inalterado', item)
+
+    def resultado(self, tipo: str, linhas_processadas: int) -> Dict[str, Any]:
+        resumo = {**self.contagens, 'erro': len(self.erros)}
+        return {
+            'success': True,
+            'simulacao': True,
+            'tipo': tipo,
+            'message': (
+                f"Simulação concluída: {resumo['inserir']} a inserir, {resumo['atualizar']} a atualizar, "
+                f"{resumo['inalterado']} inalterados e {resumo['erro']} erros. Nada foi gravado."
+            ),
+            'linhas_processadas': linhas_processadas,
+            'resumo': resumo,
+            'detalhes': self.detalhes,
+            'limite_detalhes': self.limite_detalhes,
+            'erros': self.erros
+        }
+
+
+class SimuladorImportacao:
+    """
+    Executa as mesmas leituras e validações das importações, mas compara o resultado com
+    um snapshot do banco em vez de gravar.
+
+    Proprietários e imóveis já cadastrados nunca são atualizados pela importação: um
+    registro existente idêntico conta como inalterado e um existente com dados diferentes
+    conta como erro, que é o que a importação reportaria.
+    """
+
+    TIPOS = ('proprietarios', 'imoveis', 'participacoes', 'alugueis')
+
+    def __init__(self, db: Session, limite_detalhes: int = 100):
+        self.db = db
+        self.limite_detalhes = limite_detalhes
+        self.service = ImportacaoAvancadaService()
+
+    def simular(self, tipo: str, file_content: Union[bytes, BinaryIO]) -> Dict[str, Any]:
+        if tipo not in self.TIPOS:
+            raise ValueError(f"Tipo de importação inválido: {tipo}")
+        try:
+            return getattr(self, f'simular_{tipo}')(file_content)
+        except Exception as e:
+            return {
+                'success': False,
+                'simulacao': True,
+                'tipo': tipo,
+                'message': f'Erro na simulação: {str(e)}'
+            }
+
+    def simular_proprietarios(self, file_content: Union[bytes, BinaryIO]) -> Dict[str, Any]:
+        with LeitorPlanilhas(file_content) as leitor:
+            df = leitor.dataframe(0)
+
+        colunas_esperadas = ['Nome', 'Sobrenome', 'Documento', 'Tipo Documento', 'Endereço', 'Telefone', 'Email']
+        colunas_faltando = [col for col in colunas_esperadas if col not in df.columns]
+        if colunas_faltando:
+            return {
+                'success': False,
+                'simulacao': True,
+                'tipo': 'proprietarios',
+                'message': f'Colunas obrigatórias faltando: {", ".join(colunas_faltando)}. Colunas encontradas: {", ".join(df.columns)}'
+            }
+
+        campos = ('nome', 'sobrenome', 'documento', 'tipo_documento', 'endereco', 'telefone', 'email')
+        usuarios = self.db.query(
+            Usuario.nome, Usuario.sobrenome, Usuario.documento, Usuario.tipo_documento,
+            Usuario.endereco, Usuario.telefone, Usuario.email, Usuario.username
+        ).all()
+        por_documento = {u.documento: {campo: getattr(u, campo) for campo in campos} for u in usuarios if u.documento}
+        # email e username são únicos; a importação usa o email como username
+        emails = {u.email for u in usuarios} | {u.username for u in usuarios}
+
+        diff = DiffImportacao(self.limite_detalhes)
+        preparados = self.service.preparar_proprietarios(df)
+        for idx, dados in zip(preparados.index, preparados.to_dict('records')):
+            try:
+                erro = dados.pop('erro')
+                if erro:
+                    diff.erros.append(erro)
+                    continue
+                documento = dados['documento']
+                item = {'linha': idx + 2, 'documento': documento, 'nome': dados['nome']}
+
+                existente = por_documento.get(documento)
+                if existente is not None:
+                    diferentes = [campo for campo in campos if existente[campo] != dados[campo]]
+                    if diferentes:
+                        diff.erros.append(
+                            f"Linha {idx+2}: Proprietário com documento {documento} já existe (nome: {existente['nome']}) "
+                            f"e não será atualizado - campos diferentes: {', '.join(diferentes)}"
+                        )
+                    else:
+                        diff.adicionar('inalterado', item)
+                    continue
+
+                if dados['email'] in emails:
+                    diff.erros.append(f"Linha {idx+2}: Email {dados['email']} já cadastrado")
+                    continue
+
+                # Linhas seguintes com o mesmo documento/email encontram este registro
+                por_documento[documento] = dados
+                emails.add(dados['email'])
+                diff.adicionar('inserir', {**item, 'valores': dados})
+
+            except Exception as e:
+                diff.erros.append(f"Linha {idx+2}: Erro ao processar - {str(e)}")
+
+        return diff.resultado('proprietarios', len(df))
+
+    def simular_imoveis(self, file_content: Union[bytes, BinaryIO]) -> Dict[str, Any]:
+        with LeitorPlanilhas(file_content) as leitor:
+            df = leitor.dataframe(0, inferir_tipos=False)
+
+        mapeamento = self.service.mapear_colunas_imoveis(df.columns.tolist())
+        if not mapeamento['nome'] or not mapeamento['endereco']:
+            return {
+                'success': False,
+                'simulacao': True,
+                'tipo': 'imoveis',
+                'message': 'Não foi possível identificar as colunas obrigatórias (Nome/Endereço do imóvel)'
+            }
+
+        diff = DiffImportacao(self.limite_detalhes)
+        valores_monetarios = {}
+        for campo in self.service.CAMPOS_MONETARIOS_IMOVEIS:
+            coluna = mapeamento[campo]
+            if not coluna:
+                continue
+            valores, invalidos = self.service.parse_serie_monetaria(df[coluna])
+            valores_monetarios[campo] = valores
+            for idx in invalidos:
+                diff.erros.append(f"Linha {idx+2}: Valor inválido em '{coluna}' ('{df.at[idx, coluna]}') - campo ignorado")
+
+        escalas = {campo: Imovel.__table__.c[campo].type.scale for campo in self.service.CAMPOS_MONETARIOS_IMOVEIS}
+        colunas = [getattr(Imovel, campo) for campo in ('nome', 'endereco', 'tipo', *self.service.CAMPOS_MONETARIOS_IMOVEIS)]
+        existentes = {
+            (i.nome, i.endereco): i._asdict()
+            for i in self.db.query(*colunas).all()
+        }
+
+        for idx, row in df.iterrows():
+            try:
+                dados, erro = self.service.dados_linha_imovel(idx, row, mapeamento, valores_monetarios)
+                if erro:
+                    diff.erros.append(erro)
+                    continue
+                chave = (dados['nome'], dados['endereco'])
+                item = {'linha': idx + 2, 'nome': dados['nome'], 'endereco': dados['endereco']}
+
+                existente = existentes.get(chave)
+                if existente is not None:
+                    diferentes = [
+                        campo for campo, valor in dados.items()
+                        if not _mesmo_valor(existente[campo], valor, escalas.get(campo))
+                    ]
+                    if diferentes:
+                        diff.erros.append(
+                            f"Linha {idx+2}: Imóvel '{dados['nome']}' já existe neste endereço "
+                            f"e não será atualizado - campos diferentes: {', '.join(diferentes)}"
+                        )
+                    else:
+                        diff.adicionar('inalterado', item)
+                    continue
+
+                existentes[chave] = dados
+                diff.adicionar('inserir', {
+                    **item, 'valores': {campo: _quantizar(valor, escalas.get(campo)) for campo, valor in dados.items()}
+                })
+
+            except Exception as e:
+                diff.erros.append(f"Linha {idx+2}: Erro ao processar - {str(e)}")
+
+        return diff.resultado('imoveis', len(df))
+
+    def simular_participacoes(self, file_content: Union[bytes, BinaryIO]) -> Dict[str, Any]:
+        with LeitorPlanilhas(file_content) as leitor:
+            df = leitor.dataframe(0)
+
+        if len(df.columns) < 3:
+            return {
+                'success': False,
+                'simulacao': True,
+                'tipo': 'participacoes',
+                'message': 'Arquivo deve ter pelo menos 3 colunas: Nome, Endereço, VALOR'
+            }
+
+        mapeamento = self.service.mapear_colunas_participacoes(df.columns.tolist())
+        if not mapeamento['nome_imovel'] or not mapeamento['valor_total']:
+            return {
+                'success': False,
+                'simulacao': True,
+                'tipo': 'participacoes',
+                'message': 'Não foi possível identificar as colunas do imóvel e do VALOR'
+            }
+
+        escalas = {'participacao': Participacao.__table__.c['participacao'].type.scale}
+        resolvedor = ResolvedorEntidades(self.db)
+        existentes = {
+            (p.id_imovel, p.id_proprietario): {'participacao': p.participacao}
+            for p in self.db.query(Participacao.id_imovel, Participacao.id_proprietario, Participacao.participacao).all()
+        }
+        colunas_imovel = {mapeamento['nome_imovel'], mapeamento.get('endereco_imovel'), mapeamento['valor_total']}
+
+        diff = DiffImportacao(self.limite_detalhes)
+        for idx, row in df.iterrows():
+            try:
+                nome_imovel = str(row[mapeamento['nome_imovel']]).strip()
+                valor_total = row[mapeamento['valor_total']]
+
+                if pd.isna(valor_total) or abs(float(valor_total) - 1.0) > 0.01:
+                    diff.erros.append(f"Linha {idx+2}: VALOR deve ser próximo de 1.0 (100%) - encontrado: {valor_total}")
+                    continue
+
+                id_imovel = resolvedor.resolver_imovel(nome_imovel)
+                if id_imovel is None:
+                    similares = self.service.formatar_similares(resolvedor.imoveis_similares(nome_imovel))
+                    diff.erros.append(f"Linha {idx+2}: Imóvel '{nome_imovel}' não encontrado. Imóveis similares: {similares}")
+                    continue
+
+                participacoes_imovel: List[Tuple[str, int, Decimal]] = []
+                soma_participacoes = Decimal('0')
+                for col_name in df.columns:
+                    if col_name in colunas_imovel:
+                        continue
+
+                    proprietario_nome = str(col_name).strip()
+                    participacao_valor = row[col_name]
+                    if pd.isna(participacao_valor) or participacao_valor == 0:
+                        continue
+
+                    try:
+                        participacao_decimal = Decimal(str(participacao_valor))
+                        if participacao_decimal <= 0 or participacao_decimal > 1:
+                            diff.erros.append(f"Linha {idx+2}: Participação de '{proprietario_nome}' deve ser entre 0 e 1 (encontrado: {participacao_valor})")
+                            continue
+                    except (ValueError, TypeError, ArithmeticError):
+                        diff.erros.append(f"Linha {idx+2}: Participação de '{proprietario_nome}' deve ser um número (encontrado: {participacao_valor})")
+                        continue
+
+                    id_proprietario = resolvedor.resolver_proprietario(proprietario_nome)
+                    if id_proprietario is None:
+                        similares = self.service.formatar_similares(resolvedor.proprietarios_similares(proprietario_nome))
+                        diff.erros.append(f"Linha {idx+2}: Proprietário '{proprietario_nome}' não encontrado. Proprietários similares: {similares}")
+                        continue
+
+                    participacoes_imovel.append((proprietario_nome, id_proprietario, participacao_decimal))
+                    soma_participacoes += participacao_decimal
+
+                if abs(soma_participacoes - Decimal('1')) > Decimal('0.01'):
+                    diff.erros.append(f"Linha {idx+2}: Soma das participações deve ser 100% (atual: {soma_participacoes * 100:.2f}%)")
+                    continue
+
+                for proprietario_nome, id_proprietario, participacao in participacoes_imovel:
+                    chave = (id_imovel, id_proprietario)
+                    novos = {'participacao': participacao}
+                    item = {'linha': idx + 2, 'imovel': nome_imovel, 'proprietario': proprietario_nome}
+                    diff.comparar(item, existentes.get(chave), novos, escalas)
+                    existentes[chave] = novos
+
+            except Exception as e:
+                diff.erros.append(f"Linha {idx+2}: Erro ao processar - {str(e)}")
+
+        resultado = diff.resultado('participacoes', len(df))
+        resultado['nao_encontrados'] = resolvedor.relatorio_nao_encontrados()
+        return resultado
+
+    def simular_alugueis(self, file_content: Union[bytes, BinaryIO]) -> Dict[str, Any]:
+        with LeitorPlanilhas(file_content) as leitor:
+            analises = [
+                self.service.analisar_planilha_alugueis(
+                    nome, leitor.dataframe(nome, header=None, inferir_tipos=False)
+                )
+                for nome in leitor.nomes_planilhas
+            ]
+
+        resolvedor = ResolvedorEntidades(self.db)
+        existentes = {
+            chave: {
+                'valor_total': r.valor_total,
+                'valor_proprietario': r.valor_proprietario,
+                'taxa_administracao': r.taxa_administracao
+            }
+            for chave, r in resolvedor.alugueis_existentes(
+                a['data_referencia'] for a in analises if a['data_referencia'] is not None
+            ).items()
+        }
+        escalas = {
+            campo: AluguelMensal.__table__.c[campo].type.scale
+            for campo in ('valor_total', 'valor_proprietario', 'taxa_administracao')
+        }
+
+        diff = DiffImportacao(self.limite_detalhes)
+        linhas_processadas = 0
+        for analise in analises:
+            linhas_processadas += len(analise['linhas'])
+            linhas = ImportacaoAvancadaService._linhas_planilha_alugueis(analise, resolvedor, diff.erros)
+            for posicao, registros in linhas:
+                idx, imovel_nome = analise['linhas'][posicao][:2]
+                for registro in registros:
+                    chave = (registro['id_imovel'], registro['id_proprietario'], registro['data_referencia'])
+                    novos = {campo: registro[campo] for campo in escalas}
+                    item = {
+                        'planilha': analise['planilha'],
+                        'linha': idx + 3,
+                        'imovel': imovel_nome,
+                        'id_imovel': registro['id_imovel'],
+                        'id_proprietario': registro['id_proprietario'],
+                        'data_referencia': registro['data_referencia']
+                    }
+                    diff.comparar(item, existentes.get(chave), novos, escalas)
+                    # O upsert grava a última ocorrência de cada chave
+                    existentes[chave] = novos
+
+        resultado = diff.resultado('alugueis', linhas_processadas)
+        resultado['nao_encontrados'] = resolvedor.relatorio_nao_encontrados()
+        resultado['valores_invalidos'] = [v for analise in analises for v in analise['valores_invalidos']]
+        return resultado
@@ -2,9 +2,11 @@
 Serviço de validação de participações
 Centraliza a lógica de negócio para validar participações de imóveis
 """
+from collections import defaultdict
+from datetime import date
 from sqlalchemy.orm import Session
 from sqlalchemy import func
-from typing import List, Dict, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 from decimal import Decimal
 from fastapi import HTTPException
 
@@ -180,6 +182,61 @@ class ParticipacaoService:
                 }
             )
     
+    @staticmethod
+    def validar_lote(
+        db: Session,
+        participacoes: List[Participacao],
+        grupos_originais: Iterable[Tuple[int, date]] = ()
+    ) -> None:
+        """
+        Valida, de uma vez, as somas dos grupos (imóvel, data) afetados por uma edição em lote
+        
+        As instâncias recebidas já devem estar com os novos valores (ainda não gravados); a
+        consulta devolve essas mesmas instâncias, de modo que as somas consideram o estado
+        final de todo o lote e não registro a registro.
+        
+        Args:
+            grupos_originais: (imóvel, data) das participações antes da edição; quem muda de
+                data deixa o grupo de origem, que também precisa continuar somando 100%
+                (ou ficar vazio)
+        
+        Raises:
+            HTTPException: Se algum grupo ficar fora da tolerância
+        """
+        grupos = {(p.id_imovel, p.data_cadastro) for p in participacoes} | set(grupos_originais)
+        if not grupos:
+            return
+        
+        somas = defaultdict(Decimal)
+        for p in db.query(Participacao).filter(Participacao.id_imovel.in_({g[0] for g in grupos})):
+            if (p.id_imovel, p.data_cadastro) in grupos:
+                somas[(p.id_imovel, p.data_cadastro)] += p.participacao
+        
+        invalidos = []
+        for (id_imovel, data_cadastro), soma in sorted(somas.items()):
+            diferenca = abs(soma - ParticipacaoService.TOTAL_ESPERADO)
+            if diferenca > ParticipacaoService.TOLERANCIA:
+                invalidos.append({
+                    "id_imovel": id_imovel,
+                    "data_cadastro": str(data_cadastro),
+                    "soma_resultante": float(soma),
+                    "diferenca": float(diferenca)
+                })
+        
+        if invalidos:
+            raise HTTPException(
+                status_code=400,
+                detail={
+                    "erro": "Soma de participações inválida",
+                    "grupos": invalidos,
+                    "tolerancia": float(ParticipacaoService.TOLERANCIA),
+                    "mensagem": (
+                        f"A edição deixaria {len(invalidos)} imóvel(is)/data(s) fora da "
+                        f"tolerância de ±{ParticipacaoService.TOLERANCIA}%"
+                    )
+                }
+            )
+    
     @staticmethod
     def obter_participacoes_por_imovel(
         db: Session,
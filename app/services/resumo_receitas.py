@@ -0,0 +1,136 @@
+"""
+Resumo mensal de receitas (tabela receitas_mensais_resumo)
+Totais de alugueis_mensais por mês, imóvel e proprietário, recalculados a cada gravação
+(importações e edições) para que os relatórios leiam os totais prontos em vez de
+reagregar os registros a cada requisição
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import Date, delete, func, insert, literal, select, tuple_, union_all
+from typing import Iterable, Tuple
+from collections import defaultdict
+from datetime import date
+
+from app.core.periodo import inicio_mes, intervalo_periodo, mes_seguinte
+from app.models.aluguel import AluguelMensal
+from app.models.receita_mensal_resumo import ReceitaMensalResumo
+
+
+class ResumoReceitasService:
+    """Manutenção e leitura do resumo mensal de receitas"""
+
+    COLUNAS = (
+        'mes', 'id_imovel', 'id_proprietario', 'quantidade', 'valor_total',
+        'valor_proprietario', 'taxa_administracao', 'valor_total_imovel'
+    )
+    CAMPOS_VALORES = {'valor_total', 'valor_proprietario', 'taxa_administracao'}
+    TAMANHO_LOTE = 500  # Pares (imóvel, proprietário) por comando
+
+    @staticmethod
+    def _agregado(mes: date, inicio: date, fim: date, *criterios):
+        """Totais por imóvel/proprietário dos registros com data em [inicio, fim), rotulados com `mes`"""
+        return select(
+            literal(mes, Date).label('mes'),
+            AluguelMensal.id_imovel,
+            AluguelMensal.id_proprietario,
+            func.count().label('quantidade'),
+            func.sum(AluguelMensal.valor_total).label('valor_total'),
+            func.sum(AluguelMensal.valor_proprietario).label('valor_proprietario'),
+            func.coalesce(func.sum(AluguelMensal.taxa_administracao), 0).label('taxa_administracao'),
+            func.max(AluguelMensal.valor_total).label('valor_total_imovel'),
+        ).where(
+            AluguelMensal.data_referencia >= inicio,
+            AluguelMensal.data_referencia < fim,
+            *criterios
+        ).group_by(AluguelMensal.id_imovel, AluguelMensal.id_proprietario)
+
+    @staticmethod
+    def recalcular_meses(db: Session, meses: Iterable[date]) -> int:
+        """Recalcula os meses inteiros (qualquer data do mês); retorna quantos meses"""
+        db.flush()
+        tabela = ReceitaMensalResumo.__table__
+        meses = sorted({inicio_mes(m) for m in meses})
+        for mes in meses:
+            db.execute(delete(tabela).where(tabela.c.mes == mes))
+            db.execute(insert(tabela).from_select(
+                ResumoReceitasService.COLUNAS,
+                ResumoReceitasService._agregado(mes, mes, mes_seguinte(mes))
+            ))
+        return len(meses)
+
+    @staticmethod
+    def recalcular_chaves(db: Session, chaves: Iterable[Tuple[int, int, date]]) -> None:
+        """
+        Recalcula o resumo das chaves (id_imovel, id_proprietario, data_referencia) gravadas
+        ou excluídas; chamado na mesma transação da gravação, antes do commit
+        """
+        por_mes = defaultdict(set)
+        for id_imovel, id_proprietario, data_referencia in chaves:
+            por_mes[inicio_mes(data_referencia)].add((id_imovel, id_proprietario))
+        if not por_mes:
+            return
+
+        db.flush()
+        tabela = ReceitaMensalResumo.__table__
+        for mes, pares in sorted(por_mes.items()):
+            pares = sorted(pares)
+            for i in range(0, len(pares), ResumoReceitasService.TAMANHO_LOTE):
+                lote = pares[i:i + ResumoReceitasService.TAMANHO_LOTE]
+                db.execute(delete(tabela).where(
+                    tabela.c.mes == mes,
+                    tuple_(tabela.c.id_imovel, tabela.c.id_proprietario).in_(lote)
+                ))
+                db.execute(insert(tabela).from_select(
+                    ResumoReceitasService.COLUNAS,
+                    ResumoReceitasService._agregado(
+                        mes, mes, mes_seguinte(mes),
+                        tuple_(AluguelMensal.id_imovel, AluguelMensal.id_proprietario).in_(lote)
+                    )
+                ))
+
+    @staticmethod
+    def reconstruir(db: Session) -> int:
+        """Refaz todo o resumo a partir de alugueis_mensais; retorna quantos meses"""
+        db.flush()
+        db.execute(delete(ReceitaMensalResumo.__table__))
+        primeira, ultima = db.query(
+            func.min(AluguelMensal.data_referencia), func.max(AluguelMensal.data_referencia)
+        ).one()
+        if primeira is None:
+            return 0
+        meses = []
+        mes = inicio_mes(primeira)
+        while mes <= ultima:
+            meses.append(mes)
+            mes = mes_seguinte(mes)
+        return ResumoReceitasService.recalcular_meses(db, meses)
+
+    @staticmethod
+    def fonte(data_inicio: date, data_fim: date):
+        """
+        Totais por mês/imóvel/proprietário dos registros com data_referencia entre data_inicio
+        e data_fim (inclusive), como CTE com as colunas de receitas_mensais_resumo
+
+        Os meses inteiros do período vêm do resumo; as pontas de meses incompletos (ex.: de
+        15/01 a 10/03, a segunda quinzena de janeiro e os dez dias de março) são agregadas a
+        partir de alugueis_mensais, de modo que o resultado é o mesmo de somar os registros.
+        """
+        tabela = ReceitaMensalResumo.__table__
+        data_inicio, fim = intervalo_periodo(data_inicio=data_inicio, data_fim=data_fim)
+        inicio_inteiros = data_inicio if data_inicio.day == 1 else mes_seguinte(data_inicio)
+        fim_inteiros = inicio_mes(fim)
+
+        partes = [
+            select(*(tabela.c[c] for c in ResumoReceitasService.COLUNAS)).where(
+                tabela.c.mes >= inicio_inteiros,
+                tabela.c.mes < fim_inteiros
+            )
+        ]
+        if inicio_inteiros > fim_inteiros:
+            pontas = [(data_inicio, fim)]  # Período dentro de um único mês
+        else:
+            pontas = [(data_inicio, inicio_inteiros), (fim_inteiros, fim)]
+        for inicio, fim_ponta in pontas:
+            if inicio < fim_ponta:
+                partes.append(ResumoReceitasService._agregado(inicio_mes(inicio), inicio, fim_ponta))
+
+        return union_all(*partes).cte('receitas') if len(partes) > 1 else partes[0].cte('receitas')
@@ -0,0 +1,129 @@
+"""
+Serviço de status de pagamento dos aluguéis mensais
+Transições de status em conjunto (ex.: fechamento do mês), com um único UPDATE
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, case, func, or_, select, update
+from typing import Dict, List, Optional
+
+from fastapi import HTTPException
+
+from app.core.periodo import filtro_periodo
+from app.core.permissions import filtro_proprietarios
+from app.models.aluguel import AluguelMensal
+from app.models.usuario import Usuario
+
+
+class StatusAluguelService:
+    """Serviço para alteração de status de aluguéis mensais em conjunto"""
+
+    ATUALIZADO = "atualizado"
+    INALTERADO = "inalterado"
+    SEM_PERMISSAO = "sem_permissao"
+    NAO_ENCONTRADO = "nao_encontrado"
+
+    @staticmethod
+    def _criterios(
+        ids: Optional[List[int]],
+        ano: Optional[int],
+        mes: Optional[int],
+        id_imovel: Optional[int],
+        id_proprietario: Optional[int]
+    ) -> list:
+        """Condições de seleção; o período usa intervalo em data_referencia (aproveita o índice)"""
+        if mes is not None and ano is None:
+            raise HTTPException(status_code=400, detail="Informe o ano junto com o mês")
+
+        criterios = []
+        if ids:
+            criterios.append(AluguelMensal.id.in_(set(ids)))
+        if ano is not None:
+            criterios.append(filtro_periodo(AluguelMensal.data_referencia, ano, mes))
+        if id_imovel is not None:
+            criterios.append(AluguelMensal.id_imovel == id_imovel)
+        if id_proprietario is not None:
+            criterios.append(AluguelMensal.id_proprietario == id_proprietario)
+
+        if not criterios:
+            raise HTTPException(
+                status_code=400,
+                detail="Informe ids ou ao menos um filtro (ano/mês, imóvel ou proprietário)"
+            )
+        return criterios
+
+    @staticmethod
+    def alterar_status(
+        db: Session,
+        user: Usuario,
+        status: str,
+        ids: Optional[List[int]] = None,
+        status_atual: Optional[str] = None,
+        ano: Optional[int] = None,
+        mes: Optional[int] = None,
+        id_imovel: Optional[int] = None,
+        id_proprietario: Optional[int] = None
+    ) -> Dict:
+        """
+        Altera o status dos aluguéis mensais selecionados com um único UPDATE
+
+        A permissão de edição faz parte do próprio UPDATE (EXISTS em permissoes_financeiras),
+        assim como a condição de transição (status diferente do novo e, se informado, igual a
+        status_atual). Uma segunda consulta classifica os registros que não foram alterados.
+        Ao contrário da edição em lote, a operação é parcial: cada id recebe seu resultado.
+        Com filtro, os registros que o usuário não pode visualizar ficam fora do resultado.
+        Não faz commit: a transação é confirmada por quem chama.
+
+        Returns:
+            Dicionário com total atualizado, totais por resultado e o resultado de cada id
+        """
+        criterios = StatusAluguelService._criterios(ids, ano, mes, id_imovel, id_proprietario)
+        editavel = filtro_proprietarios(user, AluguelMensal.id_proprietario, 'editar')
+        transicao = or_(AluguelMensal.status.is_(None), AluguelMensal.status != status)
+        if status_atual is not None:
+            transicao = and_(transicao, AluguelMensal.status == status_atual)
+
+        condicao = and_(*criterios, editavel, transicao)
+        valores = {'status': status, 'atualizado_em': func.now()}
+        if db.get_bind().dialect.update_returning:
+            atualizados = set(db.execute(
+                update(AluguelMensal).where(condicao).values(**valores).returning(AluguelMensal.id),
+                execution_options={'synchronize_session': False}
+            ).scalars())
+        else:
+            atualizados = set(db.execute(select(AluguelMensal.id).where(condicao).with_for_update()).scalars())
+            if atualizados:
+                db.execute(
+                    update(AluguelMensal).where(AluguelMensal.id.in_(atualizados)).values(**valores),
+                    execution_options={'synchronize_session': False}
+                )
+
+        # Registros selecionados e não alterados: sem permissão ou fora da transição
+        restantes = select(
+            AluguelMensal.id,
+            case((editavel, True), else_=False).label('pode_editar')
+        ).where(*criterios)
+        if not ids:
+            restantes = restantes.where(filtro_proprietarios(user, AluguelMensal.id_proprietario))
+        if atualizados:
+            restantes = restantes.where(AluguelMensal.id.notin_(atualizados))
+
+        resultados = {id_: StatusAluguelService.ATUALIZADO for id_ in atualizados}
+        for id_, pode_editar in db.execute(restantes):
+            resultados[id_] = StatusAluguelService.INALTERADO if pode_editar else StatusAluguelService.SEM_PERMISSAO
+        for id_ in set(ids or ()) - set(resultados):
+            resultados[id_] = StatusAluguelService.NAO_ENCONTRADO
+
+        totais = {r: 0 for r in (
+            StatusAluguelService.ATUALIZADO, StatusAluguelService.INALTERADO,
+            StatusAluguelService.SEM_PERMISSAO, StatusAluguelService.NAO_ENCONTRADO
+        )}
+        for resultado in resultados.values():
+            totais[resultado] += 1
+
+        return {
+            "message": f"{len(atualizados)} aluguel(is) mensal(is) com status '{status}'",
+            "status": status,
+            "atualizados": len(atualizados),
+            "totais": totais,
+            "resultados": [{"id": id_, "resultado": resultados[id_]} for id_ in sorted(resultados)]
+        }
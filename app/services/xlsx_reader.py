@@ -0,0 +1,180 @@
+"""
+Leitor de planilhas Excel em modo streaming
+Usa openpyxl em modo read_only para percorrer cada planilha uma única vez, linha a linha,
+sem carregar a pasta de trabalho inteira em memória; dataframe() materializa uma planilha
+por vez (as importações de planilha única mantêm a planilha inteira em memória)
+"""
+from typing import Any, Iterator, List, Optional, Tuple, Union, BinaryIO
+from io import BytesIO
+from itertools import islice
+import os
+
+try:
+    import numpy as np
+    import pandas as pd
+    import openpyxl
+except Exception:
+    np = None
+    pd = None
+    openpyxl = None
+
+
+class LeitorPlanilhas:
+    """
+    Abre um arquivo .xlsx (bytes, caminho ou arquivo aberto) e expõe suas planilhas como
+    iteradores de linhas ou DataFrames construídos a partir da leitura em streaming.
+
+    Arquivos que não são .xlsx (ex.: .xls) são lidos via pandas como alternativa.
+    """
+
+    LINHAS_POR_BLOCO = 5000  # Linhas convertidas por vez ao montar um DataFrame
+
+    def __init__(self, origem: Union[bytes, str, BinaryIO]):
+        if isinstance(origem, (bytes, bytearray)):
+            origem = BytesIO(origem)
+        self._origem = origem
+        self._workbook = None
+        self._excel_pandas = None
+
+        if self._eh_xlsx(origem):
+            self._workbook = openpyxl.load_workbook(origem, read_only=True, data_only=True, keep_links=False)
+        else:
+            self._excel_pandas = pd.ExcelFile(origem)
+
+    @staticmethod
+    def _eh_xlsx(origem) -> bool:
+        """Arquivos .xlsx são pacotes zip (assinatura 'PK')"""
+        if isinstance(origem, (str, os.PathLike)):
+            with open(origem, 'rb') as f:
+                return f.read(2) == b'PK'
+        posicao = origem.tell()
+        assinatura = origem.read(2)
+        origem.seek(posicao)
+        return assinatura == b'PK'
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+    def fechar(self):
+        if self._workbook is not None:
+            self._workbook.close()
+        if self._excel_pandas is not None:
+            self._excel_pandas.close()
+
+    @property
+    def nomes_planilhas(self) -> List[str]:
+        if self._workbook is not None:
+            return list(self._workbook.sheetnames)
+        return list(self._excel_pandas.sheet_names)
+
+    def _nome_planilha(self, planilha: Union[int, str]) -> str:
+        return self.nomes_planilhas[planilha] if isinstance(planilha, int) else planilha
+
+    def linhas(self, planilha: Union[int, str] = 0, limite: Optional[int] = None) -> Iterator[Tuple[Any, ...]]:
+        """
+        Gera as linhas da planilha como tuplas de valores, na ordem do arquivo
+
+        Linhas vazias no final da planilha e células vazias no final de cada linha são
+        descartadas, como faz o pandas.read_excel.
+        """
+        nome = self._nome_planilha(planilha)
+        if self._workbook is not None:
+            origem = self._workbook[nome].iter_rows(values_only=True)
+        else:
+            df = self._excel_pandas.parse(nome, header=None, nrows=limite, dtype=object)
+            origem = (tuple(None if pd.isna(v) else v for v in linha) for linha in df.itertuples(index=False))
+
+        emitidas = 0
+        vazias_pendentes = 0
+        for linha in origem:
+            if limite is not None and emitidas >= limite:
+                break
+            fim = len(linha)
+            while fim > 0 and (linha[fim - 1] is None or linha[fim - 1] == ''):
+                fim -= 1
+            if fim == 0:
+                vazias_pendentes += 1
+                continue
+            # Linhas vazias intermediárias são preservadas
+            while vazias_pendentes and (limite is None or emitidas < limite):
+                yield ()
+                emitidas += 1
+                vazias_pendentes -= 1
+            if limite is not None and emitidas >= limite:
+                break
+            yield tuple(linha[:fim])
+            emitidas += 1
+
+    def dataframe(
+        self,
+        planilha: Union[int, str] = 0,
+        header: Optional[int] = 0,
+        limite: Optional[int] = None,
+        inferir_tipos: bool = True
+    ) -> 'pd.DataFrame':
+        """
+        Monta um DataFrame da planilha a partir de uma única passagem em streaming
+
+        As linhas são convertidas em blocos de LINHAS_POR_BLOCO e os blocos concatenados no
+        final, sem manter uma lista com todas as linhas ao lado do DataFrame. O DataFrame
+        em si contém a planilha inteira: para memória limitada use linhas().
+
+        Args:
+            planilha: Índice ou nome da planilha
+            header: 0 para usar a primeira linha como cabeçalho, None para não usar
+            limite: Número máximo de linhas de dados (para pré-visualização/detecção)
+            inferir_tipos: Inferir tipos numéricos como o pandas.read_excel; com False todas
+                as colunas ficam como object, preservando os valores originais das células
+        """
+        limite_linhas = None if limite is None else limite + (1 if header == 0 else 0)
+        linhas = self.linhas(planilha, limite=limite_linhas)
+        cabecalho = list(next(linhas, ())) if header == 0 else []
+
+        blocos = []
+        largura = len(cabecalho)
+        while True:
+            bloco = list(islice(linhas, self.LINHAS_POR_BLOCO))
+            if not bloco:
+                break
+            largura = max(largura, max(len(l) for l in bloco))
+            df_bloco = pd.DataFrame(bloco, dtype=object)
+            blocos.append(df_bloco.where(df_bloco.notna(), np.nan))
+
+        if blocos:
+            df = pd.concat(blocos, ignore_index=True, copy=False) if len(blocos) > 1 else blocos[0]
+            df = df.reindex(columns=range(largura), fill_value=np.nan)
+        else:
+            df = pd.DataFrame(columns=range(largura), dtype=object)
+        if header == 0:
+            df.columns = self._nomes_colunas(cabecalho + [None] * (largura - len(cabecalho)))
+        if inferir_tipos:
+            df = df.infer_objects()
+        return df
+
+    def planilhas(self, header: Optional[int] = None, inferir_tipos: bool = False) -> Iterator[Tuple[str, 'pd.DataFrame']]:
+        """Gera (nome, DataFrame) para cada planilha, lendo uma de cada vez"""
+        for nome in self.nomes_planilhas:
+            yield nome, self.dataframe(nome, header=header, inferir_tipos=inferir_tipos)
+
+    def contar_linhas(self, planilha: Union[int, str] = 0, header: Optional[int] = 0) -> int:
+        """Conta as linhas de dados sem materializar a planilha"""
+        total = sum(1 for _ in self.linhas(planilha))
+        return max(total - (1 if header == 0 else 0), 0)
+
+    @staticmethod
+    def _nomes_colunas(cabecalho: List[Any]) -> List[Any]:
+        """Nomeia colunas como o pandas: vazias viram 'Unnamed: i' e repetidas ganham sufixo .n"""
+        nomes = []
+        vistos = {}
+        for i, valor in enumerate(cabecalho):
+            nome = f"Unnamed: {i}" if valor is None or valor == '' else valor
+            if nome in vistos:
+                vistos[nome] += 1
+                nome = f"{nome}.{vistos[nome]}"
+            else:
+                vistos[nome] = 0
+            nomes.append(nome)
+        return nomes
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Teste de carga das rotas de leitura (requisições por segundo e latência por concorrência)
+
+Uso:
+    python scripts/load_test.py --usuario admin --senha admin123
+    python scripts/load_test.py --url http://localhost:8000 --concorrencia 10 50 200 --duracao 20
+    python scripts/load_test.py --usuario admin --senha admin123 --rotas /api/dashboard/stats /api/imoveis/
+
+Com o servidor rodando (ex.: uvicorn app.main:app --workers 1), cada nível de concorrência
+mantém N clientes fazendo requisições em sequência pelas rotas durante --duracao segundos.
+Para medir o ganho das rotas assíncronas (get_async_db), rode o mesmo teste contra a versão
+anterior e compare as requisições por segundo nos níveis altos, acima do limite de threads
+do threadpool (40 por padrão). As métricas do pool de cada engine ficam em
+/api/admin/metricas (banco e banco_assincrono).
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+from app.core.metricas import estatisticas_latencia
+
+
+def rotas_padrao():
+    hoje = date.today()
+    periodo = f"data_inicio={hoje.year}-01-01&data_fim={hoje.isoformat()}"
+    return [
+        '/api/imoveis/',
+        f'/api/alugueis/mensais/?ano={hoje.year}&mes={hoje.month}',
+        '/api/dashboard/stats',
+        '/api/dashboard/charts',
+        f'/api/relatorios/receitas-periodo?{periodo}',
+        f'/api/relatorios/receitas-proprietario?{periodo}',
+        f'/api/relatorios/performance-imoveis?{periodo}',
+        '/api/relatorios/alugueis-ativos',
+    ]
+
+
+async def cliente(http: httpx.AsyncClient, rotas, fim: float, deslocamento: int, latencias, erros):
+    indice = deslocamento
+    while time.perf_counter() < fim:
+        rota = rotas[indice % len(rotas)]
+        indice += 1
+        inicio = time.perf_counter()
+        try:
+            resposta = await http.get(rota)
+            if resposta.status_code != 200:
+                erros[resposta.status_code] = erros.get(resposta.status_code, 0) + 1
+                continue
+        except httpx.HTTPError as e:
+            erros[type(e).__name__] = erros.get(type(e).__name__, 0) + 1
+            continue
+        latencias.append(time.perf_counter() - inicio)
+
+
+async def rodada(url: str, token: str, rotas, concorrencia: int, duracao: float):
+    latencias, erros = [], {}
+    limites = httpx.Limits(max_connections=concorrencia, max_keepalive_connections=concorrencia)
+    async with httpx.AsyncClient(
+        base_url=url, headers={'Authorization': f'Bearer {token}'}, limits=limites, timeout=60
+    ) as http:
+        inicio = time.perf_counter()
+        fim = inicio + duracao
+        await asyncio.gather(*(cliente(http, rotas, fim, i, latencias, erros) for i in range(concorrencia)))
+        decorrido = time.perf_counter() - inicio
+    return len(latencias) / decorrido, estatisticas_latencia(latencias), erros
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Teste de carga das rotas de leitura')
+    parser.add_argument('--url', default='http://localhost:8000', help='Endereço do servidor')
+    parser.add_argument('--usuario', default=os.getenv('LOAD_TEST_USUARIO', 'admin'))
+    parser.add_argument('--senha', default=os.getenv('LOAD_TEST_SENHA'))
+    parser.add_argument('--concorrencia', nargs='+', type=int, default=[1, 10, 50, 100, 200],
+                        help='Níveis de concorrência (clientes simultâneos)')
+    parser.add_argument('--duracao', type=float, default=10, help='Segundos por nível de concorrência')
+    parser.add_argument('--rotas', nargs='+', help='Rotas testadas (padrão: rotas de leitura do dashboard e relatórios)')
+    args = parser.parse_args()
+
+    if not args.senha:
+        parser.error('Informe --senha (ou LOAD_TEST_SENHA)')
+
+    try:
+        resposta = httpx.post(
+            f"{args.url.rstrip('/')}/api/auth/login/json",
+            json={'username': args.usuario, 'password': args.senha},
+            timeout=30
+        )
+        resposta.raise_for_status()
+        token = resposta.json()['access_token']
+    except Exception as e:
+        print(f"❌ Erro no login em {args.url}: {e}")
+        sys.exit(1)
+
+    rotas = args.rotas or rotas_padrao()
+    print(f"🚀 {len(rotas)} rota(s), {args.duracao:g}s por nível de concorrência")
+    print(f"{'clientes':>8} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}  erros")
+    falhas = 0
+    for concorrencia in args.concorrencia:
+        por_segundo, latencia, erros = asyncio.run(rodada(args.url, token, rotas, concorrencia, args.duracao))
+        falhas += sum(erros.values())
+        print(
+            f"{concorrencia:>8} {por_segundo:>9.1f} {latencia['p50_ms'] or 0:>9.1f} "
+            f"{latencia['p95_ms'] or 0:>9.1f} {latencia['max_ms'] or 0:>9.1f}  "
+            + (', '.join(f"{codigo}: {total}" for codigo, total in erros.items()) or '-')
+        )
+
+    if falhas:
+        print(f"\n❌ {falhas} requisição(ões) com erro (503 indica pool de conexões esgotado)")
+        sys.exit(1)
+    print("\n✅ Teste de carga concluído")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Particionamento de alugueis_mensais por ano (PostgreSQL)
+
+Uso:
+    python scripts/particionar_alugueis_mensais.py                # cria as partições do ano atual e do seguinte
+    python scripts/particionar_alugueis_mensais.py 2030 2031      # cria as partições dos anos informados
+    python scripts/particionar_alugueis_mensais.py --converter    # converte a tabela em particionada
+    python scripts/particionar_alugueis_mensais.py --desfazer     # volta a tabela comum
+
+A aplicação já cria as partições do ano atual e do seguinte ao iniciar; o script serve para
+agendar a criação (ex.: cron em dezembro), para anos antigos importados depois da conversão
+(cujos registros estão na partição padrão) e para converter bancos que rodaram a migração
+sem PARTICIONAR_ALUGUEIS_MENSAIS. Ver app/core/particionamento.py.
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.database import engine
+from app.core.particionamento import (
+    anos_particionados, desfazer_particionamento, garantir_particoes, particionar, tabela_particionada
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Particionamento de alugueis_mensais por ano')
+    parser.add_argument('anos', nargs='*', type=int, help='Anos das partições (padrão: atual e seguinte)')
+    acao = parser.add_mutually_exclusive_group()
+    acao.add_argument('--converter', action='store_true', help='Converter a tabela em particionada')
+    acao.add_argument('--desfazer', action='store_true', help='Voltar a tabela comum')
+    args = parser.parse_args()
+
+    if engine.dialect.name != 'postgresql':
+        print(f"❌ Particionamento disponível apenas no PostgreSQL (banco atual: {engine.dialect.name})")
+        sys.exit(1)
+
+    inicio = time.perf_counter()
+    try:
+        with engine.begin() as conn:
+            particionada = tabela_particionada(conn)
+            if args.desfazer:
+                if not particionada:
+                    print("ℹ️  alugueis_mensais não é particionada")
+                    return
+                desfazer_particionamento(conn)
+                print(f"✅ alugueis_mensais voltou a tabela comum em {time.perf_counter() - inicio:.2f}s")
+                return
+
+            if args.converter and not particionada:
+                particionar(conn)
+                print(f"✅ alugueis_mensais convertida em {time.perf_counter() - inicio:.2f}s")
+            elif not particionada:
+                print("❌ alugueis_mensais não é particionada; use --converter")
+                sys.exit(1)
+
+            hoje = date.today()
+            criadas = garantir_particoes(conn, args.anos or [hoje.year, hoje.year + 1])
+            if criadas:
+                print(f"✅ Partições criadas: {', '.join(map(str, criadas))}")
+            print(f"Partições existentes: {', '.join(map(str, sorted(anos_particionados(conn))))}")
+    except Exception as e:
+        print(f"❌ Erro no particionamento: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Reconstrói a tabela receitas_mensais_resumo a partir de alugueis_mensais
+
+Uso:
+    python scripts/reconstruir_resumo_receitas.py                 # todos os meses
+    python scripts/reconstruir_resumo_receitas.py 2025-01 2025-02  # apenas os meses informados
+
+As gravações da aplicação (importações e edições) já mantêm o resumo; o script serve para
+a carga inicial em bancos sem a migração, ou após alterações feitas direto no banco.
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.database import SessionLocal
+from app.services.resumo_receitas import ResumoReceitasService
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Reconstruir o resumo mensal de receitas')
+    parser.add_argument('meses', nargs='*', help='Meses no formato AAAA-MM (padrão: todos)')
+    args = parser.parse_args()
+
+    try:
+        meses = [datetime.strptime(m, '%Y-%m').date() for m in args.meses]
+    except ValueError:
+        parser.error('Meses devem estar no formato AAAA-MM')
+
+    db = SessionLocal()
+    try:
+        inicio = time.perf_counter()
+        if meses:
+            total = ResumoReceitasService.recalcular_meses(db, meses)
+        else:
+            total = ResumoReceitasService.reconstruir(db)
+        db.commit()
+        print(f"✅ Resumo de receitas recalculado: {total} mês(es) em {time.perf_counter() - inicio:.2f}s")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Erro ao reconstruir o resumo: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Verifica, com EXPLAIN, se as consultas de relatórios e dashboard usam os índices previstos
+
+Uso:
+    python scripts/verificar_planos_consulta.py              # mês atual
+    python scripts/verificar_planos_consulta.py 2025 3       # ano e mês de referência
+
+As consultas são montadas com os mesmos serviços e filtros da aplicação e explicadas no
+banco configurado (DATABASE_URL). No PostgreSQL a varredura sequencial é desligada na
+transação (enable_seqscan = off): com poucas linhas o planejador prefere ler a tabela toda,
+então o que se verifica é se o índice *pode* ser usado, ou seja, se o filtro é sargable.
+Sai com código 1 se alguma consulta ler uma das tabelas verificadas por inteiro ou não usar
+nenhum dos índices previstos para ela (ver os índices de AluguelMensal). Com alugueis_mensais
+particionada (ver app/core/particionamento.py), as consultas por período também não podem ler
+partições de outros anos (partition pruning).
+
+As mesmas verificações rodam na suíte de testes (tests/test_planos_consulta.py): sempre no
+SQLite e, com TEST_DATABASE_URL apontando para um PostgreSQL, também no PostgreSQL, com a
+tabela comum e particionada. O script serve para conferir o banco de um ambiente.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+from datetime import date
+from typing import FrozenSet, NamedTuple, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, select, tuple_
+
+from app.core.database import engine
+from app.core.particionamento import nome_particao
+from app.core.periodo import filtro_periodo, mes_seguinte, somar_meses
+from app.core.permissions import filtro_proprietarios
+from app.models.aluguel import Aluguel, AluguelMensal
+from app.models.usuario import Usuario
+from app.services.dashboard_service import DashboardService
+from app.services.resumo_receitas import ResumoReceitasService
+from app.services.status_aluguel_service import StatusAluguelService
+
+ADMIN = Usuario(id=0, tipo='administrador')
+USUARIO = Usuario(id=0, tipo='usuario')
+
+POR_DATA = 'ix_alugueis_mensais_data_imovel_proprietario'
+POR_PROPRIETARIO = 'ix_alugueis_mensais_proprietario_data'
+POR_CHAVE = 'uq_alugueis_mensais_imovel_proprietario_data'
+
+
+class Verificacao(NamedTuple):
+    descricao: str
+    consulta: object
+    tabelas: FrozenSet[str] = frozenset()  # Não podem ser lidas por inteiro
+    indices: FrozenSet[str] = frozenset()  # Ao menos um deve aparecer no plano
+    anos: FrozenSet[int] = frozenset()  # Únicas partições de alugueis_mensais que podem ser lidas
+
+
+class Leitura(NamedTuple):
+    relacao: Optional[str]
+    indice: Optional[str]
+    completa: bool
+
+
+def consultas(ano: int, mes: int):
+    inicio = date(ano, mes, 1)
+    mensais = frozenset({'alugueis_mensais'})
+    do_ano = frozenset({ano})
+    return [
+        Verificacao("dashboard: estatísticas", DashboardService.consulta_estatisticas(ADMIN, inicio),
+                    mensais, frozenset({POR_DATA}), frozenset({ano, somar_meses(inicio, -1).year})),
+        Verificacao("dashboard: estatísticas com permissões", DashboardService.consulta_estatisticas(USUARIO, inicio),
+                    mensais, frozenset({POR_DATA, POR_PROPRIETARIO}), frozenset({ano, somar_meses(inicio, -1).year})),
+        Verificacao("dashboard: aluguéis recentes",
+                    select(AluguelMensal.id).order_by(AluguelMensal.criado_em.desc()).limit(10),
+                    indices=frozenset({'ix_alugueis_mensais_criado_em'})),
+        Verificacao("relatórios: aluguéis ativos do mês",
+                    select(AluguelMensal.id).where(filtro_periodo(AluguelMensal.data_referencia, ano, mes)),
+                    mensais, frozenset({POR_DATA}), do_ano),
+        Verificacao("relatórios: receitas de período com meses incompletos",
+                    select(ResumoReceitasService.fonte(inicio.replace(day=15), somar_meses(inicio, 2).replace(day=10))),
+                    mensais | {'receitas_mensais_resumo'}, frozenset({POR_DATA}),
+                    frozenset({ano, somar_meses(inicio, 2).year})),
+        Verificacao("relatórios: aluguéis de um proprietário no ano",
+                    select(AluguelMensal.id).where(
+                        AluguelMensal.id_proprietario == 1, filtro_periodo(AluguelMensal.data_referencia, ano)
+                    ),
+                    mensais, frozenset({POR_PROPRIETARIO}), do_ano),
+        Verificacao("aluguéis: listagem do mês com permissões",
+                    select(AluguelMensal.id).where(
+                        filtro_periodo(AluguelMensal.data_referencia, ano, mes),
+                        filtro_proprietarios(USUARIO, AluguelMensal.id_proprietario)
+                    ),
+                    mensais, frozenset({POR_DATA, POR_PROPRIETARIO}), do_ano),
+        Verificacao("aluguéis: status por mês",
+                    select(AluguelMensal.id).where(*StatusAluguelService._criterios(None, ano, mes, None, None)),
+                    mensais, frozenset({POR_DATA}), do_ano),
+        Verificacao("resumo: recálculo do mês", ResumoReceitasService._agregado(inicio, inicio, mes_seguinte(inicio)),
+                    mensais, frozenset({POR_DATA}), do_ano),
+        Verificacao("resumo: recálculo das chaves gravadas (importação e edições)",
+                    ResumoReceitasService._agregado(
+                        inicio, inicio, mes_seguinte(inicio),
+                        tuple_(AluguelMensal.id_imovel, AluguelMensal.id_proprietario).in_([(1, 1), (2, 1)])
+                    ),
+                    mensais, frozenset({POR_DATA, POR_CHAVE}), do_ano),
+        Verificacao("aluguéis: registros de um imóvel no mês",
+                    select(AluguelMensal.id).where(
+                        AluguelMensal.id_imovel == 1, filtro_periodo(AluguelMensal.data_referencia, ano, mes)
+                    ),
+                    mensais, frozenset({POR_DATA, POR_CHAVE}), do_ano),
+        Verificacao("aluguéis: totais do ano",
+                    select(func.sum(Aluguel.aluguel_liquido)).where(filtro_periodo(Aluguel.data_cadastro, ano)),
+                    frozenset({'alugueis'})),
+        Verificacao("aluguéis: totais do mês",
+                    select(func.sum(Aluguel.aluguel_liquido)).where(filtro_periodo(Aluguel.data_cadastro, ano, mes)),
+                    frozenset({'alugueis'})),
+    ]
+
+
+def _nos_postgres(plano):
+    yield plano
+    for filho in plano.get('Plans', ()):
+        yield from _nos_postgres(filho)
+
+
+def explicar_postgres(conn, sql: str):
+    """Retorna (linhas do plano para exibir, leituras de tabelas e índices)"""
+    plano = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}").scalar()
+    if isinstance(plano, str):
+        plano = json.loads(plano)
+    linhas, leituras = [], []
+    for no in _nos_postgres(plano[0]['Plan']):
+        relacao, indice = no.get('Relation Name'), no.get('Index Name')
+        if relacao is None and indice is None:
+            continue
+        linhas.append(f"{no['Node Type']} em {relacao or '-'}" + (f" ({indice})" if indice else ''))
+        leituras.append(Leitura(relacao, indice, no['Node Type'] == 'Seq Scan'))
+    return linhas, leituras
+
+
+def explicar_sqlite(conn, sql: str):
+    """Retorna (linhas do plano para exibir, leituras de tabelas e índices)"""
+    linhas, leituras = [], []
+    for _, _, _, detalhe in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}"):
+        linhas.append(detalhe)
+        encontrado = re.match(r'(SCAN|SEARCH) (\w+)(?:.* USING (?:COVERING )?INDEX (\w+))?', detalhe)
+        if encontrado:
+            # SEARCH usa o índice para um intervalo; SCAN (mesmo "USING INDEX") lê a tabela toda
+            operacao, relacao, indice = encontrado.groups()
+            leituras.append(Leitura(relacao, indice, operacao == 'SCAN'))
+    return linhas, leituras
+
+
+def partes_de(conn):
+    """Partições (de tabelas e de índices) -> tabela ou índice pai; vazio sem particionamento"""
+    if conn.dialect.name != 'postgresql':
+        return {}
+    return dict(conn.exec_driver_sql(
+        "SELECT filha.relname, pai.relname FROM pg_inherits h "
+        "JOIN pg_class filha ON filha.oid = h.inhrelid JOIN pg_class pai ON pai.oid = h.inhparent"
+    ).all())
+
+
+def problemas(verificacao: Verificacao, leituras, pais) -> list:
+    encontrados = []
+    completas = sorted({
+        pais.get(l.relacao, l.relacao) for l in leituras
+        if l.completa and pais.get(l.relacao, l.relacao) in verificacao.tabelas
+    })
+    if completas:
+        encontrados.append(f"leitura completa de {', '.join(completas)}")
+    indices = {pais.get(l.indice, l.indice) for l in leituras if l.indice}
+    if verificacao.indices and not verificacao.indices & indices:
+        encontrados.append(f"sem os índices {', '.join(sorted(verificacao.indices))}")
+    if verificacao.anos:
+        permitidas = {nome_particao(ano) for ano in verificacao.anos}
+        particoes = {l.relacao for l in leituras if pais.get(l.relacao) == AluguelMensal.__tablename__}
+        fora = sorted(particoes - permitidas)
+        if fora:
+            encontrados.append(f"partições fora do período: {', '.join(fora)}")
+    return encontrados
+
+
+def main():
+    hoje = date.today()
+    parser = argparse.ArgumentParser(description='Verificar uso de índices nas consultas por período')
+    parser.add_argument('ano', nargs='?', type=int, default=hoje.year)
+    parser.add_argument('mes', nargs='?', type=int, default=hoje.month, choices=range(1, 13), metavar='mes')
+    args = parser.parse_args()
+
+    dialeto = engine.dialect.name
+    explicar = {'postgresql': explicar_postgres, 'sqlite': explicar_sqlite}.get(dialeto)
+    if explicar is None:
+        print(f"❌ Banco não suportado: {dialeto}")
+        sys.exit(1)
+
+    falhas = 0
+    with engine.connect() as conn:
+        if dialeto == 'postgresql':
+            conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        pais = partes_de(conn)
+        for verificacao in consultas(args.ano, args.mes):
+            sql = str(verificacao.consulta.compile(dialect=engine.dialect, compile_kwargs={'literal_binds': True}))
+            linhas, leituras = explicar(conn, sql)
+            encontrados = problemas(verificacao, leituras, pais)
+            if encontrados:
+                falhas += 1
+                print(f"❌ {verificacao.descricao}: {'; '.join(encontrados)}")
+            else:
+                print(f"✅ {verificacao.descricao}")
+            for linha in linhas:
+                print(f"     {linha}")
+        conn.rollback()
+
+    if falhas:
+        print(f"\n❌ {falhas} consulta(s) sem os índices previstos")
+        sys.exit(1)
+    print("\n✅ Todas as consultas usam os índices previstos")
+
+
+if __name__ == "__main__":
+    main()
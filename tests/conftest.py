@@ -1,17 +1,32 @@
 import os
+import uuid
+from datetime import date
+from io import BytesIO
+
 import pytest
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 
 # Configurar variables de entorno ANTES de importar la aplicación
-os.environ['DATABASE_URL'] = 'sqlite:///./test.db'
+# TEST_DATABASE_URL permite rodar a suíte em outro banco (ex.: PostgreSQL)
+os.environ['DATABASE_URL'] = os.getenv('TEST_DATABASE_URL', 'sqlite:///./test.db')
 os.environ['APP_ENV'] = 'test'
 os.environ['SECRET_KEY'] = 'a_test_secret' # Chave secreta para ambiente de teste
+if os.environ['DATABASE_URL'] == 'sqlite:///./test.db':
+    # Banco limpo a cada execução (os testes contam registros)
+    for arquivo in ('test.db', 'test.db-wal', 'test.db-shm'):
+        if os.path.exists(arquivo):
+            os.remove(arquivo)
 # Ahora importar después de configurar las variables
 from fastapi.testclient import TestClient
 from app.main import app
 from app.core.database import engine, Base, SessionLocal
+from app.models.imovel import Imovel
+from app.models.permissao_financeira import PermissaoFinanceira
 from app.models.usuario import Usuario
-from app.core.auth import get_password_hash
+from app.core.auth import create_access_token, dados_token, get_password_hash
+
+TIPO_XLSX = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
 
 @pytest.fixture(scope="session", autouse=True)
 def setup_test_database():
@@ -40,4 +55,143 @@ def setup_test_database():
 
 @pytest.fixture
 def client():
-    return TestClient(app)
\ No newline at end of file
+    # Como context manager: startup/shutdown rodam e todas as requisições usam o mesmo
+    # event loop (as conexões do pool assíncrono pertencem ao loop que as abriu)
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture
+def db():
+    sessao = SessionLocal()
+    try:
+        yield sessao
+    finally:
+        sessao.close()
+
+
+@pytest.fixture
+def headers():
+    """Headers de autenticação de um usuário (token emitido direto, sem login)"""
+    def _headers(usuario: Usuario):
+        return {'Authorization': f"Bearer {create_access_token(dados_token(usuario))}"}
+    return _headers
+
+
+@pytest.fixture
+def consultas():
+    """Comandos SQL executados (em qualquer engine, síncrona ou assíncrona) durante o teste"""
+    executados = []
+
+    def registrar(conn, cursor, statement, *args):
+        executados.append(statement)
+
+    event.listen(Engine, 'after_cursor_execute', registrar)
+    yield executados
+    event.remove(Engine, 'after_cursor_execute', registrar)
+
+
+@pytest.fixture
+def admin(db):
+    return db.query(Usuario).filter(Usuario.username == "admin").one()
+
+
+@pytest.fixture
+def novo_usuario(db):
+    """Cria um usuário com nome único; `senha` define o hash gravado"""
+    def _novo_usuario(tipo: str = 'usuario', senha: str = 'senha123', **campos) -> Usuario:
+        sufixo = uuid.uuid4().hex[:8]
+        usuario = Usuario(
+            username=campos.pop('username', f"usuario_{sufixo}"),
+            nome=campos.pop('nome', f"Proprietario {sufixo}"),
+            email=campos.pop('email', f"{sufixo}@test.com"),
+            tipo=tipo,
+            hashed_password=get_password_hash(senha),
+            **campos
+        )
+        db.add(usuario)
+        db.commit()
+        db.refresh(usuario)
+        return usuario
+    return _novo_usuario
+
+
+@pytest.fixture
+def novo_imovel(db):
+    def _novo_imovel(**campos) -> Imovel:
+        sufixo = uuid.uuid4().hex[:8]
+        imovel = Imovel(
+            nome=campos.pop('nome', f"Imovel {sufixo}"),
+            endereco=campos.pop('endereco', f"Rua {sufixo}, 1"),
+            tipo=campos.pop('tipo', 'Residencial'),
+            **campos
+        )
+        db.add(imovel)
+        db.commit()
+        db.refresh(imovel)
+        return imovel
+    return _novo_imovel
+
+
+@pytest.fixture
+def permitir(db):
+    """Concede ao usuário permissão sobre os dados financeiros de um proprietário"""
+    def _permitir(usuario: Usuario, proprietario: Usuario, editar: bool = False) -> PermissaoFinanceira:
+        permissao = PermissaoFinanceira(
+            id_usuario=usuario.id, id_proprietario=proprietario.id, visualizar=True, editar=editar
+        )
+        db.add(permissao)
+        db.commit()
+        db.refresh(permissao)
+        return permissao
+    return _permitir
+
+
+@pytest.fixture
+def enviar_planilha(client, headers, admin):
+    """Envia uma pasta de trabalho para uma rota de importação como administrador"""
+    def _enviar(rota: str, conteudo: bytes, **params):
+        return client.post(
+            rota,
+            params=params,
+            files={'file': ('alugueis.xlsx', conteudo, TIPO_XLSX)},
+            headers=headers(admin)
+        )
+    return _enviar
+
+
+@pytest.fixture
+def importar_alugueis(enviar_planilha):
+    """POST /api/importacao/alugueis; retorna o resultado da importação"""
+    def _importar(conteudo: bytes, **params):
+        resposta = enviar_planilha('/api/importacao/alugueis', conteudo, **params)
+        assert resposta.status_code == 200, resposta.text
+        return resposta.json()
+    return _importar
+
+
+def planilha_alugueis(meses) -> bytes:
+    """
+    Pasta de trabalho de aluguéis no formato da importação: uma planilha por mês, com a data
+    em A1, os nomes dos proprietários no cabeçalho e a taxa de administração na última coluna
+
+    Args:
+        meses: {nome da planilha: (data, [proprietários], [(imóvel, total, [valores], taxa)])}
+    """
+    from openpyxl import Workbook
+
+    pasta = Workbook()
+    pasta.remove(pasta.active)
+    for nome, (data_referencia, proprietarios, linhas) in meses.items():
+        planilha = pasta.create_sheet(nome)
+        planilha.append([data_referencia.strftime('%d/%m/%Y'), 'Valor Total', *proprietarios, 'Taxa Administração'])
+        for imovel, total, valores, taxa in linhas:
+            planilha.append([imovel, total, *valores, taxa])
+    buffer = BytesIO()
+    pasta.save(buffer)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def planilha():
+    return planilha_alugueis
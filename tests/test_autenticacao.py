@@ -0,0 +1,166 @@
+"""Autenticação: cache de credenciais verificadas e cache/revogação de tokens"""
+from datetime import date
+
+import pytest
+
+from app.core.auth import get_password_hash
+from app.services.bulk_service import BulkService
+from app.services.hash_senhas import CacheCredenciais, cache_credenciais, servico_hash_senhas
+
+
+@pytest.fixture
+def verificacoes(monkeypatch):
+    """Senhas conferidas com PBKDF2 (as que não vieram do cache de credenciais)"""
+    chamadas = []
+    verificar = servico_hash_senhas.verificar
+
+    async def verificar_contando(senha, hashed_password):
+        chamadas.append(senha)
+        return await verificar(senha, hashed_password)
+
+    monkeypatch.setattr(servico_hash_senhas, 'verificar', verificar_contando)
+    return chamadas
+
+
+def login(client, username, senha):
+    return client.post('/api/auth/login/json', json={'username': username, 'password': senha})
+
+
+def test_cache_credenciais_chave_inclui_hash_e_senha():
+    cache = CacheCredenciais(tamanho=10, ttl=60)
+    cache.registrar(1, 'hash-a', 'segredo')
+    cache.registrar(2, 'hash-b', 'segredo')
+
+    assert cache.verificada(1, 'hash-a', 'segredo')
+    assert not cache.verificada(1, 'hash-a', 'outra')
+    assert not cache.verificada(1, 'hash-novo', 'segredo')  # Senha trocada
+    assert not cache.verificada(2, 'hash-a', 'segredo')
+    assert not cache.verificada(1, None, 'segredo')
+
+    cache.invalidar_usuario(1)
+    assert not cache.verificada(1, 'hash-a', 'segredo')
+    assert cache.verificada(2, 'hash-b', 'segredo')
+
+
+def test_cache_credenciais_desativado():
+    cache = CacheCredenciais(tamanho=10, ttl=0)
+    cache.registrar(1, 'hash-a', 'segredo')
+    assert not cache.verificada(1, 'hash-a', 'segredo')
+
+
+def test_login_repetido_usa_cache_e_senha_errada_nunca(client, novo_usuario, verificacoes):
+    usuario = novo_usuario(senha='correta123')
+
+    assert login(client, usuario.username, 'correta123').status_code == 200
+    assert login(client, usuario.username, 'correta123').status_code == 200
+    assert verificacoes == ['correta123']  # Segundo login veio do cache
+
+    # Senhas erradas não entram no cache: cada tentativa refaz a verificação
+    for _ in range(2):
+        assert login(client, usuario.username, 'errada').status_code == 401
+    assert verificacoes == ['correta123', 'errada', 'errada']
+    assert not cache_credenciais.verificada(usuario.id, usuario.hashed_password, 'errada')
+
+
+def test_troca_do_hash_de_senha_invalida_credencial(client, db, novo_usuario, verificacoes):
+    usuario = novo_usuario(senha='antiga123')
+    assert login(client, usuario.username, 'antiga123').status_code == 200
+
+    usuario.hashed_password = get_password_hash('nova123')
+    db.commit()
+
+    assert login(client, usuario.username, 'antiga123').status_code == 401
+    assert login(client, usuario.username, 'nova123').status_code == 200
+    assert verificacoes == ['antiga123', 'antiga123', 'nova123']
+
+
+def test_mudar_ativo_invalida_credencial(client, db, headers, admin, novo_usuario, verificacoes):
+    usuario = novo_usuario(senha='senha123')
+    assert login(client, usuario.username, 'senha123').status_code == 200
+    assert cache_credenciais.verificada(usuario.id, usuario.hashed_password, 'senha123')
+
+    resposta = client.put(f'/api/usuarios/{usuario.id}', json={'ativo': False}, headers=headers(admin))
+    assert resposta.status_code == 200
+    assert not cache_credenciais.verificada(usuario.id, usuario.hashed_password, 'senha123')
+
+    resposta = client.put(f'/api/usuarios/{usuario.id}', json={'ativo': True}, headers=headers(admin))
+    assert resposta.status_code == 200
+    assert login(client, usuario.username, 'senha123').status_code == 200
+    assert verificacoes == ['senha123', 'senha123']
+
+
+@pytest.mark.parametrize('campo, valor', [('tipo', 'administrador'), ('ativo', False)])
+def test_mudar_tipo_ou_ativo_revoga_tokens(client, db, headers, admin, novo_usuario, campo, valor):
+    usuario = novo_usuario()
+    antigo = headers(usuario)
+    assert client.get('/api/auth/me', headers=antigo).status_code == 200  # Token em cache
+
+    resposta = client.put(f'/api/usuarios/{usuario.id}', json={campo: valor}, headers=headers(admin))
+    assert resposta.status_code == 200
+    db.refresh(usuario)
+    assert usuario.versao_token == 2
+
+    assert client.get('/api/auth/me', headers=antigo).status_code == 401
+    if campo == 'tipo':
+        novo = client.get('/api/auth/me', headers=headers(usuario))
+        assert novo.status_code == 200 and novo.json()['tipo'] == 'administrador'
+
+
+def test_alterar_outros_campos_mantem_tokens(client, db, headers, admin, novo_usuario):
+    usuario = novo_usuario()
+    antigo = headers(usuario)
+    resposta = client.put(f'/api/usuarios/{usuario.id}', json={'telefone': '11999990000'}, headers=headers(admin))
+    assert resposta.status_code == 200
+    db.refresh(usuario)
+    assert usuario.versao_token == 1
+
+    # O usuário em cache é descartado: o token continua válido e reflete a alteração
+    me = client.get('/api/auth/me', headers=antigo)
+    assert me.status_code == 200 and me.json()['telefone'] == '11999990000'
+
+
+def test_mudanca_de_permissao_vale_na_proxima_requisicao(client, db, headers, admin, novo_usuario, novo_imovel):
+    leitor, proprietario = novo_usuario(), novo_usuario()
+    imovel = novo_imovel()
+    BulkService.upsert_alugueis_mensais(db, [{
+        'id_imovel': imovel.id, 'id_proprietario': proprietario.id, 'data_referencia': date(2024, 12, 1),
+        'valor_total': 1000, 'valor_proprietario': 1000, 'taxa_administracao': 0
+    }])
+    db.commit()
+
+    def visiveis():
+        resposta = client.get(f'/api/alugueis/mensais/?imovel_id={imovel.id}', headers=headers(leitor))
+        assert resposta.status_code == 200
+        return [a['id_proprietario'] for a in resposta.json()]
+
+    assert visiveis() == []  # Usuário e permissões (nenhuma) agora em cache
+
+    criada = client.post('/api/permissoes_financeiras/', headers=headers(admin), json={
+        'id_usuario': leitor.id, 'id_proprietario': proprietario.id, 'visualizar': True, 'editar': False
+    })
+    assert criada.status_code == 200
+    assert visiveis() == [proprietario.id]
+
+    id_permissao = criada.json()['id']
+    resposta = client.put(f'/api/permissoes_financeiras/{id_permissao}', json={'visualizar': False}, headers=headers(admin))
+    assert resposta.status_code == 200
+    assert visiveis() == []
+
+    resposta = client.put(f'/api/permissoes_financeiras/{id_permissao}', json={'visualizar': True}, headers=headers(admin))
+    assert resposta.status_code == 200
+    assert visiveis() == [proprietario.id]
+
+    resposta = client.delete(f'/api/permissoes_financeiras/{id_permissao}', headers=headers(admin))
+    assert resposta.status_code == 200
+    assert visiveis() == []
+
+
+def test_usuario_em_cache_nao_consulta_o_banco(client, headers, novo_usuario, consultas):
+    token = headers(novo_usuario())
+
+    assert client.get('/api/auth/me', headers=token).status_code == 200
+    assert consultas  # Primeira requisição: usuário e permissões carregados do banco
+
+    consultas.clear()
+    assert client.get('/api/auth/me', headers=token).status_code == 200
+    assert consultas == []
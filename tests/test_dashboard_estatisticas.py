@@ -0,0 +1,90 @@
+"""Estatísticas do dashboard (DashboardService): indicadores do mês, do mês anterior e do ano"""
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from app.models.aluguel import AluguelMensal
+from app.models.imovel import Imovel
+from app.services.bulk_service import BulkService
+from app.services.dashboard_service import DashboardService
+
+
+@pytest.fixture
+def cenario(db, novo_usuario, novo_imovel, permitir):
+    """
+    `leitor` vê `ana` e `bruno`, que dividem `casa` e estão sozinhos em `sala`; `carlos`
+    (imóvel `loja`) não é visível. Ano de 2033, com dezembro de 2032 como mês anterior a janeiro.
+    """
+    leitor = novo_usuario()
+    ana, bruno, carlos = novo_usuario(), novo_usuario(), novo_usuario()
+    casa, sala, loja = novo_imovel(), novo_imovel(), novo_imovel()
+    permitir(leitor, ana)
+    permitir(leitor, bruno)
+
+    def aluguel(imovel, proprietario, data, valor_total):
+        return {'id_imovel': imovel.id, 'id_proprietario': proprietario.id, 'data_referencia': data,
+                'valor_total': valor_total, 'valor_proprietario': valor_total / 2, 'taxa_administracao': 0}
+
+    BulkService.upsert_alugueis_mensais(db, [
+        aluguel(casa, ana, date(2032, 12, 1), 900),
+        aluguel(casa, ana, date(2033, 1, 1), 1000),
+        aluguel(casa, bruno, date(2033, 1, 1), 1000),   # Mesmo imóvel: a receita conta o valor uma vez
+        aluguel(sala, ana, date(2033, 1, 15), 500),
+        aluguel(casa, ana, date(2033, 3, 1), 1200),
+        aluguel(loja, carlos, date(2033, 1, 1), 7000),  # Não visível para o leitor
+    ])
+    db.commit()
+    return {'leitor': leitor}
+
+
+def esperado(db, receita_mensal, receita_anual, variacao, alugueis, proprietarios, ocupados):
+    total = db.query(Imovel).count()
+    return {
+        'total_imoveis': total,
+        'receita_mensal': receita_mensal,
+        'receita_anual': receita_anual,
+        'variacao_mensal': variacao,
+        'imoveis_disponiveis': total - ocupados,
+        'alugueis_ativos': alugueis,
+        'proprietarios_ativos': proprietarios,
+        'taxa_ocupacao': round(ocupados / total * 100, 1),
+    }
+
+
+def test_janeiro_compara_com_dezembro_do_ano_anterior(db, cenario):
+    # Receita do mês: casa (1000, uma vez) + sala (500); mês anterior: casa em dezembro (900).
+    # Receita do ano: maior valor de cada imóvel em 2033 (casa 1200 em março, sala 500)
+    assert DashboardService.obter_estatisticas(db, cenario['leitor'], date(2033, 1, 10)) == \
+        esperado(db, 1500.0, 1700.0, Decimal('66.7'), alugueis=3, proprietarios=2, ocupados=2)
+
+
+def test_mes_sem_receita_no_mes_anterior(db, cenario):
+    assert DashboardService.obter_estatisticas(db, cenario['leitor'], date(2033, 3, 20)) == \
+        esperado(db, 1200.0, 1700.0, 100, alugueis=1, proprietarios=1, ocupados=1)
+
+
+def test_mes_sem_registros(db, cenario):
+    assert DashboardService.obter_estatisticas(db, cenario['leitor'], date(2033, 2, 5)) == \
+        esperado(db, 0.0, 1700.0, Decimal('-100'), alugueis=0, proprietarios=0, ocupados=0)
+
+
+def test_usuario_sem_permissoes(db, cenario, novo_usuario):
+    assert DashboardService.obter_estatisticas(db, novo_usuario(), date(2033, 1, 10)) == \
+        esperado(db, 0.0, 0.0, 0, alugueis=0, proprietarios=0, ocupados=0)
+
+
+def test_administrador_ve_todos_os_proprietarios(db, cenario, admin):
+    # Todos os registros de janeiro de 2033 (inclusive os de outros testes deste módulo)
+    registros = db.query(AluguelMensal).filter(
+        AluguelMensal.data_referencia >= date(2033, 1, 1), AluguelMensal.data_referencia < date(2033, 2, 1)
+    ).all()
+    por_imovel = {}
+    for r in registros:
+        por_imovel[r.id_imovel] = max(por_imovel.get(r.id_imovel, 0), r.valor_total)
+
+    resultado = DashboardService.obter_estatisticas(db, admin, date(2033, 1, 10))
+    assert resultado['receita_mensal'] == float(sum(por_imovel.values()))
+    assert resultado['alugueis_ativos'] == len(registros)
+    assert resultado['proprietarios_ativos'] == len({r.id_proprietario for r in registros})
+    assert resultado['imoveis_disponiveis'] == db.query(Imovel).count() - len(por_imovel)
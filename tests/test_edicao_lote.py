@@ -0,0 +1,176 @@
+"""Edição e exclusão em lote de aluguéis mensais e participações: tudo ou nada"""
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from app.models.aluguel import AluguelMensal
+from app.models.participacao import Participacao
+from app.services.bulk_service import BulkService
+
+ID_INEXISTENTE = 2_000_000_000
+
+
+@pytest.fixture
+def cenario(db, novo_usuario, novo_imovel, permitir):
+    """Editor com permissão de edição sobre `editavel` e só de visualização sobre `somente_leitura`"""
+    editor, editavel, somente_leitura = novo_usuario(), novo_usuario(), novo_usuario()
+    permitir(editor, editavel, editar=True)
+    permitir(editor, somente_leitura)
+    imovel = novo_imovel()
+    BulkService.upsert_alugueis_mensais(db, [
+        {'id_imovel': imovel.id, 'id_proprietario': proprietario.id, 'data_referencia': mes,
+         'valor_total': 1000, 'valor_proprietario': 500, 'taxa_administracao': 50}
+        for proprietario in (editavel, somente_leitura)
+        for mes in (date(2025, 1, 1), date(2025, 2, 1))
+    ])
+    db.commit()
+    alugueis = db.query(AluguelMensal).filter(AluguelMensal.id_imovel == imovel.id).all()
+    return {
+        'editor': editor,
+        'editaveis': sorted(a.id for a in alugueis if a.id_proprietario == editavel.id),
+        'bloqueados': sorted(a.id for a in alugueis if a.id_proprietario == somente_leitura.id),
+        'imovel': imovel,
+        'editavel': editavel,
+        'somente_leitura': somente_leitura,
+    }
+
+
+def estado_alugueis(db, ids):
+    db.expire_all()
+    return {
+        a.id: (a.status, a.valor_proprietario)
+        for a in db.query(AluguelMensal).filter(AluguelMensal.id.in_(ids))
+    }
+
+
+def test_editar_lote_com_registro_sem_permissao_nao_altera_nada(client, db, headers, cenario):
+    ids = cenario['editaveis'] + cenario['bloqueados'][:1]
+    antes = estado_alugueis(db, ids)
+
+    resposta = client.put('/api/alugueis/mensais/lote', headers=headers(cenario['editor']), json={
+        'ids': ids, 'dados': {'status': 'Pago', 'valor_proprietario': 600}
+    })
+    assert resposta.status_code == 403
+    assert resposta.json()['detail']['ids'] == cenario['bloqueados'][:1]
+    assert estado_alugueis(db, ids) == antes
+
+
+def test_editar_lote_com_id_inexistente_nao_altera_nada(client, db, headers, cenario):
+    ids = cenario['editaveis']
+    antes = estado_alugueis(db, ids)
+
+    resposta = client.put('/api/alugueis/mensais/lote', headers=headers(cenario['editor']), json={
+        'ids': ids + [ID_INEXISTENTE], 'dados': {'status': 'Pago'}
+    })
+    assert resposta.status_code == 404
+    assert resposta.json()['detail']['ids'] == [ID_INEXISTENTE]
+    assert estado_alugueis(db, ids) == antes
+
+
+def test_editar_lote_permitido_altera_todos(client, db, headers, cenario):
+    ids = cenario['editaveis']
+    resposta = client.put('/api/alugueis/mensais/lote', headers=headers(cenario['editor']), json={
+        'ids': ids, 'dados': {'status': 'Pago', 'valor_proprietario': 600}
+    })
+    assert resposta.status_code == 200
+    assert resposta.json()['atualizados'] == len(ids)
+    assert set(estado_alugueis(db, ids).values()) == {('Pago', Decimal('600.00'))}
+
+
+@pytest.mark.parametrize('extra', ['sem_permissao', 'inexistente'])
+def test_excluir_lote_tudo_ou_nada(client, db, headers, cenario, extra):
+    todos = cenario['editaveis'] + cenario['bloqueados']
+    if extra == 'sem_permissao':
+        ids, esperado = cenario['editaveis'] + cenario['bloqueados'][:1], 403
+    else:
+        ids, esperado = cenario['editaveis'] + [ID_INEXISTENTE], 404
+
+    resposta = client.request('DELETE', '/api/alugueis/mensais/lote', headers=headers(cenario['editor']), json={'ids': ids})
+    assert resposta.status_code == esperado
+    assert sorted(estado_alugueis(db, todos)) == sorted(todos)
+
+    resposta = client.request('DELETE', '/api/alugueis/mensais/lote', headers=headers(cenario['editor']), json={'ids': cenario['editaveis']})
+    assert resposta.status_code == 200
+    assert sorted(estado_alugueis(db, todos)) == cenario['bloqueados']
+
+
+@pytest.fixture
+def participacoes(db, cenario):
+    """Imóvel dividido 50/50 entre os dois proprietários do cenário"""
+    registros = [
+        Participacao(id_imovel=cenario['imovel'].id, id_proprietario=p.id, participacao=50, data_cadastro=date(2025, 1, 1))
+        for p in (cenario['editavel'], cenario['somente_leitura'])
+    ]
+    db.add_all(registros)
+    db.commit()
+    return [p.id for p in registros]
+
+
+def percentuais(db, ids):
+    db.expire_all()
+    return [db.get(Participacao, i).participacao for i in ids]
+
+
+@pytest.mark.parametrize('novos, esperado', [
+    (('40', '60'), 200),       # Redistribuição: soma final 100
+    (('40.2', '60'), 200),     # Dentro da tolerância (±0.4)
+    (('40', '50'), 400),       # Soma final 90
+    (('50.5', '50'), 400),     # Fora da tolerância
+])
+def test_redistribuir_participacoes_valida_soma_final(client, db, headers, admin, participacoes, novos, esperado):
+    antes = percentuais(db, participacoes)
+    # O segundo proprietário sobe primeiro: registro a registro, a soma passaria de 100
+    itens = [{'id': i, 'participacao': v} for i, v in reversed(list(zip(participacoes, novos)))]
+
+    resposta = client.put('/api/participacoes/lote', headers=headers(admin), json={'itens': itens})
+    assert resposta.status_code == esperado, resposta.text
+    if esperado == 200:
+        assert percentuais(db, participacoes) == [Decimal(v) for v in novos]
+    else:
+        assert percentuais(db, participacoes) == antes
+
+
+def test_participacoes_lote_sem_permissao_ou_inexistente(client, db, headers, cenario, participacoes):
+    antes = percentuais(db, participacoes)
+    editor = headers(cenario['editor'])
+
+    resposta = client.put('/api/participacoes/lote', headers=editor, json={
+        'itens': [{'id': participacoes[0], 'participacao': 40}, {'id': participacoes[1], 'participacao': 60}]
+    })
+    assert resposta.status_code == 403
+    assert resposta.json()['detail']['ids'] == [participacoes[1]]
+
+    resposta = client.put('/api/participacoes/lote', headers=editor, json={
+        'itens': [{'id': participacoes[0], 'participacao': 50}, {'id': ID_INEXISTENTE, 'participacao': 50}]
+    })
+    assert resposta.status_code == 404
+
+    resposta = client.request('DELETE', '/api/participacoes/lote', headers=editor, json={'ids': participacoes})
+    assert resposta.status_code == 403
+    assert percentuais(db, participacoes) == antes
+
+
+def datas(db, ids):
+    db.expire_all()
+    return [db.get(Participacao, i).data_cadastro for i in ids]
+
+
+def test_mover_parte_do_grupo_para_outra_data_e_recusado(client, db, headers, admin, participacoes):
+    # Só a data muda: os dois grupos ficariam com 50%
+    resposta = client.put('/api/participacoes/lote', headers=headers(admin), json={
+        'itens': [{'id': participacoes[0], 'data_cadastro': '2025-02-01'}]
+    })
+    assert resposta.status_code == 400, resposta.text
+    grupos = {g['data_cadastro']: g['soma_resultante'] for g in resposta.json()['detail']['grupos']}
+    assert grupos == {'2025-01-01': 50.0, '2025-02-01': 50.0}
+    assert datas(db, participacoes) == [date(2025, 1, 1)] * 2
+
+
+def test_mover_grupo_inteiro_para_outra_data(client, db, headers, admin, participacoes):
+    # O grupo de origem fica vazio e o de destino soma 100%
+    resposta = client.put('/api/participacoes/lote', headers=headers(admin), json={
+        'itens': [{'id': i, 'data_cadastro': '2025-02-01'} for i in participacoes]
+    })
+    assert resposta.status_code == 200, resposta.text
+    assert datas(db, participacoes) == [date(2025, 2, 1)] * 2
@@ -0,0 +1,115 @@
+"""Séries dos gráficos do dashboard (GraficosService): calendário de períodos e permissões"""
+from datetime import date
+
+import pytest
+
+from app.models.aluguel import AluguelMensal
+from app.services.bulk_service import BulkService
+from app.services.graficos_service import GraficosService, Periodo
+
+
+def test_calendario_trimestral_cobre_trimestres_do_calendario():
+    assert GraficosService.calendario(12, 'trimestral', hoje=date(2025, 2, 10)) == [
+        Periodo(date(2024, 4, 1), date(2024, 7, 1), 'T2/2024'),
+        Periodo(date(2024, 7, 1), date(2024, 10, 1), 'T3/2024'),
+        Periodo(date(2024, 10, 1), date(2025, 1, 1), 'T4/2024'),
+        Periodo(date(2025, 1, 1), date(2025, 4, 1), 'T1/2025'),
+    ]
+
+
+def test_calendario_mensal_termina_no_mes_atual():
+    periodos = GraficosService.calendario(6, hoje=date(2025, 2, 10))
+    assert [p.rotulo for p in periodos] == ['09/2024', '10/2024', '11/2024', '12/2024', '01/2025', '02/2025']
+    assert (periodos[0].inicio, periodos[-1].fim) == (date(2024, 9, 1), date(2025, 3, 1))
+    assert all(a.fim == b.inicio for a, b in zip(periodos, periodos[1:]))
+
+
+@pytest.mark.parametrize('meses, agrupamento, quantidade', [
+    (1, 'mensal', 1), (24, 'mensal', 24), (60, 'mensal', 60),
+    (1, 'trimestral', 1), (4, 'trimestral', 2), (6, 'trimestral', 2), (60, 'trimestral', 20),
+])
+def test_calendario_janelas(meses, agrupamento, quantidade):
+    periodos = GraficosService.calendario(meses, agrupamento, hoje=date(2025, 11, 30))
+    assert len(periodos) == quantidade
+    assert periodos[-1].inicio <= date(2025, 11, 30) < periodos[-1].fim
+
+
+def test_calendario_agrupamento_invalido():
+    with pytest.raises(ValueError):
+        GraficosService.calendario(6, 'semanal')
+
+
+@pytest.fixture
+def cenario(db, novo_usuario, novo_imovel, permitir):
+    """
+    `leitor` vê `ana` e `bruno` (que dividem `casa`; `ana` também em `sala`) e não vê
+    `carlos` (`loja`). Registros de 2034, ano sem dados de outros testes.
+    """
+    leitor = novo_usuario()
+    ana, bruno, carlos = novo_usuario(), novo_usuario(), novo_usuario()
+    casa, sala, loja = novo_imovel(), novo_imovel(), novo_imovel()
+    permitir(leitor, ana)
+    permitir(leitor, bruno)
+
+    def aluguel(imovel, proprietario, data, valor_total, valor_proprietario):
+        return {'id_imovel': imovel.id, 'id_proprietario': proprietario.id, 'data_referencia': data,
+                'valor_total': valor_total, 'valor_proprietario': valor_proprietario, 'taxa_administracao': 0}
+
+    BulkService.upsert_alugueis_mensais(db, [
+        aluguel(casa, ana, date(2034, 1, 1), 1000, 600),
+        aluguel(casa, bruno, date(2034, 1, 1), 1000, 400),   # Mesmo imóvel: o valor conta uma vez
+        aluguel(casa, ana, date(2034, 2, 1), 800, 800),
+        aluguel(casa, ana, date(2034, 2, 15), 300, 300),     # Mesmo mês: vale o maior valor
+        aluguel(sala, ana, date(2034, 3, 1), 500, 500),
+        aluguel(loja, carlos, date(2034, 1, 1), 7000, 7000),
+    ])
+    db.commit()
+    return {'leitor': leitor, 'ana': ana, 'bruno': bruno, 'carlos': carlos, 'loja': loja}
+
+
+def receitas(db, usuario, meses, agrupamento):
+    periodos = GraficosService.calendario(meses, agrupamento, hoje=date(2034, 4, 10))
+    return [(p['mes'], p['receita']) for p in GraficosService.receita_por_periodo(db, usuario, periodos)]
+
+
+def test_receita_mensal_com_periodos_vazios(db, cenario):
+    assert receitas(db, cenario['leitor'], 6, 'mensal') == [
+        ('11/2033', 0.0), ('12/2033', 0.0), ('01/2034', 1000.0), ('02/2034', 800.0), ('03/2034', 500.0), ('04/2034', 0.0)
+    ]
+
+
+def test_receita_trimestral(db, cenario):
+    assert receitas(db, cenario['leitor'], 12, 'trimestral') == [
+        ('T3/2033', 0.0), ('T4/2033', 0.0), ('T1/2034', 2300.0), ('T2/2034', 0.0)
+    ]
+
+
+def test_receita_do_administrador_inclui_todos(db, cenario, admin):
+    # O banco de testes é compartilhado: o esperado vem dos registros de janeiro de 2034
+    maiores = {}
+    for aluguel in db.query(AluguelMensal).filter(
+        AluguelMensal.data_referencia >= date(2034, 1, 1), AluguelMensal.data_referencia < date(2034, 2, 1)
+    ):
+        maiores[aluguel.id_imovel] = max(maiores.get(aluguel.id_imovel, 0), float(aluguel.valor_total))
+    assert maiores[cenario['loja'].id] == 7000.0
+    assert dict(receitas(db, admin, 4, 'mensal'))['01/2034'] == sum(maiores.values())
+
+
+def test_usuario_sem_permissoes_ve_series_vazias(db, cenario, novo_usuario):
+    usuario = novo_usuario()
+    assert {receita for _, receita in receitas(db, usuario, 12, 'mensal')} == {0.0}
+    assert GraficosService.receita_por_proprietario(db, usuario) == []
+    assert GraficosService.status_imoveis(db, usuario)[0] == {'status': 'Alugado', 'quantidade': 0}
+
+
+def test_series_por_proprietario_e_status_respeitam_permissoes(db, cenario):
+    leitor = cenario['leitor']
+    assert GraficosService.receita_por_proprietario(db, leitor) == [
+        {'proprietario': cenario['ana'].nome, 'receita': 2200.0},
+        {'proprietario': cenario['bruno'].nome, 'receita': 400.0},
+    ]
+    assert GraficosService.status_imoveis(db, leitor)[0] == {'status': 'Alugado', 'quantidade': 2}
+
+    graficos = GraficosService.obter_graficos(db, leitor, 3, hoje=date(2034, 4, 10))
+    assert [p['receita'] for p in graficos['receita_por_mes']] == [800.0, 500.0, 0.0]
+    assert cenario['carlos'].nome not in {p['proprietario'] for p in graficos['receita_por_proprietario']}
@@ -0,0 +1,97 @@
+"""
+Resolução de nomes de imóveis e proprietários nas importações: busca exata, normalizada,
+por substring/similaridade e desempate entre nomes ambíguos
+"""
+import uuid
+
+from app.services.import_resolver import ResolvedorEntidades
+
+
+def marcador() -> str:
+    """Trecho único para que os nomes do teste não colidam com os de outros testes"""
+    return uuid.uuid4().hex[:6]
+
+
+def test_busca_exata_ignora_caixa_e_espacos(db, novo_imovel, novo_usuario):
+    m = marcador()
+    imovel = novo_imovel(nome=f'Edifício Aurora {m}')
+    proprietario = novo_usuario(nome=f'Maria Souza {m}')
+
+    resolvedor = ResolvedorEntidades(db)
+    assert resolvedor.resolver_imovel(f'  edifício aurora {m.upper()} ') == imovel.id
+    assert resolvedor.resolver_proprietario(f'MARIA SOUZA {m}') == proprietario.id
+
+
+def test_busca_normalizada_ignora_acentos(db, novo_imovel, novo_usuario):
+    m = marcador()
+    imovel = novo_imovel(nome=f'Condomínio São  João {m}')
+    proprietario = novo_usuario(nome=f'José Antônio {m}')
+
+    resolvedor = ResolvedorEntidades(db)
+    assert resolvedor.resolver_imovel(f'Condominio Sao Joao {m}') == imovel.id
+    assert resolvedor.resolver_proprietario(f'jose antonio {m}') == proprietario.id
+
+
+def test_busca_por_endereco_quando_nome_nao_existe(db, novo_imovel):
+    m = marcador()
+    imovel = novo_imovel(nome=f'Casa {m}', endereco=f'Rua das Palmeiras {m}, 45')
+
+    resolvedor = ResolvedorEntidades(db)
+    assert resolvedor.resolver_imovel(f'Rua das Palmeiras {m}, 45') == imovel.id
+
+
+def test_busca_por_trecho_e_nome_com_sobrenome(db, novo_imovel, novo_usuario):
+    m = marcador()
+    imovel = novo_imovel(nome=f'Residencial Bela Vista {m} Bloco B')
+    proprietario = novo_usuario(nome=f'Carla{m}', sobrenome='Mendes Ribeiro')
+
+    resolvedor = ResolvedorEntidades(db)
+    assert resolvedor.resolver_imovel(f'bela vista {m}') == imovel.id
+    # Nome da planilha com sobrenome: primeira palavra no nome, segunda no sobrenome
+    assert resolvedor.resolver_proprietario(f'Carla{m} Mendes') == proprietario.id
+
+
+def test_nome_ambiguo_resolve_pelo_mais_similar(db, novo_imovel):
+    m = marcador()
+    # O primeiro cadastrado contém o termo, mas o segundo é mais parecido com ele
+    novo_imovel(nome=f'Sala {m} Comercial Centro Empresarial Norte')
+    mais_similar = novo_imovel(nome=f'Sala {m} Comercial')
+
+    resolvedor = ResolvedorEntidades(db)
+    assert resolvedor.resolver_imovel(f'sala {m}') == mais_similar.id
+
+
+def test_nome_repetido_resolve_pelo_menor_id(db, novo_imovel):
+    m = marcador()
+    primeiro = novo_imovel(nome=f'Loja {m}')
+    novo_imovel(nome=f'Loja {m}')
+
+    resolvedor = ResolvedorEntidades(db)
+    assert resolvedor.resolver_imovel(f'Loja {m}') == primeiro.id
+
+
+def test_nao_encontrado_sugere_similares(db, novo_imovel, novo_usuario):
+    m = marcador()
+    imovel = novo_imovel(nome=f'Apartamento Jardins {m}')
+    proprietario = novo_usuario(nome=f'Roberto Lima {m}')
+
+    resolvedor = ResolvedorEntidades(db)
+    assert resolvedor.resolver_imovel(f'Apartamento Jardim {m}') is None
+    assert resolvedor.resolver_proprietario(f'Roberta Lima {m}') is None
+    assert resolvedor.relatorio_nao_encontrados() == {
+        'imoveis': [f'Apartamento Jardim {m}'],
+        'proprietarios': [f'Roberta Lima {m}'],
+    }
+
+    sugestoes = resolvedor.imoveis_similares(f'Apartamento Jardim {m}')
+    assert sugestoes[0].id == imovel.id
+    assert 0 < sugestoes[0].score < 1
+    assert resolvedor.proprietarios_similares(f'Roberta Lima {m}')[0].id == proprietario.id
+
+
+def test_proprietario_ignora_administradores(db, novo_usuario):
+    m = marcador()
+    novo_usuario(tipo='administrador', nome=f'Gestor {m}')
+
+    resolvedor = ResolvedorEntidades(db)
+    assert resolvedor.resolver_proprietario(f'Gestor {m}') is None
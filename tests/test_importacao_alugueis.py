@@ -0,0 +1,115 @@
+"""
+Importação de aluguéis mensais: upsert pela chave (id_imovel, id_proprietario, data_referencia)
+e manutenção do resumo mensal de receitas
+"""
+from datetime import date
+from decimal import Decimal
+
+from app.models.aluguel import AluguelMensal
+from app.models.receita_mensal_resumo import ReceitaMensalResumo
+from app.services.bulk_service import BulkService
+from app.services.resumo_receitas import ResumoReceitasService
+
+
+def alugueis_do_imovel(db, imovel):
+    db.expire_all()
+    return {
+        (a.id_proprietario, a.data_referencia): a
+        for a in db.query(AluguelMensal).filter(AluguelMensal.id_imovel == imovel.id)
+    }
+
+
+def resumo(db):
+    db.expire_all()
+    return {
+        (r.mes, r.id_imovel, r.id_proprietario): (
+            r.quantidade, r.valor_total, r.valor_proprietario, r.taxa_administracao, r.valor_total_imovel
+        )
+        for r in db.query(ReceitaMensalResumo)
+    }
+
+
+def test_reimportar_planilha_atualiza_sem_duplicar(db, importar_alugueis, novo_usuario, novo_imovel, planilha):
+    ana, bruno = novo_usuario(), novo_usuario()
+    imovel = novo_imovel()
+
+    def pasta(valor_ana, valor_bruno):
+        return planilha({
+            'Jan': (date(2024, 1, 1), [ana.nome, bruno.nome], [(imovel.nome, 1000, [valor_ana, valor_bruno], 100)]),
+            'Fev': (date(2024, 2, 1), [ana.nome, bruno.nome], [(imovel.nome, 1000, [valor_ana, valor_bruno], 100)]),
+        })
+
+    primeira = importar_alugueis(pasta(600, 400))
+    assert primeira['success'], primeira
+    registros = alugueis_do_imovel(db, imovel)
+    assert len(registros) == 4
+    assert registros[(ana.id, date(2024, 1, 1))].valor_proprietario == Decimal('600.00')
+
+    # Mesmo arquivo reprocessado: nada muda
+    importar_alugueis(pasta(600, 400), forcar=True)
+    assert len(alugueis_do_imovel(db, imovel)) == 4
+
+    # Valores corrigidos: as mesmas chaves são atualizadas
+    importar_alugueis(pasta(550, 450))
+    registros = alugueis_do_imovel(db, imovel)
+    assert len(registros) == 4
+    for mes in (date(2024, 1, 1), date(2024, 2, 1)):
+        assert registros[(ana.id, mes)].valor_proprietario == Decimal('550.00')
+        assert registros[(bruno.id, mes)].valor_proprietario == Decimal('450.00')
+
+
+def test_upsert_preserva_status_de_pagamento(db, novo_usuario, novo_imovel):
+    proprietario, imovel = novo_usuario(), novo_imovel()
+    chave = {'id_imovel': imovel.id, 'id_proprietario': proprietario.id, 'data_referencia': date(2024, 3, 1)}
+    BulkService.upsert_alugueis_mensais(db, [{**chave, 'valor_total': 800, 'valor_proprietario': 800, 'taxa_administracao': 80}])
+    db.commit()
+    aluguel = alugueis_do_imovel(db, imovel)[(proprietario.id, date(2024, 3, 1))]
+    aluguel.status = 'Pago'
+    db.commit()
+
+    BulkService.upsert_alugueis_mensais(db, [{**chave, 'valor_total': 900, 'valor_proprietario': 900, 'taxa_administracao': 90}])
+    db.commit()
+    aluguel = alugueis_do_imovel(db, imovel)[(proprietario.id, date(2024, 3, 1))]
+    assert aluguel.status == 'Pago'
+    assert aluguel.valor_proprietario == Decimal('900.00')
+
+
+def test_chaves_repetidas_no_lote_sao_unificadas(db, novo_usuario, novo_imovel):
+    proprietario, imovel = novo_usuario(), novo_imovel()
+    chave = {'id_imovel': imovel.id, 'id_proprietario': proprietario.id, 'data_referencia': date(2024, 4, 1)}
+    enviados = BulkService.upsert_alugueis_mensais(db, [
+        {**chave, 'valor_total': 500, 'valor_proprietario': 500, 'taxa_administracao': 50},
+        {**chave, 'valor_total': 700, 'valor_proprietario': 700, 'taxa_administracao': 70},
+    ])
+    db.commit()
+
+    assert enviados == 1
+    registros = alugueis_do_imovel(db, imovel)
+    assert len(registros) == 1
+    # A última ocorrência vence
+    assert registros[(proprietario.id, date(2024, 4, 1))].valor_proprietario == Decimal('700.00')
+
+
+def test_resumo_igual_a_reconstrucao_completa(db, importar_alugueis, novo_usuario, novo_imovel, planilha):
+    ana, bruno = novo_usuario(), novo_usuario()
+    imovel = novo_imovel()
+    importar_alugueis(planilha({
+        'Mai': (date(2024, 5, 1), [ana.nome, bruno.nome], [(imovel.nome, 2000, [1200, 800], 200)]),
+    }))
+    importar_alugueis(planilha({
+        'Mai': (date(2024, 5, 1), [ana.nome, bruno.nome], [(imovel.nome, 2100, [1300, 800], 210)]),
+        'Jun': (date(2024, 6, 1), [ana.nome, bruno.nome], [(imovel.nome, 2100, [1000, 1100], 210)]),
+    }))
+    BulkService.upsert_alugueis_mensais(db, [{
+        'id_imovel': imovel.id, 'id_proprietario': ana.id, 'data_referencia': date(2024, 6, 15),
+        'valor_total': 300, 'valor_proprietario': 300, 'taxa_administracao': 0
+    }])
+    db.commit()
+
+    incremental = resumo(db)
+    assert incremental[(date(2024, 5, 1), imovel.id, ana.id)][:3] == (1, Decimal('2100.00'), Decimal('1300.00'))
+    assert incremental[(date(2024, 6, 1), imovel.id, ana.id)][0] == 2
+
+    ResumoReceitasService.reconstruir(db)
+    db.commit()
+    assert resumo(db) == incremental
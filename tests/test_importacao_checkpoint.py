@@ -0,0 +1,177 @@
+"""Retomada de importações interrompidas a partir do último lote gravado (CheckpointImportacao)"""
+import threading
+import time
+from datetime import date
+
+import pytest
+
+from app.core.config import settings
+from app.models.aluguel import AluguelMensal
+from app.models.importacao import ImportacaoCheckpoint
+from app.services.import_checkpoint import CheckpointEmUso, CheckpointImportacao, checkpoint_em_uso, hash_arquivo
+
+
+def aguardar_job(client, headers, admin, job_id, tentativas=200):
+    for _ in range(tentativas):
+        job = client.get(f'/api/importacao/jobs/{job_id}', headers=headers(admin)).json()
+        if job['status'] in ('concluido', 'erro', 'cancelado'):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f'Job {job_id} não terminou: {job}')
+
+
+def test_retomar_importacao_apos_falha_no_lote(
+    client, db, headers, admin, enviar_planilha, importar_alugueis, novo_usuario, novo_imovel, planilha, monkeypatch
+):
+    ana, bruno = novo_usuario(), novo_usuario()
+    imoveis = [novo_imovel() for _ in range(10)]
+    conteudo = planilha({
+        'Jul': (date(2024, 7, 1), [ana.nome, bruno.nome], [(i.nome, 1000 + n, [600, 400 + n], 100) for n, i in enumerate(imoveis)]),
+    })
+
+    def registros():
+        db.expire_all()
+        return db.query(AluguelMensal).filter(AluguelMensal.id_imovel.in_([i.id for i in imoveis])).all()
+
+    # Lotes de 2 linhas; o terceiro lote (linhas 4 e 5) falha ao gravar
+    monkeypatch.setattr(settings, 'import_chunk_size', 2)
+    gravar_lote = CheckpointImportacao._gravar_lote
+    chamadas = []
+
+    def gravar_lote_falhando(self, *args):
+        chamadas.append(args)
+        if len(chamadas) == 3:
+            raise RuntimeError('conexão perdida')
+        return gravar_lote(self, *args)
+
+    monkeypatch.setattr(CheckpointImportacao, '_gravar_lote', gravar_lote_falhando)
+    resultado = importar_alugueis(conteudo)
+
+    assert not resultado['success']
+    checkpoint = resultado['checkpoint']
+    assert checkpoint['status'] == 'falhou'
+    assert (checkpoint['planilha_indice'], checkpoint['linha']) == (0, 4)
+    assert checkpoint['registros_gravados'] == 8
+    assert len(registros()) == 8  # Só os dois lotes confirmados
+
+    # Retomada: sem a falha, a partir da linha gravada no checkpoint
+    monkeypatch.setattr(CheckpointImportacao, '_gravar_lote', gravar_lote)
+    posicoes = []
+    proxima_linha = CheckpointImportacao.proxima_linha
+
+    def registrar_posicao(self, planilha_indice, planilha, linha, registros_importados):
+        posicoes.append(linha)
+        return proxima_linha(self, planilha_indice, planilha, linha, registros_importados)
+
+    monkeypatch.setattr(CheckpointImportacao, 'proxima_linha', registrar_posicao)
+    resposta = enviar_planilha(f"/api/importacao/checkpoints/{checkpoint['id']}/retomar", conteudo)
+    assert resposta.status_code == 200, resposta.text
+    job = aguardar_job(client, headers, admin, resposta.json()['job']['id'])
+
+    assert job['status'] == 'concluido', job
+    assert posicoes == list(range(4, 10))  # Linhas já gravadas não são reprocessadas
+    assert job['resultado']['registros_importados'] == 20
+    assert job['resultado']['checkpoint']['retomado']
+
+    gravados = registros()
+    assert len(gravados) == 20
+    assert len({(r.id_imovel, r.id_proprietario, r.data_referencia) for r in gravados}) == 20
+    db.expire_all()
+    registro = db.query(ImportacaoCheckpoint).filter(ImportacaoCheckpoint.id == checkpoint['id']).one()
+    assert registro.status == 'concluida'
+    assert registro.registros_gravados == 20
+
+
+def test_retomar_com_outro_arquivo_e_recusado(
+    enviar_planilha, importar_alugueis, novo_usuario, novo_imovel, planilha, monkeypatch
+):
+    ana, imovel = novo_usuario(), novo_imovel()
+
+    def concluir_falhando(self, *args):
+        raise RuntimeError('conexão perdida')
+
+    monkeypatch.setattr(CheckpointImportacao, 'concluir', concluir_falhando)
+    conteudo = planilha({'Ago': (date(2024, 8, 1), [ana.nome], [(imovel.nome, 500, [500], 50)])})
+    checkpoint = importar_alugueis(conteudo)['checkpoint']
+    assert checkpoint['status'] == 'falhou'
+
+    outro = planilha({'Ago': (date(2024, 8, 1), [ana.nome], [(imovel.nome, 600, [600], 60)])})
+    resposta = enviar_planilha(f"/api/importacao/checkpoints/{checkpoint['id']}/retomar", outro)
+    assert resposta.status_code == 409
+
+
+def checkpoint_com_falha(importar_alugueis, novo_usuario, novo_imovel, planilha, monkeypatch):
+    """Importa uma planilha cuja conclusão falha; retorna (conteúdo, resumo do checkpoint)"""
+    ana, imovel = novo_usuario(), novo_imovel()
+    conteudo = planilha({f'Set {ana.id}': (date(2024, 9, 1), [ana.nome], [(imovel.nome, 500, [500], 50)])})
+    concluir = CheckpointImportacao.concluir
+
+    def concluir_falhando(self, *args):
+        raise RuntimeError('conexão perdida')
+
+    monkeypatch.setattr(CheckpointImportacao, 'concluir', concluir_falhando)
+    checkpoint = importar_alugueis(conteudo)['checkpoint']
+    monkeypatch.setattr(CheckpointImportacao, 'concluir', concluir)
+    assert checkpoint['status'] == 'falhou'
+    return conteudo, checkpoint
+
+
+def test_retomada_simultanea_e_recusada(
+    client, headers, admin, enviar_planilha, importar_alugueis, novo_usuario, novo_imovel, planilha, monkeypatch
+):
+    conteudo, checkpoint = checkpoint_com_falha(importar_alugueis, novo_usuario, novo_imovel, planilha, monkeypatch)
+    rota = f"/api/importacao/checkpoints/{checkpoint['id']}/retomar"
+
+    # A primeira retomada fica parada na primeira linha até o teste liberar
+    iniciada, liberar = threading.Event(), threading.Event()
+    proxima_linha = CheckpointImportacao.proxima_linha
+
+    def proxima_linha_bloqueada(self, *args):
+        iniciada.set()
+        assert liberar.wait(10)
+        return proxima_linha(self, *args)
+
+    monkeypatch.setattr(CheckpointImportacao, 'proxima_linha', proxima_linha_bloqueada)
+    primeira = enviar_planilha(rota, conteudo)
+    assert primeira.status_code == 200, primeira.text
+    try:
+        assert iniciada.wait(10)
+        # O checkpoint está 'em_andamento' e pertence a um job vivo
+        segunda = enviar_planilha(rota, conteudo)
+        assert segunda.status_code == 409, segunda.text
+    finally:
+        liberar.set()
+
+    job = aguardar_job(client, headers, admin, primeira.json()['job']['id'])
+    assert job['status'] == 'concluido', job
+    assert job['resultado']['registros_importados'] == 1
+    assert enviar_planilha(rota, conteudo).status_code == 409  # Já concluída
+
+
+def test_checkpoint_reservado_nao_e_retomado_duas_vezes(db, importar_alugueis, novo_usuario, novo_imovel, planilha, monkeypatch):
+    conteudo, checkpoint = checkpoint_com_falha(importar_alugueis, novo_usuario, novo_imovel, planilha, monkeypatch)
+    argumentos = (db, 'alugueis', hash_arquivo(conteudo))
+
+    primeiro = CheckpointImportacao(*argumentos, id_checkpoint=checkpoint['id'])
+    try:
+        with pytest.raises(CheckpointEmUso):
+            CheckpointImportacao(*argumentos, id_checkpoint=checkpoint['id'])
+    finally:
+        db.rollback()
+        primeiro.liberar()
+    assert not checkpoint_em_uso(checkpoint['id'])
+
+
+def test_checkpoint_de_processo_interrompido_pode_ser_retomado(
+    client, db, headers, admin, enviar_planilha, importar_alugueis, novo_usuario, novo_imovel, planilha, monkeypatch
+):
+    conteudo, checkpoint = checkpoint_com_falha(importar_alugueis, novo_usuario, novo_imovel, planilha, monkeypatch)
+    # Processo encerrado no meio da importação: o status ficou 'em_andamento' sem dono
+    registro = db.query(ImportacaoCheckpoint).filter(ImportacaoCheckpoint.id == checkpoint['id']).one()
+    registro.status = 'em_andamento'
+    db.commit()
+
+    resposta = enviar_planilha(f"/api/importacao/checkpoints/{checkpoint['id']}/retomar", conteudo)
+    assert resposta.status_code == 200, resposta.text
+    job = aguardar_job(client, headers, admin, resposta.json()['job']['id'])
+    assert job['status'] == 'concluido', job
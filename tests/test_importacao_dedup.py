@@ -0,0 +1,77 @@
+"""Reenvio de planilhas de aluguéis já importadas (DeduplicacaoImportacao)"""
+from datetime import date
+from decimal import Decimal
+
+from app.models.aluguel import AluguelMensal
+
+
+def test_reenvio_ignora_planilhas_inalteradas(db, importar_alugueis, novo_usuario, novo_imovel, planilha):
+    ana, bruno = novo_usuario(), novo_usuario()
+    imovel = novo_imovel()
+    # Os hashes são guardados pelo nome da planilha: nomes únicos isolam o teste
+    setembro, outubro = f'Set {ana.id}', f'Out {ana.id}'
+
+    def pasta(valor_outubro):
+        return planilha({
+            setembro: (date(2024, 9, 1), [ana.nome, bruno.nome], [(imovel.nome, 1000, [600, 400], 100)]),
+            outubro: (date(2024, 10, 1), [ana.nome, bruno.nome], [(imovel.nome, 1000, [valor_outubro, 400], 100)]),
+        })
+
+    def valor(mes):
+        db.expire_all()
+        return db.query(AluguelMensal.valor_proprietario).filter(
+            AluguelMensal.id_imovel == imovel.id,
+            AluguelMensal.id_proprietario == ana.id,
+            AluguelMensal.data_referencia == mes
+        ).scalar()
+
+    # O openpyxl grava a hora de criação no arquivo: o reenvio usa os mesmos bytes
+    conteudo = pasta(600)
+    primeira = importar_alugueis(conteudo)
+    assert primeira['registros_importados'] == 4
+    assert primeira['planilhas_ignoradas'] == []
+
+    # Mesmo arquivo: descartado sem ler nenhuma planilha
+    repetida = importar_alugueis(conteudo)
+    assert repetida['arquivo_ja_importado']
+    assert repetida['registros_importados'] == 0
+    assert repetida['planilhas_ignoradas'] == [setembro, outubro]
+
+    # Uma célula alterada em outubro: só outubro é reimportada. A alteração manual em
+    # setembro mostra que a planilha inalterada não é regravada
+    db.query(AluguelMensal).filter(
+        AluguelMensal.id_imovel == imovel.id, AluguelMensal.data_referencia == date(2024, 9, 1)
+    ).update({'valor_proprietario': 1})
+    db.commit()
+    alterada = importar_alugueis(pasta(650))
+    assert not alterada['arquivo_ja_importado']
+    assert alterada['planilhas_ignoradas'] == [setembro]
+    assert alterada['registros_importados'] == 2
+    assert valor(date(2024, 10, 1)) == Decimal('650.00')
+    assert valor(date(2024, 9, 1)) == Decimal('1.00')
+
+    # forcar=True reprocessa todas as planilhas
+    forcada = importar_alugueis(pasta(650), forcar=True)
+    assert not forcada['arquivo_ja_importado']
+    assert forcada['planilhas_ignoradas'] == []
+    assert forcada['registros_importados'] == 4
+    assert valor(date(2024, 9, 1)) == Decimal('600.00')
+
+
+def test_planilha_com_erros_volta_a_ser_importada(db, importar_alugueis, novo_usuario, novo_imovel, planilha):
+    ana = novo_usuario()
+    imovel = novo_imovel()
+    nome = f'Nov {ana.id}'
+    conteudo = planilha({
+        nome: (date(2024, 11, 1), [ana.nome], [(imovel.nome, 1000, [1000], 100), ('Imóvel inexistente', 500, [500], 50)]),
+    })
+
+    primeira = importar_alugueis(conteudo)
+    assert primeira['registros_importados'] == 1
+    assert primeira['erros']
+
+    # A planilha não foi registrada (linha com erro): o reenvio processa de novo
+    segunda = importar_alugueis(conteudo)
+    assert not segunda['arquivo_ja_importado']
+    assert segunda['planilhas_ignoradas'] == []
+    assert segunda['registros_importados'] == 1
@@ -0,0 +1,98 @@
+"""Conversão de valores monetários das planilhas (parse_serie_monetaria)"""
+from datetime import date
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+
+from app.models.aluguel import AluguelMensal
+from app.services.import_service import ImportacaoAvancadaService
+
+
+def converter(valores, index=None):
+    serie = pd.Series(valores, index=index, dtype=object)
+    return ImportacaoAvancadaService.parse_serie_monetaria(serie)
+
+
+def test_formatos_de_texto():
+    valores, invalidos = converter([
+        '49.891,92', 'R$ 1.234,00', '(1.234,00)', '-R$ 10,50', '2,500.00', '1234,5', '1.234', '- 7'
+    ])
+    assert list(valores) == [
+        Decimal('49891.92'), Decimal('1234.00'), Decimal('-1234.00'), Decimal('-10.50'),
+        Decimal('2500.00'), Decimal('1234.5'), Decimal('1.234'), Decimal('-7')
+    ]
+    assert invalidos == []
+
+
+def test_celulas_numericas():
+    valores, invalidos = converter([1500, 1234.5, Decimal('-3.10'), np.float64(2.25), float('nan')])
+    assert list(valores) == [Decimal('1500'), Decimal('1234.5'), Decimal('-3.10'), Decimal('2.25'), None]
+    assert invalidos == []
+
+
+def test_vazios_nao_sao_invalidos():
+    valores, invalidos = converter([None, '', '  ', '-', 'nan'])
+    assert list(valores) == [None] * 5
+    assert invalidos == []
+
+
+def test_indices_dos_invalidos():
+    valores, invalidos = converter(
+        ['100,00', 'abc', 'R$ 1.234,00', '12,34,56x', '(-5)', '()', 'abc'],
+        index=[10, 11, 12, 13, 14, 15, 16]
+    )
+    assert invalidos == [11, 13, 14, 15, 16]
+    assert valores[10] == Decimal('100.00')
+    assert valores[12] == Decimal('1234.00')
+    assert all(valores[i] is None for i in invalidos)
+
+
+def test_sinal_duplo_e_invalido():
+    valores, invalidos = converter(['(-5)', '(5)', '-5'])
+    assert valores[0] is None and invalidos == [0]
+    assert valores[1] == Decimal('-5')
+    assert valores[2] == Decimal('-5')
+
+
+def test_importacao_lista_taxas_e_valores_invalidos(db, importar_alugueis, novo_usuario, novo_imovel, planilha):
+    ana, bruno = novo_usuario(), novo_usuario()
+    casa_1, casa_2 = novo_imovel(), novo_imovel()
+    conteudo = planilha({'Mar': (date(2024, 3, 1), [ana.nome, bruno.nome], [
+        (casa_1.nome, '1.000,00', ['600,00', 'x'], '100,00'),
+        (casa_2.nome, '500,00', ['250,00', '250,00'], 'isento?'),
+    ])})
+    resultado = importar_alugueis(conteudo)
+
+    assert resultado['valores_invalidos'] == [
+        "Linha 5 planilha 'Mar': Valor inválido em 'Taxa Administração' ('isento?') - campo ignorado",
+        f"Linha 4 planilha 'Mar': Valor inválido em '{bruno.nome}' ('x') - campo ignorado",
+    ]
+    # Células inválidas são ignoradas; o restante da linha é importado
+    assert resultado['registros_importados'] == 3
+    db.expire_all()
+    aluguel = db.query(AluguelMensal).filter(
+        AluguelMensal.id_imovel == casa_2.id, AluguelMensal.id_proprietario == bruno.id
+    ).one()
+    assert aluguel.taxa_administracao == Decimal('0')
+    assert aluguel.valor_proprietario == Decimal('250.00')
+
+
+def test_analise_lista_taxas_e_valores_invalidos():
+    df = pd.DataFrame([
+        ['01/03/2024', 'Valor Total', 'Ana', 'Bruno', 'Taxa Administração'],
+        ['Casa 1', '1.000,00', '600,00', 'x', '100,00'],
+        ['Casa 2', '500,00', '250,00', '250,00', 'isento?'],
+    ], dtype=object)
+    analise = ImportacaoAvancadaService.analisar_planilha_alugueis('Mar', df)
+
+    assert analise['erro'] is None
+    assert analise['valores_invalidos'] == [
+        "Linha 5 planilha 'Mar': Valor inválido em 'Taxa Administração' ('isento?') - campo ignorado",
+        "Linha 4 planilha 'Mar': Valor inválido em 'Bruno' ('x') - campo ignorado",
+    ]
+    assert analise['data_referencia'] == date(2024, 3, 1)
+    # Células inválidas são ignoradas; o restante da linha é mantido
+    _, _, _, _, taxa, valores = analise['linhas'][1]
+    assert taxa == Decimal('0')
+    assert valores == {2: Decimal('250.00'), 3: Decimal('250.00')}
@@ -0,0 +1,65 @@
+"""Particionamento opcional de alugueis_mensais por ano (app.core.particionamento)"""
+from datetime import date
+
+import pytest
+from sqlalchemy import text
+
+from app.core import database
+from app.core.particionamento import (
+    INDICES, PARTICAO_PADRAO, anos_particionados, garantir_particoes, nome_particao, particionar,
+    tabela_particionada
+)
+from app.models.aluguel import AluguelMensal
+
+
+def test_indices_recriados_iguais_aos_do_modelo():
+    do_modelo = {
+        (
+            indice.name,
+            tuple(c.name for c in indice.columns),
+            bool(indice.unique),
+            tuple(indice.dialect_options['postgresql'].get('include') or ()),
+        )
+        for indice in AluguelMensal.__table__.indexes
+        # O índice de id é coberto pela chave primária
+        if [c.name for c in indice.columns] != ['id']
+    }
+    assert set(INDICES) == do_modelo
+
+
+@pytest.mark.skipif(
+    database.engine.dialect.name != 'postgresql',
+    reason='Particionamento só no PostgreSQL (rode com TEST_DATABASE_URL apontando para um PostgreSQL)'
+)
+def test_garantir_particoes_move_registros_da_particao_padrao(novo_usuario, novo_imovel):
+    proprietario, imovel = novo_usuario(), novo_imovel()
+    # Tudo numa transação desfeita no final, inclusive o particionamento
+    with database.engine.connect() as conn:
+        try:
+            if not tabela_particionada(conn):
+                particionar(conn)
+            ano = max(anos_particionados(conn)) + 5
+            id_aluguel = conn.execute(text(
+                "INSERT INTO alugueis_mensais (id_imovel, id_proprietario, data_referencia, valor_total, "
+                "valor_proprietario, taxa_administracao, status) "
+                "VALUES (:imovel, :proprietario, :data, 1000, 1000, 100, 'Não Pago') RETURNING id"
+            ), {'imovel': imovel.id, 'proprietario': proprietario.id, 'data': date(ano, 6, 1)}).scalar()
+
+            def particao_do_registro():
+                return conn.execute(text(
+                    "SELECT tableoid::regclass::text FROM alugueis_mensais WHERE id = :id"
+                ), {'id': id_aluguel}).scalar()
+
+            assert particao_do_registro() == PARTICAO_PADRAO
+
+            assert garantir_particoes(conn, [ano]) == [ano]
+            assert ano in anos_particionados(conn)
+            assert particao_do_registro() == nome_particao(ano)
+            assert conn.execute(text(
+                f"SELECT count(*) FROM {PARTICAO_PADRAO} WHERE data_referencia >= :inicio"
+            ), {'inicio': date(ano, 1, 1)}).scalar() == 0
+
+            # Já existente: nada a criar
+            assert garantir_particoes(conn, [ano]) == []
+        finally:
+            conn.rollback()
@@ -0,0 +1,83 @@
+"""
+Planos das consultas por período (ver scripts/verificar_planos_consulta.py): os filtros são
+sargable e usam os índices previstos de alugueis_mensais
+"""
+import pytest
+from sqlalchemy import create_engine
+
+from app.core import database
+from app.core.particionamento import (
+    desfazer_particionamento, garantir_particoes, particionar, tabela_particionada
+)
+from scripts.verificar_planos_consulta import (
+    consultas, explicar_postgres, explicar_sqlite, partes_de, problemas
+)
+
+# Janeiro: as estatísticas do dashboard comparam com dezembro do ano anterior
+MESES = [(2025, 1), (2025, 6)]
+VERIFICACOES = [(ano, mes, i) for ano, mes in MESES for i in range(len(consultas(ano, mes)))]
+
+
+def rotulo(parametro):
+    ano, mes, indice = parametro
+    return f"{ano}-{mes:02d} {consultas(ano, mes)[indice].descricao}"
+
+
+def explicar(conn, explicar_dialeto, verificacao):
+    sql = str(verificacao.consulta.compile(dialect=conn.dialect, compile_kwargs={'literal_binds': True}))
+    return explicar_dialeto(conn, sql)
+
+
+@pytest.fixture(scope='module')
+def sqlite():
+    """Banco SQLite em memória com o schema dos modelos (roda qualquer que seja o banco de teste)"""
+    engine = create_engine('sqlite://')
+    database.Base.metadata.create_all(bind=engine)
+    with engine.connect() as conn:
+        yield conn
+    engine.dispose()
+
+
+@pytest.mark.parametrize('parametro', VERIFICACOES, ids=rotulo)
+def test_sqlite_busca_pelos_indices_previstos(sqlite, parametro):
+    ano, mes, indice = parametro
+    verificacao = consultas(ano, mes)[indice]
+    linhas, leituras = explicar(sqlite, explicar_sqlite, verificacao)
+
+    assert problemas(verificacao, leituras, {}) == [], linhas
+    if verificacao.tabelas and verificacao.indices:
+        # SEARCH (intervalo no índice) em uma das tabelas verificadas, por um índice previsto
+        buscas = {l.indice for l in leituras if not l.completa and l.relacao in verificacao.tabelas}
+        assert buscas & verificacao.indices, linhas
+
+
+@pytest.mark.skipif(
+    database.engine.dialect.name != 'postgresql',
+    reason='EXPLAIN do PostgreSQL (rode com TEST_DATABASE_URL apontando para um PostgreSQL)'
+)
+@pytest.mark.parametrize('particionada', [False, True], ids=['tabela_comum', 'particionada'])
+def test_postgres_sem_seq_scan_e_sem_particoes_fora_do_periodo(particionada):
+    # Tudo numa transação desfeita no final, inclusive o (des)particionamento
+    with database.engine.connect() as conn:
+        try:
+            if particionada and not tabela_particionada(conn):
+                particionar(conn)
+            elif not particionada and tabela_particionada(conn):
+                desfazer_particionamento(conn)
+            anos = {a for ano, _ in MESES for a in (ano - 1, ano, ano + 1)}
+            garantir_particoes(conn, anos)
+            # Com poucas linhas o planejador prefere ler a tabela toda: verifica-se que o índice pode ser usado
+            conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+            assert tabela_particionada(conn) == particionada
+            pais = partes_de(conn)
+
+            falhas = {}
+            for ano, mes in MESES:
+                for verificacao in consultas(ano, mes):
+                    linhas, leituras = explicar(conn, explicar_postgres, verificacao)
+                    encontrados = problemas(verificacao, leituras, pais)
+                    if encontrados:
+                        falhas[f"{ano}-{mes:02d} {verificacao.descricao}"] = encontrados + linhas
+            assert falhas == {}
+        finally:
+            conn.rollback()
@@ -0,0 +1,231 @@
+"""
+Resumo mensal de receitas (receitas_mensais_resumo): depois de cada caminho de gravação o
+resumo tem de ser igual à agregação de alugueis_mensais feita na hora
+"""
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import func, select
+
+from app.core.periodo import inicio_mes, mes_seguinte
+from app.models.aluguel import AluguelMensal
+from app.models.receita_mensal_resumo import ReceitaMensalResumo
+from app.services.bulk_service import BulkService
+from app.services.resumo_receitas import ResumoReceitasService
+
+
+def chave_valores(linha):
+    return (
+        (linha.mes, linha.id_imovel, linha.id_proprietario),
+        (linha.quantidade, Decimal(linha.valor_total), Decimal(linha.valor_proprietario),
+         Decimal(linha.taxa_administracao), Decimal(linha.valor_total_imovel))
+    )
+
+
+def resumo(db, imovel):
+    db.expire_all()
+    return dict(
+        chave_valores(r)
+        for r in db.query(ReceitaMensalResumo).filter(ReceitaMensalResumo.id_imovel == imovel.id)
+    )
+
+
+def agregado(db, imovel):
+    """O que o resumo deveria conter: _agregado de cada mês com registros do imóvel"""
+    datas = db.query(AluguelMensal.data_referencia).filter(AluguelMensal.id_imovel == imovel.id).distinct()
+    esperado = {}
+    for mes in {inicio_mes(d) for d, in datas}:
+        consulta = ResumoReceitasService._agregado(
+            mes, mes, mes_seguinte(mes), AluguelMensal.id_imovel == imovel.id
+        )
+        esperado.update(chave_valores(r) for r in db.execute(consulta))
+    return esperado
+
+
+def conferir(db, imovel):
+    atual = resumo(db, imovel)
+    assert atual == agregado(db, imovel)
+    return atual
+
+
+def gravar(db, imovel, proprietario, valores):
+    """{data_referencia: (valor_total, valor_proprietario, taxa)} via upsert em massa"""
+    BulkService.upsert_alugueis_mensais(db, [
+        {'id_imovel': imovel.id, 'id_proprietario': proprietario.id, 'data_referencia': data,
+         'valor_total': total, 'valor_proprietario': parte, 'taxa_administracao': taxa}
+        for data, (total, parte, taxa) in valores.items()
+    ])
+    db.commit()
+
+
+def ids_alugueis(db, imovel):
+    db.expire_all()
+    return {
+        (a.id_proprietario, a.data_referencia): a.id
+        for a in db.query(AluguelMensal).filter(AluguelMensal.id_imovel == imovel.id)
+    }
+
+
+def test_importacao_mantem_resumo(db, importar_alugueis, novo_usuario, novo_imovel, planilha):
+    ana, bruno = novo_usuario(), novo_usuario()
+    imovel = novo_imovel()
+
+    def pasta(valores_marco):
+        return planilha({
+            f'Mar {ana.id}': (date(2024, 3, 1), [ana.nome, bruno.nome], [(imovel.nome, 1000, valores_marco, 100)]),
+            f'Abr {ana.id}': (date(2024, 4, 1), [ana.nome, bruno.nome], [(imovel.nome, 1200, [700, 500], 120)]),
+        })
+
+    importar_alugueis(pasta([600, 400]))
+    atual = conferir(db, imovel)
+    assert atual[(date(2024, 3, 1), imovel.id, ana.id)][:3] == (1, Decimal('1000'), Decimal('600'))
+
+    # Reimportação com valores corrigidos: as mesmas chaves são atualizadas
+    importar_alugueis(pasta([650, 350]))
+    atual = conferir(db, imovel)
+    assert atual[(date(2024, 3, 1), imovel.id, ana.id)][2] == Decimal('650')
+    assert len(atual) == 4
+
+
+def test_upsert_sem_on_conflict_mantem_resumo(db, novo_usuario, novo_imovel, monkeypatch):
+    proprietario, imovel = novo_usuario(), novo_imovel()
+    gravar(db, imovel, proprietario, {date(2024, 5, 1): (800, 800, 80)})
+
+    # Dialeto sem INSERT ... ON CONFLICT: gravação pelo ORM (_upsert_alugueis_mensais_orm)
+    monkeypatch.setattr(BulkService, '_insert_com_conflito', staticmethod(lambda dialeto: None))
+    gravar(db, imovel, proprietario, {
+        date(2024, 5, 1): (900, 900, 90),     # Existente: atualizado
+        date(2024, 5, 20): (100, 100, 10),    # Novo no mesmo mês
+        date(2024, 6, 1): (950, 950, 95),     # Novo em outro mês
+    })
+
+    atual = conferir(db, imovel)
+    assert atual[(date(2024, 5, 1), imovel.id, proprietario.id)] == (
+        2, Decimal('1000'), Decimal('1000'), Decimal('100'), Decimal('900')
+    )
+    assert (date(2024, 6, 1), imovel.id, proprietario.id) in atual
+
+
+def test_editar_e_excluir_registro_mantem_resumo(client, db, headers, admin, novo_usuario, novo_imovel):
+    ana, bruno = novo_usuario(), novo_usuario()
+    imovel = novo_imovel()
+    for proprietario in (ana, bruno):
+        gravar(db, imovel, proprietario, {date(2024, 7, 1): (1000, 500, 50), date(2024, 7, 15): (200, 100, 10)})
+    ids = ids_alugueis(db, imovel)
+
+    resposta = client.put(f"/api/alugueis/mensais/{ids[(ana.id, date(2024, 7, 1))]}", headers=headers(admin), json={
+        'valor_total': 1100, 'valor_proprietario': 550
+    })
+    assert resposta.status_code == 200, resposta.text
+    atual = conferir(db, imovel)
+    assert atual[(date(2024, 7, 1), imovel.id, ana.id)][1:3] == (Decimal('1300'), Decimal('650'))
+
+    # Só o status: o resumo não muda
+    resposta = client.put(f"/api/alugueis/mensais/{ids[(ana.id, date(2024, 7, 1))]}", headers=headers(admin), json={
+        'status': 'Pago'
+    })
+    assert resposta.status_code == 200, resposta.text
+    assert conferir(db, imovel) == atual
+
+    resposta = client.delete(f"/api/alugueis/mensais/{ids[(ana.id, date(2024, 7, 15))]}", headers=headers(admin))
+    assert resposta.status_code == 200, resposta.text
+    atual = conferir(db, imovel)
+    assert atual[(date(2024, 7, 1), imovel.id, ana.id)][0] == 1
+
+    resposta = client.delete(f"/api/alugueis/mensais/{ids[(ana.id, date(2024, 7, 1))]}", headers=headers(admin))
+    assert resposta.status_code == 200, resposta.text
+    atual = conferir(db, imovel)
+    # Sem registros no mês, a linha do proprietário sai do resumo
+    assert (date(2024, 7, 1), imovel.id, ana.id) not in atual
+    assert (date(2024, 7, 1), imovel.id, bruno.id) in atual
+
+
+def test_editar_e_excluir_em_lote_mantem_resumo(client, db, headers, admin, novo_usuario, novo_imovel):
+    ana, bruno = novo_usuario(), novo_usuario()
+    imovel = novo_imovel()
+    for proprietario in (ana, bruno):
+        gravar(db, imovel, proprietario, {
+            date(2024, 8, 1): (1000, 500, 50), date(2024, 9, 1): (1000, 500, 50), date(2024, 10, 1): (1000, 500, 50)
+        })
+    ids = ids_alugueis(db, imovel)
+    de_ana = [i for (p, _), i in ids.items() if p == ana.id]
+
+    resposta = client.put('/api/alugueis/mensais/lote', headers=headers(admin), json={
+        'ids': de_ana, 'dados': {'valor_proprietario': 600, 'taxa_administracao': 40}
+    })
+    assert resposta.status_code == 200, resposta.text
+    atual = conferir(db, imovel)
+    assert {v[2:4] for (_, _, p), v in atual.items() if p == ana.id} == {(Decimal('600'), Decimal('40'))}
+
+    resposta = client.request('DELETE', '/api/alugueis/mensais/lote', headers=headers(admin), json={
+        'ids': [ids[(ana.id, date(2024, 8, 1))], ids[(bruno.id, date(2024, 9, 1))]]
+    })
+    assert resposta.status_code == 200, resposta.text
+    atual = conferir(db, imovel)
+    assert (date(2024, 8, 1), imovel.id, ana.id) not in atual
+    assert (date(2024, 9, 1), imovel.id, bruno.id) not in atual
+    assert len(atual) == 4
+
+
+def test_reconstruir_refaz_resumo_divergente(db, novo_usuario, novo_imovel):
+    proprietario, imovel = novo_usuario(), novo_imovel()
+    gravar(db, imovel, proprietario, {date(2024, 11, 1): (700, 700, 70), date(2024, 12, 1): (750, 750, 75)})
+    esperado = conferir(db, imovel)
+
+    # Resumo corrompido: uma linha apagada e outra com valores errados
+    db.query(ReceitaMensalResumo).filter(
+        ReceitaMensalResumo.id_imovel == imovel.id, ReceitaMensalResumo.mes == date(2024, 11, 1)
+    ).delete(synchronize_session=False)
+    db.query(ReceitaMensalResumo).filter(
+        ReceitaMensalResumo.id_imovel == imovel.id, ReceitaMensalResumo.mes == date(2024, 12, 1)
+    ).update({'valor_total': 1}, synchronize_session=False)
+    db.commit()
+    assert resumo(db, imovel) != esperado
+
+    assert ResumoReceitasService.reconstruir(db) >= 2
+    db.commit()
+    assert resumo(db, imovel) == esperado
+
+
+@pytest.mark.parametrize('inicio, fim', [
+    (date(2025, 1, 15), date(2025, 3, 10)),   # Pontas incompletas nos dois lados
+    (date(2025, 1, 1), date(2025, 3, 31)),    # Só meses inteiros
+    (date(2025, 2, 1), date(2025, 3, 10)),    # Ponta incompleta só no fim
+    (date(2025, 1, 15), date(2025, 2, 28)),   # Ponta incompleta só no início
+    (date(2025, 3, 5), date(2025, 3, 20)),    # Dentro de um único mês
+])
+def test_fonte_igual_a_soma_dos_registros(db, novo_usuario, novo_imovel, inicio, fim):
+    proprietario, imovel = novo_usuario(), novo_imovel()
+    gravar(db, imovel, proprietario, {
+        date(2024, 12, 31): (1, 1, 0),
+        date(2025, 1, 10): (100, 100, 10),
+        date(2025, 1, 15): (200, 200, 20),
+        date(2025, 1, 20): (400, 400, 40),
+        date(2025, 2, 5): (800, 800, 80),
+        date(2025, 3, 5): (1600, 1600, 160),
+        date(2025, 3, 10): (3200, 3200, 320),
+        date(2025, 3, 25): (6400, 6400, 640),
+        date(2025, 4, 1): (12800, 12800, 1280),
+    })
+
+    receitas = ResumoReceitasService.fonte(inicio, fim)
+    por_mes = {
+        mes: (quantidade, Decimal(total))
+        for mes, quantidade, total in db.execute(
+            select(receitas.c.mes, func.sum(receitas.c.quantidade), func.sum(receitas.c.valor_total))
+            .where(receitas.c.id_imovel == imovel.id)
+            .group_by(receitas.c.mes)
+        )
+    }
+
+    registros = db.query(AluguelMensal).filter(
+        AluguelMensal.id_imovel == imovel.id,
+        AluguelMensal.data_referencia >= inicio,
+        AluguelMensal.data_referencia <= fim
+    ).all()
+    esperado = {}
+    for r in registros:
+        quantidade, total = esperado.get(inicio_mes(r.data_referencia), (0, Decimal(0)))
+        esperado[inicio_mes(r.data_referencia)] = (quantidade + 1, total + r.valor_total)
+    assert por_mes == esperado
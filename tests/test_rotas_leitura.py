@@ -0,0 +1,183 @@
+"""
+Rotas assíncronas de leitura (get_async_db): dashboard, relatórios e listagem de imóveis,
+como administrador, como usuário com permissão sobre parte dos proprietários e sem permissões
+"""
+from datetime import date, timedelta
+
+import pytest
+
+from app.core.periodo import mes_seguinte, somar_meses
+from app.models.imovel import Imovel
+from app.services.bulk_service import BulkService
+from app.services.dashboard_service import DashboardService
+from app.services.graficos_service import GraficosService
+
+HOJE = date.today()
+MES = HOJE.replace(day=1)
+MES_ANTERIOR = somar_meses(MES, -1)
+PERIODO = {'data_inicio': MES_ANTERIOR.isoformat(), 'data_fim': (mes_seguinte(MES) - timedelta(days=1)).isoformat()}
+
+
+@pytest.fixture
+def cenario(db, novo_usuario, novo_imovel, permitir):
+    """
+    `leitor` vê `visivel` (imóvel `casa`: 800 no mês anterior, 1000 no atual) e não vê
+    `oculto` (imóvel `loja`: 5000 no mês atual); `sem_permissao` não vê ninguém
+    """
+    leitor, sem_permissao = novo_usuario(), novo_usuario()
+    visivel, oculto = novo_usuario(), novo_usuario()
+    casa, loja = novo_imovel(), novo_imovel()
+    permitir(leitor, visivel)
+    BulkService.upsert_alugueis_mensais(db, [
+        {'id_imovel': casa.id, 'id_proprietario': visivel.id, 'data_referencia': MES_ANTERIOR,
+         'valor_total': 800, 'valor_proprietario': 720, 'taxa_administracao': 80},
+        {'id_imovel': casa.id, 'id_proprietario': visivel.id, 'data_referencia': MES,
+         'valor_total': 1000, 'valor_proprietario': 900, 'taxa_administracao': 100},
+        {'id_imovel': loja.id, 'id_proprietario': oculto.id, 'data_referencia': MES,
+         'valor_total': 5000, 'valor_proprietario': 4500, 'taxa_administracao': 500},
+    ])
+    db.commit()
+    return {
+        'leitor': leitor, 'sem_permissao': sem_permissao, 'visivel': visivel, 'oculto': oculto,
+        'casa': casa, 'loja': loja,
+    }
+
+
+def get(client, headers, usuario, rota, **params):
+    resposta = client.get(rota, params=params, headers=headers(usuario))
+    assert resposta.status_code == 200, resposta.text
+    return resposta.json()
+
+
+def test_estatisticas_do_dashboard(client, db, headers, admin, cenario):
+    total_imoveis = db.query(Imovel).count()
+
+    estatisticas = get(client, headers, cenario['leitor'], '/api/dashboard/stats')
+    assert estatisticas == {
+        'total_imoveis': total_imoveis,
+        'receita_mensal': 1000.0,
+        'receita_anual': 1000.0,  # Maior valor do imóvel no ano
+        'variacao_mensal': 25.0,
+        'imoveis_disponiveis': total_imoveis - 1,
+        'alugueis_ativos': 1,
+        'proprietarios_ativos': 1,
+        'taxa_ocupacao': round(1 / total_imoveis * 100, 1),
+    }
+
+    estatisticas = get(client, headers, cenario['sem_permissao'], '/api/dashboard/stats')
+    assert estatisticas['receita_mensal'] == 0 and estatisticas['alugueis_ativos'] == 0
+
+    assert get(client, headers, admin, '/api/dashboard/stats') == DashboardService.obter_estatisticas(db, admin)
+
+
+def test_graficos_do_dashboard(client, db, headers, admin, cenario):
+    graficos = get(client, headers, cenario['leitor'], '/api/dashboard/charts', meses=3)
+    assert [p['receita'] for p in graficos['receita_por_mes']] == [0.0, 800.0, 1000.0]
+    assert graficos['receita_por_mes'][-1]['inicio'] == MES.isoformat()
+    assert graficos['receita_por_proprietario'] == [{'proprietario': cenario['visivel'].nome, 'receita': 1620.0}]
+    assert graficos['status_imoveis'][0] == {'status': 'Alugado', 'quantidade': 1}
+
+    graficos = get(client, headers, cenario['sem_permissao'], '/api/dashboard/charts', meses=3)
+    assert {p['receita'] for p in graficos['receita_por_mes']} == {0.0}
+    assert graficos['receita_por_proprietario'] == []
+
+    trimestral = get(client, headers, cenario['leitor'], '/api/dashboard/charts', meses=6, agrupamento='trimestral')
+    assert len(trimestral['receita_por_mes']) == 2
+    assert sum(p['receita'] for p in trimestral['receita_por_mes']) == 1800.0
+
+    for meses, agrupamento in ((3, 'mensal'), (12, 'trimestral')):
+        assert get(client, headers, admin, '/api/dashboard/charts', meses=meses, agrupamento=agrupamento) == \
+            GraficosService.obter_graficos(db, admin, meses, agrupamento)
+
+    resposta = client.get('/api/dashboard/charts', params={'agrupamento': 'semanal'}, headers=headers(admin))
+    assert resposta.status_code == 422
+
+
+def test_relatorio_receitas_por_periodo(client, headers, admin, cenario):
+    esperado = [
+        {'periodo': MES_ANTERIOR.strftime('%Y-%m'), 'total_receitas': 800.0, 'imoveis_ativos': 1, 'proprietarios_ativos': 1},
+        {'periodo': MES.strftime('%Y-%m'), 'total_receitas': 1000.0, 'imoveis_ativos': 1, 'proprietarios_ativos': 1},
+    ]
+    relatorio = get(client, headers, cenario['leitor'], '/api/relatorios/receitas-periodo', **PERIODO)
+    assert relatorio['dados'] == esperado
+    assert relatorio['total_geral'] == 1800.0
+
+    # Proprietário sem permissão pedido explicitamente: nada
+    relatorio = get(client, headers, cenario['leitor'], '/api/relatorios/receitas-periodo',
+                    id_proprietario=cenario['oculto'].id, **PERIODO)
+    assert relatorio['dados'] == []
+    assert get(client, headers, cenario['sem_permissao'], '/api/relatorios/receitas-periodo', **PERIODO)['dados'] == []
+
+    relatorio = get(client, headers, admin, '/api/relatorios/receitas-periodo', id_imovel=cenario['loja'].id, **PERIODO)
+    assert relatorio['dados'] == [
+        {'periodo': MES.strftime('%Y-%m'), 'total_receitas': 5000.0, 'imoveis_ativos': 1, 'proprietarios_ativos': 1}
+    ]
+
+
+def test_relatorio_receitas_por_proprietario(client, headers, admin, cenario):
+    visivel = {
+        'id_proprietario': cenario['visivel'].id, 'nome': cenario['visivel'].nome,
+        'total_receitas': 1620.0, 'imoveis': 1, 'taxa_media': 90.0
+    }
+    relatorio = get(client, headers, cenario['leitor'], '/api/relatorios/receitas-proprietario', **PERIODO)
+    assert relatorio['dados'] == [visivel]
+    assert get(client, headers, cenario['sem_permissao'], '/api/relatorios/receitas-proprietario', **PERIODO)['dados'] == []
+
+    dados = get(client, headers, admin, '/api/relatorios/receitas-proprietario', **PERIODO)['dados']
+    por_id = {d['id_proprietario']: d for d in dados}
+    assert por_id[cenario['visivel'].id] == visivel
+    assert por_id[cenario['oculto'].id]['total_receitas'] == 4500.0
+
+
+def test_relatorio_performance_imoveis(client, headers, admin, cenario):
+    relatorio = get(client, headers, cenario['leitor'], '/api/relatorios/performance-imoveis', **PERIODO)
+    assert [(d['id_imovel'], d['receita_total'], d['meses_alugado'], d['receita_media_mensal']) for d in relatorio['dados']] == [
+        (cenario['casa'].id, 1800.0, 2, 900.0)
+    ]
+    assert get(client, headers, cenario['sem_permissao'], '/api/relatorios/performance-imoveis', **PERIODO)['dados'] == []
+
+    dados = get(client, headers, admin, '/api/relatorios/performance-imoveis', **PERIODO)['dados']
+    por_id = {d['id_imovel']: d['receita_total'] for d in dados}
+    assert por_id[cenario['casa'].id] == 1800.0
+    assert por_id[cenario['loja'].id] == 5000.0
+
+
+def test_relatorio_alugueis_ativos(client, headers, admin, cenario):
+    params = {'mes': MES.month, 'ano': MES.year}
+    relatorio = get(client, headers, cenario['leitor'], '/api/relatorios/alugueis-ativos', **params)
+    assert [(d['imovel'], d['valor_total'], d['data_referencia']) for d in relatorio['dados']] == [
+        (cenario['casa'].nome, 1000.0, MES.isoformat())
+    ]
+    assert relatorio['receita_total'] == 1000.0
+    assert get(client, headers, cenario['sem_permissao'], '/api/relatorios/alugueis-ativos', **params)['dados'] == []
+
+    imoveis = {d['imovel'] for d in get(client, headers, admin, '/api/relatorios/alugueis-ativos', **params)['dados']}
+    assert {cenario['casa'].nome, cenario['loja'].nome} <= imoveis
+
+
+def test_listagem_de_imoveis_oculta_inativos_para_usuarios(client, headers, admin, novo_usuario, novo_imovel):
+    ativo = novo_imovel()
+    marcador = ativo.nome.split()[-1]
+    inativo = novo_imovel(nome=f'Inativo {marcador}', ativo=False)
+
+    assert {i['id'] for i in get(client, headers, admin, '/api/imoveis/', q=marcador)} == {ativo.id, inativo.id}
+    assert [i['id'] for i in get(client, headers, novo_usuario(), '/api/imoveis/', q=marcador)] == [ativo.id]
+
+
+@pytest.mark.parametrize('rota, consultas_da_rota', [
+    ('/api/dashboard/stats', 1),
+    ('/api/imoveis/', 1),
+])
+def test_usuario_em_cache_nas_rotas_assincronas(client, headers, novo_usuario, consultas, rota, consultas_da_rota):
+    token = headers(novo_usuario())
+
+    primeira = client.get(rota, headers=token)
+    assert primeira.status_code == 200
+    assert len(consultas) > consultas_da_rota  # Usuário e permissões carregados do banco
+
+    # Com o usuário em cache só a consulta da rota chega ao banco
+    consultas.clear()
+    segunda = client.get(rota, headers=token)
+    assert segunda.status_code == 200
+    assert len(consultas) == consultas_da_rota, consultas
+    assert segunda.json() == primeira.json()
@@ -0,0 +1,99 @@
+"""Alteração de status de pagamento em conjunto (PUT /api/alugueis/mensais/status)"""
+from datetime import date
+
+import pytest
+
+from app.models.aluguel import AluguelMensal
+from app.services.bulk_service import BulkService
+from app.services.status_aluguel_service import StatusAluguelService
+
+ID_INEXISTENTE = 2_000_000_000
+
+
+@pytest.fixture
+def cenario(db, novo_usuario, novo_imovel, permitir):
+    """
+    Editor com edição sobre `editavel`, só visualização sobre `somente_leitura` e nenhuma
+    permissão sobre `oculto`; um aluguel de cada em jan/2025, o de `editavel` em vários status
+    """
+    editor, editavel, somente_leitura, oculto = (novo_usuario() for _ in range(4))
+    permitir(editor, editavel, editar=True)
+    permitir(editor, somente_leitura)
+    imovel = novo_imovel()
+    status_por_mes = {date(2025, 1, 1): 'Não Pago', date(2025, 2, 1): 'Pago', date(2025, 3, 1): 'Atrasado'}
+    BulkService.upsert_alugueis_mensais(db, [
+        {'id_imovel': imovel.id, 'id_proprietario': editavel.id, 'data_referencia': mes, 'status': status,
+         'valor_total': 1000, 'valor_proprietario': 1000, 'taxa_administracao': 0}
+        for mes, status in status_por_mes.items()
+    ] + [
+        {'id_imovel': imovel.id, 'id_proprietario': p.id, 'data_referencia': date(2025, 1, 1),
+         'valor_total': 1000, 'valor_proprietario': 1000, 'taxa_administracao': 0}
+        for p in (somente_leitura, oculto)
+    ])
+    db.commit()
+
+    ids = {}
+    for a in db.query(AluguelMensal).filter(AluguelMensal.id_imovel == imovel.id):
+        if a.id_proprietario == editavel.id:
+            ids[a.status] = a.id
+        else:
+            ids['somente_leitura' if a.id_proprietario == somente_leitura.id else 'oculto'] = a.id
+    return {'editor': editor, 'imovel': imovel, 'ids': ids}
+
+
+def status_atuais(db, ids):
+    db.expire_all()
+    return {a.id: a.status for a in db.query(AluguelMensal).filter(AluguelMensal.id.in_(ids))}
+
+
+def alterar(client, headers, usuario, **dados):
+    resposta = client.put('/api/alugueis/mensais/status', headers=headers(usuario), json=dados)
+    assert resposta.status_code == 200, resposta.text
+    corpo = resposta.json()
+    return corpo, {r['id']: r['resultado'] for r in corpo['resultados']}
+
+
+def test_resultado_por_id(client, db, headers, cenario):
+    ids = cenario['ids']
+    enviados = [ids['Não Pago'], ids['Pago'], ids['somente_leitura'], ids['oculto'], ID_INEXISTENTE]
+    antes = status_atuais(db, enviados)
+
+    corpo, resultados = alterar(client, headers, cenario['editor'], status='Pago', ids=enviados)
+
+    assert resultados == {
+        ids['Não Pago']: 'atualizado',
+        ids['Pago']: 'inalterado',          # Já estava no status
+        ids['somente_leitura']: 'sem_permissao',
+        ids['oculto']: 'sem_permissao',
+        ID_INEXISTENTE: 'nao_encontrado',
+    }
+    assert corpo['atualizados'] == 1
+    assert corpo['totais'] == {'atualizado': 1, 'inalterado': 1, 'sem_permissao': 2, 'nao_encontrado': 1}
+    assert status_atuais(db, enviados) == {**antes, ids['Não Pago']: 'Pago'}
+
+
+def test_status_atual_restringe_a_transicao(client, db, headers, cenario):
+    ids = cenario['ids']
+    enviados = [ids['Não Pago'], ids['Atrasado']]
+
+    _, resultados = alterar(client, headers, cenario['editor'], status='Pago', status_atual='Atrasado', ids=enviados)
+
+    assert resultados == {ids['Atrasado']: 'atualizado', ids['Não Pago']: 'inalterado'}
+    assert status_atuais(db, enviados) == {ids['Atrasado']: 'Pago', ids['Não Pago']: 'Não Pago'}
+
+
+def test_filtro_omite_registros_que_o_usuario_nao_ve(client, db, headers, cenario):
+    ids = cenario['ids']
+    _, resultados = alterar(
+        client, headers, cenario['editor'], status='Pago', ano=2025, mes=1, id_imovel=cenario['imovel'].id
+    )
+    assert resultados == {ids['Não Pago']: 'atualizado', ids['somente_leitura']: 'sem_permissao'}
+
+
+def test_servico_nao_faz_commit(db, admin, cenario):
+    id_ = cenario['ids']['Não Pago']
+    resultado = StatusAluguelService.alterar_status(db, admin, status='Pago', ids=[id_])
+    assert resultado['atualizados'] == 1
+
+    db.rollback()
+    assert status_atuais(db, [id_]) == {id_: 'Não Pago'}
@@ -0,0 +1,41 @@
+"""Leitura em streaming das planilhas (LeitorPlanilhas)"""
+from io import BytesIO
+
+import pandas as pd
+from openpyxl import Workbook
+
+from app.services.xlsx_reader import LeitorPlanilhas
+
+
+def pasta_de_trabalho(linhas) -> bytes:
+    pasta = Workbook()
+    for linha in linhas:
+        pasta.active.append(linha)
+    buffer = BytesIO()
+    pasta.save(buffer)
+    return buffer.getvalue()
+
+
+def test_dataframe_em_blocos_igual_ao_read_excel(monkeypatch):
+    linhas = [['Nome', 'Valor', None, 'Nome']]
+    linhas += [[f'Imovel {i}', i * 1.5] for i in range(23)]
+    linhas[9] += [None, None, None, 'x']  # Linha mais larga que o cabeçalho
+    linhas += [[], ['fim']]  # Linha vazia intermediária
+    conteudo = pasta_de_trabalho(linhas)
+    monkeypatch.setattr(LeitorPlanilhas, 'LINHAS_POR_BLOCO', 4)
+
+    with LeitorPlanilhas(conteudo) as leitor:
+        df = leitor.dataframe(0)
+        sem_cabecalho = leitor.dataframe(0, header=None, inferir_tipos=False)
+        amostra = leitor.dataframe(0, limite=3)
+
+    pd.testing.assert_frame_equal(df, pd.read_excel(BytesIO(conteudo)))
+    assert sem_cabecalho.shape == (len(linhas), 6)
+    assert sem_cabecalho.at[0, 0] == 'Nome' and sem_cabecalho.at[9, 5] == 'x'
+    assert list(amostra['Nome']) == ['Imovel 0', 'Imovel 1', 'Imovel 2']
+
+
+def test_planilha_vazia():
+    with LeitorPlanilhas(pasta_de_trabalho([])) as leitor:
+        assert leitor.dataframe(0).empty
+        assert leitor.contar_linhas(0) == 0